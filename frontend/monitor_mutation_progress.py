@@ -1,148 +1,681 @@
 #!/usr/bin/env python3
 """
 Task 6: Mutation Testing Monitor
-Checks progress every 5 minutes until completion
+Watches the mutation test log and process until completion
 """
 
+import argparse
+import ctypes
+import selectors
+import struct
+import sys
 import time
 import os
 import subprocess
 import re
+from array import array
+from collections import deque, namedtuple
 from datetime import datetime
 
 LOG_FILE = "mutation_test.log"
 PID_FILE = "mutation_test.pid"
-CHECK_INTERVAL = 300  # 5 minutes
+REDRAW_INTERVAL = 10  # default minimum seconds between screen redraws
+CRASH_REACTION = 1.0  # crashes and process exit are shown within this many seconds
+MIN_POLL = 0.1  # fallback polling interval right after the log changed
+MAX_POLL = 1.0  # fallback polling interval once the log has been quiet (<= CRASH_REACTION)
+READ_BLOCK = 1024 * 1024  # bytes read per syscall when catching up on the log
+RECENT_LINES = 15  # log lines kept for the "Recent Activity" section
+CRASH_LINES = 10  # crash lines kept for display
+
+class LogReader:
+    """Incremental reader for LOG_FILE.
+
+    Remembers the byte offset and line count between checks and only reads
+    bytes appended since the previous call, so the cost of a check is
+    proportional to new output rather than to the size of the log (which
+    reaches gigabytes with fileLogLevel: trace). A smaller file or a
+    different inode means the log was truncated or rotated; the reader then
+    starts again from the beginning of the new file.
+    """
+
+    def __init__(self, path=LOG_FILE):
+        self.path = path
+        self.offset = 0
+        self.line_count = 0
+        self.size = 0
+        self.resets = 0
+        self._identity = None
+        self._partial = b''
+
+    @property
+    def exists(self):
+        return self._identity is not None
+
+    def _reset(self, identity):
+        if self._identity is not None:
+            self.resets += 1
+        self._identity = identity
+        self.offset = 0
+        self.line_count = 0
+        self._partial = b''
+
+    def read_new_lines(self):
+        """Yield (line_number, line) for complete lines appended since the last call"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            self._identity = None
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            identity = (st.st_dev, st.st_ino)
+            if identity != self._identity or st.st_size < self.offset:
+                self._reset(identity)
+            self.size = st.st_size
+            f.seek(self.offset)
+            while True:
+                block = f.read(READ_BLOCK)
+                if not block:
+                    break
+                self.offset += len(block)
+                block = self._partial + block
+                lines = block.split(b'\n')
+                self._partial = lines.pop()
+                for raw in lines:
+                    self.line_count += 1
+                    yield self.line_count, raw.decode('utf-8', errors='ignore').rstrip('\r')
+            self.size = max(self.size, self.offset)
+
+# Events of interesting log lines. `kind` is one of the _KINDS group names
+# below, or 'crash'; `data` holds whatever the kind's handler could parse.
+Event = namedtuple('Event', 'kind line_num line data')
+
+_CRASH = (
+    r'ChildProcessCrashedError|exited unexpectedly|ran out of memory'
+    r'|TypeError.*undefined|Cannot read properties|FATAL|Error:'
+)
+_KIND_ALTERNATIVES = (
+    r'(?P<complete>Mutation test report|All mutants tested|Mutation testing complete|Done in\b)'
+    r'|(?P<dry_run>Initial test run|Dry run)'
+    r'|(?P<progress>Mutation testing\b)'
+    r'|(?P<table>^[\s|]*(?:File|All files)\s*\|)'
+    r'|(?P<score>Mutation score)'
+    r'|(?P<counts>\d+\s*(?:/|of)\s*\d+\s+(?:mutants\s+)?tested'
+    r'|\b(?:killed|survived|timeout|timed out|no coverage|errors?)\b)'
+)
+# Every log line goes through _SCANNER, one compiled alternation of all the
+# keywords, exactly once. Most trace lines match nothing and cost no more.
+# Crashes are searched for separately on the few lines that do match, so a
+# crash is never hidden behind progress or counts on the same line. The
+# other kinds are tried left to right (earlier alternatives win ties, which
+# is why "Mutation testing complete" is listed before the progress keyword)
+# until one parses; a bare "timeout" or "error" that is not a count falls
+# through to whatever follows it.
+_SCANNER = re.compile(f'{_KIND_ALTERNATIVES}|{_CRASH}', re.IGNORECASE)
+_CRASH_SCANNER = re.compile(_CRASH, re.IGNORECASE)
+_KINDS = re.compile(_KIND_ALTERNATIVES, re.IGNORECASE)
+_PERCENT = re.compile(r'(\d+(?:\.\d+)?)%')
+_SCORE = re.compile(r'mutation score\D*?(\d+(?:\.\d+)?)', re.IGNORECASE)
+_TESTED = re.compile(r'(\d+)\s*(?:/|of)\s*(\d+)')
+_COUNT_AFTER = re.compile(
+    r'(\d+)\s+(killed|survived|timed out|timeout|no coverage|errors?)\b', re.IGNORECASE
+)
+_COUNT_BEFORE = re.compile(
+    r'\b(killed|survived|timed out|timeout|no coverage|errors?)\b\s*[:=]?\s*(\d+)', re.IGNORECASE
+)
+_COUNT_KEYS = {
+    'killed': 'killed', 'survived': 'survived', 'timed out': 'timeout', 'timeout': 'timeout',
+    'no coverage': 'no_coverage', 'error': 'error', 'errors': 'error',
+}
+# Header labels of the clear-text reporter's summary table
+_TABLE_LABELS = {
+    '# killed': 'killed', '# timeout': 'timeout', '# survived': 'survived',
+    '# no cov': 'no_coverage', '# errors': 'error',
+}
+_TABLE_COLUMNS = ('killed', 'timeout', 'survived', 'no_coverage', 'error')
+
+def _parse_counts(line):
+    """Parse "12 killed" / "Killed: 12" style mutant counts"""
+    counts = {}
+    lowered = line.lower()
+    if 'mutant' not in lowered and 'tested' not in lowered:
+        return counts
+    for number, label in _COUNT_AFTER.findall(line):
+        counts[_COUNT_KEYS[label.lower()]] = number
+    if not counts:
+        for label, number in _COUNT_BEFORE.findall(line):
+            counts[_COUNT_KEYS[label.lower()]] = number
+    return counts
+
+def _parse_tested(line, data):
+    if 'tested' in line.lower():
+        match = _TESTED.search(line)
+        if match:
+            data['tested'], data['total_mutants'] = match.groups()
+
+def _kind_data(kind, match, line):
+    """Parse what a _KINDS match announces; None if the line does not bear it out"""
+    data = {}
+    if kind == 'progress':
+        pct = _PERCENT.search(line, match.end())
+        if pct:
+            data['progress_pct'] = pct.group(1)
+        _parse_tested(line, data)
+        data.update(_parse_counts(line))
+    elif kind == 'counts':
+        _parse_tested(line, data)
+        data.update(_parse_counts(line))
+        if not data:
+            return None
+    elif kind == 'score':
+        score = _SCORE.search(line)
+        if not score:
+            return None
+        data['mutation_score'] = score.group(1)
+        if 'final' in line[:match.start()].lower():
+            data['final'] = True
+    elif kind == 'table':
+        data['cells'] = [c.strip() for c in line.strip().strip('|').split('|')]
+    return data
+
+def scan_line(line_num, line):
+    """Classify one log line; return a list of its events (at most one kind plus a crash)"""
+    if not _SCANNER.search(line):
+        return []
+    events = []
+    for match in _KINDS.finditer(line):
+        data = _kind_data(match.lastgroup, match, line)
+        if data is not None:
+            events.append(Event(match.lastgroup, line_num, line, data))
+            break
+    if _CRASH_SCANNER.search(line):
+        events.append(Event('crash', line_num, line, {}))
+    return events
+
+class ProgressState:
+    """Running state of a Stryker run, built from scan_line events.
+
+    Metrics always reflect the latest event of each kind seen anywhere in the
+    log, so nothing is missed between checks however much output a run
+    produces. Phases move waiting -> dry run -> mutation testing -> complete.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.phase = 'waiting'
+        self.completed = False
+        self.metrics = dict.fromkeys((
+            'progress_pct', 'killed', 'survived', 'timeout', 'no_coverage', 'error',
+            'mutation_score', 'tested', 'total_mutants',
+        ))
+        self.recent_lines = deque(maxlen=RECENT_LINES)
+        self.crash_lines = deque(maxlen=CRASH_LINES)
+        self.crash_count = 0
+        self.last_line = 0
+        self._table_columns = _TABLE_COLUMNS
+
+    def update(self, reader):
+        """Feed lines appended to the log; return the crash events among them"""
+        crashes = []
+        for line_num, line in reader.read_new_lines():
+            if line_num <= self.last_line:
+                self.reset()  # the log was truncated or rotated: a new run
+            self.last_line = line_num
+            self.recent_lines.append(line)
+            for event in scan_line(line_num, line):
+                self.apply(event)
+                if event.kind == 'crash':
+                    crashes.append(event)
+        return crashes
+
+    def apply(self, event):
+        kind, data = event.kind, event.data
+        if kind == 'complete' or data.get('final'):
+            self.completed = True
+            self.phase = 'complete'
+        elif kind == 'dry_run' and self.phase == 'waiting':
+            self.phase = 'dry run'
+        elif kind == 'progress' and not self.completed:
+            self.phase = 'mutation testing'
+        elif kind == 'crash':
+            self.crash_count += 1
+            self.crash_lines.append((event.line_num, event.line.strip()))
+        elif kind == 'table':
+            self._apply_table(data['cells'])
+        for key, value in data.items():
+            if key in self.metrics:
+                self.metrics[key] = value
+
+    def _apply_table(self, cells):
+        labels = [_TABLE_LABELS.get(c.lower()) for c in cells]
+        if any(labels):
+            self._table_columns = tuple(label for label in labels if label)
+            return
+        if not cells or cells[0].lower() != 'all files':
+            return
+        numbers = [c for c in cells[1:] if re.fullmatch(r'\d+(?:\.\d+)?', c)]
+        columns = self._table_columns
+        if len(numbers) > len(columns):
+            self.metrics['mutation_score'] = numbers[0]
+        self.metrics.update(zip(columns, numbers[-len(columns):]))
+
+    def snapshot(self):
+        """Progress dict in the shape show_progress / show_final_results expect"""
+        progress = dict(self.metrics)
+        progress['completed'] = self.completed
+        progress['phase'] = self.phase
+        progress['recent_lines'] = list(self.recent_lines)
+        return progress
 
 def is_running():
     """Check if mutation test process is still running"""
-    if not os.path.exists(PID_FILE):
+    pid = read_pid()
+    if pid is None:
         return False
     
+    # Check if process exists
     try:
-        with open(PID_FILE, 'r') as f:
-            pid = int(f.read().strip())
-        
-        # Check if process exists
-        try:
-            os.kill(pid, 0)
-            return True
-        except OSError:
-            return False
-    except (ValueError, FileNotFoundError):
+        os.kill(pid, 0)
+        return True
+    except OSError:
         return False
 
-def check_crashes():
-    """Check log file for crash indicators"""
-    if not os.path.exists(LOG_FILE):
-        return False, []
-    
-    crash_patterns = [
-        r"ChildProcessCrashedError",
-        r"exited unexpectedly",
-        r"TypeError.*undefined",
-        r"Cannot read properties",
-        r"FATAL",
-        r"Error:",
-    ]
-    
-    crashes = []
-    try:
-        with open(LOG_FILE, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-            for i, line in enumerate(lines[-200:], start=len(lines)-200):
-                for pattern in crash_patterns:
-                    if re.search(pattern, line, re.IGNORECASE):
-                        crashes.append((i+1, line.strip()))
-                        break
-    except Exception as e:
-        print(f"Error reading log: {e}")
-    
-    return len(crashes) > 0, crashes[-10:]  # Return last 10 crash lines
+# inotify(7) constants; the flags for inotify_init1 equal O_NONBLOCK / O_CLOEXEC on Linux
+_IN_MODIFY = 0x002
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_IN_WATCH_MASK = _IN_MODIFY | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_IN_EVENT = struct.Struct('iIII')
 
-def extract_progress():
-    """Extract progress information from log file"""
-    if not os.path.exists(LOG_FILE):
+def _inotify_watch(directory):
+    """Return a non-blocking inotify fd watching directory, or None if unavailable"""
+    if not sys.platform.startswith('linux'):
         return None
-    
     try:
-        with open(LOG_FILE, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-            lines = content.split('\n')
-            
-        progress = {
-            'completed': False,
-            'progress_pct': None,
-            'killed': None,
-            'survived': None,
-            'timeout': None,
-            'no_coverage': None,
-            'error': None,
-            'mutation_score': None,
-            'tested': None,
-            'total_mutants': None,
-            'recent_lines': lines[-15:] if len(lines) > 15 else lines
-        }
-        
-        # Check for completion
-        if any('Mutation test report' in line or 'Mutation score' in line or 
-               'All mutants tested' in line or 'Final mutation score' in line 
-               for line in lines[-500:]):
-            progress['completed'] = True
-        
-        # Extract progress percentage
-        for line in reversed(lines[-500:]):
-            match = re.search(r'(\d+\.?\d*)%', line)
-            if match and 'Mutation testing' in line:
-                progress['progress_pct'] = match.group(1)
-                break
-        
-        # Extract mutant counts
-        for line in reversed(lines[-500:]):
-            if 'Killed' in line and 'mutant' in line.lower():
-                match = re.search(r'(\d+)', line)
-                if match:
-                    progress['killed'] = match.group(1)
-            if 'Survived' in line and 'mutant' in line.lower():
-                match = re.search(r'(\d+)', line)
-                if match:
-                    progress['survived'] = match.group(1)
-            if 'Timeout' in line and 'mutant' in line.lower():
-                match = re.search(r'(\d+)', line)
-                if match:
-                    progress['timeout'] = match.group(1)
-            if 'No coverage' in line.lower() and 'mutant' in line.lower():
-                match = re.search(r'(\d+)', line)
-                if match:
-                    progress['no_coverage'] = match.group(1)
-            if 'Error' in line and 'mutant' in line.lower():
-                match = re.search(r'(\d+)', line)
-                if match:
-                    progress['error'] = match.group(1)
-        
-        # Extract mutation score
-        for line in reversed(lines[-500:]):
-            if 'Mutation score' in line.lower():
-                match = re.search(r'(\d+\.?\d*)%', line)
-                if match:
-                    progress['mutation_score'] = match.group(1)
-                    break
-        
-        # Extract tested/total
-        for line in reversed(lines[-500:]):
-            if 'tested' in line.lower() and ('/' in line or 'of' in line):
-                matches = re.findall(r'(\d+)', line)
-                if len(matches) >= 2:
-                    progress['tested'] = matches[0]
-                    progress['total_mutants'] = matches[1]
-                    break
-        
-        return progress
-    except Exception as e:
-        print(f"Error extracting progress: {e}")
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), _IN_WATCH_MASK) < 0:
+        os.close(fd)
         return None
+    return fd
+
+def read_pid():
+    """Return the PID recorded in PID_FILE, or None"""
+    try:
+        with open(PID_FILE, 'r') as f:
+            return int(f.read().strip())
+    except (ValueError, OSError):
+        return None
+
+class Watcher:
+    """Block until the log changes, the mutation test process exits, or a timeout.
+
+    Log growth is observed with inotify on the log's directory (which also
+    sees the log being created, replaced or rotated); where inotify is not
+    available the log is stat()ed with adaptive polling, backing off from
+    MIN_POLL to MAX_POLL while it stays quiet. Process exit is observed
+    through a pidfd where the platform has one, otherwise by polling
+    is_running() at MAX_POLL, so exit is noticed within a second either way.
+    """
+
+    def __init__(self, log_path=LOG_FILE):
+        self.log_path = os.path.abspath(log_path)
+        self.log_name = os.fsencode(os.path.basename(self.log_path))
+        self.selector = selectors.DefaultSelector()
+        self.inotify = _inotify_watch(os.path.dirname(self.log_path))
+        if self.inotify is not None:
+            self.selector.register(self.inotify, selectors.EVENT_READ, 'log')
+        self.pidfd = None
+        self.exited = False
+        pid = read_pid()
+        if pid is not None and hasattr(os, 'pidfd_open'):
+            try:
+                self.pidfd = os.pidfd_open(pid)
+                self.selector.register(self.pidfd, selectors.EVENT_READ, 'process')
+            except ProcessLookupError:
+                self.exited = True
+            except OSError:
+                self.pidfd = None
+        self.poll_interval = MIN_POLL
+        self._log_identity = self._stat_log()
+
+    @property
+    def mode(self):
+        log = 'inotify' if self.inotify is not None else 'polling'
+        process = 'pidfd' if self.pidfd is not None else 'polling'
+        return f"log: {log}, process: {process}"
+
+    def _stat_log(self):
+        try:
+            st = os.stat(self.log_path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _drain_inotify(self):
+        """Read all queued inotify events; return True if any concerned the log"""
+        changed = False
+        while True:
+            try:
+                data = os.read(self.inotify, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            pos = 0
+            while pos < len(data):
+                _wd, mask, _cookie, length = _IN_EVENT.unpack_from(data, pos)
+                pos += _IN_EVENT.size
+                name = data[pos:pos + length].rstrip(b'\0')
+                pos += length
+                if name == self.log_name or mask & _IN_Q_OVERFLOW:
+                    changed = True
 
-def show_progress(iteration, progress, crashed=False):
+    def process_alive(self):
+        if self.exited:
+            return False
+        if self.pidfd is None:
+            self.exited = not is_running()
+        return not self.exited
+
+    def wait(self, timeout):
+        """Sleep up to timeout seconds; return True if the log or process changed"""
+        if self.inotify is None or self.pidfd is None:
+            timeout = min(timeout, self.poll_interval if self.inotify is None else MAX_POLL)
+        timeout = max(timeout, 0)
+        if self.selector.get_map():
+            ready = self.selector.select(timeout)
+        else:
+            time.sleep(timeout)
+            ready = []
+        changed = False
+        for key, _ in ready:
+            if key.data == 'log':
+                changed = self._drain_inotify() or changed
+            else:
+                self.exited = True
+                changed = True
+        if self.inotify is None:
+            identity = self._stat_log()
+            if identity != self._log_identity:
+                self._log_identity = identity
+                self.poll_interval = MIN_POLL
+                changed = True
+            else:
+                self.poll_interval = min(self.poll_interval * 2, MAX_POLL)
+        if self.pidfd is None and not self.process_alive():
+            changed = True
+        return changed
+
+    def close(self):
+        for fd in (self.inotify, self.pidfd):
+            if fd is not None:
+                os.close(fd)
+        self.selector.close()
+
+# Sampling of the Stryker process tree. With concurrency: 8 and
+# maxTestRunnerReuse: 50 the interesting processes are the test runner
+# workers, which are replaced every 50 runs; each (pid, start time) is one
+# runner lifetime and gets its own ring of samples.
+SAMPLE_INTERVAL = 5  # seconds between /proc samples
+SAMPLE_HISTORY = 720  # samples kept per process (one hour at SAMPLE_INTERVAL)
+RETIRED_RUNNERS = 500  # exited processes remembered for the recycle summary
+LEAK_MIN_SAMPLES = 12  # samples needed before judging a trend
+LEAK_MIN_GROWTH_MB = 100  # RSS growth within one lifetime before alerting
+LEAK_MB_PER_MIN = 5.0  # least-squares RSS slope before alerting
+LEAK_STEADY_FRACTION = 0.7  # share of RSS changes that must be increases
+FD_LEAK_MIN_GROWTH = 100  # open-FD growth within one lifetime before alerting
+_CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+_PAGE_KB = os.sysconf('SC_PAGE_SIZE') // 1024 if hasattr(os, 'sysconf') else 4
+
+class SampleRing:
+    """Fixed-capacity ring of (time, CPU seconds, RSS KiB, open FDs) samples.
+
+    Stored as four flat typed arrays rather than per-sample objects, so an
+    hour of history for one process costs about 23 KiB.
+    """
+
+    __slots__ = ('capacity', 'count', '_next', 'times', 'cpu', 'rss', 'fds')
+
+    def __init__(self, capacity=SAMPLE_HISTORY):
+        self.capacity = capacity
+        self.count = 0
+        self._next = 0
+        self.times = array('d', [0.0]) * capacity
+        self.cpu = array('d', [0.0]) * capacity
+        self.rss = array('q', [0]) * capacity
+        self.fds = array('q', [0]) * capacity
+
+    def __len__(self):
+        return self.count
+
+    def append(self, t, cpu, rss, fds):
+        i = self._next
+        self.times[i], self.cpu[i], self.rss[i], self.fds[i] = t, cpu, rss, fds
+        self._next = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def series(self, name):
+        """Return one column in chronological order"""
+        column = getattr(self, name)
+        start = (self._next - self.count) % self.capacity
+        if start + self.count <= self.capacity:
+            return column[start:start + self.count]
+        return column[start:] + column[:self._next]
+
+    def last(self, name, back=1):
+        return getattr(self, name)[(self._next - back) % self.capacity]
+
+def _slope(xs, ys):
+    """Least-squares slope of ys against xs"""
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var = sum((x - mean_x) ** 2 for x in xs)
+    if not var:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+
+def _steady_growth(values):
+    """True if most of the changes between consecutive samples are increases"""
+    changes = [b - a for a, b in zip(values, values[1:]) if b != a]
+    return bool(changes) and sum(1 for c in changes if c > 0) >= LEAK_STEADY_FRACTION * len(changes)
+
+class ProcessSampler:
+    """Samples CPU time, RSS and open FDs of every process under the Stryker PID.
+
+    Each sample reads /proc/<pid>/stat (one small read per process) and
+    lists /proc/<pid>/fd; children are found through
+    /proc/<pid>/task/<tid>/children, or a scan of /proc when the kernel lacks
+    that file. Nothing is sampled where /proc does not exist.
+    """
+
+    def __init__(self, root_pid):
+        self.root_pid = root_pid
+        self.available = root_pid is not None and os.path.isdir('/proc/self')
+        self.rings = {}  # (pid, start ticks) -> SampleRing
+        self.labels = {}  # (pid, start ticks) -> short command description
+        self.retired = deque(maxlen=RETIRED_RUNNERS)  # (label, lifetime s, first/peak/last RSS KiB)
+        self.alerts = {}  # (pid, start ticks) -> message
+        self.last_sample = None
+        self._children_file = True
+
+    def _children(self, pid):
+        try:
+            tids = os.listdir(f'/proc/{pid}/task')
+        except OSError:
+            return []
+        children = []
+        for tid in tids:
+            try:
+                with open(f'/proc/{pid}/task/{tid}/children', 'rb') as f:
+                    children.extend(int(c) for c in f.read().split())
+            except FileNotFoundError:
+                if tid == str(pid):
+                    self._children_file = False
+                    return None
+            except OSError:
+                pass
+        return children
+
+    def _parent_map(self):
+        parents = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                stat = self._read_stat(int(entry))
+                if stat:
+                    parents.setdefault(stat[0], []).append(int(entry))
+        return parents
+
+    def tree(self):
+        """PIDs of the root process and all of its descendants"""
+        pids = [self.root_pid]
+        parents = None if self._children_file else self._parent_map()
+        i = 0
+        while i < len(pids):
+            children = None
+            if parents is None:
+                children = self._children(pids[i])
+                if children is None:
+                    parents = self._parent_map()
+            if parents is not None:
+                children = parents.get(pids[i], [])
+            pids.extend(children)
+            i += 1
+        return pids
+
+    @staticmethod
+    def _read_stat(pid):
+        """Return (ppid, start ticks, CPU seconds, RSS KiB) from /proc/<pid>/stat"""
+        try:
+            with open(f'/proc/{pid}/stat', 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        # Fields after the parenthesised command name, which may contain spaces
+        fields = data[data.rindex(b')') + 2:].split()
+        cpu = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+        return int(fields[1]), int(fields[19]), cpu, int(fields[21]) * _PAGE_KB
+
+    @staticmethod
+    def _label(pid):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                args = f.read().decode('utf-8', errors='ignore').split('\0')
+        except OSError:
+            return '?'
+        scripts = [os.path.basename(a) for a in args if a.endswith(('.js', '.cjs', '.mjs'))]
+        return scripts[0] if scripts else os.path.basename(args[0]) or '?'
+
+    def sample(self, now=None):
+        """Take one sample of the whole tree and re-evaluate leak alerts"""
+        now = time.monotonic() if now is None else now
+        self.last_sample = now
+        seen = set()
+        for pid in self.tree():
+            stat = self._read_stat(pid)
+            if not stat:
+                continue
+            _ppid, start, cpu, rss = stat
+            try:
+                fds = len(os.listdir(f'/proc/{pid}/fd'))
+            except OSError:
+                fds = -1
+            key = (pid, start)
+            seen.add(key)
+            if key not in self.rings:
+                self.rings[key] = SampleRing()
+                self.labels[key] = self._label(pid)
+            self.rings[key].append(now, cpu, rss, fds)
+        for key in [k for k in self.rings if k not in seen]:
+            self._retire(key)
+        self._check_leaks()
+
+    def _retire(self, key):
+        ring = self.rings.pop(key)
+        rss = ring.series('rss')
+        times = ring.series('times')
+        self.retired.append((self.labels.pop(key), times[-1] - times[0], rss[0], max(rss), rss[-1]))
+        self.alerts.pop(key, None)
+
+    def _check_leaks(self):
+        for key, ring in self.rings.items():
+            self.alerts.pop(key, None)
+            if len(ring) < LEAK_MIN_SAMPLES:
+                continue
+            times = ring.series('times')
+            minutes = [(t - times[0]) / 60 for t in times]
+            rss_mb = [kb / 1024 for kb in ring.series('rss')]
+            growth = rss_mb[-1] - min(rss_mb)
+            slope = _slope(minutes, rss_mb)
+            if (growth >= LEAK_MIN_GROWTH_MB and slope >= LEAK_MB_PER_MIN
+                    and _steady_growth(rss_mb)):
+                self.alerts[key] = (
+                    f"PID {key[0]} ({self.labels[key]}): RSS +{growth:.0f} MB "
+                    f"at {slope:.1f} MB/min over {minutes[-1]:.0f} min"
+                )
+                continue
+            fds = ring.series('fds')
+            if fds[0] >= 0 and fds[-1] - min(fds) >= FD_LEAK_MIN_GROWTH and _steady_growth(fds):
+                self.alerts[key] = (
+                    f"PID {key[0]} ({self.labels[key]}): open FDs {min(fds)} -> {fds[-1]} "
+                    f"over {minutes[-1]:.0f} min"
+                )
+
+    def processes(self):
+        """Rows (pid, label, CPU %, RSS MB, FDs, age s) for live processes, largest RSS first"""
+        rows = []
+        for key, ring in self.rings.items():
+            cpu_pct = None
+            if len(ring) >= 2:
+                elapsed = ring.last('times') - ring.last('times', 2)
+                if elapsed > 0:
+                    cpu_pct = (ring.last('cpu') - ring.last('cpu', 2)) / elapsed * 100
+            age = ring.last('times') - ring.series('times')[0]
+            rows.append((key[0], self.labels[key], cpu_pct, ring.last('rss') / 1024,
+                         ring.last('fds'), age))
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows
+
+    def recycle_summary(self):
+        """Averages over exited processes: count, lifetime s, peak RSS MB, RSS growth MB"""
+        if not self.retired:
+            return None
+        n = len(self.retired)
+        lifetime = sum(r[1] for r in self.retired) / n
+        peak = sum(r[3] for r in self.retired) / n / 1024
+        growth = sum(r[4] - r[2] for r in self.retired) / n / 1024
+        return n, lifetime, peak, growth
+
+def show_resources(sampler, limit=10):
+    """Display the sampled process tree and any leak alerts"""
+    if not sampler or not sampler.available or sampler.last_sample is None:
+        return
+    rows = sampler.processes()
+    print()
+    total_rss = sum(row[3] for row in rows)
+    total_cpu = sum(row[2] or 0 for row in rows)
+    print(f"--- Processes ({len(rows)} live, {total_rss:.0f} MB RSS, {total_cpu:.0f}% CPU) ---")
+    for pid, label, cpu_pct, rss_mb, fds, age in rows[:limit]:
+        cpu = f"{cpu_pct:5.1f}%" if cpu_pct is not None else "    -"
+        fd_text = str(fds) if fds >= 0 else "-"
+        print(f"  {pid:>7} {cpu} {rss_mb:8.1f} MB {fd_text:>5} fds {age / 60:6.1f} min  {label}")
+    summary = sampler.recycle_summary()
+    if summary:
+        n, lifetime, peak, growth = summary
+        print(f"  Exited: {n}, avg lifetime {lifetime / 60:.1f} min, "
+              f"avg peak RSS {peak:.0f} MB, avg RSS growth {growth:+.0f} MB")
+    for message in sampler.alerts.values():
+        print(f"🔴 Possible leak: {message}")
+
+def show_progress(iteration, progress, reader, crashed=False, sampler=None):
     """Display progress information"""
     print("=" * 60)
     print(f"Task 6: Mutation Testing Monitor")
@@ -163,6 +696,7 @@ def show_progress(iteration, progress, crashed=False):
         print()
     
     print("--- Current Status ---")
+    print(f"Phase: {progress['phase']}")
     
     if progress['progress_pct']:
         print(f"Progress: {progress['progress_pct']}%")
@@ -185,6 +719,9 @@ def show_progress(iteration, progress, crashed=False):
         print()
         print(f"Mutation Score: {progress['mutation_score']}%")
     
+    print()
+    show_resources(sampler)
+    
     print()
     print("--- Recent Activity (last 10 lines) ---")
     for line in progress['recent_lines'][-10:]:
@@ -192,15 +729,14 @@ def show_progress(iteration, progress, crashed=False):
             print(f"  {line}")
     
     # Log file stats
-    if os.path.exists(LOG_FILE):
-        size = os.path.getsize(LOG_FILE)
-        size_mb = size / (1024 * 1024)
-        with open(LOG_FILE, 'r', encoding='utf-8', errors='ignore') as f:
-            line_count = sum(1 for _ in f)
+    if reader.exists:
+        size_mb = reader.size / (1024 * 1024)
         print()
-        print(f"Log file: {LOG_FILE} ({size_mb:.2f} MB, {line_count} lines)")
+        print(f"Log file: {LOG_FILE} ({size_mb:.2f} MB, {reader.line_count} lines)")
+        if reader.resets:
+            print(f"Log was truncated or rotated {reader.resets} time(s) since monitoring started")
 
-def show_final_results(progress):
+def show_final_results(progress, sampler=None):
     """Display final results"""
     print()
     print("=" * 60)
@@ -236,6 +772,14 @@ def show_final_results(progress):
         print()
         print(f"Total Mutants Tested: {progress['tested']} / {progress['total_mutants']}")
     
+    summary = sampler.recycle_summary() if sampler else None
+    if summary:
+        n, lifetime, peak, growth = summary
+        print()
+        print(f"--- Processes ({n} exited) ---")
+        print(f"Avg lifetime {lifetime / 60:.1f} min, avg peak RSS {peak:.0f} MB, "
+              f"avg RSS growth {growth:+.0f} MB")
+    
     print()
     print("=== Report Location ===")
     if os.path.exists("reports/mutation/html"):
@@ -243,67 +787,88 @@ def show_final_results(progress):
     else:
         print("Report directory not found yet")
 
-def main():
+def main(redraw_interval=REDRAW_INTERVAL):
     """Main monitoring loop"""
     iteration = 0
     crash_detected = False
+    reader = LogReader()
+    state = ProgressState()
+    watcher = Watcher()
+    sampler = ProcessSampler(read_pid())
     
     print("=" * 60)
     print("Task 6: Mutation Testing Monitor")
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 60)
     print()
-    print("Monitoring mutation tests every 5 minutes...")
+    print(f"Watching {LOG_FILE} ({watcher.mode})...")
     print("Press Ctrl+C to stop monitoring (tests will continue running)")
     print()
     
-    while True:
-        iteration += 1
-        
-        # Check if process is running
-        if not is_running():
-            print()
-            print("⚠️  Process check: Mutation test process not found")
+    last_draw = None
+    unshown_crash = False
+    try:
+        while True:
+            # Read the log before acting on process exit so its last lines are included
+            running = watcher.process_alive()
+            now = time.monotonic()
+            # A last sample after exit moves the remaining runners into the recycle summary
+            if sampler.available and (not running or sampler.last_sample is None
+                                      or now - sampler.last_sample >= SAMPLE_INTERVAL):
+                sampler.sample(now)
+            new_crashes = state.update(reader)
+            progress = state.snapshot() if reader.exists else None
+            if not running:
+                print()
+                print("⚠️  Process check: Mutation test process not found")
+                
+                # Check if completed or crashed
+                if progress and progress['completed']:
+                    print("✅ Mutation tests completed normally")
+                    show_final_results(progress, sampler)
+                    break
+                else:
+                    print("❌ Mutation tests may have crashed or stopped unexpectedly")
+                    crash_detected = True
+                    if state.crash_lines:
+                        print()
+                        print("Crash indicators found:")
+                        for line_num, line in state.crash_lines:
+                            print(f"  Line {line_num}: {line}")
+                    show_final_results(progress, sampler)
+                    break
             
-            # Check if completed or crashed
-            progress = extract_progress()
-            if progress and progress['completed']:
-                print("✅ Mutation tests completed normally")
-                show_final_results(progress)
-                break
-            else:
-                print("❌ Mutation tests may have crashed or stopped unexpectedly")
+            if new_crashes:
                 crash_detected = True
-                crashed, crash_lines = check_crashes()
-                if crashed:
+                unshown_crash = True
+            
+            # Redraw at most every redraw_interval seconds, but show crashes within a second
+            since_draw = None if last_draw is None else now - last_draw
+            if (since_draw is None or since_draw >= redraw_interval
+                    or (unshown_crash and since_draw >= CRASH_REACTION)):
+                iteration += 1
+                os.system('clear' if os.name != 'nt' else 'cls')
+                show_progress(iteration, progress, reader, unshown_crash, sampler)
+                
+                if crash_detected:
                     print()
-                    print("Crash indicators found:")
-                    for line_num, line in crash_lines:
-                        print(f"  Line {line_num}: {line}")
-                show_final_results(progress)
-                break
-        
-        # Extract and show progress
-        progress = extract_progress()
-        crashed, crash_lines = check_crashes()
-        
-        if crashed:
-            crash_detected = True
-        
-        # Clear screen and show progress
-        os.system('clear' if os.name != 'nt' else 'cls')
-        show_progress(iteration, progress, crashed)
-        
-        if crash_detected:
-            print()
-            print("⚠️  Crash detected - monitoring will continue but mutation tests may have issues")
-        
-        print()
-        print("--- Next check in 5 minutes ---")
-        print("Press Ctrl+C to stop monitoring (tests will continue running)")
-        
-        # Wait 5 minutes
-        time.sleep(CHECK_INTERVAL)
+                    print("⚠️  Crash detected - monitoring will continue but mutation tests may have issues")
+                
+                print()
+                print(f"--- Redrawing on log activity, at most every {redraw_interval:g}s ---")
+                print("Press Ctrl+C to stop monitoring (tests will continue running)")
+                last_draw = now
+                unshown_crash = False
+                since_draw = 0
+            
+            # Sleep until the log changes, the process exits, or a redraw or sample is due
+            deadline = CRASH_REACTION if unshown_crash else redraw_interval
+            timeout = deadline - since_draw
+            if sampler.available:
+                timeout = min(timeout, sampler.last_sample + SAMPLE_INTERVAL - time.monotonic())
+            watcher.wait(timeout)
+    finally:
+        watcher.close()
     
     # Final status
     print()
@@ -313,8 +878,12 @@ def main():
         print("✅ Monitoring complete - mutation tests finished")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch a Stryker mutation test run")
+    parser.add_argument("--redraw-interval", type=float, default=REDRAW_INTERVAL,
+                        help=f"minimum seconds between redraws (default: {REDRAW_INTERVAL})")
+    args = parser.parse_args()
     try:
-        main()
+        main(args.redraw_interval)
     except KeyboardInterrupt:
         print()
         print()
@@ -0,0 +1,395 @@
+"""Unit tests for monitor_mutation_progress (log scanning and the running progress state)."""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import monitor_mutation_progress
+from monitor_mutation_progress import (
+    LogReader,
+    ProcessSampler,
+    ProgressState,
+    SampleRing,
+    Watcher,
+    scan_line,
+)
+
+# Trimmed from a Stryker run with the clear-text reporter
+RUN_LOG = '''\
+12:00:00 (4242) INFO ProjectReader Found 12 of 300 file(s) to be mutated.
+12:00:02 (4242) INFO Instrumenter Instrumented 12 source file(s) with 640 mutant(s)
+12:00:03 (4242) DEBUG Jest config loaded from jsconfig.json
+12:00:03 (4242) INFO DryRunExecutor Starting initial test run (jest test runner).
+12:00:40 (4242) INFO DryRunExecutor Initial test run succeeded. Ran 512 tests in 37 seconds.
+12:00:41 (4242) INFO MutationTestExecutor Mutation testing 0% (elapsed: <1m, remaining: n/a) \
+0/640 tested (0 survived, 0 timed out)
+12:03:41 (4242) INFO ProgressReporter Mutation testing 45% (elapsed: ~3m, remaining: ~4m) \
+288/640 tested (41 survived, 2 timed out)
+12:07:49 (4242) INFO ProgressReporter Mutation testing 100% (elapsed: ~7m, remaining: ~0m) \
+640/640 tested (95 survived, 4 timed out)
+-----------|---------|----------|-----------|------------|----------|----------|
+File       | % score | # killed | # timeout | # survived | # no cov | # errors |
+-----------|---------|----------|-----------|------------|----------|----------|
+All files  |   83.59 |      531 |         4 |         95 |       10 |        0 |
+-----------|---------|----------|-----------|------------|----------|----------|
+12:07:50 (4242) INFO MutationTestReportHelper Final mutation score of 83.59 is greater than \
+or equal to break threshold 50
+12:07:50 (4242) INFO MutationTestExecutor Done in 7 minutes 10 seconds.
+'''
+
+CRASH_LINES = [
+    '12:01:00 (4242) ERROR Stryker ChildProcessCrashedError: Child process exited unexpectedly',
+    '12:01:00 (4242) ERROR Stryker An error occurred: Cannot read properties of undefined',
+    'WARN Timeout: child process exited unexpectedly',
+    '3 killed; FATAL heap out of memory',
+]
+
+
+class _Lines:
+    """Stands in for LogReader: yields the given lines once, numbered from `start`"""
+
+    def __init__(self, text, start=1):
+        self.lines = text.splitlines()
+        self.start = start
+
+    def read_new_lines(self):
+        yield from enumerate(self.lines, self.start)
+        self.lines = []
+
+
+def _kinds(line):
+    return [event.kind for event in scan_line(1, line)]
+
+
+class TestScanLine(unittest.TestCase):
+    def test_plain_lines_have_no_events(self):
+        self.assertEqual(scan_line(1, '12:00:03 (4242) DEBUG Jest config loaded'), [])
+        self.assertEqual(scan_line(1, ''), [])
+
+    def test_crash_lines(self):
+        for line in CRASH_LINES:
+            with self.subTest(line=line):
+                self.assertEqual(_kinds(line), ['crash'])
+
+    def test_crash_on_a_progress_line_keeps_the_progress(self):
+        line = 'Mutation testing 45% (elapsed: ~3m) 288/640 tested (41 survived) Error: boom'
+        progress, crash = scan_line(7, line)
+        self.assertEqual(progress.kind, 'progress')
+        self.assertEqual(
+            progress.data,
+            {'progress_pct': '45', 'tested': '288', 'total_mutants': '640', 'survived': '41'},
+        )
+        self.assertEqual((crash.kind, crash.line_num, crash.line), ('crash', 7, line))
+
+    def test_keyword_that_is_not_a_count_falls_through(self):
+        events = scan_line(1, 'timeout reached; mutation score: 81.2')
+        self.assertEqual(
+            [(e.kind, e.data) for e in events], [('score', {'mutation_score': '81.2'})]
+        )
+
+    def test_counts(self):
+        (event,) = scan_line(1, 'Mutants tested: Killed: 12, Survived: 3')
+        self.assertEqual((event.kind, event.data), ('counts', {'killed': '12', 'survived': '3'}))
+        self.assertEqual(scan_line(1, 'request killed by the proxy'), [])
+
+
+class TestProgressState(unittest.TestCase):
+    def test_recorded_run(self):
+        state = ProgressState()
+        self.assertEqual(state.update(_Lines(RUN_LOG)), [])
+        progress = state.snapshot()
+        self.assertTrue(progress['completed'])
+        self.assertEqual(progress['phase'], 'complete')
+        self.assertEqual(progress['progress_pct'], '100')
+        self.assertEqual((progress['tested'], progress['total_mutants']), ('640', '640'))
+        self.assertEqual(progress['mutation_score'], '83.59')
+        self.assertEqual(
+            [progress[k] for k in ('killed', 'timeout', 'survived', 'no_coverage', 'error')],
+            ['531', '4', '95', '10', '0'],
+        )
+        self.assertEqual(state.crash_count, 0)
+        self.assertIn('Done in 7 minutes', progress['recent_lines'][-1])
+
+    def test_phases(self):
+        state = ProgressState()
+        lines = RUN_LOG.splitlines()
+        state.update(_Lines('\n'.join(lines[:5])))
+        self.assertEqual(state.phase, 'dry run')
+        state.update(_Lines('\n'.join(lines[5:7]), start=6))
+        self.assertEqual(state.phase, 'mutation testing')
+        self.assertEqual(state.metrics['progress_pct'], '45')
+        self.assertFalse(state.completed)
+
+    def test_crashes_are_reported_with_the_progress_on_their_line(self):
+        state = ProgressState()
+        lines = [*CRASH_LINES, 'Mutation testing 50% 320/640 tested Error: boom']
+        crashes = state.update(_Lines('\n'.join(lines)))
+        self.assertEqual([c.line_num for c in crashes], [1, 2, 3, 4, 5])
+        self.assertEqual(state.crash_count, 5)
+        self.assertEqual(state.crash_lines[-1], (5, lines[-1]))
+        self.assertEqual(state.metrics['progress_pct'], '50')
+        self.assertEqual(state.phase, 'mutation testing')
+
+    def test_restarted_line_numbers_start_a_new_run(self):
+        state = ProgressState()
+        state.update(_Lines(RUN_LOG))
+        state.update(_Lines('Mutation testing 10% 64/640 tested'))
+        self.assertFalse(state.completed)
+        self.assertEqual(state.metrics['progress_pct'], '10')
+        self.assertIsNone(state.metrics['mutation_score'])
+
+
+
+class TestLogReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'mutation_test.log')
+        self.reader = LogReader(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _append(self, text):
+        with open(self.path, 'a', newline='') as f:
+            f.write(text)
+
+    def _read(self):
+        return list(self.reader.read_new_lines())
+
+    def test_missing_log(self):
+        self.assertEqual(self._read(), [])
+        self.assertFalse(self.reader.exists)
+
+    def test_reads_only_appended_complete_lines(self):
+        self._append('one\ntwo\r\n')
+        self.assertEqual(self._read(), [(1, 'one'), (2, 'two')])
+        self.assertTrue(self.reader.exists)
+        self.assertEqual(self._read(), [])
+        self._append('three\npar')
+        self.assertEqual(self._read(), [(3, 'three')])
+        self._append('tial\n')
+        self.assertEqual(self._read(), [(4, 'partial')])
+        self.assertEqual(self.reader.offset, os.path.getsize(self.path))
+
+    def test_lines_split_across_read_blocks(self):
+        lines = [f'line {i} ' + 'x' * (i % 7) for i in range(50)]
+        self._append(''.join(line + '\n' for line in lines[:20]) + 'line 20')
+        with mock.patch.object(monitor_mutation_progress, 'READ_BLOCK', 5):
+            read = self._read()
+            self._append(lines[20][len('line 20'):] + '\n')
+            self._append(''.join(line + '\n' for line in lines[21:]))
+            read += self._read()
+        self.assertEqual(read, list(enumerate(lines, 1)))
+        self.assertEqual(self.reader.resets, 0)
+
+    def test_truncation_starts_over(self):
+        self._append('one\ntwo\nthree\n')
+        self._read()
+        with open(self.path, 'w') as f:
+            f.write('new\n')
+        self.assertEqual(self._read(), [(1, 'new')])
+        self.assertEqual(self.reader.resets, 1)
+
+    def test_rotation_starts_over(self):
+        self._append('old\n')
+        self._read()
+        os.rename(self.path, self.path + '.1')
+        self._append('first\nsecond\n')
+        self.assertEqual(self._read(), [(1, 'first'), (2, 'second')])
+        self.assertEqual(self.reader.resets, 1)
+        self._append('third\n')
+        self.assertEqual(self._read(), [(3, 'third')])
+
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log = os.path.join(self.tmp.name, 'mutation_test.log')
+        pid_file = os.path.join(self.tmp.name, 'mutation_test.pid')
+        patcher = mock.patch.object(monitor_mutation_progress, 'PID_FILE', pid_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+        self.addCleanup(self._stop_process)
+        with open(pid_file, 'w') as f:
+            f.write(f'{self.process.pid}\n')
+        with open(self.log, 'w') as f:
+            f.write('start\n')
+
+    def _stop_process(self):
+        self.process.kill()
+        self.process.wait()
+
+    def _watcher(self):
+        watcher = Watcher(self.log)
+        self.addCleanup(watcher.close)
+        return watcher
+
+    def _append_later(self, delay=0.2):
+        def append():
+            with open(self.log, 'a') as f:
+                f.write('more\n')
+        timer = threading.Timer(delay, append)
+        timer.start()
+        self.addCleanup(timer.join)
+
+    def _timed_wait(self, watcher, timeout):
+        started = time.monotonic()
+        changed = watcher.wait(timeout)
+        return changed, time.monotonic() - started
+
+    def test_log_growth_wakes_before_the_timeout(self):
+        watcher = self._watcher()
+        if watcher.mode != 'log: inotify, process: pidfd':
+            self.skipTest(f'needs inotify and pidfd ({watcher.mode})')
+        self._append_later()
+        changed, elapsed = self._timed_wait(watcher, 10)
+        self.assertTrue(changed)
+        self.assertLess(elapsed, 5)
+        self.assertTrue(watcher.process_alive())
+
+    def test_process_exit_wakes_before_the_timeout(self):
+        watcher = self._watcher()
+        if watcher.pidfd is None:
+            self.skipTest(f'needs pidfd ({watcher.mode})')
+        timer = threading.Timer(0.2, self.process.kill)
+        timer.start()
+        self.addCleanup(timer.join)
+        changed, elapsed = self._timed_wait(watcher, 10)
+        self.assertTrue(changed)
+        self.assertLess(elapsed, 5)
+        self.assertFalse(watcher.process_alive())
+
+    def test_polling_fallback(self):
+        with mock.patch.object(monitor_mutation_progress, '_inotify_watch', return_value=None):
+            with mock.patch.object(os, 'pidfd_open', side_effect=PermissionError, create=True):
+                watcher = self._watcher()
+        self.assertEqual(watcher.mode, 'log: polling, process: polling')
+        changed, elapsed = self._timed_wait(watcher, 10)
+        self.assertFalse(changed)
+        self.assertLessEqual(elapsed, monitor_mutation_progress.MAX_POLL + 0.5)
+        self.assertGreater(watcher.poll_interval, monitor_mutation_progress.MIN_POLL)
+        self._append_later(0)
+        deadline = time.monotonic() + 5
+        while not watcher.wait(10):
+            self.assertLess(time.monotonic(), deadline)
+        self.assertEqual(watcher.poll_interval, monitor_mutation_progress.MIN_POLL)
+        self._stop_process()
+        changed, elapsed = self._timed_wait(watcher, 10)
+        self.assertTrue(changed)
+        self.assertLessEqual(elapsed, monitor_mutation_progress.MAX_POLL + 0.5)
+        self.assertFalse(watcher.process_alive())
+
+
+
+# /proc/<pid>/stat of a jest worker; the command name holds a space and a ')'
+PROC_STAT = (
+    b'4321 (node (jest) w) S 4300 4300 4200 0 -1 4194560 52000 0 12 0 250 50 0 0 20 0 11 0 '
+    b'987654 1073741824 25600 18446744073709551615 1 1 0 0 0 0 0 4096 17920 0 0 0 17 3 0 0\n'
+)
+
+
+class TestSampleRing(unittest.TestCase):
+    def test_wraps_around_and_keeps_the_newest(self):
+        ring = SampleRing(capacity=4)
+        ring.append(1.0, 0.5, 100, 10)
+        ring.append(2.0, 0.7, 110, 11)
+        self.assertEqual(len(ring), 2)
+        self.assertEqual(list(ring.series('rss')), [100, 110])
+        for t in range(3, 7):
+            ring.append(float(t), t / 10, 100 + 10 * t, 10 + t)
+        self.assertEqual(len(ring), 4)
+        self.assertEqual(list(ring.series('times')), [3.0, 4.0, 5.0, 6.0])
+        self.assertEqual(list(ring.series('fds')), [13, 14, 15, 16])
+        self.assertEqual((ring.last('rss'), ring.last('rss', 2)), (160, 150))
+
+
+class TestProcessSampler(unittest.TestCase):
+    def test_read_stat_fixture(self):
+        with mock.patch('builtins.open', mock.mock_open(read_data=PROC_STAT)):
+            stat = ProcessSampler._read_stat(4321)
+        self.assertEqual(
+            stat,
+            (4300, 987654, 300 / monitor_mutation_progress._CLK_TCK,
+             25600 * monitor_mutation_progress._PAGE_KB),
+        )
+
+    def test_read_stat_of_a_missing_process(self):
+        with mock.patch('builtins.open', side_effect=FileNotFoundError):
+            self.assertIsNone(ProcessSampler._read_stat(4321))
+
+    @unittest.skipUnless(os.path.isdir('/proc/self'), 'needs /proc')
+    def test_read_stat_of_this_process(self):
+        ppid, _start, cpu, rss = ProcessSampler._read_stat(os.getpid())
+        self.assertEqual(ppid, os.getppid())
+        self.assertGreater(cpu, 0)
+        self.assertGreater(rss, 0)
+
+    def _sampler(self, stats):
+        """A sampler whose process tree is the pids in `stats`, read from it instead of /proc"""
+        sampler = ProcessSampler(1)
+        sampler.tree = lambda: list(stats)
+        sampler._read_stat = stats.get
+        sampler._label = lambda pid: 'jest-worker.js'
+        return sampler
+
+    def _run(self, rss_mb_series, fds=None, interval=10):
+        stats = {}
+        sampler = self._sampler(stats)
+        for i, rss_mb in enumerate(rss_mb_series):
+            stats[42] = (1, 5000, i * 0.1, int(rss_mb * 1024))
+            open_fds = ['x'] * (fds[i] if fds else 20)
+            with mock.patch.object(os, 'listdir', return_value=open_fds):
+                sampler.sample(now=i * interval)
+        return sampler
+
+    def test_steady_rss_growth_is_a_leak(self):
+        sampler = self._run([200 + 20 * i for i in range(20)])
+        self.assertEqual(
+            list(sampler.alerts.values()),
+            ['PID 42 (jest-worker.js): RSS +380 MB at 120.0 MB/min over 3 min'],
+        )
+
+    def test_flat_or_jumpy_rss_is_not_a_leak(self):
+        few = monitor_mutation_progress.LEAK_MIN_SAMPLES - 1
+        cases = {
+            'flat with noise': [300 + (i % 2) * 5 for i in range(30)],
+            'one jump': [200 + (i % 2) for i in range(15)] + [700 + (i % 2) for i in range(15)],
+            'too few samples': [200 + 50 * i for i in range(few)],
+        }
+        for name, series in cases.items():
+            with self.subTest(name):
+                self.assertEqual(self._run(series).alerts, {})
+
+    def test_open_fd_growth_is_a_leak(self):
+        sampler = self._run([300] * 20, fds=[20 + 10 * i for i in range(20)])
+        self.assertEqual(
+            list(sampler.alerts.values()),
+            ['PID 42 (jest-worker.js): open FDs 20 -> 210 over 3 min'],
+        )
+
+    def test_exited_and_recycled_processes_are_retired(self):
+        stats = {42: (1, 5000, 1.0, 100 * 1024)}
+        sampler = self._sampler(stats)
+        with mock.patch.object(os, 'listdir', return_value=[]):
+            sampler.sample(now=0)
+            stats[42] = (1, 5000, 2.0, 300 * 1024)
+            sampler.sample(now=60)
+            stats[42] = (1, 9000, 0.1, 120 * 1024)  # same pid, new runner
+            sampler.sample(now=70)
+        self.assertEqual(list(sampler.rings), [(42, 9000)])
+        self.assertEqual(sampler.recycle_summary(), (1, 60.0, 300.0, 200.0))
+        (row,) = sampler.processes()
+        self.assertEqual(row[:2], (42, 'jest-worker.js'))
+        self.assertEqual(row[3], 120.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Move old settled executions out of workflows.db into the compressed archive (execution_archive.py).
+
+Rows whose completed_at is older than --older-than-days (status completed by default) are
+archived in batches of up to --batch-size rows. A batch is read and appended to the archive
+(compress, fsync, then index commit) without holding any lock on the live file; only then does
+one short write transaction, BEGIN IMMEDIATE ... COMMIT, delete those rowids, each only if every
+column still equals the archived copy. A row that changed in between stays live (the next run
+archives it again; the newest archived copy wins). A --pause-ms sleep between batches lets the
+Java writer in. The inspector reads archived IDs transparently, so
+`inspect_executions_db.py <id>` keeps working after a row has moved.
+
+Deleted rows leave free pages inside the file; the size on disk only drops after VACUUM (or
+incremental_vacuum when auto_vacuum is enabled).
+
+Usage:
+  python3 scripts/archive_executions.py --older-than-days 30 --dry-run
+  python3 scripts/archive_executions.py --older-than-days 30 --batch-size 200 --pause-ms 50
+  python3 scripts/archive_executions.py --older-than-days 90 --status failed --codec lzma
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence
+
+from execution_archive import CODECS, ExecutionArchive, archive_path
+from execution_rollup import SETTLED_STATUSES
+from inspect_executions_db import (
+    DEFAULT_BUSY_TIMEOUT_MS,
+    REPORT_FORMATS,
+    TimestampStorage,
+    detect_timestamp_storage,
+    emit_records,
+    has_executions_table,
+    open_readonly,
+    parse_timestamp,
+    quote_ident,
+    resolve_db,
+    with_busy_retry,
+)
+
+DEFAULT_OLDER_THAN_DAYS = 30
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_PAUSE_MS = 50
+
+
+@dataclass
+class ArchiveRun:
+    executions: int = 0
+    batches: int = 0
+    state_bytes: int = 0
+    archived_bytes: int = 0
+    locked_seconds: float = 0.0  # time spent inside write transactions
+    changed: int = 0  # archived rows left live because they changed before the delete
+
+
+def cutoff_bound(storage: TimestampStorage, now: float, days: float) -> object:
+    """completed_at values below this (in the column's own representation) are archived."""
+    iso = datetime.fromtimestamp(now - days * 86400, timezone.utc).isoformat(timespec="seconds")
+    return storage.bound(iso[:19])
+
+
+def _candidates_sql(statuses: Sequence[str]) -> str:
+    return (
+        f"status IN ({','.join('?' * len(statuses))}) "
+        "AND completed_at IS NOT NULL AND completed_at < ?"
+    )
+
+
+def summarize_candidates(
+    conn: sqlite3.Connection, cutoff: object, statuses: Sequence[str]
+) -> tuple[int, int]:
+    """(executions, bytes of state) that an archive run would move."""
+    count, size = with_busy_retry(
+        lambda: conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length(state)), 0) FROM executions "
+            f"WHERE {_candidates_sql(statuses)}",
+            [*statuses, cutoff],
+        ).fetchone()
+    )
+    return count, size
+
+
+def archive_executions(
+    conn: sqlite3.Connection,
+    archive: ExecutionArchive,
+    cutoff: object,
+    statuses: Sequence[str] = ("completed",),
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    pause: float = DEFAULT_PAUSE_MS / 1000,
+    max_batches: int | None = None,
+) -> ArchiveRun:
+    """
+    Archive and delete matching rows batch by batch (see module docstring).
+
+    ``conn`` must be a writable connection in autocommit mode (``isolation_level=None``) so
+    each batch's BEGIN IMMEDIATE / COMMIT is explicit.
+    """
+    run = ArchiveRun()
+    conn.row_factory = sqlite3.Row
+    select = (
+        "SELECT rowid AS archive_rowid, * FROM executions "
+        f"WHERE {_candidates_sql(statuses)} AND rowid > ? ORDER BY rowid LIMIT {int(batch_size)}"
+    )
+    last_rowid = 0
+    while max_batches is None or run.batches < max_batches:
+        rows = with_busy_retry(
+            lambda: conn.execute(select, [*statuses, cutoff, last_rowid]).fetchall()
+        )
+        if not rows:
+            break
+        columns = [k for k in rows[0].keys() if k != "archive_rowid"]
+        records = [{k: row[k] for k in columns} for row in rows]
+        run.archived_bytes += archive.append(records)
+        delete = "DELETE FROM executions WHERE rowid = ? AND " + " AND ".join(
+            f"{quote_ident(c)} IS ?" for c in columns
+        )
+        started = time.monotonic()
+        with_busy_retry(lambda: conn.execute("BEGIN IMMEDIATE"))
+        try:
+            deleted = [
+                row
+                for row in rows
+                if conn.execute(delete, [row["archive_rowid"], *(row[c] for c in columns)]).rowcount
+            ]
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        run.locked_seconds += time.monotonic() - started
+        run.batches += 1
+        run.executions += len(deleted)
+        run.changed += len(rows) - len(deleted)
+        run.state_bytes += sum(len(r["state"] or "") for r in deleted)
+        last_rowid = rows[-1]["archive_rowid"]
+        if len(rows) < batch_size:
+            break
+        time.sleep(pause)
+    return run
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Archive old settled executions into compressed segments and delete them "
+        "from the live table."
+    )
+    parser.add_argument(
+        "--older-than-days",
+        type=float,
+        default=DEFAULT_OLDER_THAN_DAYS,
+        help=f"Archive rows completed before now minus this (default {DEFAULT_OLDER_THAN_DAYS})",
+    )
+    parser.add_argument(
+        "--status",
+        action="append",
+        choices=sorted(SETTLED_STATUSES),
+        help="Repeatable (default: completed)",
+    )
+    parser.add_argument("--now", help="Reference time as ISO timestamp (default: current UTC)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--pause-ms",
+        type=int,
+        default=DEFAULT_PAUSE_MS,
+        help="Sleep between batches so the application can take the write lock",
+    )
+    parser.add_argument("--max-batches", type=int, help="Stop after this many batches")
+    parser.add_argument("--codec", choices=tuple(CODECS), default="zlib")
+    parser.add_argument(
+        "--archive-dir", type=Path, help="Archive directory (default: <database>.archive)"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only count what would be archived (read-only)"
+    )
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="table")
+    parser.add_argument("--busy-timeout-ms", type=int, default=DEFAULT_BUSY_TIMEOUT_MS)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    try:
+        now = parse_timestamp(args.now) if args.now else time.time()
+    except ValueError as e:
+        print(f"Invalid --now: {e}", file=sys.stderr)
+        return 2
+    db = resolve_db()
+    if db is None:
+        return 1
+    statuses = tuple(args.status or ("completed",))
+    path = args.archive_dir or archive_path(db)
+    if args.dry_run:
+        with contextlib.closing(open_readonly(db, busy_timeout_ms=args.busy_timeout_ms)) as conn:
+            if not has_executions_table(conn):
+                return 1
+            cutoff = cutoff_bound(detect_timestamp_storage(conn), now, args.older_than_days)
+            count, size = summarize_candidates(conn, cutoff, statuses)
+        emit_records(
+            [
+                {
+                    "statuses": ",".join(statuses),
+                    "cutoff": cutoff,
+                    "executions": count,
+                    "state_mb": round(size / 2**20, 2),
+                }
+            ],
+            args.format,
+            sys.stdout,
+            f"Would archive from {db} into {path}",
+        )
+        return 0
+    conn = sqlite3.connect(db, timeout=args.busy_timeout_ms / 1000, isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA busy_timeout = {int(args.busy_timeout_ms)}")
+        if not has_executions_table(conn):
+            return 1
+        cutoff = cutoff_bound(detect_timestamp_storage(conn), now, args.older_than_days)
+        started = time.monotonic()
+        with ExecutionArchive(path, codec=args.codec) as archive:
+            run = archive_executions(
+                conn,
+                archive,
+                cutoff,
+                statuses,
+                batch_size=max(1, args.batch_size),
+                pause=max(0, args.pause_ms) / 1000,
+                max_batches=args.max_batches,
+            )
+            stats = archive.stats()
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        conn.close()
+    emit_records(
+        [
+            {
+                "executions": run.executions,
+                "batches": run.batches,
+                "state_mb": round(run.state_bytes / 2**20, 2),
+                "archived_mb": round(run.archived_bytes / 2**20, 2),
+                "locked_s": round(run.locked_seconds, 3),
+                "changed": run.changed,
+                "archive_total": stats.executions,
+                "archive_ratio": round(stats.ratio, 2) if stats.ratio else None,
+            }
+        ],
+        args.format,
+        sys.stdout,
+        f"Archived from {db} into {path}",
+    )
+    print(
+        f"Done in {time.monotonic() - started:.2f}s. {free_pages * page_size / 2**20:.1f} MB of "
+        "free pages in the live file; VACUUM (or incremental_vacuum) returns them to the OS.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
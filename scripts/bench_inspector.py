@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Time every inspect_executions_db.py query path on a synthetic (or given) database and compare
+the timings with a stored baseline. The exit status is 1 when any path got slower than the
+baseline by more than --tolerance. Use it to check that an inspector change still scales.
+
+Each case is one inspector command line, run in-process with its output sent to /dev/null.
+The timing is the best of --repeat runs. Cases marked ``warm`` run once untimed first, so
+they measure the incremental path of a sidecar that already exists. Sidecars (rollup, log
+index) are written to a temporary directory and never next to the database.
+
+The baseline file keeps one set of timings per dataset label ("synthetic executions=100000
+... seed=1", or the file name and row count for --db). Dataset sizes therefore do not mix,
+and a single file can hold baselines for 10^4 through 10^7 rows. Timings are only comparable
+on the machine that recorded them. A run with no baseline for its dataset only reports the
+timings; --update-baseline records them. A case counts as regressed only if it is slower by
+both --tolerance and --min-delta, so cases of a few milliseconds do not fail on timer noise.
+
+Usage:
+  python3 scripts/bench_inspector.py --executions 1e5 --update-baseline
+  python3 scripts/bench_inspector.py --executions 1e5 --tolerance 0.2
+  python3 scripts/bench_inspector.py --executions 1e6 --work-dir /var/tmp/bench --case stream
+  python3 scripts/bench_inspector.py --db /path/to/copy-of-prod.db --repeat 1 --format jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator, Mapping, Sequence
+
+import inspect_executions_db
+from inspect_executions_db import REPORT_FORMATS, emit_records, open_readonly
+from synth_workflows_db import SynthConfig, generate, parse_row_count
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "bench_inspector_baseline.json"
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA = 0.05
+LOOKUP_IDS = 1000
+BASELINE_VERSION = 1
+
+
+class BenchError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class BenchCase:
+    """One inspector invocation. ``argv`` may use {ids_file} and {sidecars} placeholders."""
+
+    name: str
+    argv: tuple[str, ...]
+    warm: bool = False
+
+
+CASES: tuple[BenchCase, ...] = (
+    BenchCase("list-recent", ()),
+    BenchCase("lookup-ids", ("--ids-file", "{ids_file}")),
+    BenchCase("stream-jsonl", ("--stream", "--format", "jsonl")),
+    BenchCase("stream-failed-csv", ("--stream", "--format", "csv", "--status", "failed")),
+    BenchCase("path-error-logs", ("--path", "logs[?level=ERROR].message", "--format", "jsonl")),
+    BenchCase("scan", ("scan", "--reduce", "node-status", "--reduce", "log-levels")),
+    BenchCase("latency", ("latency", "--by", "workflow", "--by", "status", "--by", "owner")),
+    BenchCase("nodes", ("nodes",)),
+    BenchCase("concurrency", ("concurrency", "--window", "hour")),
+    BenchCase("stuck", ("stuck", "--older-than", "600")),
+    BenchCase(
+        "rollup-build",
+        ("rollup", "--rollup-db", "{sidecars}/rollup.db", "--rebuild", "--by", "workflow,status"),
+    ),
+    BenchCase(
+        "rollup", ("rollup", "--rollup-db", "{sidecars}/rollup.db", "--by", "workflow"), warm=True
+    ),
+    BenchCase(
+        "search-build", ("search", "--index-db", "{sidecars}/logs.db", "--rebuild", "timeout")
+    ),
+    BenchCase(
+        "search",
+        ("search", "--index-db", "{sidecars}/logs.db", '"connection refused" OR rate*'),
+        warm=True,
+    ),
+    BenchCase("failures", ("failures",)),
+    BenchCase("sizes", ("sizes", "--depth", "3")),
+)
+
+
+def select_cases(prefixes: Sequence[str], cases: Sequence[BenchCase] = CASES) -> list[BenchCase]:
+    if not prefixes:
+        return list(cases)
+    return [c for c in cases if any(c.name.startswith(p) for p in prefixes)]
+
+
+def write_lookup_ids(db: Path, dest: Path, count: int = LOOKUP_IDS) -> int:
+    """Every n-th execution ID plus a few that do not exist, so both lookup paths run."""
+    with contextlib.closing(open_readonly(db)) as conn:
+        total = conn.execute("SELECT COUNT(*) FROM executions").fetchone()[0]
+        step = max(1, total // max(1, count))
+        ids = [
+            r[0]
+            for r in conn.execute(
+                "SELECT id FROM executions WHERE rowid % ? = 0 LIMIT ?", (step, count)
+            )
+        ]
+    ids += [f"missing-{i}" for i in range(10)]
+    dest.write_text("\n".join(ids) + "\n")
+    return len(ids)
+
+
+def run_case(
+    case: BenchCase,
+    db: Path,
+    context: Mapping[str, str],
+    repeat: int = DEFAULT_REPEAT,
+    timer: Callable[[], float] = time.perf_counter,
+) -> float:
+    """Best wall time of ``repeat`` runs; BenchError if the inspector exits non-zero."""
+    argv = [arg.format(**context) for arg in case.argv] + ["--db", str(db)]
+    best = float("inf")
+    with open(os.devnull, "w") as sink:
+        for attempt in range(max(1, repeat) + int(case.warm)):
+            started = timer()
+            with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+                code = inspect_executions_db.main(list(argv))
+            elapsed = timer() - started
+            if code:
+                raise BenchError(f"{case.name}: inspector exited {code} for {' '.join(argv)}")
+            if attempt or not case.warm:
+                best = min(best, elapsed)
+    return best
+
+
+def run_suite(
+    db: Path,
+    cases: Sequence[BenchCase],
+    repeat: int = DEFAULT_REPEAT,
+    progress: Callable[[str, float], None] | None = None,
+) -> dict[str, float]:
+    with tempfile.TemporaryDirectory(prefix="bench-inspector-") as tmp:
+        context = {"ids_file": str(Path(tmp) / "ids.txt"), "sidecars": tmp}
+        write_lookup_ids(db, Path(context["ids_file"]))
+        results = {}
+        for case in cases:
+            results[case.name] = run_case(case, db, context, repeat)
+            if progress is not None:
+                progress(case.name, results[case.name])
+    return results
+
+
+def load_baseline(path: Path) -> dict[str, object]:
+    if not path.is_file():
+        return {"version": BASELINE_VERSION, "datasets": {}}
+    data = json.loads(path.read_text())
+    if data.get("version") != BASELINE_VERSION:
+        raise BenchError(f"{path}: unsupported baseline version {data.get('version')!r}")
+    return data
+
+
+def save_baseline(
+    path: Path, data: dict[str, object], dataset: str, results: Mapping[str, float]
+) -> None:
+    """Record ``results`` under ``dataset``; cases not run this time keep their old timings."""
+    datasets = data.setdefault("datasets", {})
+    entry = datasets.setdefault(dataset, {"seconds": {}})
+    entry["seconds"] = {**entry.get("seconds", {}), **{k: round(v, 4) for k, v in results.items()}}
+    entry.update(
+        recorded_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        python=platform.python_version(),
+        sqlite=sqlite3.sqlite_version,
+        machine=platform.machine(),
+    )
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def compare(
+    results: Mapping[str, float],
+    baseline: Mapping[str, float],
+    tolerance: float = DEFAULT_TOLERANCE,
+    min_delta: float = DEFAULT_MIN_DELTA,
+) -> list[dict[str, object]]:
+    records = []
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if before is None:
+            verdict, ratio = "new", None
+        else:
+            ratio = seconds / before if before else None
+            if seconds > before * (1 + tolerance) and seconds - before > min_delta:
+                verdict = "REGRESSED"
+            elif seconds < before / (1 + tolerance) and before - seconds > min_delta:
+                verdict = "faster"
+            else:
+                verdict = "ok"
+        records.append(
+            {
+                "case": name,
+                "seconds": round(seconds, 4),
+                "baseline": before,
+                "ratio": None if ratio is None else round(ratio, 2),
+                "verdict": verdict,
+            }
+        )
+    return records
+
+
+@contextlib.contextmanager
+def bench_database(args: argparse.Namespace) -> Iterator[tuple[Path, str]]:
+    """(database path, dataset label): --db as given, else a cached or temporary synthetic DB."""
+    if args.db is not None:
+        with contextlib.closing(open_readonly(args.db)) as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM executions").fetchone()[0]
+        yield args.db, f"{args.db.name} executions={rows}"
+        return
+    config = SynthConfig(
+        executions=args.executions, users=args.users, workflows=args.workflows, seed=args.seed
+    )
+    with contextlib.ExitStack() as stack:
+        if args.work_dir is None:
+            directory = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="bench-db-")))
+        else:
+            directory = args.work_dir
+            directory.mkdir(parents=True, exist_ok=True)
+        db = directory / (
+            f"synthetic-{config.executions}-{config.users}-{config.workflows}-{config.seed}.db"
+        )
+        if db.is_file():
+            print(f"Reusing {db}", file=sys.stderr)
+        else:
+            print(f"Generating {config.executions} execution(s) into {db} ...", file=sys.stderr)
+            summary = generate(db, config, workers=args.workers)
+            print(f"  done in {summary.seconds:.1f}s", file=sys.stderr)
+        yield db, config.label
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    defaults = SynthConfig()
+    parser = argparse.ArgumentParser(
+        description="Benchmark the inspector's query paths against a stored baseline."
+    )
+    data = parser.add_argument_group("dataset")
+    data.add_argument("--db", type=Path, help="Benchmark this database instead of a synthetic one")
+    data.add_argument("--executions", type=parse_row_count, default=defaults.executions)
+    data.add_argument("--users", type=parse_row_count, default=defaults.users)
+    data.add_argument("--workflows", type=parse_row_count, default=defaults.workflows)
+    data.add_argument("--seed", type=int, default=defaults.seed)
+    data.add_argument(
+        "--work-dir", type=Path, help="Keep generated databases here and reuse them across runs"
+    )
+    data.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Generator processes"
+    )
+    parser.add_argument(
+        "--case", action="append", default=[], metavar="PREFIX", help="Repeatable; default all"
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per case")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="Record this run as the baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Allowed slowdown as a fraction (default {DEFAULT_TOLERANCE})",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=DEFAULT_MIN_DELTA,
+        help=f"Ignore slowdowns smaller than this many seconds (default {DEFAULT_MIN_DELTA})",
+    )
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="table")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    cases = select_cases(args.case)
+    if args.tolerance < 0 or args.min_delta < 0:
+        parser.error("--tolerance and --min-delta must not be negative")
+    if not cases:
+        parser.error(f"no case matches {args.case}; cases: {', '.join(c.name for c in CASES)}")
+    if args.db is not None and not args.db.is_file():
+        print(f"Database file not found: {args.db}", file=sys.stderr)
+        return 1
+    try:
+        baseline = load_baseline(args.baseline)
+        with bench_database(args) as (db, dataset):
+            results = run_suite(
+                db,
+                cases,
+                args.repeat,
+                lambda name, s: print(f"  {name}: {s:.3f}s", file=sys.stderr),
+            )
+    except BenchError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    previous = baseline["datasets"].get(dataset, {}).get("seconds", {})
+    records = compare(results, previous, args.tolerance, args.min_delta)
+    emit_records(records, args.format, sys.stdout, f"Inspector timings on {dataset}")
+    regressed = [r["case"] for r in records if r["verdict"] == "REGRESSED"]
+    if args.update_baseline:
+        save_baseline(args.baseline, baseline, dataset, results)
+        print(f"Baseline for {dataset!r} written to {args.baseline}.", file=sys.stderr)
+        return 0
+    if not previous:
+        print(
+            f"No baseline for {dataset!r} in {args.baseline}; run with --update-baseline.",
+            file=sys.stderr,
+        )
+    elif regressed:
+        print(
+            f"Regressed beyond {args.tolerance:.0%} (and {args.min_delta}s): "
+            + ", ".join(regressed),
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Compare the binary state codec (state_codec.py) with JSON and zlib-compressed JSON on real
+executions.state rows: total size, and encode/decode time for the same decoded documents.
+
+Every sampled row is first checked for an exact round trip (decode(encode(state)) == state).
+The exit status is 1 if any row fails, so the benchmark doubles as a compatibility check
+against a production copy. Timings are the best of --repeat passes over the whole sample.
+Throughput is in MB of stored JSON per second, so codecs compare on the same work. The codec
+here is pure Python, so its speed is a lower bound for a JVM implementation. Size is what
+it measures.
+
+Usage:
+  python3 scripts/bench_state_codec.py
+  python3 scripts/bench_state_codec.py --limit 20000 --workflow wf-1 --repeat 5 --format jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import sqlite3
+import sys
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Iterable, Sequence
+
+from inspect_executions_db import (
+    DEFAULT_BUSY_TIMEOUT_MS,
+    REPORT_FORMATS,
+    ExecutionFilters,
+    emit_records,
+    has_executions_table,
+    iter_rows_in_rowid_order,
+    open_readonly,
+    resolve_db,
+)
+from state_codec import decode_state, encode_state
+
+DEFAULT_LIMIT = 5000
+DEFAULT_REPEAT = 3
+
+
+def _json_encode(state: object) -> bytes:
+    return json.dumps(state, separators=(",", ":")).encode()
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    encode: Callable[[object], bytes]
+    decode: Callable[[bytes], object]
+
+
+CODECS = (
+    Codec("json", _json_encode, json.loads),
+    Codec(
+        "json+zlib",
+        lambda s: zlib.compress(_json_encode(s), 6),
+        lambda b: json.loads(zlib.decompress(b)),
+    ),
+    Codec("binary", encode_state, decode_state),
+    Codec(
+        "binary+zlib",
+        lambda s: zlib.compress(encode_state(s), 6),
+        lambda b: decode_state(zlib.decompress(b)),
+    ),
+)
+
+
+@dataclass(frozen=True)
+class CodecResult:
+    name: str
+    rows: int
+    bytes: int
+    encode_seconds: float
+    decode_seconds: float
+
+
+def load_sample(
+    conn: sqlite3.Connection, filters: ExecutionFilters | None = None, limit: int = DEFAULT_LIMIT
+) -> tuple[list[tuple[str, object]], int, int]:
+    """(execution id, decoded state) pairs in rowid order, stored bytes, undecodable rows."""
+    sample: list[tuple[str, object]] = []
+    stored = undecodable = 0
+    for row in iter_rows_in_rowid_order(conn, filters, include_state=True):
+        if len(sample) >= limit:
+            break
+        text = row["state"] or ""
+        try:
+            state = json.loads(text)
+        except ValueError:
+            undecodable += 1
+            continue
+        stored += len(text.encode())
+        sample.append((row["id"], state))
+    return sample, stored, undecodable
+
+
+def verify_round_trip(sample: Iterable[tuple[str, object]]) -> list[str]:
+    """IDs whose state does not survive encode_state/decode_state unchanged."""
+    return [
+        execution_id
+        for execution_id, state in sample
+        if decode_state(encode_state(state)) != state
+    ]
+
+
+def benchmark(
+    states: Sequence[object],
+    codecs: Sequence[Codec] = CODECS,
+    repeat: int = DEFAULT_REPEAT,
+    timer: Callable[[], float] = time.perf_counter,
+) -> list[CodecResult]:
+    results = []
+    for codec in codecs:
+        encode, decode = codec.encode, codec.decode
+        best_encode = best_decode = float("inf")
+        blobs: list[bytes] = []
+        for _ in range(max(1, repeat)):
+            started = timer()
+            blobs = [encode(s) for s in states]
+            best_encode = min(best_encode, timer() - started)
+            started = timer()
+            for blob in blobs:
+                decode(blob)
+            best_decode = min(best_decode, timer() - started)
+        results.append(
+            CodecResult(
+                codec.name, len(states), sum(len(b) for b in blobs), best_encode, best_decode
+            )
+        )
+    return results
+
+
+def bench_records(results: Sequence[CodecResult], stored: int) -> list[dict[str, object]]:
+    baseline = next((r.bytes for r in results if r.name == "json"), None) or 1
+    mb = stored / 2**20
+    return [
+        {
+            "codec": r.name,
+            "rows": r.rows,
+            "size_mb": round(r.bytes / 2**20, 2),
+            "vs_json": round(r.bytes / baseline, 3),
+            "avg_bytes": round(r.bytes / r.rows) if r.rows else 0,
+            "encode_s": round(r.encode_seconds, 3),
+            "decode_s": round(r.decode_seconds, 3),
+            "encode_mb_s": round(mb / r.encode_seconds, 1) if r.encode_seconds else None,
+            "decode_mb_s": round(mb / r.decode_seconds, 1) if r.decode_seconds else None,
+        }
+        for r in results
+    ]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the binary state codec against JSON and zlib-JSON."
+    )
+    parser.add_argument(
+        "--limit", type=int, default=DEFAULT_LIMIT, help="Rows sampled, oldest rowid first"
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed passes")
+    parser.add_argument("--status", action="append", default=[], help="Repeatable")
+    parser.add_argument("--workflow", action="append", default=[], help="Repeatable workflow_id")
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="table")
+    parser.add_argument("--busy-timeout-ms", type=int, default=DEFAULT_BUSY_TIMEOUT_MS)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    db = resolve_db()
+    if db is None:
+        return 1
+    filters = ExecutionFilters(statuses=tuple(args.status), workflow_ids=tuple(args.workflow))
+    with contextlib.closing(open_readonly(db, busy_timeout_ms=args.busy_timeout_ms)) as conn:
+        if not has_executions_table(conn):
+            return 1
+        sample, stored, undecodable = load_sample(conn, filters, max(1, args.limit))
+    if not sample:
+        print("No decodable executions.state rows matched.", file=sys.stderr)
+        return 1
+    mismatched = verify_round_trip(sample)
+    results = benchmark([state for _, state in sample], repeat=args.repeat)
+    emit_records(
+        bench_records(results, stored),
+        args.format,
+        sys.stdout,
+        f"State codecs on {len(sample)} row(s) from {db} ({stored / 2**20:.1f} MB stored JSON)",
+    )
+    print(
+        f"Round trip: {len(sample) - len(mismatched)}/{len(sample)} exact"
+        f"{'; mismatched: ' + ', '.join(mismatched[:10]) if mismatched else ''}; "
+        f"{undecodable} undecodable row(s) skipped.",
+        file=sys.stderr,
+    )
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,195 @@
+"""
+In-flight execution counts over time, from (started, completed) pairs in one streaming pass.
+
+Rows arrive ordered by start time. Completion times wait in a min-heap, and before each start
+every completion at or before it is popped, so ends sort against starts (end first on ties)
+without sorting the whole event list. Memory is proportional to the peak concurrency, not the
+number of rows. Between events the current level is held for a known time, which gives
+time-weighted concurrency percentiles. Starts also feed arrivals-per-minute counts and
+inter-arrival statistics.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Sequence
+
+WINDOW_SECONDS = {"all": None, "hour": 3600.0, "day": 86400.0}
+CONCURRENCY_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def weighted_quantile(weights: Counter, q: float) -> float | None:
+    """Smallest key whose cumulative weight reaches ``q`` of the total."""
+    total = sum(weights.values())
+    if total <= 0:
+        return None
+    seen = 0.0
+    for key in sorted(weights):
+        seen += weights[key]
+        if seen >= q * total:
+            return key
+    return max(weights)
+
+
+@dataclass
+class WindowStats:
+    """Concurrency within one time window; ``level_seconds`` maps level -> seconds held."""
+
+    start: float | None
+    level_seconds: Counter = field(default_factory=Counter)
+    arrivals: int = 0
+    peak: int = 0
+    peak_at: float | None = None
+    busiest_minute: int = 0
+
+    @property
+    def seconds(self) -> float:
+        return sum(self.level_seconds.values())
+
+    @property
+    def mean(self) -> float | None:
+        seconds = self.seconds
+        if not seconds:
+            return None
+        return sum(level * s for level, s in self.level_seconds.items()) / seconds
+
+    def quantile(self, q: float) -> float | None:
+        return weighted_quantile(self.level_seconds, q)
+
+    def seconds_above(self, capacity: int) -> float:
+        return sum(s for level, s in self.level_seconds.items() if level > capacity)
+
+
+class ConcurrencySweep:
+    """
+    Sweep line over executions fed in start order (see module docstring).
+
+    Open-ended executions (no completion) stay in flight until ``finish``. Starts that arrive
+    earlier than the previous one are clamped to it and counted in ``out_of_order``.
+    """
+
+    def __init__(self, window: str = "all") -> None:
+        if window not in WINDOW_SECONDS:
+            raise ValueError(f"Unknown window: {window}")
+        self.window_seconds = WINDOW_SECONDS[window]
+        self.windows: dict[float | None, WindowStats] = {}
+        self.level = 0
+        self.cursor: float | None = None
+        self.open_ended = 0
+        self.out_of_order = 0
+        self.executions = 0
+        self.busy_seconds = 0.0  # sum of completed durations (Little's law check)
+        self.completed = 0
+        self.latest = -math.inf
+        self._ends: list[float] = []
+        self._minute: int | None = None
+        self._minute_count = 0
+        self.minute_arrivals: Counter = Counter()  # arrivals in a minute -> number of minutes
+        self._gap_count = 0
+        self._gap_mean = 0.0
+        self._gap_m2 = 0.0
+
+    def _window(self, t: float) -> WindowStats:
+        key = None if self.window_seconds is None else t - t % self.window_seconds
+        stats = self.windows.get(key)
+        if stats is None:
+            stats = self.windows[key] = WindowStats(key)
+        return stats
+
+    def _hold(self, until: float) -> None:
+        """Credit the current level for the time from the cursor up to ``until``."""
+        t = self.cursor
+        if t is None or until <= t:
+            return
+        size = self.window_seconds
+        while t < until:
+            boundary = until if size is None else min(until, t - t % size + size)
+            self._window(t).level_seconds[self.level] += boundary - t
+            t = boundary
+        self.cursor = until
+
+    def _drain(self, until: float) -> None:
+        ends = self._ends
+        while ends and ends[0] <= until:
+            end = heapq.heappop(ends)
+            self._hold(end)
+            self.level -= 1
+        self._hold(until)
+
+    def add(self, started: float, completed: float | None) -> None:
+        if self.cursor is not None and started < self.cursor:
+            self.out_of_order += 1
+            started = self.cursor
+        if self.cursor is not None:
+            self._gap(started - self.cursor)
+        self._drain(started)
+        self.cursor = started
+        self.level += 1
+        self.executions += 1
+        window = self._window(started)
+        window.arrivals += 1
+        if self.level > window.peak:
+            window.peak, window.peak_at = self.level, started
+        self._arrive(started, window)
+        if completed is None or math.isnan(completed):
+            self.open_ended += 1
+            heapq.heappush(self._ends, math.inf)
+        else:
+            completed = max(completed, started)
+            self.busy_seconds += completed - started
+            self.completed += 1
+            self.latest = max(self.latest, completed)
+            heapq.heappush(self._ends, completed)
+        self.latest = max(self.latest, started)
+
+    def _gap(self, gap: float) -> None:
+        # Welford's running mean/variance of inter-arrival gaps.
+        self._gap_count += 1
+        delta = gap - self._gap_mean
+        self._gap_mean += delta / self._gap_count
+        self._gap_m2 += delta * (gap - self._gap_mean)
+
+    def _arrive(self, started: float, window: WindowStats) -> None:
+        minute = int(started // 60)
+        if minute != self._minute:
+            if self._minute is not None:
+                self.minute_arrivals[self._minute_count] += 1
+                self.minute_arrivals[0] += minute - self._minute - 1
+            self._minute, self._minute_count = minute, 0
+        self._minute_count += 1
+        window.busiest_minute = max(window.busiest_minute, self._minute_count)
+
+    def finish(self, horizon: float | None = None) -> None:
+        """Close the sweep at ``horizon`` (default: latest timestamp seen)."""
+        if self.cursor is None:
+            return
+        horizon = self.latest if horizon is None else max(horizon, self.cursor)
+        self._drain(horizon)
+        if self._minute is not None:
+            self.minute_arrivals[self._minute_count] += 1
+            self._minute = None
+
+    @property
+    def interarrival_cv(self) -> float | None:
+        """Coefficient of variation of gaps between starts (1 for Poisson arrivals)."""
+        if self._gap_count < 2 or self._gap_mean <= 0:
+            return None
+        return math.sqrt(self._gap_m2 / (self._gap_count - 1)) / self._gap_mean
+
+    def overall(self) -> WindowStats:
+        """All windows merged into one."""
+        merged = WindowStats(None)
+        for stats in self.windows.values():
+            merged.level_seconds.update(stats.level_seconds)
+            merged.arrivals += stats.arrivals
+            if stats.peak > merged.peak:
+                merged.peak, merged.peak_at = stats.peak, stats.peak_at
+            merged.busiest_minute = max(merged.busiest_minute, stats.busiest_minute)
+        return merged
+
+    def arrival_rate_quantiles(
+        self, quantiles: Sequence[float] = CONCURRENCY_QUANTILES
+    ) -> dict[float, float | None]:
+        return {q: weighted_quantile(self.minute_arrivals, q) for q in quantiles}
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Online maintenance for workflows.db: space/fragmentation stats, throttled backups, and
+chunked incremental vacuum. Everything is safe to run while the Spring Boot app is writing.
+
+stats   page and freelist counts, plus per-table page usage and out-of-order leaf pages from
+        the dbstat virtual table when SQLite was built with it.
+backup  sqlite3 backup API, --pages-per-step pages at a time with a sleep after every step.
+        The sleep caps throughput at --max-mb-per-s. Each step holds only a short read lock.
+        A commit by another connection restarts the copy; restarts are counted, and the backup
+        fails after --max-restarts of them or once --max-seconds has passed. The copy is
+        written to <dest>.partial and renamed once it passes quick_check.
+vacuum  PRAGMA incremental_vacuum(N) in separate short write transactions with a pause
+        between them, stopping when the freelist is empty, --max-seconds has passed, or the
+        --window (local HH:MM-HH:MM) closes. This needs auto_vacuum=INCREMENTAL. Switching
+        an existing file to it takes one full VACUUM, which --enable-incremental runs
+        (opt-in, since it holds the write lock for the whole rebuild).
+
+Usage:
+  python3 scripts/db_maintenance.py stats
+  python3 scripts/db_maintenance.py backup /backups/ --max-mb-per-s 20 --keep 7
+  python3 scripts/db_maintenance.py vacuum --window 02:00-04:00 --pages-per-step 512
+  python3 scripts/db_maintenance.py vacuum --enable-incremental   # once, in a quiet period
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from datetime import time as clock_time
+from pathlib import Path
+from typing import Callable
+
+from inspect_executions_db import (
+    DEFAULT_BUSY_TIMEOUT_MS,
+    REPORT_FORMATS,
+    BackupError,
+    BackupLimit,
+    emit_records,
+    is_busy_error,
+    open_readonly,
+    resolve_db,
+    with_busy_retry,
+)
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+DEFAULT_PAGES_PER_STEP = 256
+DEFAULT_MAX_MB_PER_S = 50.0
+DEFAULT_MAX_RESTARTS = 20
+DEFAULT_VACUUM_PAUSE_MS = 200
+
+
+@dataclass(frozen=True)
+class SpaceStats:
+    page_size: int
+    page_count: int
+    freelist_count: int
+    auto_vacuum: str
+    journal_mode: str
+
+    @property
+    def free_share(self) -> float:
+        return self.freelist_count / self.page_count if self.page_count else 0.0
+
+    def record(self) -> dict[str, object]:
+        mb = self.page_size / 2**20
+        return {
+            "page_size": self.page_size,
+            "pages": self.page_count,
+            "size_mb": round(self.page_count * mb, 2),
+            "free_pages": self.freelist_count,
+            "free_mb": round(self.freelist_count * mb, 2),
+            "free_share": round(self.free_share, 4),
+            "auto_vacuum": self.auto_vacuum,
+            "journal_mode": self.journal_mode,
+        }
+
+
+def space_stats(conn: sqlite3.Connection) -> SpaceStats:
+    def pragma(name: str) -> object:
+        return with_busy_retry(lambda: conn.execute(f"PRAGMA {name}").fetchone()[0])
+
+    return SpaceStats(
+        page_size=int(pragma("page_size")),
+        page_count=int(pragma("page_count")),
+        freelist_count=int(pragma("freelist_count")),
+        auto_vacuum=AUTO_VACUUM_MODES.get(int(pragma("auto_vacuum")), "unknown"),
+        journal_mode=str(pragma("journal_mode")).lower(),
+    )
+
+
+def table_fragmentation(conn: sqlite3.Connection) -> list[dict[str, object]] | None:
+    """
+    Per table/index: pages, unused bytes inside them, and the share of leaf pages that do not
+    directly follow the previous leaf on disk (what makes range scans seek). None without dbstat.
+    """
+    try:
+        cur = with_busy_retry(
+            lambda: conn.execute(
+                "SELECT name, pagetype, pageno, unused, pgsize FROM dbstat ORDER BY name, path"
+            )
+        )
+    except sqlite3.OperationalError as e:
+        if is_busy_error(e):
+            raise
+        return None
+    tables: dict[str, list[int]] = {}  # name -> [pages, leaves, out_of_order, unused, bytes]
+    previous: dict[str, int] = {}
+    for name, pagetype, pageno, unused, pgsize in cur:
+        t = tables.setdefault(name, [0, 0, 0, 0, 0])
+        t[0] += 1
+        t[3] += unused
+        t[4] += pgsize
+        if pagetype == "leaf":
+            t[1] += 1
+            last = previous.get(name)
+            if last is not None and pageno != last + 1:
+                t[2] += 1
+            previous[name] = pageno
+    records = [
+        {
+            "name": name,
+            "pages": pages,
+            "size_mb": round(size / 2**20, 2),
+            "unused_share": round(unused / size, 4) if size else 0.0,
+            "leaves": leaves,
+            "out_of_order": round(jumps / (leaves - 1), 4) if leaves > 1 else 0.0,
+        }
+        for name, (pages, leaves, jumps, unused, size) in tables.items()
+    ]
+    return sorted(records, key=lambda r: -r["pages"])
+
+
+# --- Backup -------------------------------------------------------------------------------
+
+
+@dataclass
+class BackupResult:
+    pages: int = 0
+    steps: int = 0
+    restarts: int = 0
+    seconds: float = 0.0
+    slept: float = 0.0
+
+
+def throttled_backup(
+    db: Path,
+    dest: Path,
+    pages_per_step: int = DEFAULT_PAGES_PER_STEP,
+    max_mb_per_s: float | None = DEFAULT_MAX_MB_PER_S,
+    busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+    sleep: Callable[[float], None] = time.sleep,
+    max_restarts: int | None = DEFAULT_MAX_RESTARTS,
+    max_seconds: float | None = None,
+) -> BackupResult:
+    """
+    Copy ``db`` to ``dest`` with the backup API, sleeping after each step so the average rate
+    stays at or below ``max_mb_per_s`` (None: unthrottled, one step at a time).
+
+    Raises BackupError once the copy has restarted more than ``max_restarts`` times or is
+    still unfinished after ``max_seconds`` (None disables either limit), so a source that is
+    written continuously cannot keep the backup looping forever.
+    """
+    result = BackupResult()
+    started = time.monotonic()
+    limit = BackupLimit(db, max_restarts, max_seconds)
+    src = open_readonly(db, busy_timeout_ms=busy_timeout_ms)
+    page_size = src.execute("PRAGMA page_size").fetchone()[0]
+    step_budget = (
+        pages_per_step * page_size / (max_mb_per_s * 2**20) if max_mb_per_s else 0.0
+    )
+    step_started = time.monotonic()
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        nonlocal step_started
+        result.steps += 1
+        result.pages = total
+        try:
+            limit(status, remaining, total)
+        finally:
+            result.restarts = limit.restarts
+        pause = step_budget - (time.monotonic() - step_started)
+        if pause > 0 and remaining:
+            sleep(pause)
+            result.slept += pause
+        step_started = time.monotonic()
+
+    try:
+        dst = sqlite3.connect(dest)
+        try:
+            with_busy_retry(lambda: src.backup(dst, pages=pages_per_step, progress=progress))
+        finally:
+            dst.close()
+    finally:
+        src.close()
+    result.seconds = time.monotonic() - started
+    return result
+
+
+def backup_destination(dest: Path, db: Path, now: datetime) -> Path:
+    """``dest`` itself, or a timestamped file inside it when it is a directory."""
+    if dest.is_dir():
+        return dest / f"{db.stem}-{now.strftime('%Y%m%dT%H%M%SZ')}{db.suffix}"
+    return dest
+
+
+def rotate_backups(directory: Path, db: Path, keep: int) -> list[Path]:
+    """Delete all but the newest ``keep`` timestamped backups of ``db``; return those removed."""
+    backups = sorted(directory.glob(f"{db.stem}-*T*Z{db.suffix}"))
+    removed = backups[: max(0, len(backups) - keep)]
+    for path in removed:
+        path.unlink()
+    return removed
+
+
+# --- Incremental vacuum -------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class VacuumWindow:
+    """Local wall-clock window; ``start > end`` wraps past midnight."""
+
+    start: clock_time
+    end: clock_time
+
+    @classmethod
+    def parse(cls, spec: str) -> VacuumWindow:
+        try:
+            start, end = (clock_time.fromisoformat(part.strip()) for part in spec.split("-"))
+        except ValueError as e:
+            raise ValueError(f"Expected HH:MM-HH:MM, got {spec!r}") from e
+        return cls(start, end)
+
+    def contains(self, moment: datetime) -> bool:
+        now = moment.time()
+        if self.start <= self.end:
+            return self.start <= now < self.end
+        return now >= self.start or now < self.end
+
+
+@dataclass(frozen=True)
+class VacuumStep:
+    step: int
+    pages: int
+    seconds: float
+    free_pages: int
+
+
+def incremental_vacuum(
+    conn: sqlite3.Connection,
+    pages_per_step: int = DEFAULT_PAGES_PER_STEP,
+    pause: float = DEFAULT_VACUUM_PAUSE_MS / 1000,
+    max_seconds: float | None = None,
+    window: VacuumWindow | None = None,
+    clock: Callable[[], datetime] = datetime.now,
+    sleep: Callable[[float], None] = time.sleep,
+) -> list[VacuumStep]:
+    """
+    Reclaim free pages ``pages_per_step`` at a time (see module docstring). ``conn`` must be
+    writable and in autocommit mode so every PRAGMA is its own short transaction.
+    """
+    steps: list[VacuumStep] = []
+    deadline = None if max_seconds is None else time.monotonic() + max_seconds
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    while free > 0:
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        if window is not None and not window.contains(clock()):
+            break
+        started = time.monotonic()
+        # The pragma frees one page per VM step and returns no columns, so execute() stops
+        # after the first page; executescript() steps every statement to completion.
+        with_busy_retry(
+            lambda: conn.executescript(f"PRAGMA incremental_vacuum({int(pages_per_step)});")
+        )
+        remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        steps.append(
+            VacuumStep(len(steps) + 1, free - remaining, time.monotonic() - started, remaining)
+        )
+        if remaining >= free:
+            break  # nothing reclaimed: auto_vacuum is not incremental
+        free = remaining
+        if free:
+            sleep(pause)
+    return steps
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> float:
+    """Switch auto_vacuum to INCREMENTAL; the required VACUUM rebuilds the whole file."""
+    started = time.monotonic()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    with_busy_retry(lambda: conn.execute("VACUUM"))
+    return time.monotonic() - started
+
+
+# --- CLI ----------------------------------------------------------------------------------
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Online backup and space maintenance.")
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="table")
+    parser.add_argument("--busy-timeout-ms", type=int, default=DEFAULT_BUSY_TIMEOUT_MS)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="Page, freelist and per-table fragmentation statistics")
+
+    backup = commands.add_parser("backup", help="Throttled online backup")
+    backup.add_argument("dest", type=Path, help="Backup file, or directory for timestamped files")
+    backup.add_argument("--pages-per-step", type=int, default=DEFAULT_PAGES_PER_STEP)
+    backup.add_argument(
+        "--max-mb-per-s",
+        type=float,
+        default=DEFAULT_MAX_MB_PER_S,
+        help="Average read rate cap; 0 disables throttling",
+    )
+    backup.add_argument(
+        "--keep", type=int, help="With a directory dest: keep only the newest N backups"
+    )
+    backup.add_argument(
+        "--max-restarts",
+        type=int,
+        default=DEFAULT_MAX_RESTARTS,
+        help="Fail after the copy has restarted this many times because of writes "
+        f"(default {DEFAULT_MAX_RESTARTS})",
+    )
+    backup.add_argument("--max-seconds", type=float, help="Fail if not finished after this long")
+
+    vacuum = commands.add_parser("vacuum", help="Chunked incremental vacuum")
+    vacuum.add_argument("--pages-per-step", type=int, default=DEFAULT_PAGES_PER_STEP)
+    vacuum.add_argument(
+        "--pause-ms",
+        type=int,
+        default=DEFAULT_VACUUM_PAUSE_MS,
+        help="Sleep between steps so the application can take the write lock",
+    )
+    vacuum.add_argument("--max-seconds", type=float, help="Stop after this long")
+    vacuum.add_argument("--window", help="Only run between these local times, e.g. 02:00-04:00")
+    vacuum.add_argument(
+        "--enable-incremental",
+        action="store_true",
+        help="If auto_vacuum is not INCREMENTAL, switch it with one full VACUUM (locks the "
+        "database for the whole rebuild)",
+    )
+    return parser
+
+
+def _cmd_stats(db: Path, args: argparse.Namespace) -> int:
+    with contextlib.closing(open_readonly(db, busy_timeout_ms=args.busy_timeout_ms)) as conn:
+        stats = space_stats(conn)
+        started = time.monotonic()
+        tables = table_fragmentation(conn)
+        elapsed = time.monotonic() - started
+    emit_records([stats.record()], args.format, sys.stdout, f"Database: {db}")
+    if tables is None:
+        print("dbstat is not available in this SQLite build; no per-table stats.", file=sys.stderr)
+        return 0
+    if args.format == "table":
+        print()
+    emit_records(tables, args.format, sys.stdout, "Pages per table/index")
+    print(f"dbstat walk took {elapsed:.2f}s.", file=sys.stderr)
+    return 0
+
+
+def _cmd_backup(db: Path, args: argparse.Namespace) -> int:
+    now = datetime.now(timezone.utc)
+    dest = backup_destination(args.dest, db, now)
+    partial = dest.with_name(dest.name + ".partial")
+    partial.unlink(missing_ok=True)
+    try:
+        result = throttled_backup(
+            db,
+            partial,
+            pages_per_step=max(1, args.pages_per_step),
+            max_mb_per_s=args.max_mb_per_s or None,
+            busy_timeout_ms=args.busy_timeout_ms,
+            max_restarts=max(0, args.max_restarts),
+            max_seconds=args.max_seconds,
+        )
+    except BackupError as e:
+        partial.unlink(missing_ok=True)
+        print(
+            f"Backup failed: {e}; retry in a quieter period or raise --max-restarts/--max-seconds",
+            file=sys.stderr,
+        )
+        return 1
+    with contextlib.closing(sqlite3.connect(partial)) as check:
+        verdict = check.execute("PRAGMA quick_check").fetchone()[0]
+    if verdict != "ok":
+        print(f"Backup failed quick_check ({verdict}); kept as {partial}", file=sys.stderr)
+        return 1
+    os.replace(partial, dest)
+    removed = rotate_backups(args.dest, db, args.keep) if args.dest.is_dir() and args.keep else []
+    size = dest.stat().st_size
+    emit_records(
+        [
+            {
+                "backup": str(dest),
+                "size_mb": round(size / 2**20, 2),
+                "steps": result.steps,
+                "restarts": result.restarts,
+                "seconds": round(result.seconds, 2),
+                "slept_s": round(result.slept, 2),
+                "mb_per_s": round(size / 2**20 / result.seconds, 1) if result.seconds else None,
+                "rotated_out": len(removed),
+            }
+        ],
+        args.format,
+        sys.stdout,
+        f"Backup of {db}",
+    )
+    return 0
+
+
+def _cmd_vacuum(db: Path, args: argparse.Namespace) -> int:
+    try:
+        window = VacuumWindow.parse(args.window) if args.window else None
+    except ValueError as e:
+        print(f"Invalid --window: {e}", file=sys.stderr)
+        return 2
+    if window is not None and not window.contains(datetime.now()):
+        print(f"Outside the {args.window} window; nothing done.", file=sys.stderr)
+        return 0
+    conn = sqlite3.connect(db, timeout=args.busy_timeout_ms / 1000, isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA busy_timeout = {int(args.busy_timeout_ms)}")
+        before = space_stats(conn)
+        if before.auto_vacuum != "incremental":
+            if not args.enable_incremental:
+                print(
+                    f"auto_vacuum is {before.auto_vacuum}, so incremental_vacuum reclaims "
+                    "nothing. Re-run with --enable-incremental (one full VACUUM, "
+                    "holding the write lock) during a quiet period.",
+                    file=sys.stderr,
+                )
+                return 1
+            seconds = enable_incremental_vacuum(conn)
+            print(f"Switched to auto_vacuum=INCREMENTAL in {seconds:.2f}s.", file=sys.stderr)
+            before = space_stats(conn)
+        steps = incremental_vacuum(
+            conn,
+            pages_per_step=max(1, args.pages_per_step),
+            pause=max(0, args.pause_ms) / 1000,
+            max_seconds=args.max_seconds,
+            window=window,
+        )
+        after = space_stats(conn)
+    finally:
+        conn.close()
+    emit_records(
+        [
+            {
+                "step": s.step,
+                "pages": s.pages,
+                "mb": round(s.pages * before.page_size / 2**20, 2),
+                "seconds": round(s.seconds, 4),
+                "free_pages_left": s.free_pages,
+            }
+            for s in steps
+        ],
+        args.format,
+        sys.stdout,
+        f"incremental_vacuum on {db}",
+    )
+    reclaimed = before.freelist_count - after.freelist_count
+    locked = sum(s.seconds for s in steps)
+    print(
+        f"Reclaimed {reclaimed} page(s) ({reclaimed * before.page_size / 2**20:.1f} MB) in "
+        f"{len(steps)} step(s), {locked:.2f}s holding the write lock; "
+        f"{after.freelist_count} free page(s) left.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+COMMANDS = {"stats": _cmd_stats, "backup": _cmd_backup, "vacuum": _cmd_vacuum}
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    db = resolve_db()
+    if db is None:
+        return 1
+    return COMMANDS[args.command](db, args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
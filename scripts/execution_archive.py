@@ -0,0 +1,239 @@
+"""
+Append-only compressed archive of executions rows, kept next to the DB (``workflows.db.archive/``).
+
+Rows are grouped into blocks of up to BLOCK_BYTES of JSON lines. Each block is compressed as one
+zlib or lzma frame and appended to the current segment file; a new segment starts once the
+current one passes SEGMENT_BYTES. ``index.db`` maps every execution ID to its block's segment,
+offset and length plus its line inside the block, so a lookup reads and decompresses one block.
+
+A block is fsynced before its index rows commit, and the archiver deletes live rows only after
+that commit. A crash at any point therefore leaves each execution readable in the live table,
+the archive, or both. If an ID is archived twice, the newest copy wins.
+"""
+from __future__ import annotations
+
+import json
+import lzma
+import os
+import sqlite3
+import struct
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+SCHEMA_VERSION = 1
+INDEX_NAME = "index.db"
+BLOCK_BYTES = 256 * 1024  # uncompressed; bigger compresses better, smaller reads faster
+SEGMENT_BYTES = 64 * 1024 * 1024
+
+# Frame header: magic, codec id, payload length, CRC-32 of the payload.
+_FRAME = struct.Struct(">4sBII")
+_MAGIC = b"WFA1"
+CODECS: dict[str, tuple[int, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (1, lambda b: zlib.compress(b, 6), zlib.decompress),
+    "lzma": (2, lambda b: lzma.compress(b, preset=6), lzma.decompress),
+}
+_DECOMPRESS = {codec_id: decompress for codec_id, _, decompress in CODECS.values()}
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS segments (
+        name TEXT PRIMARY KEY,
+        bytes INTEGER NOT NULL,
+        blocks INTEGER NOT NULL,
+        raw_bytes INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS entries (
+        id TEXT PRIMARY KEY,
+        segment TEXT NOT NULL,
+        offset INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        line INTEGER NOT NULL,
+        workflow_id TEXT,
+        status TEXT,
+        completed_at
+    ) WITHOUT ROWID;
+"""
+
+
+class ArchiveError(Exception):
+    """A segment frame is missing, truncated or fails its checksum."""
+
+
+def archive_path(db: Path) -> Path:
+    return db.with_name(db.name + ".archive")
+
+
+@dataclass(frozen=True)
+class ArchiveStats:
+    executions: int
+    segments: int
+    blocks: int
+    bytes: int
+    raw_bytes: int
+
+    @property
+    def ratio(self) -> float | None:
+        return self.raw_bytes / self.bytes if self.bytes else None
+
+
+def encode_block(rows: Sequence[dict[str, object]], codec: str) -> tuple[bytes, int]:
+    """One frame holding ``rows`` as JSON lines; return (frame, uncompressed size)."""
+    codec_id, compress, _ = CODECS[codec]
+    raw = "\n".join(json.dumps(r, separators=(",", ":"), default=str) for r in rows).encode()
+    payload = compress(raw)
+    return _FRAME.pack(_MAGIC, codec_id, len(payload), zlib.crc32(payload)) + payload, len(raw)
+
+
+def decode_block(frame: bytes) -> list[dict[str, object]]:
+    if len(frame) < _FRAME.size:
+        raise ArchiveError("truncated frame header")
+    magic, codec_id, length, crc = _FRAME.unpack_from(frame)
+    payload = frame[_FRAME.size : _FRAME.size + length]
+    if magic != _MAGIC or codec_id not in _DECOMPRESS:
+        raise ArchiveError("not an archive frame")
+    if len(payload) != length or zlib.crc32(payload) != crc:
+        raise ArchiveError("frame checksum mismatch")
+    return [json.loads(line) for line in _DECOMPRESS[codec_id](payload).splitlines()]
+
+
+class ExecutionArchive:
+    """Segments plus their ID index (see module docstring). Writable unless ``readonly``."""
+
+    def __init__(
+        self,
+        path: Path,
+        readonly: bool = False,
+        codec: str = "zlib",
+        segment_bytes: int = SEGMENT_BYTES,
+    ) -> None:
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+        self.path = path
+        self.codec = codec
+        self.segment_bytes = segment_bytes
+        index = path / INDEX_NAME
+        if readonly:
+            self.conn = sqlite3.connect(f"{index.resolve().as_uri()}?mode=ro", uri=True)
+            return
+        path.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(index)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = FULL")  # the live rows go once this commits
+        self.conn.executescript(_SCHEMA)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(SCHEMA_VERSION),),
+            )
+
+    def __enter__(self) -> ExecutionArchive:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _current_segment(self) -> str:
+        row = self.conn.execute(
+            "SELECT name, bytes FROM segments ORDER BY name DESC LIMIT 1"
+        ).fetchone()
+        if row is not None and row[1] < self.segment_bytes:
+            return row[0]
+        number = int(row[0][len("segment-") : -len(".seg")]) + 1 if row else 1
+        return f"segment-{number:06d}.seg"
+
+    def append(self, rows: Sequence[dict[str, object]]) -> int:
+        """Archive ``rows`` (dicts with at least ``id``) durably; return compressed bytes."""
+        written = 0
+        block: list[dict[str, object]] = []
+        size = 0
+        for row in rows:
+            block.append(row)
+            size += len(str(row.get("state") or "")) + 256
+            if size >= BLOCK_BYTES:
+                written += self._append_block(block)
+                block, size = [], 0
+        if block:
+            written += self._append_block(block)
+        return written
+
+    def _append_block(self, rows: list[dict[str, object]]) -> int:
+        frame, raw_size = encode_block(rows, self.codec)
+        name = self._current_segment()
+        with open(self.path / name, "ab") as f:
+            # Bytes left by a crash before the index commit are never referenced; append past.
+            offset = f.seek(0, os.SEEK_END)
+            f.write(frame)
+            f.flush()
+            os.fsync(f.fileno())
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO segments (name, bytes, blocks, raw_bytes) VALUES (?, ?, 1, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    bytes = excluded.bytes, blocks = blocks + 1,
+                    raw_bytes = raw_bytes + excluded.raw_bytes
+                """,
+                (name, offset + len(frame), raw_size),
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        r["id"], name, offset, len(frame), line,
+                        r.get("workflow_id"), r.get("status"), r.get("completed_at"),
+                    )
+                    for line, r in enumerate(rows)
+                ],
+            )
+        return len(frame)
+
+    def _read_block(self, segment: str, offset: int, length: int) -> list[dict[str, object]]:
+        try:
+            with open(self.path / segment, "rb") as f:
+                f.seek(offset)
+                frame = f.read(length)
+        except FileNotFoundError as e:
+            raise ArchiveError(f"missing segment {segment}") from e
+        return decode_block(frame)
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, dict[str, object]]:
+        """Archived rows for whichever of ``ids`` are present; each block is read once."""
+        wanted = list(dict.fromkeys(i for i in ids if i))
+        blocks: dict[tuple[str, int, int], list[tuple[str, int]]] = defaultdict(list)
+        for start in range(0, len(wanted), 500):
+            chunk = wanted[start : start + 500]
+            for execution_id, segment, offset, length, line in self.conn.execute(
+                "SELECT id, segment, offset, length, line FROM entries "
+                f"WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ):
+                blocks[(segment, offset, length)].append((execution_id, line))
+        found = {}
+        for (segment, offset, length), members in sorted(blocks.items()):
+            rows = self._read_block(segment, offset, length)
+            for execution_id, line in members:
+                found[execution_id] = rows[line]
+        return found
+
+    def get(self, execution_id: str) -> dict[str, object] | None:
+        return self.get_many([execution_id]).get(execution_id)
+
+    def __contains__(self, execution_id: str) -> bool:
+        return (
+            self.conn.execute("SELECT 1 FROM entries WHERE id = ?", (execution_id,)).fetchone()
+            is not None
+        )
+
+    def stats(self) -> ArchiveStats:
+        executions = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        segments, blocks, size, raw = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(blocks), 0), COALESCE(SUM(bytes), 0), "
+            "COALESCE(SUM(raw_bytes), 0) FROM segments"
+        ).fetchone()
+        return ArchiveStats(executions, segments, blocks, size, raw)
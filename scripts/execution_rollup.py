@@ -0,0 +1,259 @@
+"""
+Incremental execution rollups kept in a sidecar SQLite file (``workflows.db.rollup``).
+
+Settled executions (completed, failed, cancelled) are folded exactly once into rows keyed by
+(day, workflow, user, status) that hold an execution count and a mergeable DurationSketch. The
+store remembers the highest executions rowid it has read plus the IDs that were still in
+flight, so a refresh reads only rows past that mark and re-checks the in-flight set. Reports
+merge the stored sketches and never touch the executions table.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from execution_stats import DurationSketch, window_label
+
+SCHEMA_VERSION = 1
+SETTLED_STATUSES = frozenset({"completed", "failed", "cancelled"})
+ROLLUP_DIMENSIONS = {
+    "workflow": "r.workflow_id",
+    "status": "r.status",
+    "owner": "COALESCE(o.username, r.user_id)",
+}
+ROLLUP_WINDOWS = ("all", "day", "week", "month")
+NONE_LABEL = "(none)"
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS rollups (
+        day TEXT NOT NULL,
+        workflow_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        executions INTEGER NOT NULL,
+        sketch TEXT NOT NULL,
+        PRIMARY KEY (day, workflow_id, user_id, status)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS in_flight (
+        id TEXT PRIMARY KEY,
+        workflow_id TEXT NOT NULL,
+        status TEXT NOT NULL
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS owners (user_id TEXT PRIMARY KEY, username TEXT) WITHOUT ROWID;
+"""
+
+
+def sidecar_path(db: Path) -> Path:
+    return db.with_name(db.name + ".rollup")
+
+
+@dataclass(frozen=True)
+class ExecutionFact:
+    """The columns a rollup needs from one executions row (times as epoch seconds)."""
+
+    rowid: int
+    id: str
+    workflow_id: str
+    user_id: str | None
+    status: str
+    started: float | None
+    duration: float | None
+
+    @property
+    def settled(self) -> bool:
+        return self.status in SETTLED_STATUSES
+
+    @property
+    def day(self) -> str:
+        return window_label(self.started, "day")
+
+
+@dataclass(frozen=True)
+class HighWaterMark:
+    rowid: int = 0
+    execution_id: str | None = None
+    started: float | None = None
+
+
+@dataclass
+class RollupGroup:
+    window: str
+    key: tuple[str, ...]
+    executions: int
+    sketch: DurationSketch
+
+
+class RollupStore:
+    """Read/write access to one rollup sidecar; all writes of a refresh share one transaction."""
+
+    def __init__(self, path: Path, readonly: bool = False) -> None:
+        self.path = path
+        if readonly:
+            self.conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        else:
+            self.conn = sqlite3.connect(path)
+            self.conn.execute("PRAGMA journal_mode = WAL")  # dashboards read during refreshes
+            self.conn.executescript(_SCHEMA)
+            if self.get_meta("schema_version") != str(SCHEMA_VERSION):
+                with self.conn:
+                    self._clear()
+                    self.set_meta("schema_version", str(SCHEMA_VERSION))
+
+    def __enter__(self) -> RollupStore:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get_meta(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def set_meta(self, key: str, value: object) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, None if value is None else str(value)),
+        )
+
+    def high_water(self) -> HighWaterMark:
+        rowid = self.get_meta("high_water_rowid")
+        started = self.get_meta("high_water_started")
+        return HighWaterMark(
+            rowid=int(rowid) if rowid else 0,
+            execution_id=self.get_meta("high_water_id"),
+            started=float(started) if started else None,
+        )
+
+    def set_high_water(self, mark: HighWaterMark) -> None:
+        self.set_meta("high_water_rowid", mark.rowid)
+        self.set_meta("high_water_id", mark.execution_id)
+        self.set_meta("high_water_started", mark.started)
+
+    def _clear(self) -> None:
+        for table in ("rollups", "in_flight", "owners"):
+            self.conn.execute(f"DELETE FROM {table}")
+        self.conn.execute("DELETE FROM meta WHERE key != 'schema_version'")
+
+    def reset(self) -> None:
+        """Forget everything folded so far (the next refresh starts from rowid 0)."""
+        self._clear()
+
+    def fold(self, facts: Iterable[ExecutionFact]) -> int:
+        """Add settled executions to their rollup rows; return how many were folded."""
+        groups: dict[tuple[str, str, str, str], tuple[int, DurationSketch]] = {}
+        for fact in facts:
+            key = (fact.day, fact.workflow_id, fact.user_id or NONE_LABEL, fact.status)
+            count, sketch = groups.get(key) or (0, DurationSketch())
+            if fact.duration is not None:
+                sketch.add(max(0.0, fact.duration))
+            groups[key] = (count + 1, sketch)
+        for key, (count, sketch) in groups.items():
+            row = self.conn.execute(
+                "SELECT executions, sketch FROM rollups "
+                "WHERE day = ? AND workflow_id = ? AND user_id = ? AND status = ?",
+                key,
+            ).fetchone()
+            if row is not None:
+                count += row[0]
+                sketch.merge(DurationSketch.from_dict(json.loads(row[1])))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, count, json.dumps(sketch.to_dict(), separators=(",", ":"))),
+            )
+        return sum(count for count, _ in groups.values())
+
+    def in_flight_ids(self) -> list[str]:
+        return [r[0] for r in self.conn.execute("SELECT id FROM in_flight ORDER BY id")]
+
+    def track_in_flight(self, facts: Iterable[ExecutionFact]) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO in_flight (id, workflow_id, status) VALUES (?, ?, ?)",
+            [(f.id, f.workflow_id, f.status) for f in facts],
+        )
+
+    def forget_in_flight(self, ids: Iterable[str]) -> None:
+        self.conn.executemany("DELETE FROM in_flight WHERE id = ?", [(i,) for i in ids])
+
+    def replace_owners(self, owners: Iterable[tuple[str, str]]) -> None:
+        self.conn.execute("DELETE FROM owners")
+        self.conn.executemany("INSERT INTO owners (user_id, username) VALUES (?, ?)", owners)
+
+    def in_flight_counts(self) -> dict[str, int]:
+        return dict(
+            self.conn.execute("SELECT status, COUNT(*) FROM in_flight GROUP BY status ORDER BY 1")
+        )
+
+    def folded_count(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(executions), 0) FROM rollups").fetchone()[0]
+
+    def groups(
+        self,
+        group_by: Sequence[str],
+        window: str = "all",
+        since: str | None = None,
+        until: str | None = None,
+        statuses: Sequence[str] = (),
+        workflow_ids: Sequence[str] = (),
+    ) -> list[RollupGroup]:
+        """
+        Merge stored rows into (window, *group_by) groups, sorted by window then key.
+
+        ``since``/``until`` are ISO dates or timestamps applied at whole-day granularity
+        (``since`` inclusive, ``until`` exclusive), because rows are keyed by day.
+        """
+        if window not in ROLLUP_WINDOWS:
+            raise ValueError(f"Unknown window: {window}")
+        clauses, params = ["1 = 1"], []
+        if since:
+            clauses.append("r.day >= ?")
+            params.append(since[:10])
+        if until:
+            clauses.append("r.day < ?")
+            params.append(until[:10])
+        if statuses:
+            clauses.append(f"r.status IN ({','.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if workflow_ids:
+            clauses.append(f"r.workflow_id IN ({','.join('?' * len(workflow_ids))})")
+            params.extend(workflow_ids)
+        dim_sql = "".join(f", {ROLLUP_DIMENSIONS[d]}" for d in group_by)
+        cur = self.conn.execute(
+            f"""
+            SELECT r.day, r.executions, r.sketch{dim_sql}
+            FROM rollups r LEFT JOIN owners o ON o.user_id = r.user_id
+            WHERE {' AND '.join(clauses)}
+            """,
+            params,
+        )
+        merged: dict[tuple[str, ...], RollupGroup] = {}
+        labels: dict[str, str] = {}
+        for day, executions, sketch_json, *dims in cur:
+            label = labels.get(day)
+            if label is None:
+                label = labels[day] = _day_window(day, window)
+            key = (label, *(str(d) for d in dims))
+            sketch = DurationSketch.from_dict(json.loads(sketch_json))
+            group = merged.get(key)
+            if group is None:
+                merged[key] = RollupGroup(label, key[1:], executions, sketch)
+            else:
+                group.executions += executions
+                group.sketch.merge(sketch)
+        return sorted(merged.values(), key=lambda g: (g.window, g.key))
+
+
+def _day_window(day: str, window: str) -> str:
+    if window == "all":
+        return "all"
+    if window == "day" or day == NONE_LABEL:
+        return day
+    start = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return window_label(start.timestamp(), window)
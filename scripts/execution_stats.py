@@ -0,0 +1,334 @@
+"""
+Duration statistics for execution analytics: grouped percentiles, histograms, time windows.
+
+With NumPy installed, every group is summarized in one vectorized pass: group keys become
+integer codes, one lexsort orders (code, duration), and percentiles/max/mean/histograms are
+read off the sorted array for all groups at once. Without NumPy, each group feeds a
+DurationSketch (log-bucketed, 1% relative accuracy, mergeable) in a single streaming pass.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+QUANTILES = (0.5, 0.9, 0.99)
+# Upper bucket edges in seconds; the last bucket is open-ended.
+HISTOGRAM_EDGES = (1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+WINDOWS = ("all", "hour", "day", "week", "month")
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+def histogram_labels(edges: Sequence[float] = HISTOGRAM_EDGES) -> list[str]:
+    def fmt(seconds: float) -> str:
+        if seconds >= 3600 and seconds % 3600 == 0:
+            return f"{int(seconds // 3600)}h"
+        if seconds >= 60 and seconds % 60 == 0:
+            return f"{int(seconds // 60)}m"
+        return f"{seconds:g}s"
+
+    labels = [f"<{fmt(edges[0])}"]
+    labels += [f"{fmt(lo)}-{fmt(hi)}" for lo, hi in zip(edges, edges[1:])]
+    labels.append(f">={fmt(edges[-1])}")
+    return labels
+
+
+class DurationSketch:
+    """
+    Mergeable quantile sketch with bounded relative error (DDSketch-style log buckets).
+
+    Values <= ``min_value`` share one zero bucket; memory grows with the log of the value range,
+    not with the number of values, and two sketches merge by adding bucket counts.
+    """
+
+    def __init__(
+        self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY, min_value: float = 1e-3
+    ) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.max: float | None = None
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value <= self.min_value:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: DurationSketch) -> DurationSketch:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for index, n in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def quantile(self, q: float) -> float | None:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # Bucket midpoint (in relative terms) keeps the error within relative_accuracy.
+                value = 2 * self._gamma**index / (self._gamma + 1)
+                return min(value, self.max) if self.max is not None else value
+        return self.max
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "min_value": self.min_value,
+            "bins": {str(k): v for k, v in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> DurationSketch:
+        sketch = cls(data["relative_accuracy"], data["min_value"])
+        sketch.bins = {int(k): int(v) for k, v in data["bins"].items()}
+        sketch.zero_count = int(data["zero_count"])
+        sketch.count = int(data["count"])
+        sketch.total = float(data["total"])
+        sketch.max = data["max"]
+        return sketch
+
+
+def window_label(epoch_seconds: float | None, window: str) -> str:
+    """Label of the UTC time window containing ``epoch_seconds``."""
+    if window == "all":
+        return "all"
+    if epoch_seconds is None or math.isnan(epoch_seconds):
+        return "(none)"
+    dt = datetime.fromtimestamp(epoch_seconds, timezone.utc)
+    if window == "hour":
+        return dt.strftime("%Y-%m-%dT%H:00")
+    if window == "day":
+        return dt.strftime("%Y-%m-%d")
+    if window == "week":
+        return (dt - timedelta(days=dt.weekday())).strftime("%Y-%m-%d")
+    if window == "month":
+        return dt.strftime("%Y-%m")
+    raise ValueError(f"Unknown window: {window}")
+
+
+@dataclass
+class GroupSummary:
+    window: str
+    key: tuple[str, ...]
+    count: int
+    quantiles: dict[float, float]
+    max: float
+    mean: float
+    histogram: list[int] = field(default_factory=list)
+
+
+@dataclass
+class DurationColumns:
+    """Column-oriented execution durations, filled in bulk from fetchmany batches."""
+
+    dimensions: dict[str, list[str]]
+    started: array = field(default_factory=lambda: array("d"))
+    durations: array = field(default_factory=lambda: array("d"))
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def extend(self, batch: Sequence[Sequence[object]]) -> None:
+        """Append rows laid out as (*dimensions, started epoch, duration seconds)."""
+        if not batch:
+            return
+        columns = list(zip(*batch))
+        for name, values in zip(self.dimensions, columns):
+            self.dimensions[name].extend("(none)" if v is None else str(v) for v in values)
+        self.started.extend(math.nan if v is None else float(v) for v in columns[-2])
+        self.durations.extend(max(0.0, float(v)) for v in columns[-1])
+
+    @classmethod
+    def concat(cls, parts: Sequence[DurationColumns]) -> DurationColumns:
+        """One set of columns holding every part's rows (e.g. one part per database shard)."""
+        names = list(parts[0].dimensions) if parts else []
+        combined = cls({name: [] for name in names})
+        for part in parts:
+            for name in names:
+                combined.dimensions[name].extend(part.dimensions[name])
+            combined.started.extend(part.started)
+            combined.durations.extend(part.durations)
+        return combined
+
+
+def summarize(
+    columns: DurationColumns,
+    group_by: Sequence[str],
+    window: str = "all",
+    quantiles: Sequence[float] = QUANTILES,
+    edges: Sequence[float] = HISTOGRAM_EDGES,
+    use_numpy: bool | None = None,
+) -> list[GroupSummary]:
+    """Summaries per (window, *group_by) key, sorted by window then key."""
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown window: {window}")
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy and np is None:
+        raise RuntimeError("NumPy is not installed")
+    if not len(columns):
+        return []
+    if use_numpy:
+        summaries = _summarize_numpy(columns, group_by, window, quantiles, edges)
+    else:
+        summaries = _summarize_sketch(columns, group_by, window, quantiles, edges)
+    return sorted(summaries, key=lambda s: (s.window, s.key))
+
+
+def _summarize_sketch(
+    columns: DurationColumns,
+    group_by: Sequence[str],
+    window: str,
+    quantiles: Sequence[float],
+    edges: Sequence[float],
+) -> list[GroupSummary]:
+    sketches: dict[tuple[str, ...], DurationSketch] = {}
+    histograms: dict[tuple[str, ...], list[int]] = {}
+    dims = [columns.dimensions[name] for name in group_by]
+    labels: dict[float, str] = {}
+    for i, duration in enumerate(columns.durations):
+        started = columns.started[i]
+        label = labels.get(started)
+        if label is None:
+            label = labels[started] = window_label(started, window)
+        key = (label, *(d[i] for d in dims))
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = DurationSketch()
+            histograms[key] = [0] * (len(edges) + 1)
+        sketch.add(duration)
+        histograms[key][bisect.bisect_right(edges, duration)] += 1
+    return [
+        GroupSummary(
+            window=key[0],
+            key=key[1:],
+            count=sketch.count,
+            quantiles={q: sketch.quantile(q) for q in quantiles},
+            max=sketch.max,
+            mean=sketch.mean,
+            histogram=histograms[key],
+        )
+        for key, sketch in sketches.items()
+    ]
+
+
+def _window_codes(started: np.ndarray, window: str) -> tuple[np.ndarray, list[str]]:
+    """Integer window code per row plus the label for each distinct code."""
+    if window == "all":
+        return np.zeros(len(started), dtype=np.int64), ["all"]
+    valid = ~np.isnan(started)
+    seconds = np.where(valid, started, 0).astype("int64").astype("datetime64[s]")
+    unit = {"hour": "h", "day": "D", "week": "D", "month": "M"}[window]
+    floored = seconds.astype(f"datetime64[{unit}]")
+    if window == "week":
+        days = floored.astype(np.int64)
+        floored = ((days + 3) // 7 * 7 - 3).astype("datetime64[D]")  # 1970-01-01 was a Thursday
+    codes = np.where(valid, floored.astype(np.int64), np.iinfo(np.int64).min)
+    uniques, inverse = np.unique(codes, return_inverse=True)
+    labels = []
+    for code in uniques:
+        if code == np.iinfo(np.int64).min:
+            labels.append("(none)")
+            continue
+        text = str(np.datetime_as_string(np.int64(code).astype(f"datetime64[{unit}]")))
+        labels.append(text + ":00" if window == "hour" else text)
+    return inverse.astype(np.int64), labels
+
+
+def _summarize_numpy(
+    columns: DurationColumns,
+    group_by: Sequence[str],
+    window: str,
+    quantiles: Sequence[float],
+    edges: Sequence[float],
+) -> list[GroupSummary]:
+    durations = np.frombuffer(columns.durations, dtype=np.float64)
+    started = np.frombuffer(columns.started, dtype=np.float64)
+    codes, window_labels = _window_codes(started, window)
+    level_labels: list[Sequence[str]] = [window_labels]
+    radix = [len(window_labels)]
+    for name in group_by:
+        uniques, inverse = np.unique(
+            np.asarray(columns.dimensions[name], dtype=object), return_inverse=True
+        )
+        codes = codes * len(uniques) + inverse
+        level_labels.append(list(uniques))
+        radix.append(len(uniques))
+    groups, group_of_row = np.unique(codes, return_inverse=True)
+
+    order = np.lexsort((durations, group_of_row))
+    sorted_durations = durations[order]
+    counts = np.bincount(group_of_row, minlength=len(groups))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    q_values = {}
+    for q in quantiles:
+        pos = starts + q * (counts - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        frac = pos - lo
+        q_values[q] = sorted_durations[lo] + (sorted_durations[hi] - sorted_durations[lo]) * frac
+    maxima = sorted_durations[starts + counts - 1]
+    means = np.bincount(group_of_row, weights=durations, minlength=len(groups)) / counts
+    buckets = np.searchsorted(np.asarray(edges, dtype=np.float64), durations, side="right")
+    histograms = np.zeros((len(groups), len(edges) + 1), dtype=np.int64)
+    np.add.at(histograms, (group_of_row, buckets), 1)
+
+    summaries = []
+    for g, code in enumerate(groups.tolist()):
+        parts = []
+        for size in reversed(radix):
+            code, part = divmod(code, size)
+            parts.append(part)
+        parts.reverse()
+        labels = [level_labels[level][part] for level, part in enumerate(parts)]
+        summaries.append(
+            GroupSummary(
+                window=labels[0],
+                key=tuple(str(v) for v in labels[1:]),
+                count=int(counts[g]),
+                quantiles={q: float(q_values[q][g]) for q in quantiles},
+                max=float(maxima[g]),
+                mean=float(means[g]),
+                histogram=[int(n) for n in histograms[g]],
+            )
+        )
+    return summaries
+
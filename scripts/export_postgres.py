@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+"""
+Export workflows.db to PostgreSQL COPY files for moving the app to the postgresql profile.
+
+Every table (users, workflows, executions, workflow_templates, ...) is split into rowid ranges
+of --chunk-rows. A pool of worker processes writes each range to its own file, in COPY text
+format, each worker with its own read-only connection. Values are converted as PostgreSQL
+expects them:
+- NULL becomes ``\\N``;
+- backslash, newline, carriage return and tab are escaped, so a multi-line JSON ``state``
+  stays on one line. A NUL character cannot be stored in PostgreSQL text, and is an error;
+- BOOLEAN columns (0/1 in SQLite) become t/f;
+- TIMESTAMP/DATETIME values stored as epoch milliseconds (sqlite-jdbc's default) become
+  ``YYYY-MM-DD HH:MM:SS.fff``, read as UTC like the inspector does. Text timestamps pass
+  through unchanged;
+- BLOBs become bytea hex.
+
+The output directory holds:
+  <table>.<n>.copy  one file per chunk, renamed into place only after it is fsynced
+  manifest.json     the size and mtime of the source file and its -wal file, then per table
+                    the columns and, per chunk, the rowid range, row count, byte count and
+                    sha256. It is rewritten after every finished chunk
+  SHA256SUMS        for ``sha256sum -c``
+  load.sql          psql script. It runs every \\copy in one transaction, in foreign key
+                    order, and rolls back unless each table's row count matches the export
+  source.snapshot.db
+                    with --immutable-snapshot, the backup-API copy that is planned and
+                    exported from. It is kept until the export completes, so a resume reads
+                    the same state, and then removed
+
+Rerunning with the same directory resumes the export. Finished chunks are kept, and
+leftover .partial files are redone. This refuses to resume if the source file changed since
+the export started; --restart starts over. Stop the backend first so the export is one
+consistent state, or pass --immutable-snapshot to plan and export from a backup-API copy.
+--verify checks the files offline: it re-hashes them, counts lines and checks each line's
+field count against the manifest.
+
+The target tables must exist and be empty. Start the backend once with
+SPRING_PROFILES_ACTIVE=postgresql so Hibernate creates them, stop it, then load:
+  cd export/ && psql "$POSTGRES_URL" -f load.sql
+
+Usage:
+  python3 scripts/export_postgres.py export/
+  python3 scripts/export_postgres.py export/ --workers 8 --chunk-rows 100000 --table executions
+  python3 scripts/export_postgres.py export/ --verify
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+from inspect_executions_db import (
+    DEFAULT_BUSY_TIMEOUT_MS,
+    REPORT_FORMATS,
+    BackupError,
+    emit_records,
+    open_readonly,
+    quote_ident,
+    resolve_db,
+    snapshot_database,
+)
+
+MANIFEST_NAME = "manifest.json"
+SUMS_NAME = "SHA256SUMS"
+LOAD_SCRIPT_NAME = "load.sql"
+SNAPSHOT_NAME = "source.snapshot.db"
+MANIFEST_VERSION = 1
+DEFAULT_CHUNK_ROWS = 50_000
+FETCH_ROWS = 1000
+_EPOCH = datetime(1970, 1, 1)
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\n": "\\n", "\r": "\\r", "\t": "\\t"})
+
+
+class ExportError(Exception):
+    pass
+
+
+# --- COPY text encoding ----------------------------------------------------------------
+
+
+def column_kind(declared_type: str) -> str:
+    """How a column's values are written: bool, timestamp or value (everything else)."""
+    declared = declared_type.upper()
+    if "BOOL" in declared:
+        return "bool"
+    if "TIMESTAMP" in declared or "DATETIME" in declared:
+        return "timestamp"
+    return "value"
+
+
+def copy_text(text: str) -> str:
+    if "\x00" in text:
+        raise ExportError("NUL character in text value (PostgreSQL text cannot store it)")
+    return text.translate(_COPY_ESCAPES)
+
+
+def _copy_scalar(value: object) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return copy_text(value)
+    if isinstance(value, bytes):
+        return "\\\\x" + value.hex()  # bytea hex input, backslash escaped for COPY
+    if isinstance(value, float) and not math.isfinite(value):
+        return "NaN" if math.isnan(value) else ("Infinity" if value > 0 else "-Infinity")
+    return str(value)
+
+
+def _copy_bool(value: object) -> str:
+    if isinstance(value, int):
+        return "t" if value else "f"
+    return _copy_scalar(value)
+
+
+def _copy_timestamp(value: object) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = value / 1000.0 if abs(value) > 1e11 else float(value)
+        moment = _EPOCH + timedelta(seconds=seconds)
+        return moment.isoformat(sep=" ", timespec="milliseconds")
+    return _copy_scalar(value)
+
+
+_ENCODERS: dict[str, Callable[[object], str]] = {
+    "bool": _copy_bool,
+    "timestamp": _copy_timestamp,
+    "value": _copy_scalar,
+}
+
+
+def copy_line(row: Sequence[object], kinds: Sequence[str]) -> str:
+    return "\t".join(_ENCODERS[k](v) for k, v in zip(kinds, row)) + "\n"
+
+
+# --- Planning ------------------------------------------------------------------------------
+
+
+@dataclass
+class Chunk:
+    file: str
+    lo: int | None  # inclusive rowid range; None for a WITHOUT ROWID table (one chunk)
+    hi: int | None
+    rows: int | None = None  # set once the file is complete
+    bytes: int | None = None
+    sha256: str | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.sha256 is not None
+
+
+@dataclass
+class TableExport:
+    name: str
+    columns: list[str]
+    kinds: list[str]
+    chunks: list[Chunk]
+
+
+def list_tables(conn: sqlite3.Connection) -> list[str]:
+    """User tables, referenced tables before the tables whose foreign keys point at them."""
+    names = [
+        r[0]
+        for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "ORDER BY name"
+        )
+    ]
+    known = set(names)
+    parents = {
+        name: {
+            r[2]
+            for r in conn.execute(f"PRAGMA foreign_key_list({quote_ident(name)})")
+            if r[2] in known and r[2] != name
+        }
+        for name in names
+    }
+    ordered: list[str] = []
+    visiting: set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in ordered or name in visiting:
+            return  # a cycle keeps alphabetical order; load.sql runs in one transaction
+        visiting.add(name)
+        for parent in sorted(parents[name]):
+            visit(parent)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in names:
+        visit(name)
+    return ordered
+
+
+def _has_rowid(conn: sqlite3.Connection, table: str) -> bool:
+    sql = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()[0]
+    return "WITHOUT ROWID" not in " ".join((sql or "").upper().split())
+
+
+def plan_table(conn: sqlite3.Connection, table: str, chunk_rows: int) -> TableExport:
+    info = conn.execute(f"PRAGMA table_info({quote_ident(table)})").fetchall()
+    columns = [r[1] for r in info]
+    kinds = [column_kind(r[2] or "") for r in info]
+    if not _has_rowid(conn, table):
+        return TableExport(table, columns, kinds, [Chunk(f"{table}.000001.copy", None, None)])
+    lo, hi = conn.execute(f"SELECT min(rowid), max(rowid) FROM {quote_ident(table)}").fetchone()
+    chunks = []
+    if lo is not None:
+        for index, start in enumerate(range(lo, hi + 1, chunk_rows), start=1):
+            chunks.append(
+                Chunk(f"{table}.{index:06d}.copy", start, min(start + chunk_rows - 1, hi))
+            )
+    return TableExport(table, columns, kinds, chunks)
+
+
+def source_fingerprint(db: Path) -> dict[str, object]:
+    """Path, size and mtime of ``db``, plus those of its -wal file while it has one."""
+    stat = db.stat()
+    fingerprint: dict[str, object] = {
+        "path": str(db.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    wal = db.with_name(db.name + "-wal")
+    if wal.is_file():
+        wal_stat = wal.stat()
+        fingerprint["wal_size"] = wal_stat.st_size
+        fingerprint["wal_mtime_ns"] = wal_stat.st_mtime_ns
+    return fingerprint
+
+
+# --- Manifest --------------------------------------------------------------------------------
+
+
+@dataclass
+class Manifest:
+    source: dict[str, object]
+    chunk_rows: int
+    tables: list[TableExport]
+    version: int = MANIFEST_VERSION
+
+    def save(self, out_dir: Path) -> None:
+        path = out_dir / MANIFEST_NAME
+        partial = path.with_name(path.name + ".partial")
+        partial.write_text(json.dumps(asdict(self), indent=1) + "\n")
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, out_dir: Path) -> Manifest | None:
+        path = out_dir / MANIFEST_NAME
+        if not path.is_file():
+            return None
+        data = json.loads(path.read_text())
+        if data.get("version") != MANIFEST_VERSION:
+            raise ExportError(f"{path}: unsupported manifest version {data.get('version')!r}")
+        tables = [
+            TableExport(t["name"], t["columns"], t["kinds"], [Chunk(**c) for c in t["chunks"]])
+            for t in data["tables"]
+        ]
+        return cls(data["source"], data["chunk_rows"], tables)
+
+    def chunks(self) -> Iterable[tuple[TableExport, Chunk]]:
+        for table in self.tables:
+            for chunk in table.chunks:
+                yield table, chunk
+
+
+# --- Export ----------------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class ChunkTask:
+    db: str
+    immutable: bool
+    table: str
+    columns: tuple[str, ...]
+    kinds: tuple[str, ...]
+    lo: int | None
+    hi: int | None
+    path: str
+    busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS
+
+
+@dataclass(frozen=True)
+class ChunkResult:
+    path: str
+    rows: int
+    bytes: int
+    sha256: str
+
+
+def export_chunk(task: ChunkTask) -> ChunkResult:
+    """Write one rowid range as COPY text (runs inside a worker process)."""
+    target = Path(task.path)
+    partial = target.with_name(target.name + ".partial")
+    columns = ", ".join(quote_ident(c) for c in task.columns)
+    sql = f"SELECT {columns} FROM {quote_ident(task.table)}"
+    params: tuple[int, ...] = ()
+    if task.lo is not None:
+        sql += " WHERE rowid BETWEEN ? AND ? ORDER BY rowid"
+        params = (task.lo, task.hi)
+    digest = hashlib.sha256()
+    rows = size = 0
+    conn = open_readonly(
+        Path(task.db), immutable=task.immutable, busy_timeout_ms=task.busy_timeout_ms
+    )
+    conn.row_factory = None
+    try:
+        cur = conn.execute(sql, params)
+        with open(partial, "wb") as out:
+            while batch := cur.fetchmany(FETCH_ROWS):
+                try:
+                    data = "".join(copy_line(row, task.kinds) for row in batch).encode()
+                except ExportError as e:
+                    raise ExportError(f"{task.table} rowid {task.lo}-{task.hi}: {e}") from None
+                out.write(data)
+                digest.update(data)
+                rows += len(batch)
+                size += len(data)
+            out.flush()
+            os.fsync(out.fileno())
+    except sqlite3.Error as e:
+        partial.unlink(missing_ok=True)
+        raise ExportError(f"{task.table} rowid {task.lo}-{task.hi}: {e}") from None
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    finally:
+        conn.close()
+    os.replace(partial, target)
+    return ChunkResult(task.path, rows, size, digest.hexdigest())
+
+
+def prepare_manifest(
+    db: Path,
+    out_dir: Path,
+    chunk_rows: int,
+    tables: Sequence[str],
+    restart: bool,
+    busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+    immutable: bool = False,
+) -> Manifest:
+    """The manifest to continue from, or a new plan (after checking the source is unchanged)."""
+    fingerprint = source_fingerprint(db)
+    manifest = None if restart else Manifest.load(out_dir)
+    if manifest is not None:
+        if manifest.source != fingerprint:
+            raise ExportError(
+                f"{db} changed since the export in {out_dir} started; pass --restart to redo it"
+            )
+        planned = [t.name for t in manifest.tables]
+        if tables and sorted(tables) != sorted(planned):
+            raise ExportError(
+                f"{out_dir} holds an export of {', '.join(planned)}; pass --restart to change it"
+            )
+        return manifest
+    for stale in out_dir.glob("*.copy"):
+        stale.unlink()
+    conn = open_readonly(db, immutable=immutable, busy_timeout_ms=busy_timeout_ms)
+    with contextlib.closing(conn):
+        names = list_tables(conn)
+        unknown = sorted(set(tables) - set(names))
+        if unknown:
+            raise ExportError(f"No such table(s) in {db}: {', '.join(unknown)}")
+        plans = [plan_table(conn, n, chunk_rows) for n in names if not tables or n in tables]
+    manifest = Manifest(fingerprint, chunk_rows, plans)
+    manifest.save(out_dir)
+    return manifest
+
+
+def prepare_snapshot(db: Path, out_dir: Path, restart: bool) -> Path:
+    """
+    The backup-API copy of ``db`` in ``out_dir`` to plan and export from.
+
+    An unfinished export keeps reading the copy it started with; a new one (or --restart)
+    takes a fresh copy.
+    """
+    snapshot = out_dir / SNAPSHOT_NAME
+    if not restart and snapshot.is_file() and Manifest.load(out_dir) is not None:
+        return snapshot
+    partial = snapshot.with_name(snapshot.name + ".partial")
+    partial.unlink(missing_ok=True)
+    try:
+        snapshot_database(db, partial)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    os.replace(partial, snapshot)
+    return snapshot
+
+
+def run_export(
+    manifest: Manifest,
+    read_db: Path,
+    out_dir: Path,
+    workers: int,
+    immutable: bool = False,
+    progress: Callable[[TableExport, Chunk], None] | None = None,
+    busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+) -> int:
+    """Write every unfinished chunk; return how many were written this run."""
+    for stale in out_dir.glob("*.partial"):
+        if stale.name != MANIFEST_NAME + ".partial":
+            stale.unlink()
+    pending = {}
+    for table, chunk in manifest.chunks():
+        path = out_dir / chunk.file
+        if chunk.done and path.is_file() and path.stat().st_size == chunk.bytes:
+            continue
+        chunk.rows = chunk.bytes = chunk.sha256 = None
+        task = ChunkTask(
+            str(read_db),
+            immutable,
+            table.name,
+            tuple(table.columns),
+            tuple(table.kinds),
+            chunk.lo,
+            chunk.hi,
+            str(path),
+            busy_timeout_ms,
+        )
+        pending[task.path] = (task, table, chunk)
+
+    def finish(result: ChunkResult) -> None:
+        _, table, chunk = pending[result.path]
+        chunk.rows, chunk.bytes, chunk.sha256 = result.rows, result.bytes, result.sha256
+        manifest.save(out_dir)
+        if progress is not None:
+            progress(table, chunk)
+
+    tasks = [task for task, _, _ in pending.values()]
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            finish(export_chunk(task))
+        return len(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {pool.submit(export_chunk, task) for task in tasks}
+        try:
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future.result())
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+    return len(tasks)
+
+
+def write_sums(manifest: Manifest, out_dir: Path) -> None:
+    lines = [f"{chunk.sha256}  {chunk.file}\n" for _, chunk in manifest.chunks()]
+    (out_dir / SUMS_NAME).write_text("".join(lines))
+
+
+def load_script(manifest: Manifest) -> str:
+    """psql script: every chunk in one transaction, then a row-count check that rolls back."""
+    lines = [
+        f"-- Generated by export_postgres.py from {manifest.source['path']}.",
+        "-- Run from this directory. The target tables must exist and be empty:",
+        '--   psql "$POSTGRES_URL" -f load.sql',
+        "\\set ON_ERROR_STOP on",
+        "BEGIN;",
+    ]
+    for table in manifest.tables:
+        columns = ", ".join(quote_ident(c) for c in table.columns)
+        for chunk in table.chunks:
+            lines.append(f"\\copy {quote_ident(table.name)} ({columns}) FROM '{chunk.file}'")
+    lines += ["DO $$", "BEGIN"]
+    for table in manifest.tables:
+        expected = sum(c.rows or 0 for c in table.chunks)
+        lines.append(
+            f"  IF (SELECT count(*) FROM {quote_ident(table.name)}) <> {expected} THEN "
+            f"RAISE EXCEPTION '{table.name}: expected {expected} rows'; END IF;"
+        )
+    lines += ["END $$;", "COMMIT;", ""]
+    return "\n".join(lines)
+
+
+# --- Verification -----------------------------------------------------------------------------
+
+
+def verify_export(out_dir: Path) -> list[dict[str, object]]:
+    """One problem record per bad or missing chunk (empty when everything checks out)."""
+    manifest = Manifest.load(out_dir)
+    if manifest is None:
+        return [{"file": MANIFEST_NAME, "problem": "missing"}]
+    problems = []
+    for table, chunk in manifest.chunks():
+        path = out_dir / chunk.file
+        if not chunk.done:
+            problems.append({"file": chunk.file, "problem": "not exported yet"})
+            continue
+        if not path.is_file():
+            problems.append({"file": chunk.file, "problem": "missing"})
+            continue
+        digest = hashlib.sha256()
+        lines = bad_lines = 0
+        with open(path, "rb") as f:
+            for line in f:
+                digest.update(line)
+                lines += 1
+                if not line.endswith(b"\n") or line.count(b"\t") != len(table.columns) - 1:
+                    bad_lines += 1
+        if digest.hexdigest() != chunk.sha256:
+            problems.append({"file": chunk.file, "problem": "sha256 mismatch"})
+        if lines != chunk.rows:
+            problems.append(
+                {"file": chunk.file, "problem": f"{lines} line(s), manifest says {chunk.rows}"}
+            )
+        if bad_lines:
+            problems.append(
+                {
+                    "file": chunk.file,
+                    "problem": f"{bad_lines} line(s) without {len(table.columns)} fields",
+                }
+            )
+    return problems
+
+
+def table_records(manifest: Manifest) -> list[dict[str, object]]:
+    return [
+        {
+            "table": t.name,
+            "chunks": len(t.chunks),
+            "rows": sum(c.rows or 0 for c in t.chunks),
+            "mb": round(sum(c.bytes or 0 for c in t.chunks) / 2**20, 2),
+            "complete": all(c.done for c in t.chunks),
+        }
+        for t in manifest.tables
+    ]
+
+
+# --- CLI ---------------------------------------------------------------------------------------
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Export workflows.db as PostgreSQL COPY files.")
+    parser.add_argument("out_dir", type=Path, help="Output directory (created if missing)")
+    parser.add_argument(
+        "--table", action="append", default=[], help="Repeatable (default: all tables)"
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help=f"Rowid span per file (default {DEFAULT_CHUNK_ROWS})",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Worker processes"
+    )
+    parser.add_argument(
+        "--immutable-snapshot",
+        action="store_true",
+        help=f"Plan and export from a backup-API copy ({SNAPSHOT_NAME} in out_dir)",
+    )
+    parser.add_argument("--restart", action="store_true", help="Discard a previous export")
+    parser.add_argument(
+        "--verify", action="store_true", help="Check the files in out_dir against the manifest"
+    )
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="table")
+    parser.add_argument("--busy-timeout-ms", type=int, default=DEFAULT_BUSY_TIMEOUT_MS)
+    return parser
+
+
+def _cmd_verify(args: argparse.Namespace) -> int:
+    try:
+        problems = verify_export(args.out_dir)
+    except (ExportError, ValueError, KeyError) as e:
+        print(f"{args.out_dir / MANIFEST_NAME} is unreadable: {e}", file=sys.stderr)
+        return 1
+    if problems:
+        emit_records(problems, args.format, sys.stdout, f"Problems in {args.out_dir}")
+        return 1
+    manifest = Manifest.load(args.out_dir)
+    assert manifest is not None
+    emit_records(table_records(manifest), args.format, sys.stdout, f"Verified {args.out_dir}")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.verify:
+        return _cmd_verify(args)
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows must be at least 1")
+    db = resolve_db()
+    if db is None:
+        return 1
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    started = time.monotonic()
+
+    def progress(table: TableExport, chunk: Chunk) -> None:
+        print(f"  {chunk.file}: {chunk.rows} row(s)", file=sys.stderr)
+
+    try:
+        read_db = db
+        if args.immutable_snapshot:
+            read_db = prepare_snapshot(db, args.out_dir, args.restart)
+        manifest = prepare_manifest(
+            read_db,
+            args.out_dir,
+            args.chunk_rows,
+            args.table,
+            args.restart,
+            args.busy_timeout_ms,
+            immutable=args.immutable_snapshot,
+        )
+        written = run_export(
+            manifest,
+            read_db,
+            args.out_dir,
+            max(1, args.workers),
+            immutable=args.immutable_snapshot,
+            progress=progress,
+            busy_timeout_ms=args.busy_timeout_ms,
+        )
+    except (ExportError, BackupError) as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print(f"Interrupted; rerun with {args.out_dir} to resume.", file=sys.stderr)
+        return 130
+    if args.immutable_snapshot:
+        read_db.unlink()
+    write_sums(manifest, args.out_dir)
+    (args.out_dir / LOAD_SCRIPT_NAME).write_text(load_script(manifest))
+    emit_records(
+        table_records(manifest),
+        args.format,
+        sys.stdout,
+        f"COPY export of {db} in {args.out_dir}",
+    )
+    total = sum(len(t.chunks) for t in manifest.tables)
+    print(
+        f"{written} chunk(s) written, {total - written} reused, in "
+        f"{time.monotonic() - started:.1f}s; load with: cd {args.out_dir} && psql -f load.sql",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
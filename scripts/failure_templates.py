@@ -0,0 +1,199 @@
+"""
+Failure signatures mined from execution error messages with Drain, in one streaming pass.
+
+Each message is reduced to its first line, obvious variables (UUIDs, execution ids, IPs, URLs,
+hex, numbers) are masked, and the tokens are routed down a fixed-depth tree (token count, then
+the leading tokens) to a short list of templates. The message joins the most similar template
+when at least ``similarity`` of the tokens agree, and tokens that differ become ``<*>``;
+otherwise it starts a new template. Work per message is bounded by the leaf size, and memory by
+``max_templates``: the least recently matched template is evicted when a new one would exceed
+it (``evicted`` counts those, so a report can say how much of the tail it lost).
+
+He, Zhu, Zheng, Lyu: "Drain: An Online Log Parsing Approach with Fixed Depth Tree" (ICWS 2017).
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Sequence
+
+WILDCARD = "<*>"
+OTHER_SOURCE = ("(other)", "(other)")
+MAX_TOKENS = 48  # longer first lines keep their head; the tail is almost always payload
+
+_MASK = re.compile(
+    "|".join(
+        f"(?P<{name}>{pattern})"
+        for name, pattern in (
+            ("UUID", r"\b[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}\b"),
+            ("ID", r"\b(?:exec|wf|user|node)-[A-Za-z0-9_\-]*\d[A-Za-z0-9_\-]*"),
+            ("URL", r"\b[a-z][a-z0-9+.\-]*://\S+"),
+            ("IP", r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"),
+            ("HEX", r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{16,}\b"),
+            ("NUM", r"(?<![A-Za-z_])[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?[A-Za-z%]{0,3}\b"),
+        )
+    )
+)
+_HAS_DIGIT = re.compile(r"\d")
+
+
+@lru_cache(maxsize=8192)  # state.error usually repeats the last ERROR log line verbatim
+def _mask_line(line: str) -> tuple[str, ...]:
+    return tuple(_MASK.sub(lambda m: f"<{m.lastgroup}>", line).split()[:MAX_TOKENS])
+
+
+def mask(message: str) -> tuple[str, ...]:
+    """Tokens of the message's first non-empty line with variable-looking parts masked."""
+    line = next((part.strip() for part in message.splitlines() if part.strip()), "")
+    return _mask_line(line)
+
+
+@dataclass
+class FailureTemplate:
+    id: int
+    tokens: list[str]
+    count: int = 0
+    executions: int = 0
+    first_seen: float | None = None
+    last_seen: float | None = None
+    example: str | None = None  # an execution id carrying this failure
+    sources: Counter = field(default_factory=Counter)  # (workflow_id, node_id) -> messages
+    _last_execution: str | None = field(default=None, repr=False)
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def _similarity(self, tokens: Sequence[str]) -> tuple[float, int]:
+        same = params = 0
+        for mine, theirs in zip(self.tokens, tokens):
+            if mine == WILDCARD:
+                params += 1
+            elif mine == theirs:
+                same += 1
+        return same / len(tokens), params
+
+    def _merge(self, tokens: Sequence[str]) -> None:
+        self.tokens = [
+            mine if mine == theirs else WILDCARD for mine, theirs in zip(self.tokens, tokens)
+        ]
+
+    def _record(
+        self,
+        execution_id: str,
+        workflow_id: str,
+        node_id: str | None,
+        seen_at: float | None,
+        max_sources: int,
+    ) -> None:
+        self.count += 1
+        if execution_id != self._last_execution:
+            # Rows arrive one execution at a time, so this counts distinct executions.
+            self.executions += 1
+            self._last_execution = execution_id
+        if self.example is None:
+            self.example = execution_id
+        source = (workflow_id, node_id or "(none)")
+        if source in self.sources or len(self.sources) < max_sources:
+            self.sources[source] += 1
+        else:
+            self.sources[OTHER_SOURCE] += 1
+        if seen_at is not None:
+            if self.first_seen is None or seen_at < self.first_seen:
+                self.first_seen = seen_at
+            if self.last_seen is None or seen_at > self.last_seen:
+                self.last_seen = seen_at
+
+
+class TemplateMiner:
+    """Drain parse tree plus the templates it has found (see module docstring)."""
+
+    def __init__(
+        self,
+        similarity: float = 0.5,
+        depth: int = 4,
+        max_children: int = 100,
+        max_templates: int = 2000,
+        max_sources: int = 64,
+    ) -> None:
+        if not 0 < similarity <= 1:
+            raise ValueError("similarity must be in (0, 1]")
+        if depth < 3:
+            raise ValueError("depth must be at least 3")
+        self.similarity = similarity
+        self.prefix_depth = depth - 2  # the root and the token-count level are implicit
+        self.max_children = max_children
+        self.max_templates = max_templates
+        self.max_sources = max_sources
+        self.messages = 0
+        self.evicted = 0
+        self.evicted_messages = 0
+        self._templates: OrderedDict[int, FailureTemplate] = OrderedDict()  # LRU order
+        self._tree: dict[int, dict] = {}
+        self._next_id = 1
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def _leaf(self, tokens: Sequence[str]) -> list[int]:
+        node = self._tree.setdefault(len(tokens), {})
+        for token in tokens[: self.prefix_depth]:
+            if _HAS_DIGIT.search(token):
+                token = WILDCARD
+            child = node.get(token)
+            if child is None:
+                if len(node) >= self.max_children - 1:
+                    token = WILDCARD  # the last slot is shared by every further token
+                child = node.setdefault(token, {})
+            node = child
+        return node.setdefault(None, [])
+
+    def _best(self, leaf: list[int], tokens: Sequence[str]) -> FailureTemplate | None:
+        best, best_key = None, (-1.0, -1)
+        live = []
+        for template_id in leaf:
+            template = self._templates.get(template_id)
+            if template is None:
+                continue  # evicted
+            live.append(template_id)
+            key = template._similarity(tokens)
+            if key > best_key:
+                best, best_key = template, key
+        leaf[:] = live
+        if best is None or best_key[0] < self.similarity:
+            return None
+        return best
+
+    def add(
+        self,
+        message: str,
+        execution_id: str,
+        workflow_id: str,
+        node_id: str | None = None,
+        seen_at: float | None = None,
+    ) -> FailureTemplate:
+        """Fold one message into its template (creating it if nothing is similar enough)."""
+        self.messages += 1
+        tokens = mask(message) or ("(empty)",)
+        leaf = self._leaf(tokens)
+        template = self._best(leaf, tokens)
+        if template is None:
+            if len(self._templates) >= self.max_templates:
+                _, stale = self._templates.popitem(last=False)
+                self.evicted += 1
+                self.evicted_messages += stale.count
+            template = FailureTemplate(self._next_id, list(tokens))
+            self._next_id += 1
+            self._templates[template.id] = template
+            leaf.append(template.id)
+        else:
+            template._merge(tokens)
+            self._templates.move_to_end(template.id)
+        template._record(execution_id, workflow_id, node_id, seen_at, self.max_sources)
+        return template
+
+    def templates(self) -> list[FailureTemplate]:
+        """Live templates, most messages first."""
+        return sorted(self._templates.values(), key=lambda t: (-t.count, t.id))
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Index advisor for workflows.db: EXPLAIN QUERY PLAN over the known hot queries, with benchmarks.
+
+Every query in CATALOG (Spring Data repository methods and this directory's inspector) is
+planned and timed on a private backup copy of the database. Plans with a full table scan or a
+temp B-tree sort get a proposed index. Columns follow the usual order: equality columns, then
+sort or range columns, then any extra columns that make the index covering for narrow
+projections. Each proposal is built on the copy on its own. The query is re-planned and
+re-timed, the index size is measured, and the index is dropped again. The live file is only
+ever read through the backup API.
+
+Usage:
+  python3 scripts/index_advisor.py
+  python3 scripts/index_advisor.py --repeat 10 --format jsonl
+  python3 scripts/index_advisor.py --format sql > proposed_indexes.sql   # DDL for accepted ones
+  WORKFLOW_SQLITE_DB=/path/to/workflows.db python3 scripts/index_advisor.py --query api.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+from inspect_executions_db import (
+    REPORT_FORMATS,
+    BackupError,
+    emit_records,
+    quote_ident,
+    resolve_db,
+    snapshot_copy,
+)
+
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_SPEEDUP = 2.0
+_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?(?P<index> USING (?:COVERING )?INDEX \w+)?")
+_TEMP_BTREE = re.compile(r"USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)")
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """
+    One catalogued query. ``equality`` / ``ordering`` / ``covering`` describe how an index
+    would serve it and are only used to build the proposal.
+    """
+
+    name: str
+    source: str
+    table: str
+    sql: str
+    equality: tuple[str, ...] = ()
+    ordering: tuple[str, ...] = ()
+    covering: tuple[str, ...] = ()
+
+    @property
+    def index_columns(self) -> tuple[str, ...]:
+        columns: list[str] = []
+        for column in (*self.equality, *self.ordering, *self.covering):
+            if column not in columns:
+                columns.append(column)
+        return tuple(columns)
+
+    @property
+    def index_name(self) -> str:
+        return f"idx_{self.table}_{'_'.join(self.index_columns)}"
+
+    @property
+    def ddl(self) -> str:
+        columns = ", ".join(self.index_columns)
+        return f"CREATE INDEX IF NOT EXISTS {self.index_name} ON {self.table} ({columns});"
+
+
+# Named parameters are filled from a recent row (see sample_parameters).
+CATALOG: tuple[HotQuery, ...] = (
+    HotQuery(
+        "api.executions.by_workflow_recent",
+        "ExecutionRepository.findByWorkflowIdOrderByStartedAtDesc",
+        "executions",
+        "SELECT * FROM executions WHERE workflow_id = :workflow_id "
+        "ORDER BY started_at DESC LIMIT 50",
+        equality=("workflow_id",),
+        ordering=("started_at",),
+    ),
+    HotQuery(
+        "api.executions.by_user_recent",
+        "ExecutionRepository.findByUserIdOrderByStartedAtDesc",
+        "executions",
+        "SELECT * FROM executions WHERE user_id = :user_id ORDER BY started_at DESC LIMIT 50",
+        equality=("user_id",),
+        ordering=("started_at",),
+    ),
+    HotQuery(
+        "api.executions.by_workflow_status_recent",
+        "ExecutionRepository.findByWorkflowIdAndStatusOrderByStartedAtDesc",
+        "executions",
+        "SELECT * FROM executions WHERE workflow_id = :workflow_id AND status = :status "
+        "ORDER BY started_at DESC LIMIT 50",
+        equality=("workflow_id", "status"),
+        ordering=("started_at",),
+    ),
+    HotQuery(
+        "api.executions.running",
+        "ExecutionRepository.findByStatus (GET /api/executions/running)",
+        "executions",
+        "SELECT * FROM executions WHERE status = 'running'",
+        equality=("status",),
+        ordering=("started_at",),
+    ),
+    HotQuery(
+        "api.executions.filtered_recent",
+        "ExecutionRepository.findWithFilters (all filters null)",
+        "executions",
+        "SELECT * FROM executions WHERE (:none IS NULL OR workflow_id = :none) "
+        "AND (:none IS NULL OR user_id = :none) AND (:none IS NULL OR status = :none) "
+        "ORDER BY started_at DESC LIMIT 50",
+        ordering=("started_at",),
+    ),
+    HotQuery(
+        "api.workflows.by_owner",
+        "WorkflowRepository.findByOwnerId",
+        "workflows",
+        "SELECT * FROM workflows WHERE owner_id = :owner_id",
+        equality=("owner_id",),
+    ),
+    HotQuery(
+        "api.refresh_tokens.by_user",
+        "RefreshTokenRepository.findByUserId",
+        "refresh_tokens",
+        "SELECT * FROM refresh_tokens WHERE user_id = :user_id",
+        equality=("user_id",),
+    ),
+    HotQuery(
+        "tool.inspect.recent",
+        "inspect_executions_db.py (default listing)",
+        "executions",
+        "SELECT e.id, e.workflow_id, e.user_id, e.status, e.started_at, e.completed_at, "
+        "u.username FROM executions e LEFT JOIN users u ON u.id = e.user_id "
+        "ORDER BY e.started_at DESC LIMIT 25",
+        ordering=("started_at",),
+    ),
+    HotQuery(
+        "tool.inspect.keyset_page",
+        "inspect_executions_db.py --stream",
+        "executions",
+        "SELECT id, workflow_id, user_id, status, started_at, completed_at FROM executions "
+        "WHERE (started_at, id) > (:started_at, :id) ORDER BY started_at, id LIMIT 5000",
+        ordering=("started_at", "id"),
+    ),
+    HotQuery(
+        "tool.inspect.stuck",
+        "inspect_executions_db.py stuck",
+        "executions",
+        "SELECT id FROM executions WHERE status IN ('pending', 'running') "
+        "AND started_at < :started_at AND completed_at IS NULL ORDER BY started_at",
+        equality=("status",),
+        ordering=("started_at",),
+    ),
+    HotQuery(
+        "tool.inspect.concurrency",
+        "inspect_executions_db.py concurrency",
+        "executions",
+        "SELECT started_at, completed_at FROM executions WHERE started_at IS NOT NULL "
+        "ORDER BY started_at",
+        ordering=("started_at",),
+        covering=("completed_at",),
+    ),
+)
+
+# (table, column, parameter) triples used to pick realistic parameter values.
+_SAMPLES = (
+    ("executions", "workflow_id", "workflow_id"),
+    ("executions", "user_id", "user_id"),
+    ("executions", "status", "status"),
+    ("executions", "started_at", "started_at"),
+    ("executions", "id", "id"),
+    ("workflows", "owner_id", "owner_id"),
+)
+
+
+@dataclass(frozen=True)
+class PlanSummary:
+    details: tuple[str, ...]
+    full_scans: tuple[str, ...]
+    temp_btrees: tuple[str, ...]
+
+    @property
+    def flagged(self) -> bool:
+        return bool(self.full_scans or self.temp_btrees)
+
+    @property
+    def text(self) -> str:
+        return "; ".join(self.details)
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: dict) -> PlanSummary:
+    details = tuple(r[-1] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+    full_scans, temp_btrees = [], []
+    for detail in details:
+        scan = _SCAN.match(detail)
+        if scan and not scan.group("index"):
+            full_scans.append(scan.group(1))
+        sort = _TEMP_BTREE.search(detail)
+        if sort:
+            temp_btrees.append(sort.group(1))
+    return PlanSummary(details, tuple(full_scans), tuple(temp_btrees))
+
+
+def time_query(conn: sqlite3.Connection, sql: str, params: dict, repeat: int) -> float:
+    """Median wall time in milliseconds of executing ``sql`` and fetching every row."""
+    conn.execute(sql, params).fetchall()  # warm the page cache once
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def table_names(conn: sqlite3.Connection) -> set[str]:
+    return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def sample_parameters(conn: sqlite3.Connection) -> dict[str, object]:
+    """Values from the most recent row of each sampled table, so plans see real keys."""
+    tables = table_names(conn)
+    params: dict[str, object] = {"none": None}
+    for table, column, name in _SAMPLES:
+        params.setdefault(name, None)
+        if table not in tables:
+            continue
+        row = conn.execute(
+            f"SELECT {quote_ident(column)} FROM {quote_ident(table)} "
+            f"WHERE {quote_ident(column)} IS NOT NULL ORDER BY rowid DESC LIMIT 1"
+        ).fetchone()
+        if row is not None and params[name] is None:
+            params[name] = row[0]
+    return params
+
+
+def existing_index_prefixes(conn: sqlite3.Connection, table: str) -> list[tuple[str, ...]]:
+    prefixes = []
+    for index in conn.execute(f"PRAGMA index_list({quote_ident(table)})").fetchall():
+        columns = conn.execute(f"PRAGMA index_info({quote_ident(index[1])})").fetchall()
+        prefixes.append(tuple(r[2] for r in columns))
+    return prefixes
+
+
+def used_bytes(conn: sqlite3.Connection) -> int:
+    """Bytes in pages holding data (dropped proposals leave free pages that get reused)."""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    return (pages - conn.execute("PRAGMA freelist_count").fetchone()[0]) * page_size
+
+
+@dataclass
+class Finding:
+    query: HotQuery
+    before: PlanSummary
+    before_ms: float
+    after: PlanSummary | None = None
+    after_ms: float | None = None
+    index_bytes: int | None = None
+    note: str = ""
+
+    @property
+    def speedup(self) -> float | None:
+        if self.after_ms is None:
+            return None
+        return self.before_ms / max(self.after_ms, 1e-3)
+
+    def record(self) -> dict[str, object]:
+        return {
+            "query": self.query.name,
+            "source": self.query.source,
+            "full_scan": ",".join(self.before.full_scans) or None,
+            "temp_btree": ",".join(self.before.temp_btrees) or None,
+            "before_ms": round(self.before_ms, 3),
+            "proposal": self.query.index_name if self.after is not None else None,
+            "after_ms": None if self.after_ms is None else round(self.after_ms, 3),
+            "speedup": None if self.speedup is None else round(self.speedup, 1),
+            "index_kib": None if self.index_bytes is None else round(self.index_bytes / 1024),
+            "after_plan": None if self.after is None else self.after.text,
+            "note": self.note,
+        }
+
+
+def evaluate(conn: sqlite3.Connection, query: HotQuery, params: dict, repeat: int) -> Finding:
+    """Plan and time ``query``; if flagged, benchmark its proposed index (then drop it)."""
+    before = explain(conn, query.sql, params)
+    finding = Finding(query, before, time_query(conn, query.sql, params, repeat))
+    if not before.flagged:
+        finding.note = "ok"
+        return finding
+    columns = query.index_columns
+    if not columns:
+        finding.note = "no index can help"
+        return finding
+    prefixes = existing_index_prefixes(conn, query.table)
+    if any(prefix[: len(columns)] == columns for prefix in prefixes):
+        finding.note = "matching index exists but is not used"
+        return finding
+    size_before = used_bytes(conn)
+    conn.execute(query.ddl)
+    conn.commit()
+    try:
+        finding.index_bytes = used_bytes(conn) - size_before
+        finding.after = explain(conn, query.sql, params)
+        finding.after_ms = time_query(conn, query.sql, params, repeat)
+        if finding.speedup < 1:
+            finding.note = "slower with index"
+        else:
+            finding.note = "still flagged" if finding.after.flagged else "plan fixed"
+    finally:
+        conn.execute(f"DROP INDEX {query.index_name}")
+        conn.commit()
+    return finding
+
+
+def advise(
+    db: Path, queries: Sequence[HotQuery], repeat: int = DEFAULT_REPEAT
+) -> list[Finding]:
+    """Evaluate ``queries`` against a private backup copy of ``db``."""
+    with snapshot_copy(db) as copy:
+        conn = sqlite3.connect(copy)
+        try:
+            tables = table_names(conn)
+            params = sample_parameters(conn)
+            return [evaluate(conn, q, params, repeat) for q in queries if q.table in tables]
+        finally:
+            conn.close()
+
+
+def accepted_ddl(findings: Sequence[Finding], min_speedup: float) -> list[str]:
+    """One CREATE INDEX per distinct proposal that reached ``min_speedup`` for some query."""
+    statements: dict[str, str] = {}
+    for f in findings:
+        if f.speedup is not None and f.speedup >= min_speedup:
+            reason = f"-- {f.query.name}: {f.before_ms:.2f} ms -> {f.after_ms:.2f} ms"
+            statements.setdefault(f.query.ddl, "")
+            statements[f.query.ddl] += reason + "\n"
+    return [f"{reasons}{ddl}" for ddl, reasons in statements.items()]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Plan and benchmark workflows.db hot queries; propose indexes."
+    )
+    parser.add_argument("--format", choices=REPORT_FORMATS + ("sql",), default="table")
+    parser.add_argument(
+        "--query",
+        action="append",
+        default=[],
+        metavar="PREFIX",
+        help="Only catalog entries whose name starts with PREFIX (repeatable)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per query (median)"
+    )
+    parser.add_argument(
+        "--min-speedup",
+        type=float,
+        default=DEFAULT_MIN_SPEEDUP,
+        help="--format sql keeps proposals at least this much faster",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    db = resolve_db()
+    if db is None:
+        return 1
+    queries = [q for q in CATALOG if not args.query or q.name.startswith(tuple(args.query))]
+    started = time.monotonic()
+    try:
+        findings = advise(db, queries, max(1, args.repeat))
+    except BackupError as e:
+        print(f"Could not snapshot {db}: {e}", file=sys.stderr)
+        return 1
+    if args.format == "sql":
+        for statement in accepted_ddl(findings, args.min_speedup):
+            print(statement)
+    else:
+        emit_records([f.record() for f in findings], args.format, sys.stdout, f"Database: {db}")
+    flagged = sum(1 for f in findings if f.before.flagged)
+    print(
+        f"{len(findings)} quer(ies) planned, {flagged} flagged, "
+        f"in {time.monotonic() - started:.2f}s.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,16 +5,192 @@ Inspect workflow executions in the local SQLite DB (same file as Spring Boot def
 Usage:
   python3 scripts/inspect_executions_db.py
   python3 scripts/inspect_executions_db.py exec-abc-... exec-def-...
+  python3 scripts/inspect_executions_db.py --ids-file ids.txt      # or --ids-file - (stdin)
   WORKFLOW_SQLITE_DB=/path/to/workflows.db python3 scripts/inspect_executions_db.py exec-...
 
+IDs moved out by archive_executions.py are read from the compressed archive next to the DB
+(workflows.db.archive/, see execution_archive.py) for ID lookups, --stream and --path alike.
+
+Streaming (bounded memory, keyset-paginated on (started_at, id), oldest first):
+  python3 scripts/inspect_executions_db.py --stream --format jsonl
+  python3 scripts/inspect_executions_db.py --stream --format csv --since 2024-05-01 --status failed
+  python3 scripts/inspect_executions_db.py --stream --cursor <token printed by a previous run>
+
+Following live traffic (polls PRAGMA data_version; reads only rows past the last rowid seen
+and the executions still running):
+  python3 scripts/inspect_executions_db.py --follow --status failed --interval 0.5
+
+Selecting paths inside executions.state without decoding whole blobs (see state_stream.py):
+  python3 scripts/inspect_executions_db.py --path 'node_states.*.status' --workflow wf-1
+  python3 scripts/inspect_executions_db.py --path 'logs[?level=ERROR].message' --since 2024-05-01
+
+Parallel state decoding (rowid-range partitions, one process and read-only connection each):
+  python3 scripts/inspect_executions_db.py scan --reduce node-status --reduce log-levels
+  python3 scripts/inspect_executions_db.py scan --reduce failed-nodes --since 2024-05-01 --workers 8
+
+Latency percentiles (p50/p90/p99/max of completed_at - started_at; NumPy when installed):
+  python3 scripts/inspect_executions_db.py latency --by workflow --by status --by owner
+  python3 scripts/inspect_executions_db.py latency --by workflow,status --window day --histogram
+
+Per-node durations by node type / agent model, and each workflow's critical path:
+  python3 scripts/inspect_executions_db.py nodes --workflow wf-1 --format json
+
+Concurrency over time (sweep line; peak/percentile in-flight counts, arrivals per minute,
+time above the backend's pool sizes) for sizing thread pools and HPA replica bounds:
+  python3 scripts/inspect_executions_db.py concurrency --window hour --since 2024-05-01
+
+Stuck and orphaned executions (pending/running past a threshold; the newest log or node
+timestamp in state separates slow runs from dead ones). --format sql prints a guarded
+remediation script; --create-index opts in to adding the (status, started_at) index:
+  python3 scripts/inspect_executions_db.py stuck --older-than 600 --create-index
+  python3 scripts/inspect_executions_db.py stuck --format sql > fail-orphans.sql
+
+Incremental rollups in a sidecar (workflows.db.rollup; see execution_rollup.py). Each run folds
+only executions that are new or settled since the last one; --no-refresh reads the sidecar only:
+  python3 scripts/inspect_executions_db.py rollup --by workflow,status --window day
+  python3 scripts/inspect_executions_db.py rollup --no-refresh --by owner --since 2024-05-01
+
+Full-text search over log messages (FTS5 sidecar workflows.db.logs, see log_search.py; refreshed
+incrementally before each search):
+  python3 scripts/inspect_executions_db.py search '"connection refused" OR timeout*' --level ERROR
+  python3 scripts/inspect_executions_db.py search 'rate NEAR limit' --executions --since 2024-05-01
+
+Failure signatures (state.error and ERROR log messages clustered into templates with Drain, see
+failure_templates.py; one streaming pass, bounded memory):
+  python3 scripts/inspect_executions_db.py failures --since 2024-05-01T12:00 --top 10
+
+Where the state bytes go (sizes per JSON path and per workflow, with zlib ratio and how much
+repeats values from earlier executions, see state_profile.py):
+  python3 scripts/inspect_executions_db.py sizes --workflow wf-1 --depth 3 --top 20
+
+Several databases at once (one file per backend replica, e.g. copied out of each pod): --db takes
+paths or globs and is repeatable. Listings and --stream are merged by started_at with a "shard"
+column; latency, failures and sizes aggregate across all of them:
+  python3 scripts/inspect_executions_db.py --db 'incident/*.db' --stream --status failed
+  python3 scripts/inspect_executions_db.py latency --db replica-0.db --db replica-1.db
+
+The DB is always opened read-only (mode=ro URI, query_only) with jittered busy retries so a
+live Spring Boot writer is never blocked for long. --immutable-snapshot first copies the file
+with the sqlite3 backup API and queries that page-consistent copy instead:
+  python3 scripts/inspect_executions_db.py --stream --immutable-snapshot
+
 Repo default: workflows.db at repository root (see backend-java SqlitePathEnvironmentPostProcessor).
 """
 from __future__ import annotations
 
+import argparse
+import base64
+import contextlib
+import csv
+import heapq
+import itertools
+import json
+import math
 import os
+import random
 import sqlite3
 import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence, TextIO, TypeVar
+from urllib.parse import quote
+
+from concurrency_timeline import CONCURRENCY_QUANTILES, WINDOW_SECONDS, ConcurrencySweep
+from execution_archive import INDEX_NAME as ARCHIVE_INDEX_NAME
+from execution_archive import ArchiveError, ExecutionArchive, archive_path
+from execution_rollup import (
+    ROLLUP_DIMENSIONS,
+    ROLLUP_WINDOWS,
+    SETTLED_STATUSES,
+    ExecutionFact,
+    HighWaterMark,
+    RollupGroup,
+    RollupStore,
+)
+from execution_rollup import sidecar_path as rollup_sidecar_path
+from execution_stats import (
+    QUANTILES,
+    WINDOWS,
+    DurationColumns,
+    GroupSummary,
+    histogram_labels,
+    summarize,
+)
+from failure_templates import TemplateMiner
+from log_search import ExecutionHits, LogHit, LogIndex
+from log_search import sidecar_path as log_sidecar_path
+from node_timeline import NodeTiming, WorkflowGraph, critical_path, node_timings, parse_iso
+from shard_fanout import (
+    DEFAULT_SHARD_WORKERS,
+    ShardError,
+    expand_shards,
+    map_shards,
+    merge_shards,
+    shard_labels,
+)
+from state_profile import WORKFLOW_DEPTH, StateProfiler
+from state_stream import PathStep, PathSyntaxError, iter_path_values, parse_path, select_paths
+
+try:
+    import orjson  # optional: several times faster than json for large state blobs
+except ImportError:
+    orjson = None
+
+EXECUTION_COLUMNS = (
+    "id",
+    "workflow_id",
+    "user_id",
+    "status",
+    "started_at",
+    "completed_at",
+    "owner_username",
+)
+
+_SELECT_EXECUTIONS = """
+    SELECT e.id, e.workflow_id, e.user_id, e.status, e.started_at, e.completed_at,
+           u.username AS owner_username
+    FROM executions e
+    LEFT JOIN users u ON u.id = e.user_id
+"""
+_SELECT_EXECUTIONS_WITH_ROWID = _SELECT_EXECUTIONS.replace(
+    "SELECT e.id", "SELECT e.rowid AS row_number, e.id", 1
+)
+_SELECT_EXECUTIONS_WITH_STATE = _SELECT_EXECUTIONS.replace(
+    "AS owner_username", "AS owner_username, e.state"
+)
+
+STREAM_FORMATS = ("jsonl", "csv", "tsv")
+DEFAULT_PAGE_SIZE = 5000
+ROLLBACK_JOURNAL_PAGE_SIZE = 500
+FETCH_CHUNK = 500
+STATE_FETCH_CHUNK = 8  # state blobs can be megabytes each
+
+DEFAULT_BUSY_TIMEOUT_MS = 250
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+BUSY_RETRY_ATTEMPTS = 6
+BUSY_RETRY_BASE_DELAY = 0.05
+SNAPSHOT_PAGES_PER_STEP = 1024
+SNAPSHOT_STEP_SLEEP = 0.005
+SNAPSHOT_MAX_RESTARTS = 20
+
+FOLLOW_INTERVAL = 1.0
+STUCK_AFTER_SECONDS = 300  # execution.timeout-seconds
+DEAD_AFTER_IDLE_SECONDS = 900  # workflow.node-execution-timeout-sec: a node may log nothing
+STATUS_STARTED_INDEX = "idx_executions_status_started_at"
+LOOKUP_ID_TABLE = "inspect_lookup_ids"
+LOOKUP_ID_CHUNK = 5000
+
+REPORT_FORMATS = ("table", "jsonl", "csv", "tsv")
+NODE_REPORT_FORMATS = REPORT_FORMATS + ("json",)
+STUCK_REPORT_FORMATS = REPORT_FORMATS + ("sql",)
+PARTITIONS_PER_WORKER = 4
+
+T = TypeVar("T")
 
 
 def default_db_path() -> Path:
@@ -25,86 +201,3051 @@ def default_db_path() -> Path:
     return root / "workflows.db"
 
 
+# --- Connections ----------------------------------------------------------------
+#
+# The inspector shares workflows.db with the live API. In rollback-journal mode a reader's SHARED
+# lock stops the writer from committing; in WAL mode a long read transaction pins the WAL and
+# delays checkpoints. So: read-only URI + query_only, a short busy timeout, jittered retries
+# instead of long waits, and short per-page queries (see iter_execution_rows).
+
+
+def readonly_uri(db: Path, immutable: bool = False) -> str:
+    uri = f"file:{quote(str(db))}?mode=ro"
+    return uri + "&immutable=1" if immutable else uri
+
+
+def open_readonly(
+    db: Path,
+    *,
+    immutable: bool = False,
+    busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+    mmap_size: int = DEFAULT_MMAP_SIZE,
+) -> sqlite3.Connection:
+    """Open ``db`` read-only; ``immutable`` is only safe for files nothing else writes to."""
+    conn = sqlite3.connect(
+        readonly_uri(db, immutable), uri=True, timeout=busy_timeout_ms / 1000.0
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    return conn
+
+
+def journal_mode(conn: sqlite3.Connection) -> str:
+    """'wal' or a rollback-journal mode ('delete', 'truncate', 'persist', ...)."""
+    return str(conn.execute("PRAGMA journal_mode").fetchone()[0]).lower()
+
+
+def is_busy_error(error: BaseException) -> bool:
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    name = getattr(error, "sqlite_errorname", "") or ""
+    if name.startswith(("SQLITE_BUSY", "SQLITE_LOCKED")):
+        return True
+    message = str(error).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def with_busy_retry(
+    fn: Callable[[], T],
+    attempts: int = BUSY_RETRY_ATTEMPTS,
+    base_delay: float = BUSY_RETRY_BASE_DELAY,
+) -> T:
+    """Call ``fn``, retrying SQLITE_BUSY with full-jitter exponential backoff."""
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e) or attempt == attempts - 1:
+                raise
+            time.sleep(random.uniform(0, base_delay * (2**attempt)))
+    raise AssertionError("unreachable")
+
+
+def execute_with_retry(
+    conn: sqlite3.Connection, sql: str, params: Sequence[object] = ()
+) -> sqlite3.Cursor:
+    return with_busy_retry(lambda: conn.execute(sql, params))
+
+
+class BackupError(RuntimeError):
+    """A backup-API copy gave up: the source kept changing, or the copy ran too long."""
+
+
+class BackupLimit:
+    """
+    ``progress`` callback for ``Connection.backup`` that gives up instead of looping forever.
+
+    Every commit to the source by another connection restarts the copy from the first page.
+    Under a steady write load the step after a restart reports the same remaining count as
+    the one before, so any step that makes no progress counts as a restart. Raises
+    BackupError after more than ``max_restarts`` restarts, or once ``max_seconds`` have passed
+    with pages still left (None disables either limit).
+    """
+
+    def __init__(
+        self,
+        db: Path,
+        max_restarts: int | None = SNAPSHOT_MAX_RESTARTS,
+        max_seconds: float | None = None,
+    ) -> None:
+        self.db = db
+        self.max_restarts = max_restarts
+        self.max_seconds = max_seconds
+        self.restarts = 0
+        self.started = time.monotonic()
+        self._last_remaining: int | None = None
+
+    def __call__(self, status: int, remaining: int, total: int) -> None:
+        if self._last_remaining is not None and remaining >= self._last_remaining:
+            self.restarts += 1
+            if self.max_restarts is not None and self.restarts > self.max_restarts:
+                raise BackupError(
+                    f"Gave up after {self.max_restarts} restart(s): {self.db} is written too "
+                    "often for the copy to finish"
+                )
+        self._last_remaining = remaining
+        elapsed = time.monotonic() - self.started
+        if self.max_seconds is not None and remaining and elapsed >= self.max_seconds:
+            raise BackupError(
+                f"Gave up after {elapsed:.1f}s with {remaining} of {total} page(s) left "
+                f"({self.restarts} restart(s))"
+            )
+
+
+def snapshot_database(
+    db: Path,
+    dest: Path,
+    pages_per_step: int = SNAPSHOT_PAGES_PER_STEP,
+    step_sleep: float = SNAPSHOT_STEP_SLEEP,
+    max_restarts: int | None = SNAPSHOT_MAX_RESTARTS,
+    max_seconds: float | None = None,
+) -> None:
+    """
+    Copy ``db`` to ``dest`` with the online backup API.
+
+    The backup restarts by itself if the writer commits mid-copy, so the result is
+    page-consistent; copying in small steps keeps each lock window short, and
+    ``step_sleep`` is the wait after a step finds the source locked.
+    A source that never stops changing raises BackupError (see BackupLimit).
+    """
+    limit = BackupLimit(db, max_restarts, max_seconds)
+    src = open_readonly(db)
+    try:
+        dst = sqlite3.connect(str(dest))
+        try:
+            with_busy_retry(
+                lambda: src.backup(dst, pages=pages_per_step, progress=limit, sleep=step_sleep)
+            )
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+
+@contextlib.contextmanager
+def snapshot_copy(db: Path) -> Iterator[Path]:
+    """Yield the path of a temporary backup-API copy of ``db``; removed on exit."""
+    with tempfile.TemporaryDirectory(prefix="workflows-snapshot-") as tmp:
+        copy = Path(tmp) / db.name
+        snapshot_database(db, copy)
+        yield copy
+
+
+@contextlib.contextmanager
+def open_inspection_db(
+    db: Path,
+    *,
+    immutable_snapshot: bool = False,
+    busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+) -> Iterator[sqlite3.Connection]:
+    """Yield a read-only connection to ``db``, or to a private backup copy of it."""
+    if not immutable_snapshot:
+        conn = open_readonly(db, busy_timeout_ms=busy_timeout_ms)
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+    with snapshot_copy(db) as copy:
+        conn = open_readonly(copy, immutable=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+# --- Bulk ID lookup ----------------------------------------------------------------
+#
+# Large ID sets go through a temp table rather than ``IN (?, ?, ...)``: no host-parameter limit,
+# the join probes the executions primary key once per ID, and missing-ID detection is an
+# anti-join in SQL. The temp schema stays writable on a mode=ro connection; query_only is lifted
+# only while the table is loaded.
+
+
+def read_ids(lines: Iterable[str]) -> Iterator[str]:
+    """Yield IDs from whitespace/comma separated text, skipping blanks and # comments."""
+    for line in lines:
+        line = line.split("#", 1)[0]
+        for token in line.replace(",", " ").split():
+            yield token
+
+
+def _chunked(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    chunk: list[T] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@contextlib.contextmanager
+def _temp_writes(conn: sqlite3.Connection) -> Iterator[None]:
+    query_only = conn.execute("PRAGMA query_only").fetchone()[0]
+    conn.execute("PRAGMA query_only = OFF")
+    try:
+        yield
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute(f"PRAGMA query_only = {int(query_only)}")
+
+
+def load_lookup_ids(
+    conn: sqlite3.Connection, ids: Iterable[str], chunk_size: int = LOOKUP_ID_CHUNK
+) -> int:
+    """(Re)create temp.inspect_lookup_ids from ``ids`` in chunks; return distinct ID count."""
+    with _temp_writes(conn):
+        conn.execute(f"DROP TABLE IF EXISTS temp.{LOOKUP_ID_TABLE}")
+        conn.execute(f"CREATE TEMP TABLE {LOOKUP_ID_TABLE} (id TEXT PRIMARY KEY) WITHOUT ROWID")
+        for chunk in _chunked((i.strip() for i in ids if i.strip()), chunk_size):
+            conn.executemany(
+                f"INSERT OR IGNORE INTO temp.{LOOKUP_ID_TABLE} (id) VALUES (?)",
+                [(i,) for i in chunk],
+            )
+    return conn.execute(f"SELECT COUNT(*) FROM temp.{LOOKUP_ID_TABLE}").fetchone()[0]
+
+
+def fetch_lookup_rows(conn: sqlite3.Connection) -> list[sqlite3.Row]:
+    """Rows for the IDs loaded by load_lookup_ids, newest first."""
+    conn.row_factory = sqlite3.Row
+    return execute_with_retry(
+        conn,
+        f"""
+        {_SELECT_EXECUTIONS}
+        JOIN temp.{LOOKUP_ID_TABLE} l ON l.id = e.id
+        ORDER BY e.started_at DESC
+        """,
+    ).fetchall()
+
+
+def missing_lookup_ids(conn: sqlite3.Connection) -> list[str]:
+    """Loaded IDs with no executions row (anti-join against the primary key)."""
+    return [
+        r[0]
+        for r in execute_with_retry(
+            conn,
+            f"""
+            SELECT l.id FROM temp.{LOOKUP_ID_TABLE} l
+            WHERE NOT EXISTS (SELECT 1 FROM executions e WHERE e.id = l.id)
+            ORDER BY l.id
+            """,
+        )
+    ]
+
+
 def fetch_execution_rows(
-    conn: sqlite3.Connection, ids: list[str] | None, recent_limit: int = 25
+    conn: sqlite3.Connection, ids: Iterable[str] | None, recent_limit: int = 25
 ) -> list[sqlite3.Row]:
     """Return execution rows joined to users.username (owner_username)."""
     conn.row_factory = sqlite3.Row
     if ids:
-        placeholders = ",".join("?" * len(ids))
-        return conn.execute(
-            f"""
-            SELECT e.id, e.workflow_id, e.user_id, e.status, e.started_at, e.completed_at,
-                   u.username AS owner_username
-            FROM executions e
-            LEFT JOIN users u ON u.id = e.user_id
-            WHERE e.id IN ({placeholders})
-            ORDER BY e.started_at DESC
-            """,
-            ids,
-        ).fetchall()
-    return conn.execute(
+        load_lookup_ids(conn, ids)
+        return fetch_lookup_rows(conn)
+    return execute_with_retry(
+        conn,
         f"""
-        SELECT e.id, e.workflow_id, e.user_id, e.status, e.started_at, e.completed_at,
-               u.username AS owner_username
-        FROM executions e
-        LEFT JOIN users u ON u.id = e.user_id
+        {_SELECT_EXECUTIONS}
         ORDER BY e.started_at DESC
         LIMIT {int(recent_limit)}
-        """
+        """,
     ).fetchall()
 
 
-def main() -> int:
-    db = default_db_path()
-    if not db.is_file():
-        print(f"Database file not found: {db}", file=sys.stderr)
-        print("Set WORKFLOW_SQLITE_DB or run from repo with workflows.db at root.", file=sys.stderr)
-        return 1
+def fetch_archived_rows(
+    conn: sqlite3.Connection,
+    archive_dir: Path,
+    filters: ExecutionFilters | None = None,
+    include_state: bool = False,
+) -> list[dict[str, object]]:
+    """
+    Loaded lookup IDs missing from executions but present in the archive written by
+    archive_executions.py, shaped like live rows and filtered the same way.
+    """
+    if not (archive_dir / ARCHIVE_INDEX_NAME).is_file():
+        return []
+    missing = missing_lookup_ids(conn)
+    if not missing:
+        return []
+    with ExecutionArchive(archive_dir, readonly=True) as archive:
+        found = archive.get_many(missing)
+    if not found:
+        return []
+    filters = filters or ExecutionFilters()
+    since = parse_timestamp(filters.since) if filters.since else None
+    until = parse_timestamp(filters.until) if filters.until else None
+    user_ids = sorted({str(r["user_id"]) for r in found.values() if r.get("user_id")})
+    owners: dict[str, str] = {}
+    if user_ids:
+        owners = dict(
+            execute_with_retry(
+                conn,
+                f"SELECT id, username FROM users WHERE id IN ({','.join('?' * len(user_ids))})",
+                user_ids,
+            ).fetchall()
+        )
+    rows = []
+    for row in found.values():
+        started = parse_timestamp(row.get("started_at"))
+        if (
+            (filters.statuses and row.get("status") not in filters.statuses)
+            or (filters.workflow_ids and row.get("workflow_id") not in filters.workflow_ids)
+            or (since is not None and (started is None or started < since))
+            or (until is not None and (started is None or started >= until))
+        ):
+            continue
+        record = {
+            column: row.get(column)
+            for column in ("id", "workflow_id", "user_id", "status", "started_at", "completed_at")
+        }
+        record["owner_username"] = owners.get(row.get("user_id"))
+        if include_state:
+            record["state"] = row.get("state")
+        rows.append(record)
+    rows.sort(key=lambda r: (parse_timestamp(r["started_at"]) or 0.0, str(r["id"])))
+    return rows
+
+
+# --- Timestamps -------------------------------------------------------------
+#
+# Hibernate's SQLite dialect (sqlite-jdbc default date_class) stores LocalDateTime as epoch
+# milliseconds, while the retired Python backend wrote ISO text. Filters must be expressed in
+# whichever representation the file actually holds, or SQLite's cross-type ordering
+# (INTEGER < TEXT) silently matches everything or nothing.
+
+
+def parse_timestamp(value: object) -> float | None:
+    """Convert a stored started_at/completed_at value (epoch ms/s or ISO text) to epoch seconds."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000.0 if abs(value) > 1e11 else float(value)
+    text = str(value).strip()
+    try:
+        return parse_timestamp(float(text))
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+@dataclass(frozen=True)
+class TimestampStorage:
+    """How executions.started_at is stored: 'integer' (epoch ms) or 'text' (ISO, with separator)."""
+
+    kind: str = "text"
+    separator: str = " "
+
+    def bound(self, value: str) -> object:
+        """Translate a user-supplied ISO timestamp into a value comparable with the column."""
+        if self.kind == "integer":
+            seconds = parse_timestamp(value)
+            return None if seconds is None else int(seconds * 1000)
+        text = value.strip()
+        if len(text) > 10 and text[10] in "T ":
+            text = text[:10] + self.separator + text[11:]
+        return text
+
+    def epoch_sql(self, column: str) -> str:
+        """SQL expression for ``column`` as epoch seconds (REAL), so SQLite does the parsing."""
+        if self.kind == "integer":
+            return f"(CASE WHEN abs({column}) > 1e11 THEN {column} / 1000.0 ELSE {column} END)"
+        return f"((julianday({column}) - 2440587.5) * 86400.0)"
+
+
+def detect_timestamp_storage(conn: sqlite3.Connection) -> TimestampStorage:
+    row = execute_with_retry(
+        conn,
+        "SELECT typeof(started_at), started_at FROM executions "
+        "WHERE started_at IS NOT NULL LIMIT 1",
+    ).fetchone()
+    if row is None:
+        return TimestampStorage()
+    kind, sample = row[0], row[1]
+    if kind in ("integer", "real"):
+        return TimestampStorage(kind="integer")
+    sample = str(sample)
+    return TimestampStorage(separator="T" if len(sample) > 10 and sample[10] == "T" else " ")
+
+
+# --- Filters and keyset streaming --------------------------------------------
+
+
+@dataclass(frozen=True)
+class ExecutionFilters:
+    """Row filters shared by the streaming and aggregate query paths (all optional)."""
+
+    since: str | None = None
+    until: str | None = None
+    statuses: tuple[str, ...] = ()
+    workflow_ids: tuple[str, ...] = ()
+    lookup_ids: bool = False  # restrict to IDs loaded by load_lookup_ids
+
+    def where(
+        self, storage: TimestampStorage, alias: str = "e"
+    ) -> tuple[list[str], list[object]]:
+        """Return (SQL predicates, params); ``since`` is inclusive, ``until`` exclusive."""
+        clauses: list[str] = []
+        params: list[object] = []
+        if self.since:
+            clauses.append(f"{alias}.started_at >= ?")
+            params.append(storage.bound(self.since))
+        if self.until:
+            clauses.append(f"{alias}.started_at < ?")
+            params.append(storage.bound(self.until))
+        if self.statuses:
+            clauses.append(f"{alias}.status IN ({','.join('?' * len(self.statuses))})")
+            params.extend(self.statuses)
+        if self.workflow_ids:
+            clauses.append(f"{alias}.workflow_id IN ({','.join('?' * len(self.workflow_ids))})")
+            params.extend(self.workflow_ids)
+        if self.lookup_ids:
+            clauses.append(f"{alias}.id IN (SELECT id FROM temp.{LOOKUP_ID_TABLE})")
+        return clauses, params
+
+
+def encode_cursor(started_at: object, execution_id: str) -> str:
+    """Opaque resume token for the last emitted (started_at, id) pair."""
+    raw = json.dumps([started_at, execution_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[object, str]:
+    padded = token.strip() + "=" * (-len(token.strip()) % 4)
+    try:
+        started_at, execution_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor token: {token!r}") from e
+    return started_at, str(execution_id)
+
+
+def _keyset_predicate(cursor: tuple[object, str]) -> tuple[str, list[object]]:
+    started_at, execution_id = cursor
+    if started_at is None:
+        # NULLs sort first in ascending order: finish the NULL block, then everything dated.
+        return "((e.started_at IS NULL AND e.id > ?) OR e.started_at IS NOT NULL)", [execution_id]
+    return "(e.started_at, e.id) > (?, ?)", [started_at, execution_id]
+
+
+def iter_execution_rows(
+    conn: sqlite3.Connection,
+    filters: ExecutionFilters | None = None,
+    cursor: tuple[object, str] | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    include_state: bool = False,
+) -> Iterator[sqlite3.Row]:
+    """
+    Yield execution rows ordered by (started_at, id) ascending, one keyset page at a time.
+
+    Each page is a separate short query (no OFFSET, no long-lived read transaction), read with
+    ``fetchmany`` so only a small chunk of rows is held at once. An index on
+    executions(started_at, id) turns every page into a range scan.
+    """
+    select = _SELECT_EXECUTIONS_WITH_STATE if include_state else _SELECT_EXECUTIONS
+    fetch_chunk = STATE_FETCH_CHUNK if include_state else FETCH_CHUNK
+    conn.row_factory = sqlite3.Row
+    filters = filters or ExecutionFilters()
+    base_clauses, base_params = filters.where(detect_timestamp_storage(conn))
+    while True:
+        clauses, params = list(base_clauses), list(base_params)
+        if cursor is not None:
+            predicate, cursor_params = _keyset_predicate(cursor)
+            clauses.append(predicate)
+            params.extend(cursor_params)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cur = execute_with_retry(
+            conn,
+            f"""
+            {select}
+            {where}
+            ORDER BY e.started_at, e.id
+            LIMIT {int(page_size)}
+            """,
+            params,
+        )
+        seen = 0
+        while batch := cur.fetchmany(fetch_chunk):
+            for row in batch:
+                seen += 1
+                cursor = (row["started_at"], row["id"])
+                yield row
+        if seen < page_size:
+            return
+
 
-    ids = [a for a in sys.argv[1:] if a.strip()]
-    conn = sqlite3.connect(str(db))
+def iter_rows_in_rowid_order(
+    conn: sqlite3.Connection,
+    filters: ExecutionFilters | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    include_state: bool = False,
+) -> Iterator[sqlite3.Row]:
+    """
+    Like iter_execution_rows, but keyset-paginated on rowid. Each page is a rowid range scan,
+    so order-insensitive aggregations skip sorting on started_at when it has no index.
+    """
+    select = _SELECT_EXECUTIONS_WITH_STATE if include_state else _SELECT_EXECUTIONS
+    select = select.replace("SELECT e.id", "SELECT e.rowid AS row_number, e.id", 1)
+    fetch_chunk = STATE_FETCH_CHUNK if include_state else FETCH_CHUNK
     conn.row_factory = sqlite3.Row
+    clauses, params = (filters or ExecutionFilters()).where(detect_timestamp_storage(conn))
+    where = "".join(f" AND {c}" for c in clauses)
+    high_water = 0
+    while True:
+        cur = execute_with_retry(
+            conn,
+            f"{select} WHERE e.rowid > ?{where} ORDER BY e.rowid LIMIT {int(page_size)}",
+            [high_water, *params],
+        )
+        seen = 0
+        while batch := cur.fetchmany(fetch_chunk):
+            for row in batch:
+                seen += 1
+                high_water = row["row_number"]
+                yield row
+        if seen < page_size:
+            return
+
+
+def iter_state_matches(
+    rows: Iterable[sqlite3.Row], selectors: Sequence[tuple[PathStep, ...]]
+) -> Iterator[dict[str, object]]:
+    """One record per selector match in each row's state (path=None marks an undecodable state)."""
+    for row in rows:
+        base = {
+            "id": row["id"],
+            "workflow_id": row["workflow_id"],
+            "status": row["status"],
+            "started_at": row["started_at"],
+        }
+        try:
+            for path, value in select_paths(row["state"] or "", selectors):
+                yield {**base, "path": path, "value": value}
+        except (ValueError, IndexError) as e:
+            yield {**base, "path": None, "value": f"undecodable state: {e}"}
+
+
+def make_row_writer(fmt: str, out: TextIO) -> Callable[[sqlite3.Row], None]:
+    """Return a per-row emitter for jsonl/csv/tsv; csv/tsv write their header on first use."""
+    if fmt == "jsonl":
+
+        def write_jsonl(row: sqlite3.Row) -> None:
+            out.write(json.dumps({c: row[c] for c in row.keys()}, default=str) + "\n")
+
+        return write_jsonl
+    if fmt not in ("csv", "tsv"):
+        raise ValueError(f"Unknown output format: {fmt}")
+    writer = csv.writer(out, delimiter="\t" if fmt == "tsv" else ",", lineterminator="\n")
+    header_written = False
+
+    def write_delimited(row: sqlite3.Row) -> None:
+        nonlocal header_written
+        if not header_written:
+            writer.writerow(row.keys())
+            header_written = True
+        writer.writerow([_delimited_cell(row[c]) for c in row.keys()])
+
+    return write_delimited
+
+
+def _delimited_cell(value: object) -> object:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list, bool)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def stream_executions(
+    conn: sqlite3.Connection,
+    out: TextIO,
+    fmt: str = "jsonl",
+    filters: ExecutionFilters | None = None,
+    cursor: tuple[object, str] | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    extra_rows: Iterable[dict[str, object]] = (),
+) -> tuple[int, str | None]:
+    """
+    Write matching rows to ``out`` as they arrive; return (row count, resume cursor token).
+    ``extra_rows`` (archived executions) follow the live ones and do not move the cursor.
+    """
+    write = make_row_writer(fmt, out)
+    count = 0
+    last: tuple[object, str] | None = None
     try:
-        cur = conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='executions'"
+        for row in iter_execution_rows(conn, filters, cursor, page_size):
+            write(row)
+            count += 1
+            last = (row["started_at"], row["id"])
+        for row in extra_rows:
+            write(row)
+            count += 1
+    finally:
+        out.flush()
+    return count, encode_cursor(*last) if last else None
+
+
+# --- Follow mode ------------------------------------------------------------------------
+#
+# PRAGMA data_version changes only when another connection commits and reads no table, so an
+# idle poll costs microseconds. After a change two indexed queries run: a rowid range past the
+# high-water mark, and a primary-key probe of the executions still being tracked. Every query
+# is a short autocommit read, so no snapshot or lock is held between polls and WAL
+# checkpoints by the Java writer are never pinned.
+
+FOLLOW_EVENTS = ("new", "status", "deleted")
+
+
+class ExecutionFollower:
+    """Turns commits to ``executions`` into new/status/deleted events, like ``tail -f``."""
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        filters: ExecutionFilters | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> None:
+        self.conn = conn
+        self.filters = filters or ExecutionFilters()
+        self.page_size = page_size
+        self.high_water = 0
+        self.data_version: int | None = None
+        self.tracked: dict[str, str] = {}  # unsettled execution id -> last status seen
+
+    def start(self) -> None:
+        """
+        Begin at the current end of the table, tracking executions that have not settled.
+
+        This is the only query that reads the whole table (status has no index); polls never do.
+        """
+        self.conn.row_factory = sqlite3.Row
+        self.data_version = self._data_version()
+        row = execute_with_retry(self.conn, "SELECT MAX(rowid) FROM executions").fetchone()
+        self.high_water = row[0] or 0
+        # Status filters apply to emitted events, not to tracking: a running execution must
+        # still be watched to report it turning 'failed'.
+        clauses, params = ExecutionFilters(workflow_ids=self.filters.workflow_ids).where(
+            TimestampStorage()
         )
-        if cur.fetchone() is None:
-            print("Table 'executions' does not exist.", file=sys.stderr)
-            return 1
+        clauses.append(f"e.status NOT IN ({','.join('?' * len(SETTLED_STATUSES))})")
+        cur = execute_with_retry(
+            self.conn,
+            f"SELECT e.id, e.status FROM executions e WHERE {' AND '.join(clauses)}",
+            [*params, *sorted(SETTLED_STATUSES)],
+        )
+        self.tracked = {r[0]: r[1] for r in cur.fetchall()}
 
-        rows = fetch_execution_rows(conn, ids if ids else None, recent_limit=25)
+    def _data_version(self) -> int:
+        return execute_with_retry(self.conn, "PRAGMA data_version").fetchone()[0]
 
-        if not rows:
-            print("No matching rows." if ids else "No executions in database.")
-            return 0
+    def poll(self) -> list[dict[str, object]]:
+        """Events committed since the previous poll (empty, after one PRAGMA, if none)."""
+        version = self._data_version()
+        if version == self.data_version:
+            return []
+        self.data_version = version
+        events = self._transitions() + self._new_rows()
+        statuses = set(self.filters.statuses)
+        return [e for e in events if not statuses or e["status"] in statuses]
 
-        cols = list(rows[0].keys())
-        widths = {
-            c: max(
-                len(c),
-                *(len("" if r[c] is None else str(r[c])) for r in rows),
-            )
-            for c in cols
+    def _transitions(self) -> list[dict[str, object]]:
+        if not self.tracked:
+            return []
+        load_lookup_ids(self.conn, self.tracked)
+        rows = execute_with_retry(
+            self.conn,
+            f"{_SELECT_EXECUTIONS} JOIN temp.{LOOKUP_ID_TABLE} l ON l.id = e.id ORDER BY e.rowid",
+        ).fetchall()
+        events = []
+        found = set()
+        for row in rows:
+            found.add(row["id"])
+            previous = self.tracked[row["id"]]
+            if row["status"] != previous:
+                events.append(_follow_event("status", row, previous))
+            self._track(row)
+        for execution_id in sorted(set(self.tracked) - found):
+            previous = self.tracked.pop(execution_id)
+            events.append(_follow_event("deleted", {"id": execution_id}, previous))
+        return events
+
+    def _new_rows(self) -> list[dict[str, object]]:
+        events = []
+        workflows = set(self.filters.workflow_ids)
+        while True:
+            # Unfiltered, so the high-water mark always moves past every committed row.
+            rows = execute_with_retry(
+                self.conn,
+                f"""
+                {_SELECT_EXECUTIONS_WITH_ROWID}
+                WHERE e.rowid > ?
+                ORDER BY e.rowid
+                LIMIT {int(self.page_size)}
+                """,
+                (self.high_water,),
+            ).fetchall()
+            for row in rows:
+                self.high_water = row["row_number"]
+                if workflows and row["workflow_id"] not in workflows:
+                    continue
+                events.append(_follow_event("new", row, None))
+                self._track(row)
+            if len(rows) < self.page_size:
+                return events
+
+    def _track(self, row: sqlite3.Row) -> None:
+        if row["status"] in SETTLED_STATUSES:
+            self.tracked.pop(row["id"], None)
+        else:
+            self.tracked[row["id"]] = row["status"]
+
+
+def _follow_event(
+    event: str, row: sqlite3.Row | dict, previous_status: str | None
+) -> dict[str, object]:
+    keys = row.keys()
+    return {
+        "event": event,
+        "previous_status": previous_status,
+        **{c: row[c] if c in keys else None for c in EXECUTION_COLUMNS},
+    }
+
+
+# --- Parallel state scan ----------------------------------------------------------
+#
+# Full decoding of every state blob is CPU-bound, so the table is split into rowid ranges
+# (a rowid range is the cheapest access path SQLite has) and each range is decoded and reduced
+# in its own process on its own read-only connection. Reducers yield keys to count; partial
+# Counters are merged by addition, so partition order never matters.
+
+
+def json_backend() -> str:
+    return "orjson" if orjson is not None else "json"
+
+
+def loads_state(text: str | bytes) -> object:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _label(value: object) -> str:
+    return "(none)" if value is None or value == "" else str(value)
+
+
+def _reduce_status(state: dict) -> Iterator[str]:
+    yield _label(state.get("status"))
+
+
+def _reduce_node_status(state: dict) -> Iterator[str]:
+    for node in (state.get("node_states") or {}).values():
+        if isinstance(node, dict):
+            yield _label(node.get("status"))
+
+
+def _reduce_log_levels(state: dict) -> Iterator[str]:
+    for entry in state.get("logs") or ():
+        if isinstance(entry, dict):
+            yield _label(entry.get("level"))
+
+
+def _reduce_failed_nodes(state: dict) -> Iterator[str]:
+    for node_id, node in (state.get("node_states") or {}).items():
+        if isinstance(node, dict) and str(node.get("status", "")).lower() in ("failed", "error"):
+            yield node_id
+
+
+SCAN_REDUCERS: dict[str, Callable[[dict], Iterable[str]]] = {
+    "status": _reduce_status,
+    "node-status": _reduce_node_status,
+    "log-levels": _reduce_log_levels,
+    "failed-nodes": _reduce_failed_nodes,
+}
+
+
+@dataclass(frozen=True)
+class ScanTask:
+    """One rowid partition for a worker process (must stay picklable)."""
+
+    db: str
+    lo: int
+    hi: int
+    reducers: tuple[str, ...]
+    filters: ExecutionFilters = ExecutionFilters()
+    immutable: bool = False
+
+
+@dataclass
+class ScanResult:
+    counts: Counter = field(default_factory=Counter)
+    rows: int = 0
+    undecodable: int = 0
+
+    def merge(self, other: ScanResult) -> ScanResult:
+        self.counts.update(other.counts)
+        self.rows += other.rows
+        self.undecodable += other.undecodable
+        return self
+
+
+def partition_rowids(conn: sqlite3.Connection, parts: int) -> list[tuple[int, int]]:
+    """Split [min(rowid), max(rowid)] into ``parts`` contiguous inclusive ranges."""
+    lo, hi = execute_with_retry(conn, "SELECT min(rowid), max(rowid) FROM executions").fetchone()
+    if lo is None:
+        return []
+    parts = max(1, min(parts, hi - lo + 1))
+    step = (hi - lo + 1) / parts
+    bounds = [lo + round(i * step) for i in range(parts)] + [hi + 1]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(parts) if bounds[i] < bounds[i + 1]]
+
+
+def scan_partition(task: ScanTask) -> ScanResult:
+    """Decode and reduce every state in one rowid range (runs inside a worker process)."""
+    result = ScanResult()
+    reducers = [(name, SCAN_REDUCERS[name]) for name in task.reducers]
+    conn = open_readonly(Path(task.db), immutable=task.immutable)
+    try:
+        clauses, params = task.filters.where(detect_timestamp_storage(conn))
+        clauses.insert(0, "e.rowid BETWEEN ? AND ?")
+        cur = execute_with_retry(
+            conn,
+            f"SELECT e.state FROM executions e WHERE {' AND '.join(clauses)}",
+            [task.lo, task.hi, *params],
+        )
+        while batch := cur.fetchmany(STATE_FETCH_CHUNK):
+            for (text,) in batch:
+                result.rows += 1
+                try:
+                    state = loads_state(text or "")
+                except ValueError:
+                    result.undecodable += 1
+                    continue
+                if not isinstance(state, dict):
+                    result.undecodable += 1
+                    continue
+                for name, reduce in reducers:
+                    for key in reduce(state):
+                        result.counts[(name, key)] += 1
+    finally:
+        conn.close()
+    return result
+
+
+def parallel_scan(
+    db: Path,
+    reducers: Sequence[str],
+    filters: ExecutionFilters | None = None,
+    workers: int | None = None,
+    immutable: bool = False,
+) -> ScanResult:
+    """Run ``reducers`` over all matching states in a process pool (``workers=1``: in-process)."""
+    if filters is not None and filters.lookup_ids:
+        raise ValueError("Temp-table ID lookups are per-connection and cannot be partitioned")
+    unknown = [r for r in reducers if r not in SCAN_REDUCERS]
+    if unknown:
+        raise ValueError(f"Unknown reducer(s): {', '.join(unknown)}")
+    workers = workers or os.cpu_count() or 1
+    conn = open_readonly(db, immutable=immutable)
+    try:
+        ranges = partition_rowids(conn, workers * PARTITIONS_PER_WORKER)
+    finally:
+        conn.close()
+    tasks = [
+        ScanTask(str(db), lo, hi, tuple(reducers), filters or ExecutionFilters(), immutable)
+        for lo, hi in ranges
+    ]
+    total = ScanResult()
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            total.merge(scan_partition(task))
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(scan_partition, t) for t in tasks]):
+            total.merge(future.result())
+    return total
+
+
+def scan_records(result: ScanResult) -> list[dict[str, object]]:
+    """Flatten merged counts into report rows, grouped by reducer, largest first."""
+    return [
+        {"reducer": name, "key": key, "count": count}
+        for (name, key), count in sorted(
+            result.counts.items(), key=lambda kv: (kv[0][0], -kv[1], kv[0][1])
+        )
+    ]
+
+
+# --- Latency report ---------------------------------------------------------------
+
+LATENCY_DIMENSIONS = {
+    "workflow": "e.workflow_id",
+    "status": "e.status",
+    "owner": "u.username",
+}
+
+
+def fetch_duration_columns(
+    conn: sqlite3.Connection,
+    dimensions: Sequence[str],
+    filters: ExecutionFilters | None = None,
+) -> DurationColumns:
+    """
+    Pull (dimensions..., started epoch, duration) for completed executions in bulk.
+
+    SQLite converts timestamps to epoch seconds, and rows land in column arrays one fetchmany
+    batch at a time, so nothing per-row is kept beyond the values themselves.
+    """
+    storage = detect_timestamp_storage(conn)
+    started = storage.epoch_sql("e.started_at")
+    completed = storage.epoch_sql("e.completed_at")
+    clauses, params = (filters or ExecutionFilters()).where(storage)
+    clauses += ["e.started_at IS NOT NULL", "e.completed_at IS NOT NULL"]
+    dim_sql = "".join(f"{LATENCY_DIMENSIONS[d]}, " for d in dimensions)
+    cur = execute_with_retry(
+        conn,
+        f"""
+        SELECT {dim_sql}{started}, {completed} - {started}
+        FROM executions e
+        LEFT JOIN users u ON u.id = e.user_id
+        WHERE {' AND '.join(clauses)}
+        """,
+        params,
+    )
+    columns = DurationColumns({d: [] for d in dimensions})
+    while batch := cur.fetchmany(10_000):
+        columns.extend(batch)
+    return columns
+
+
+def latency_records(
+    summaries: Sequence[GroupSummary], group_by: Sequence[str]
+) -> list[dict[str, object]]:
+    by = ",".join(group_by) or "all"
+    return [
+        {
+            "by": by,
+            "window": s.window,
+            "group": "/".join(s.key) or "*",
+            "count": s.count,
+            **{f"p{round(q * 100):g}": round(s.quantiles[q], 3) for q in QUANTILES},
+            "max": round(s.max, 3),
+            "mean": round(s.mean, 3),
         }
+        for s in summaries
+    ]
 
-        def line(values: dict[str, object]) -> str:
-            return "  ".join(
-                str(values[c])[:200].ljust(widths[c]) for c in cols
-            )
 
-        print(f"Database: {db}")
-        print(line({c: c for c in cols}))
-        print("-" * (sum(widths[c] for c in cols) + 2 * (len(cols) - 1)))
-        for r in rows:
-            print(line({c: ("" if r[c] is None else str(r[c])) for c in cols}))
+def histogram_records(
+    summaries: Sequence[GroupSummary], group_by: Sequence[str]
+) -> list[dict[str, object]]:
+    by = ",".join(group_by) or "all"
+    labels = histogram_labels()
+    return [
+        {
+            "by": by,
+            "window": s.window,
+            "group": "/".join(s.key) or "*",
+            **dict(zip(labels, s.histogram)),
+        }
+        for s in summaries
+    ]
+
+
+# --- Concurrency timeline -----------------------------------------------------------
+
+# Capacities the measured concurrency is compared with (backend-java defaults).
+DEFAULT_CAPACITIES = {
+    4: "AsyncConfig core pool",
+    10: "execution.max-concurrent",
+    16: "AsyncConfig max pool",
+}
+
+
+def sweep_concurrency(
+    conn: sqlite3.Connection,
+    filters: ExecutionFilters | None = None,
+    window: str = "all",
+    horizon: float | None = None,
+) -> ConcurrencySweep:
+    """
+    Feed every execution with a start time to a ConcurrencySweep in started_at order.
+
+    Ordering by the raw column lets an executions(started_at) index stream rows straight from
+    the B-tree; without one SQLite sorts externally in bounded memory. Either way Python holds
+    only one fetchmany batch plus the in-flight completion heap.
+    """
+    storage = detect_timestamp_storage(conn)
+    clauses, params = (filters or ExecutionFilters()).where(storage)
+    clauses.append("e.started_at IS NOT NULL")
+    cur = execute_with_retry(
+        conn,
+        f"""
+        SELECT {storage.epoch_sql("e.started_at")}, {storage.epoch_sql("e.completed_at")}
+        FROM executions e
+        WHERE {' AND '.join(clauses)}
+        ORDER BY e.started_at
+        """,
+        params,
+    )
+    sweep = ConcurrencySweep(window)
+    add = sweep.add
+    while batch := cur.fetchmany(10_000):
+        for started, completed in batch:
+            if started is not None:
+                add(started, completed)
+    sweep.finish(horizon)
+    return sweep
+
 
-        if ids:
-            missing = set(ids) - {r["id"] for r in rows}
-            if missing:
-                print("\nIDs not found in DB:", ", ".join(sorted(missing)), file=sys.stderr)
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
+
+
+def _iso(epoch: float | None) -> str | None:
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat(timespec="seconds")
+
+
+def concurrency_sections(
+    sweep: ConcurrencySweep, capacities: dict[int, str]
+) -> dict[str, list[dict[str, object]]]:
+    def quantiles(values: dict[float, float | None]) -> dict[str, object]:
+        return {f"p{round(q * 100):g}": v for q, v in values.items()}
+
+    windows = []
+    for key in sorted(sweep.windows, key=lambda k: -math.inf if k is None else k):
+        stats = sweep.windows[key]
+        windows.append(
+            {
+                "window": "all" if key is None else _iso(key),
+                "arrivals": stats.arrivals,
+                "peak": stats.peak,
+                "peak_at": _iso(stats.peak_at),
+                **quantiles({q: stats.quantile(q) for q in CONCURRENCY_QUANTILES}),
+                "mean": _round(stats.mean),
+                "busiest_minute": stats.busiest_minute,
+            }
+        )
+    overall = sweep.overall()
+    minutes = sum(sweep.minute_arrivals.values())
+    rate = sweep.executions / minutes if minutes else None
+    mean_duration = sweep.busy_seconds / sweep.completed if sweep.completed else None
+    arrivals = [
+        {
+            "minutes": minutes,
+            "per_minute_mean": _round(rate),
+            **quantiles(sweep.arrival_rate_quantiles()),
+            "per_minute_max": max(sweep.minute_arrivals, default=0),
+            "interarrival_cv": _round(sweep.interarrival_cv),
+            # Little's law: mean concurrency ~= arrival rate x mean time in system.
+            "littles_law_l": _round(
+                rate * mean_duration / 60 if rate is not None and mean_duration else None
+            ),
+            "measured_mean": _round(overall.mean),
+        }
+    ]
+    total = overall.seconds
+    capacity = [
+        {
+            "capacity": limit,
+            "setting": label,
+            "time_above_pct": _round(100 * overall.seconds_above(limit) / total if total else None),
+            "seconds_above": _round(overall.seconds_above(limit)),
+            "peak_excess": max(0, overall.peak - limit),
+        }
+        for limit, label in sorted(capacities.items())
+    ]
+    return {"concurrency": windows, "arrivals": arrivals, "capacity": capacity}
+
+
+# --- Stuck and orphaned executions ---------------------------------------------------
+#
+# A pod restart leaves its executions 'running' with no completed_at forever. Candidates come
+# from an index range on (status, started_at); only their state blobs are read, for the
+# newest log / node timestamp. Anything active within the idle window is merely slow.
+
+_UNSETTLED_STATUSES = ("pending", "running")
+_ACTIVITY_PATHS = tuple(
+    parse_path(p)
+    for p in ("logs[*].timestamp", "node_states.*.started_at", "node_states.*.completed_at")
+)
+
+
+def has_status_started_index(conn: sqlite3.Connection) -> bool:
+    """True when some index on executions leads with (status, started_at)."""
+    for index in execute_with_retry(conn, "PRAGMA index_list(executions)").fetchall():
+        columns = [
+            r[2]
+            for r in execute_with_retry(conn, f"PRAGMA index_info({quote_ident(index[1])})")
+        ]
+        if columns[:2] == ["status", "started_at"]:
+            return True
+    return False
+
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def create_status_started_index(db: Path, busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS) -> None:
+    """Build the (status, started_at) index on the live file (opt-in; takes the write lock)."""
+    conn = sqlite3.connect(db, timeout=busy_timeout_ms / 1000)
+    try:
+        with_busy_retry(
+            lambda: conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {STATUS_STARTED_INDEX} "
+                "ON executions (status, started_at)"
+            )
+        )
+        conn.commit()
     finally:
         conn.close()
+
+
+def last_activity(state_text: str | None) -> float | None:
+    """Newest log or node timestamp inside a state blob (None if it has none)."""
+    latest = None
+    try:
+        for _, value in select_paths(state_text or "", _ACTIVITY_PATHS):
+            try:
+                t = parse_timestamp(value)
+            except ValueError:
+                continue
+            if t is not None and (latest is None or t > latest):
+                latest = t
+    except (ValueError, IndexError):
+        return None
+    return latest
+
+
+@dataclass(frozen=True)
+class StuckExecution:
+    id: str
+    workflow_id: str
+    user_id: str | None
+    owner: str | None
+    status: str
+    started_at: object
+    running_for: float
+    last_activity: float | None
+    idle_for: float
+    orphaned: bool
+
+
+def find_stuck_executions(
+    conn: sqlite3.Connection,
+    now: float,
+    stuck_after: float = STUCK_AFTER_SECONDS,
+    filters: ExecutionFilters | None = None,
+    dead_after_idle: float = DEAD_AFTER_IDLE_SECONDS,
+) -> list[StuckExecution]:
+    """Unsettled executions started more than ``stuck_after`` seconds before ``now``."""
+    storage = detect_timestamp_storage(conn)
+    filters = filters or ExecutionFilters()
+    if not filters.statuses:
+        filters = replace(filters, statuses=_UNSETTLED_STATUSES)
+    clauses, params = filters.where(storage)
+    cutoff = datetime.fromtimestamp(now - stuck_after, timezone.utc).replace(tzinfo=None)
+    clauses += ["e.started_at < ?", "e.completed_at IS NULL"]
+    params.append(storage.bound(cutoff.isoformat(timespec="seconds")))
+    conn.row_factory = sqlite3.Row
+    cur = execute_with_retry(
+        conn,
+        f"""
+        {_SELECT_EXECUTIONS_WITH_STATE}
+        WHERE {' AND '.join(clauses)}
+        ORDER BY e.started_at
+        """,
+        params,
+    )
+    found = []
+    while batch := cur.fetchmany(STATE_FETCH_CHUNK):
+        for row in batch:
+            started = parse_timestamp(row["started_at"])
+            active = last_activity(row["state"])
+            idle_for = max(0.0, now - max(t for t in (started, active) if t is not None))
+            found.append(
+                StuckExecution(
+                    id=row["id"],
+                    workflow_id=row["workflow_id"],
+                    user_id=row["user_id"],
+                    owner=row["owner_username"],
+                    status=row["status"],
+                    started_at=row["started_at"],
+                    running_for=now - started,
+                    last_activity=active,
+                    idle_for=idle_for,
+                    orphaned=idle_for >= dead_after_idle,
+                )
+            )
+    return found
+
+
+def stuck_records(stuck: Sequence[StuckExecution]) -> list[dict[str, object]]:
+    return [
+        {
+            "id": s.id,
+            "workflow_id": s.workflow_id,
+            "owner": s.owner,
+            "status": s.status,
+            "started_at": s.started_at,
+            "running_for_s": round(s.running_for),
+            "last_activity": _iso(s.last_activity),
+            "idle_for_s": round(s.idle_for),
+            "verdict": "orphaned" if s.orphaned else "slow",
+            "action": "mark failed" if s.orphaned else f"watch /api/executions/{s.id}/logs",
+        }
+        for s in stuck
+    ]
+
+
+def _sql_literal(value: object) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def remediation_sql(
+    stuck: Sequence[StuckExecution], storage: TimestampStorage, now: float
+) -> Iterator[str]:
+    """
+    One guarded UPDATE per orphaned execution, mirroring what a cancel writes: status on the
+    row and in the state document, an error message, and completed_at. Rows that settled in
+    the meantime are left alone by the status guard.
+    """
+    completed = storage.bound(
+        datetime.fromtimestamp(now, timezone.utc).replace(tzinfo=None).isoformat()
+    )
+    when = _iso(now)
+    yield "BEGIN;"
+    for s in stuck:
+        if not s.orphaned:
+            continue
+        message = f"Orphaned: no activity for {round(s.idle_for)}s (marked failed {when})"
+        yield (
+            "UPDATE executions SET status = 'failed', "
+            f"completed_at = {_sql_literal(completed)}, "
+            "state = json_set(state, '$.status', 'failed', "
+            f"'$.error', {_sql_literal(message)}) "
+            f"WHERE id = {_sql_literal(s.id)} AND status = {_sql_literal(s.status)} "
+            "AND completed_at IS NULL;"
+        )
+    yield "COMMIT;"
+
+
+# --- Incremental rollups ------------------------------------------------------------
+
+
+@dataclass
+class RollupRefresh:
+    new_rows: int = 0
+    rechecked: int = 0
+    folded: int = 0
+    in_flight: int = 0
+    rebuilt: bool = False
+
+
+def _fact_query(storage: TimestampStorage) -> str:
+    started = storage.epoch_sql("e.started_at")
+    completed = storage.epoch_sql("e.completed_at")
+    return f"""
+        SELECT e.rowid, e.id, e.workflow_id, e.user_id, e.status, {started},
+               {completed} - {started}
+        FROM executions e
+    """
+
+
+def _fetch_facts(cur: sqlite3.Cursor) -> Iterator[ExecutionFact]:
+    while batch := cur.fetchmany(FETCH_CHUNK):
+        for row in batch:
+            yield ExecutionFact(*row)
+
+
+def high_water_moved(conn: sqlite3.Connection, mark: HighWaterMark) -> bool:
+    """True when the row at ``mark.rowid`` no longer holds ``mark.execution_id``."""
+    if not mark.rowid:
+        return False
+    row = execute_with_retry(
+        conn, "SELECT id FROM executions WHERE rowid = ?", (mark.rowid,)
+    ).fetchone()
+    return row is None or row[0] != mark.execution_id
+
+
+def refresh_rollup(
+    conn: sqlite3.Connection, store: RollupStore, rebuild: bool = False
+) -> RollupRefresh:
+    """
+    Fold executions settled since the last refresh into ``store`` (one sidecar transaction).
+
+    New rows are read by rowid past the stored high-water mark; IDs that were still in flight
+    are re-checked through the lookup temp table. The store is rebuilt from scratch when the
+    timestamp storage changed or the high-water rowid no longer holds the same execution
+    (VACUUM may renumber rowids, and deleting the newest row lets its rowid be reused).
+    """
+    stats = RollupRefresh()
+    storage = detect_timestamp_storage(conn)
+    mark = store.high_water()
+    rebuild = rebuild or high_water_moved(conn, mark)
+    if store.get_meta("timestamp_kind") not in (None, storage.kind):
+        rebuild = True
+    query = _fact_query(storage)
+    with store.conn:
+        if rebuild:
+            store.reset()
+            mark = HighWaterMark()
+            stats.rebuilt = True
+        pending = store.in_flight_ids()
+        if pending:
+            load_lookup_ids(conn, pending)
+            # A row re-inserted under the same ID lands past the mark and is read below.
+            cur = execute_with_retry(
+                conn,
+                f"{query} JOIN temp.{LOOKUP_ID_TABLE} l ON l.id = e.id WHERE e.rowid <= ?",
+                (mark.rowid,),
+            )
+            found = list(_fetch_facts(cur))
+            stats.rechecked = len(found)
+            settled = [f for f in found if f.settled]
+            stats.folded += store.fold(settled)
+            store.forget_in_flight(set(pending) - {f.id for f in found if not f.settled})
+            store.track_in_flight(f for f in found if not f.settled)
+        cur = execute_with_retry(
+            conn, f"{query} WHERE e.rowid > ? ORDER BY e.rowid", (mark.rowid,)
+        )
+        batch: list[ExecutionFact] = []
+        for fact in _fetch_facts(cur):
+            batch.append(fact)
+            if len(batch) >= DEFAULT_PAGE_SIZE:
+                stats.folded += _fold_batch(store, batch)
+                mark = _advance(mark, batch)
+                stats.new_rows += len(batch)
+                batch = []
+        if batch:
+            stats.folded += _fold_batch(store, batch)
+            mark = _advance(mark, batch)
+            stats.new_rows += len(batch)
+        store.replace_owners(execute_with_retry(conn, "SELECT id, username FROM users"))
+        store.set_high_water(mark)
+        store.set_meta("timestamp_kind", storage.kind)
+        store.set_meta("refreshed_at", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    stats.in_flight = len(store.in_flight_ids())
+    return stats
+
+
+def _fold_batch(store: RollupStore, batch: Sequence[ExecutionFact]) -> int:
+    store.track_in_flight(f for f in batch if not f.settled)
+    return store.fold(f for f in batch if f.settled)
+
+
+def _advance(mark: HighWaterMark, batch: Sequence[ExecutionFact]) -> HighWaterMark:
+    last = batch[-1]
+    started = [f.started for f in batch if f.started is not None]
+    if mark.started is not None:
+        started.append(mark.started)
+    return HighWaterMark(last.rowid, last.id, max(started) if started else None)
+
+
+def rollup_records(
+    groups: Sequence[RollupGroup], group_by: Sequence[str]
+) -> list[dict[str, object]]:
+    by = ",".join(group_by) or "all"
+    records = []
+    for g in groups:
+        sketch = g.sketch
+        records.append(
+            {
+                "by": by,
+                "window": g.window,
+                "group": "/".join(g.key) or "*",
+                "executions": g.executions,
+                "timed": sketch.count,
+                **{f"p{round(q * 100):g}": _round(sketch.quantile(q)) for q in QUANTILES},
+                "max": _round(sketch.max),
+                "mean": _round(sketch.mean),
+            }
+        )
+    return records
+
+
+# --- Log search index -----------------------------------------------------------------
+
+_LOGS_PATH = parse_path("logs")
+LOG_INDEX_COMMIT_EVERY = 1000  # executions per sidecar commit, so an interrupted build resumes
+
+
+@dataclass
+class LogIndexRefresh:
+    new_rows: int = 0
+    rechecked: int = 0
+    entries: int = 0
+    in_flight: int = 0
+    rebuilt: bool = False
+
+
+def _state_logs(state_text: str | None) -> list[object]:
+    try:
+        for _, value in iter_path_values(state_text or "", _LOGS_PATH):
+            return value if isinstance(value, list) else []
+    except (ValueError, IndexError):
+        pass
+    return []
+
+
+def refresh_log_index(
+    conn: sqlite3.Connection, index: LogIndex, rebuild: bool = False
+) -> LogIndexRefresh:
+    """
+    Add log entries written since the last refresh to ``index``.
+
+    Executions past the high-water rowid are read once; in-flight ones are re-read by ID and
+    only entries beyond the count already indexed are added. The sidecar commits every
+    LOG_INDEX_COMMIT_EVERY executions together with the advanced mark, so an interrupted
+    first build picks up where it stopped.
+    """
+    stats = LogIndexRefresh()
+    mark = index.high_water()
+    if rebuild or high_water_moved(conn, mark):
+        with index.conn:
+            index.reset()
+        mark = HighWaterMark()
+        stats.rebuilt = True
+    conn.row_factory = sqlite3.Row
+    tracked = index.in_flight()
+    if tracked:
+        load_lookup_ids(conn, tracked)
+        cur = execute_with_retry(
+            conn,
+            f"""
+            SELECT e.id, e.workflow_id, e.status, e.state FROM executions e
+            JOIN temp.{LOOKUP_ID_TABLE} l ON l.id = e.id
+            WHERE e.rowid <= ?
+            """,
+            (mark.rowid,),
+        )
+        seen = set()
+        with index.conn:
+            while batch := cur.fetchmany(STATE_FETCH_CHUNK):
+                for row in batch:
+                    seen.add(row["id"])
+                    stats.entries += _index_row(index, row, tracked[row["id"]])
+            index.forget(set(tracked) - seen)
+        stats.rechecked = len(seen)
+    while True:
+        cur = execute_with_retry(
+            conn,
+            "SELECT e.rowid AS row_number, e.id, e.workflow_id, e.status, e.state "
+            f"FROM executions e WHERE e.rowid > ? ORDER BY e.rowid "
+            f"LIMIT {LOG_INDEX_COMMIT_EVERY}",
+            (mark.rowid,),
+        )
+        count = 0
+        with index.conn:
+            while batch := cur.fetchmany(STATE_FETCH_CHUNK):
+                for row in batch:
+                    count += 1
+                    stats.entries += _index_row(index, row, 0)
+                    mark = HighWaterMark(row["row_number"], row["id"])
+            index.set_high_water(mark)
+            index.set_meta(
+                "refreshed_at", datetime.now(timezone.utc).isoformat(timespec="seconds")
+            )
+        stats.new_rows += count
+        if count < LOG_INDEX_COMMIT_EVERY:
+            break
+    stats.in_flight = len(index.in_flight())
+    return stats
+
+
+def _index_row(index: LogIndex, row: sqlite3.Row, offset: int) -> int:
+    """Index the row's entries past ``offset``; keep tracking it until it settles."""
+    entries = _state_logs(row["state"])
+    added = index.add_logs(row["id"], row["workflow_id"], entries, min(offset, len(entries)))
+    if row["status"] in SETTLED_STATUSES:
+        index.forget([row["id"]])
+    else:
+        index.track(row["id"], max(offset, len(entries)))
+    return added
+
+
+def log_hit_records(hits: Sequence[LogHit]) -> list[dict[str, object]]:
+    return [
+        {
+            "execution_id": h.execution_id,
+            "workflow_id": h.workflow_id,
+            "timestamp": h.timestamp,
+            "level": h.level,
+            "node_id": h.node_id,
+            "message": h.message,
+        }
+        for h in hits
+    ]
+
+
+def execution_hit_records(hits: Sequence[ExecutionHits]) -> list[dict[str, object]]:
+    return [
+        {
+            "execution_id": h.execution_id,
+            "workflow_id": h.workflow_id,
+            "hits": h.hits,
+            "first": h.first,
+            "last": h.last,
+        }
+        for h in hits
+    ]
+
+
+# --- Failure signatures ---------------------------------------------------------------
+
+_ERROR_PATH = parse_path("error")
+_CURRENT_NODE_PATH = parse_path("current_node")
+_ERROR_LOGS_PATH = parse_path("logs[?level=ERROR]")
+
+
+@dataclass
+class FailureMining:
+    executions: int = 0
+    messages: int = 0
+    undecodable: int = 0
+
+
+def failure_messages(state_text: str | None) -> Iterator[tuple[str, str | None, object]]:
+    """(message, node_id, timestamp) for state.error and every ERROR-level log entry."""
+    text = state_text or ""
+    # Substring checks run at C speed and spare the selector walk for most rows.
+    if '"error"' in text:
+        for _, error in iter_path_values(text, _ERROR_PATH):
+            if error:
+                node = next((v for _, v in iter_path_values(text, _CURRENT_NODE_PATH)), None)
+                yield str(error), node, None
+    if '"ERROR"' not in text:
+        return
+    for _, entry in iter_path_values(text, _ERROR_LOGS_PATH):
+        if isinstance(entry, dict) and entry.get("message"):
+            yield str(entry["message"]), entry.get("node_id"), entry.get("timestamp")
+
+
+def mine_failures(
+    conn: sqlite3.Connection,
+    miner: TemplateMiner,
+    filters: ExecutionFilters | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> FailureMining:
+    """One rowid-order pass feeding each execution's error messages to ``miner``."""
+    rows = iter_rows_in_rowid_order(conn, filters, page_size, include_state=True)
+    return mine_failure_rows(rows, miner)
+
+
+def mine_failure_rows(rows: Iterable[sqlite3.Row], miner: TemplateMiner) -> FailureMining:
+    """mine_failures over rows from any source (e.g. several shards); order does not matter."""
+    stats = FailureMining()
+    for row in rows:
+        stats.executions += 1
+        try:
+            messages = list(failure_messages(row["state"]))
+        except (ValueError, IndexError):
+            stats.undecodable += 1
+            continue
+        try:
+            fallback = parse_timestamp(row["completed_at"]) or parse_timestamp(row["started_at"])
+        except ValueError:
+            fallback = None
+        for message, node_id, timestamp in messages:
+            stats.messages += 1
+            seen_at = parse_iso(timestamp) if timestamp else fallback
+            miner.add(message, row["id"], row["workflow_id"], node_id, seen_at)
+    return stats
+
+
+def failure_sections(
+    miner: TemplateMiner, top: int = 20, sources: int = 5
+) -> dict[str, list[dict[str, object]]]:
+    total = miner.messages or 1
+    templates, by_source = [], []
+    for rank, template in enumerate(miner.templates()[:top], start=1):
+        templates.append(
+            {
+                "rank": rank,
+                "messages": template.count,
+                "executions": template.executions,
+                "share": round(template.count / total, 3),
+                "first_seen": _iso(template.first_seen),
+                "last_seen": _iso(template.last_seen),
+                "sources": len(template.sources),
+                "example": template.example,
+                "template": template.template,
+            }
+        )
+        for (workflow_id, node_id), count in template.sources.most_common(sources):
+            by_source.append(
+                {
+                    "rank": rank,
+                    "workflow": workflow_id,
+                    "node": node_id,
+                    "messages": count,
+                    "share": round(count / template.count, 3),
+                }
+            )
+    return {"templates": templates, "sources": by_source}
+
+
+# --- State size profile ---------------------------------------------------------------
+
+
+@dataclass
+class SizeProfiling:
+    executions: int = 0
+    undecodable: int = 0
+
+
+def profile_state_sizes(
+    conn: sqlite3.Connection,
+    profiler: StateProfiler,
+    filters: ExecutionFilters | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> SizeProfiling:
+    """One rowid-order pass feeding every decoded state to ``profiler``."""
+    rows = iter_rows_in_rowid_order(conn, filters, page_size, include_state=True)
+    return profile_state_rows(rows, profiler)
+
+
+def profile_state_rows(rows: Iterable[sqlite3.Row], profiler: StateProfiler) -> SizeProfiling:
+    stats = SizeProfiling()
+    for row in rows:
+        stats.executions += 1
+        text = row["state"] or ""
+        try:
+            state = loads_state(text)
+        except ValueError:
+            stats.undecodable += 1
+            continue
+        profiler.add(state, row["workflow_id"], raw_bytes=len(text))
+    return stats
+
+
+def _kb(size: float) -> float:
+    return round(size / 1024, 1)
+
+
+def size_sections(profiler: StateProfiler, top: int = 30) -> dict[str, list[dict[str, object]]]:
+    total = profiler.bytes or 1
+    paths = []
+    for rank, stats in enumerate(profiler.paths()[:top], start=1):
+        ratio = stats.compression_ratio
+        paths.append(
+            {
+                "rank": rank,
+                "path": stats.path,
+                "depth": stats.depth,
+                "kb": _kb(stats.bytes),
+                "share": round(stats.bytes / total, 3),
+                "executions": stats.executions,
+                "values": stats.values,
+                "avg_bytes": round(stats.bytes / stats.values) if stats.values else 0,
+                "max_kb": _kb(stats.max_bytes),
+                "zlib_ratio": round(ratio, 1) if ratio else None,
+                "dup_share": round(stats.duplicate_bytes / stats.bytes, 3) if stats.bytes else 0,
+                "dup_kb": _kb(stats.duplicate_bytes),
+                "dup_exact": not stats.saturated,
+            }
+        )
+    workflows = [
+        {
+            "workflow": w.workflow_id,
+            "executions": w.executions,
+            "kb": _kb(w.bytes),
+            "share": round(w.bytes / total, 3),
+            "avg_kb": _kb(w.bytes / w.executions),
+            "stored_kb": _kb(w.raw_bytes),
+        }
+        for w in profiler.workflows()[:top]
+    ]
+    sizes = {w.workflow_id: w.bytes or 1 for w in profiler.workflows()}
+    workflow_paths = [
+        {
+            "workflow": workflow_id,
+            "path": path,
+            "kb": _kb(size),
+            "workflow_share": round(size / sizes[workflow_id], 3),
+        }
+        for workflow_id, path, size in profiler.workflow_paths()[:top]
+    ]
+    return {"paths": paths, "workflows": workflows, "workflow_paths": workflow_paths}
+
+
+# --- Node timing and critical paths --------------------------------------------------
+
+_NODE_STATES_PATH = parse_path("node_states")
+
+
+@dataclass
+class CriticalPathStats:
+    """Critical-path tallies for one workflow across its executions."""
+
+    executions: int = 0
+    paths: Counter = field(default_factory=Counter)
+    span_seconds: float = 0.0
+    path_seconds: float = 0.0
+    node_hits: Counter = field(default_factory=Counter)
+    node_seconds: Counter = field(default_factory=Counter)
+    node_labels: dict[str, tuple[str, str]] = field(default_factory=dict)
+
+    def add(self, timings: Sequence[NodeTiming], path: Sequence[NodeTiming]) -> None:
+        self.executions += 1
+        self.paths[" > ".join(t.node_id for t in path)] += 1
+        self.span_seconds += max(t.completed for t in timings) - min(t.started for t in timings)
+        for t in path:
+            self.path_seconds += t.duration
+            self.node_hits[t.node_id] += 1
+            self.node_seconds[t.node_id] += t.duration
+            self.node_labels[t.node_id] = (t.node_type, t.model)
+
+
+@dataclass
+class NodeTimingReport:
+    durations: DurationColumns = field(
+        default_factory=lambda: DurationColumns({"node_type": [], "model": []})
+    )
+    workflows: dict[str, CriticalPathStats] = field(default_factory=dict)
+    executions: int = 0
+    untimed: int = 0
+
+
+def load_workflow_graph(
+    conn: sqlite3.Connection, workflow_id: str, cache: dict[str, WorkflowGraph]
+) -> WorkflowGraph:
+    """Graph for ``workflow_id`` from workflows.definition (empty if the table/row is missing)."""
+    graph = cache.get(workflow_id)
+    if graph is not None:
+        return graph
+    definition = None
+    try:
+        row = execute_with_retry(
+            conn, "SELECT definition FROM workflows WHERE id = ?", (workflow_id,)
+        ).fetchone()
+        if row is not None and row[0]:
+            definition = loads_state(row[0])
+    except (sqlite3.OperationalError, ValueError):
+        definition = None
+    graph = cache[workflow_id] = WorkflowGraph.from_definition(definition)
+    return graph
+
+
+def _node_states(state_text: str | None) -> object:
+    try:
+        for _, value in iter_path_values(state_text or "", _NODE_STATES_PATH):
+            return value
+    except (ValueError, IndexError):
+        pass
+    return None
+
+
+def analyze_node_timings(
+    conn: sqlite3.Connection,
+    filters: ExecutionFilters | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> NodeTimingReport:
+    """One keyset pass: decode only node_states per row, collect durations and critical paths."""
+    report = NodeTimingReport()
+    graphs: dict[str, WorkflowGraph] = {}
+    for row in iter_execution_rows(conn, filters, page_size=page_size, include_state=True):
+        report.executions += 1
+        graph = load_workflow_graph(conn, row["workflow_id"], graphs)
+        timings = node_timings(_node_states(row["state"]), graph)
+        if not timings:
+            report.untimed += 1
+            continue
+        report.durations.extend([(t.node_type, t.model, t.started, t.duration) for t in timings])
+        stats = report.workflows.setdefault(row["workflow_id"], CriticalPathStats())
+        stats.add(timings, critical_path(timings, graph))
+    return report
+
+
+def critical_path_records(report: NodeTimingReport) -> list[dict[str, object]]:
+    records = []
+    for workflow_id, stats in sorted(report.workflows.items()):
+        top_path, top_count = stats.paths.most_common(1)[0]
+        bottleneck, bottleneck_seconds = stats.node_seconds.most_common(1)[0]
+        records.append(
+            {
+                "workflow": workflow_id,
+                "executions": stats.executions,
+                "critical_path": top_path,
+                "path_share": round(top_count / stats.executions, 3),
+                "mean_span_s": round(stats.span_seconds / stats.executions, 3),
+                "mean_path_busy_s": round(stats.path_seconds / stats.executions, 3),
+                "bottleneck": bottleneck,
+                "bottleneck_share": round(bottleneck_seconds / (stats.path_seconds or 1), 3),
+            }
+        )
+    return records
+
+
+def critical_node_records(report: NodeTimingReport, top: int = 5) -> list[dict[str, object]]:
+    records = []
+    for workflow_id, stats in sorted(report.workflows.items()):
+        for node_id, seconds in stats.node_seconds.most_common(top):
+            node_type, model = stats.node_labels[node_id]
+            records.append(
+                {
+                    "workflow": workflow_id,
+                    "node": node_id,
+                    "type": node_type,
+                    "model": model,
+                    "on_path": round(stats.node_hits[node_id] / stats.executions, 3),
+                    "mean_critical_s": round(seconds / stats.executions, 3),
+                    "critical_share": round(seconds / (stats.path_seconds or 1), 3),
+                }
+            )
+    return records
+
+
+def node_report_sections(
+    report: NodeTimingReport, top: int = 5
+) -> dict[str, list[dict[str, object]]]:
+    by_model = [
+        r
+        for r in latency_records(summarize(report.durations, ["model"]), ["model"])
+        if r["group"] != "(n/a)"
+    ]
+    return {
+        "node_types": latency_records(summarize(report.durations, ["node_type"]), ["node_type"]),
+        "agent_models": by_model,
+        "critical_paths": critical_path_records(report),
+        "critical_nodes": critical_node_records(report, top),
+    }
+
+
+# --- CLI ----------------------------------------------------------------------
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Inspect workflow executions in the local SQLite DB.",
+        epilog="Subcommands (run '<subcommand> --help'): " + ", ".join(SUBCOMMANDS),
+    )
+    parser.add_argument("ids", nargs="*", help="Execution IDs to look up (default: most recent)")
+    parser.add_argument(
+        "--ids-file",
+        help="File of execution IDs (whitespace/comma separated, '-' for stdin)",
+    )
+    parser.add_argument("--limit", type=int, default=25, help="Rows for the recent listing")
+    stream = parser.add_argument_group("streaming")
+    stream.add_argument(
+        "--stream",
+        action="store_true",
+        help="Page through all matching executions oldest-first with bounded memory",
+    )
+    stream.add_argument(
+        "--follow",
+        action="store_true",
+        help="Like tail -f: emit new executions and status changes as they are committed",
+    )
+    stream.add_argument(
+        "--interval",
+        type=float,
+        default=FOLLOW_INTERVAL,
+        help=f"Seconds between --follow polls (default {FOLLOW_INTERVAL:g})",
+    )
+    stream.add_argument("--format", choices=STREAM_FORMATS, default="jsonl")
+    _add_filter_arguments(stream)
+    stream.add_argument(
+        "--cursor", help="Resume after the token printed by a previous --stream run"
+    )
+    stream.add_argument(
+        "--page-size",
+        type=int,
+        help=f"Rows per keyset page (default {DEFAULT_PAGE_SIZE}; "
+        f"{ROLLBACK_JOURNAL_PAGE_SIZE} on rollback-journal databases)",
+    )
+    stream.add_argument(
+        "--path",
+        action="append",
+        default=[],
+        metavar="SELECTOR",
+        help="Emit values at this path inside executions.state (repeatable), e.g. "
+        "'node_states.*.status' or 'logs[?level=ERROR].message'",
+    )
+    _add_access_arguments(parser)
+    return parser
+
+
+def _add_filter_arguments(parser: argparse.ArgumentParser | argparse._ArgumentGroup) -> None:
+    parser.add_argument("--since", help="started_at >= this ISO timestamp")
+    parser.add_argument("--until", help="started_at < this ISO timestamp")
+    parser.add_argument("--status", action="append", default=[], help="Repeatable")
+    parser.add_argument("--workflow", action="append", default=[], help="Repeatable workflow_id")
+
+
+def _add_access_arguments(parser: argparse.ArgumentParser) -> None:
+    access = parser.add_argument_group("database access")
+    access.add_argument(
+        "--immutable-snapshot",
+        action="store_true",
+        help="Query a private backup-API copy instead of the live file",
+    )
+    access.add_argument("--busy-timeout-ms", type=int, default=DEFAULT_BUSY_TIMEOUT_MS)
+    access.add_argument(
+        "--db",
+        action="append",
+        default=[],
+        metavar="PATH_OR_GLOB",
+        help="Database file or glob, repeatable (default: WORKFLOW_SQLITE_DB or ./workflows.db). "
+        "Several shards are queried concurrently and their results merged",
+    )
+    access.add_argument(
+        "--shard-workers",
+        type=int,
+        default=DEFAULT_SHARD_WORKERS,
+        help=f"Shards aggregated at once (default {DEFAULT_SHARD_WORKERS})",
+    )
+
+
+def _subcommand_parser(
+    name: str, description: str, formats: Sequence[str] = REPORT_FORMATS
+) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog=f"{Path(sys.argv[0]).name} {name}", description=description
+    )
+    parser.add_argument("--format", choices=formats, default="table")
+    _add_filter_arguments(parser.add_argument_group("filters"))
+    _add_access_arguments(parser)
+    return parser
+
+
+def build_scan_parser() -> argparse.ArgumentParser:
+    parser = _subcommand_parser(
+        "scan", "Decode executions.state in parallel and count reducer keys."
+    )
+    parser.add_argument(
+        "--reduce",
+        action="append",
+        choices=sorted(SCAN_REDUCERS),
+        help="Repeatable (default: status and node-status)",
+    )
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    return parser
+
+
+def build_latency_parser() -> argparse.ArgumentParser:
+    parser = _subcommand_parser(
+        "latency", "Duration percentiles and histograms of completed executions."
+    )
+    parser.add_argument(
+        "--by",
+        action="append",
+        metavar="DIMS",
+        help="Grouping, comma-joined from workflow,status,owner (repeatable; "
+        "default: workflow, status and owner separately)",
+    )
+    parser.add_argument("--window", choices=WINDOWS, default="all", help="Time bucket")
+    parser.add_argument("--histogram", action="store_true", help="Also print duration histograms")
+    parser.add_argument(
+        "--engine",
+        choices=("auto", "numpy", "sketch"),
+        default="auto",
+        help="numpy: exact, vectorized; sketch: pure Python, ~1%% relative error",
+    )
+    return parser
+
+
+def build_nodes_parser() -> argparse.ArgumentParser:
+    parser = _subcommand_parser(
+        "nodes",
+        "Per-node duration distributions and per-workflow critical paths from node_states.",
+        formats=NODE_REPORT_FORMATS,
+    )
+    parser.add_argument("--top", type=int, default=5, help="Critical nodes listed per workflow")
+    return parser
+
+
+def build_rollup_parser() -> argparse.ArgumentParser:
+    parser = _subcommand_parser(
+        "rollup",
+        "Refresh the incremental rollup sidecar and report counts and latency from it. "
+        "Filters apply to the report at whole-day granularity.",
+    )
+    parser.add_argument(
+        "--by",
+        action="append",
+        metavar="DIMS",
+        help="Grouping, comma-joined from workflow,status,owner (repeatable; default: status)",
+    )
+    parser.add_argument("--window", choices=ROLLUP_WINDOWS, default="all", help="Time bucket")
+    parser.add_argument(
+        "--rollup-db", type=Path, help="Sidecar path (default: <database>.rollup)"
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--no-refresh", action="store_true", help="Report from the sidecar as-is (read-only)"
+    )
+    mode.add_argument("--refresh-only", action="store_true", help="Refresh without reporting")
+    mode.add_argument("--rebuild", action="store_true", help="Discard and refold everything")
+    return parser
+
+
+def build_concurrency_parser() -> argparse.ArgumentParser:
+    parser = _subcommand_parser(
+        "concurrency",
+        "In-flight executions over time (sweep line): peak and time-weighted percentile "
+        "concurrency, arrivals per minute, and time spent above pool/limit capacities.",
+        formats=NODE_REPORT_FORMATS,
+    )
+    parser.add_argument("--window", choices=tuple(WINDOW_SECONDS), default="all")
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        action="append",
+        metavar="N",
+        help="Capacity to compare against (repeatable; default: "
+        + ", ".join(f"{n} {label}" for n, label in DEFAULT_CAPACITIES.items())
+        + ")",
+    )
+    parser.add_argument(
+        "--horizon",
+        help="ISO time at which unfinished executions stop counting (default: latest "
+        "timestamp in the data, so stale 'running' rows do not stretch to now)",
+    )
+    return parser
+
+
+def build_stuck_parser() -> argparse.ArgumentParser:
+    parser = _subcommand_parser(
+        "stuck",
+        "Executions still pending/running past a threshold, split into slow (recent log or "
+        "node activity) and orphaned (idle), with a remediation list. --status overrides the "
+        "pending/running default.",
+        formats=STUCK_REPORT_FORMATS,
+    )
+    parser.add_argument(
+        "--older-than",
+        type=float,
+        default=STUCK_AFTER_SECONDS,
+        metavar="SECONDS",
+        help=f"Started at least this long ago (default {STUCK_AFTER_SECONDS}, "
+        "execution.timeout-seconds)",
+    )
+    parser.add_argument(
+        "--idle",
+        type=float,
+        default=DEAD_AFTER_IDLE_SECONDS,
+        metavar="SECONDS",
+        help=f"No activity for this long means orphaned (default {DEAD_AFTER_IDLE_SECONDS}, "
+        "the per-node timeout)",
+    )
+    parser.add_argument("--now", help="Reference time as ISO timestamp (default: current UTC)")
+    parser.add_argument(
+        "--create-index",
+        action="store_true",
+        help=f"Create {STATUS_STARTED_INDEX} on (status, started_at) if missing. This writes "
+        "to the live database and holds its write lock while the index builds",
+    )
+    return parser
+
+
+def build_failures_parser() -> argparse.ArgumentParser:
+    parser = _subcommand_parser(
+        "failures",
+        "Cluster state.error and ERROR-level log messages into templates (Drain) and rank "
+        "them, with per workflow/node counts. Only failed executions unless --status is given.",
+        formats=NODE_REPORT_FORMATS,
+    )
+    parser.add_argument("--top", type=int, default=20, help="Templates reported")
+    parser.add_argument(
+        "--sources", type=int, default=5, help="Workflow/node rows listed per template"
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        default=0.5,
+        help="Share of tokens that must agree for a message to join a template",
+    )
+    parser.add_argument(
+        "--max-templates",
+        type=int,
+        default=2000,
+        help="Memory bound; the least recently matched template is evicted beyond it",
+    )
+    return parser
+
+
+def build_sizes_parser() -> argparse.ArgumentParser:
+    parser = _subcommand_parser(
+        "sizes",
+        "Attribute executions.state bytes to JSON paths and workflows, with per-path zlib "
+        "ratio and the share of bytes repeating a value from an earlier execution.",
+        formats=NODE_REPORT_FORMATS,
+    )
+    parser.add_argument("--top", type=int, default=30, help="Rows per section")
+    parser.add_argument(
+        "--depth", type=int, default=4, help="Deepest path level tracked (default 4)"
+    )
+    parser.add_argument(
+        "--max-paths",
+        type=int,
+        default=256,
+        help="Memory bound; values under further paths are counted as (other)",
+    )
+    return parser
+
+
+def build_search_parser() -> argparse.ArgumentParser:
+    parser = _subcommand_parser(
+        "search",
+        "Full-text search over state.logs messages via the log index sidecar, refreshed "
+        "first. --since/--until compare log entry timestamps; --status is not supported.",
+    )
+    parser.add_argument(
+        "query",
+        nargs="?",
+        help='FTS5 query on messages: words, "quoted phrases", prefix*, AND/OR/NOT, NEAR()',
+    )
+    parser.add_argument(
+        "--level", action="append", default=[], help="Log level, e.g. ERROR (repeatable)"
+    )
+    parser.add_argument(
+        "--node", action="append", default=[], metavar="NODE_ID", help="Repeatable"
+    )
+    parser.add_argument(
+        "--executions",
+        action="store_true",
+        help="One row per matching execution (hit count, first/last hit) instead of entries",
+    )
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument(
+        "--by-time", action="store_true", help="Newest entries first instead of best match"
+    )
+    parser.add_argument("--index-db", type=Path, help="Sidecar path (default: <database>.logs)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--no-refresh", action="store_true", help="Search the sidecar as-is (read-only)"
+    )
+    mode.add_argument("--refresh-only", action="store_true", help="Refresh without searching")
+    mode.add_argument("--rebuild", action="store_true", help="Discard and reindex everything")
+    return parser
+
+
+def filters_from_args(args: argparse.Namespace, lookup_ids: bool = False) -> ExecutionFilters:
+    return ExecutionFilters(
+        since=args.since,
+        until=args.until,
+        statuses=tuple(args.status),
+        workflow_ids=tuple(args.workflow),
+        lookup_ids=lookup_ids,
+    )
+
+
+def _iter_requested_ids(args: argparse.Namespace) -> Iterator[str]:
+    yield from (a for a in args.ids if a.strip())
+    if args.ids_file == "-":
+        yield from read_ids(sys.stdin)
+    elif args.ids_file:
+        with open(args.ids_file, encoding="utf-8") as f:
+            yield from read_ids(f)
+
+
+def _report_missing(conn: sqlite3.Connection, archived: Iterable[str] = ()) -> None:
+    archived = set(archived)
+    _print_missing([i for i in missing_lookup_ids(conn) if i not in archived])
+
+
+def _print_missing(missing: Sequence[str]) -> None:
+    if missing:
+        shown = ", ".join(missing[:50])
+        more = f" (+{len(missing) - 50} more)" if len(missing) > 50 else ""
+        print(f"\nIDs not found in DB ({len(missing)}): {shown}{more}", file=sys.stderr)
+
+
+def _print_table(rows: Sequence[sqlite3.Row | dict], title: str | None = None) -> None:
+    cols = list(rows[0].keys())
+    widths = {
+        c: max(
+            len(c),
+            *(len("" if r[c] is None else str(r[c])) for r in rows),
+        )
+        for c in cols
+    }
+
+    def line(values: dict[str, object]) -> str:
+        return "  ".join(
+            str(values[c])[:200].ljust(widths[c]) for c in cols
+        )
+
+    if title:
+        print(title)
+    print(line({c: c for c in cols}))
+    print("-" * (sum(widths[c] for c in cols) + 2 * (len(cols) - 1)))
+    for r in rows:
+        print(line({c: ("" if r[c] is None else str(r[c])) for c in cols}))
+
+
+def default_page_size(conn: sqlite3.Connection) -> int:
+    # Under a rollback journal every open page query blocks the writer's commit.
+    return DEFAULT_PAGE_SIZE if journal_mode(conn) == "wal" else ROLLBACK_JOURNAL_PAGE_SIZE
+
+
+def _run_stream(
+    conn: sqlite3.Connection,
+    args: argparse.Namespace,
+    lookup_ids: bool = False,
+    archive_dir: Path | None = None,
+) -> int:
+    try:
+        cursor = decode_cursor(args.cursor) if args.cursor else None
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    page_size = args.page_size or default_page_size(conn)
+    filters = filters_from_args(args, lookup_ids=lookup_ids)
+    archived = (
+        fetch_archived_rows(conn, archive_dir, filters) if lookup_ids and archive_dir else []
+    )
+    count, token = 0, None
+    try:
+        count, token = stream_executions(
+            conn,
+            sys.stdout,
+            fmt=args.format,
+            filters=filters,
+            cursor=cursor,
+            page_size=page_size,
+            extra_rows=archived,
+        )
+    except BrokenPipeError:
+        # Downstream (e.g. `| head`) closed early; nothing useful left to report.
+        sys.stderr.close()
+        return 0
+    print(
+        f"Streamed {count} row(s)"
+        + (f", {len(archived)} from the archive." if archived else "."),
+        file=sys.stderr,
+    )
+    if token:
+        print(f"Resume with: --cursor {token}", file=sys.stderr)
+    if lookup_ids:
+        _report_missing(conn, {r["id"] for r in archived})
+    return 0
+
+
+def _run_follow(conn: sqlite3.Connection, args: argparse.Namespace) -> int:
+    follower = ExecutionFollower(conn, filters_from_args(args))
+    follower.start()
+    print(
+        f"Following executions after rowid {follower.high_water} "
+        f"({len(follower.tracked)} unsettled tracked); Ctrl-C to stop.",
+        file=sys.stderr,
+    )
+    write = make_row_writer(args.format, sys.stdout)
+    events = 0
+    try:
+        while True:
+            for event in follower.poll():
+                write(event)
+                events += 1
+            sys.stdout.flush()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        sys.stderr.close()
+        return 0
+    print(f"\n{events} event(s).", file=sys.stderr)
+    return 0
+
+
+def _run_paths(
+    conn: sqlite3.Connection,
+    args: argparse.Namespace,
+    selectors: Sequence[tuple[PathStep, ...]],
+    lookup_ids: bool = False,
+    archive_dir: Path | None = None,
+) -> int:
+    try:
+        cursor = decode_cursor(args.cursor) if args.cursor else None
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    write = make_row_writer(args.format, sys.stdout)
+    filters = filters_from_args(args, lookup_ids=lookup_ids)
+    archived = (
+        fetch_archived_rows(conn, archive_dir, filters, include_state=True)
+        if lookup_ids and archive_dir
+        else []
+    )
+    rows = itertools.chain(
+        iter_execution_rows(
+            conn,
+            filters,
+            cursor=cursor,
+            page_size=args.page_size or DEFAULT_PAGE_SIZE,
+            include_state=True,
+        ),
+        archived,
+    )
+    matches = 0
+    try:
+        for record in iter_state_matches(rows, selectors):
+            write(record)
+            matches += 1
+    except BrokenPipeError:
+        sys.stderr.close()
+        return 0
+    finally:
+        sys.stdout.flush()
+    print(f"{matches} match(es).", file=sys.stderr)
+    return 0
+
+
+def emit_records(
+    records: Sequence[dict[str, object]], fmt: str, out: TextIO, title: str | None = None
+) -> None:
+    """Write aggregate report rows as an aligned table or jsonl/csv/tsv."""
+    if fmt == "table":
+        if records:
+            _print_table(records, title)
+        else:
+            print(f"{title}\n(no rows)" if title else "(no rows)")
+        return
+    write = make_row_writer(fmt, out)
+    for record in records:
+        write(record)
+    out.flush()
+
+
+def resolve_db() -> Path | None:
+    """The database path from default_db_path(), or None (after a message) if it is missing."""
+    db = default_db_path()
+    if not db.is_file():
+        print(f"Database file not found: {db}", file=sys.stderr)
+        print("Set WORKFLOW_SQLITE_DB or run from repo with workflows.db at root.", file=sys.stderr)
+        return None
+    return db
+
+
+def has_executions_table(conn: sqlite3.Connection, db: Path | None = None) -> bool:
+    """True if ``conn`` has an executions table; otherwise print why not and return False."""
+    cur = execute_with_retry(
+        conn, "SELECT name FROM sqlite_master WHERE type='table' AND name='executions'"
+    )
+    if cur.fetchone() is None:
+        print(f"Table 'executions' does not exist{f' in {db}' if db else ''}.", file=sys.stderr)
+        return False
+    return True
+
+
+# --- Shards -----------------------------------------------------------------------------
+#
+# --db may name several files (one per backend replica) or globs. Row listings and --stream
+# read every shard in its own thread and k-way merge on started_at (shard_fanout.py);
+# latency, failures and sizes combine per-shard aggregates. Commands that keep a sidecar or
+# write to the database take exactly one file.
+
+
+def _resolve_shards(args: argparse.Namespace) -> list[Path] | None:
+    if not args.db:
+        db = resolve_db()
+        return None if db is None else [db]
+    shards, unmatched = expand_shards(args.db)
+    for pattern in unmatched:
+        print(f"No database file matches {pattern!r}", file=sys.stderr)
+    return shards or None
+
+
+def _single_db(args: argparse.Namespace, command: str) -> Path | None:
+    shards = _resolve_shards(args)
+    if shards is not None and len(shards) > 1:
+        print(
+            f"{command} reads one database but --db matched {len(shards)}; run it per shard.",
+            file=sys.stderr,
+        )
+        return None
+    return shards[0] if shards else None
+
+
+def _started_key(row: sqlite3.Row | dict[str, object]) -> tuple[bool, float, str]:
+    """started_at as epoch seconds (NULL first, like SQL), so shards with either storage merge."""
+    try:
+        started = parse_timestamp(row["started_at"])
+    except ValueError:
+        started = None
+    return started is not None, started or 0.0, str(row["id"])
+
+
+def _open_shard(shard: Path, args: argparse.Namespace) -> contextlib.AbstractContextManager:
+    return open_inspection_db(
+        shard, immutable_snapshot=args.immutable_snapshot, busy_timeout_ms=args.busy_timeout_ms
+    )
+
+
+def _lookup_in_shard(shard: Path, args: argparse.Namespace, ids: Sequence[str]) -> list[dict]:
+    with _open_shard(shard, args) as conn:
+        load_lookup_ids(conn, ids)
+        rows = [dict(r) for r in fetch_lookup_rows(conn)]
+        return rows + fetch_archived_rows(conn, archive_path(shard))
+
+
+def _recent_in_shard(shard: Path, args: argparse.Namespace) -> list[dict]:
+    with _open_shard(shard, args) as conn:
+        return [dict(r) for r in fetch_execution_rows(conn, None, recent_limit=args.limit)]
+
+
+def _run_shards(shards: Sequence[Path], args: argparse.Namespace, by_id: bool) -> int:
+    labels = shard_labels(shards)
+    ids = list(dict.fromkeys(_iter_requested_ids(args))) if by_id else []
+    try:
+        if args.stream:
+            return _stream_shards(shards, labels, args, ids)
+        if by_id:
+            parts = map_shards(shards, lambda s: _lookup_in_shard(s, args, ids), args.shard_workers)
+        else:
+            parts = map_shards(shards, lambda s: _recent_in_shard(s, args), args.shard_workers)
+    except ShardError as e:
+        print(f"Shard {e}", file=sys.stderr)
+        return 1
+    rows = [{"shard": labels[s], **row} for s, part in zip(shards, parts) for row in part]
+    rows.sort(key=_started_key, reverse=not by_id)
+    if not by_id:
+        rows = rows[: args.limit]
+    if rows:
+        _print_table(rows, f"Databases: {len(shards)} shard(s)")
+    else:
+        print("No matching rows." if by_id else "No executions in database.")
+    if by_id:
+        found = {r["id"] for r in rows}
+        _print_missing([i for i in ids if i not in found])
+    return 0
+
+
+def _stream_shards(
+    shards: Sequence[Path], labels: dict[Path, str], args: argparse.Namespace, ids: Sequence[str]
+) -> int:
+    """--stream over every shard at once, merged oldest first; each row gains a shard column."""
+    filters = filters_from_args(args, lookup_ids=bool(ids))
+
+    def produce(shard: Path) -> Iterator[sqlite3.Row | dict[str, object]]:
+        with _open_shard(shard, args) as conn:
+            if ids:
+                load_lookup_ids(conn, ids)
+            live = iter_execution_rows(
+                conn, filters, page_size=args.page_size or default_page_size(conn)
+            )
+            archived = fetch_archived_rows(conn, archive_path(shard), filters) if ids else []
+            yield from heapq.merge(live, archived, key=_started_key)
+
+    write = make_row_writer(args.format, sys.stdout)
+    count = 0
+    found = set()
+    try:
+        for shard, row in merge_shards(shards, produce, key=_started_key):
+            write({"shard": labels[shard], **dict(row)})
+            count += 1
+            if ids:
+                found.add(row["id"])
+    except BrokenPipeError:
+        sys.stderr.close()
+        return 0
+    finally:
+        sys.stdout.flush()
+    print(f"Streamed {count} row(s) from {len(shards)} shard(s).", file=sys.stderr)
+    if ids:
+        _print_missing([i for i in ids if i not in found])
+    return 0
+
+
+def _fold_state_rows(
+    shards: Sequence[Path],
+    args: argparse.Namespace,
+    filters: ExecutionFilters,
+    fold: Callable[[Iterable[sqlite3.Row]], T],
+) -> T | None:
+    """
+    ``fold`` over the rows (with state) of every shard, or None after printing why not.
+    Shards are read concurrently in rowid order; decoding happens in the calling thread.
+    """
+    if len(shards) == 1:
+        with _open_shard(shards[0], args) as conn:
+            if not has_executions_table(conn):
+                return None
+            return fold(iter_rows_in_rowid_order(conn, filters, include_state=True))
+
+    def produce(shard: Path) -> Iterator[sqlite3.Row]:
+        with _open_shard(shard, args) as conn:
+            yield from iter_rows_in_rowid_order(conn, filters, include_state=True)
+
+    try:
+        return fold(row for _, row in merge_shards(shards, produce))
+    except ShardError as e:
+        print(f"Shard {e}", file=sys.stderr)
+        return None
+
+
+def _parse_groupings(specs: Sequence[str], dimensions: Iterable[str]) -> list[list[str]] | None:
+    groupings = [[d.strip() for d in spec.split(",") if d.strip()] for spec in specs]
+    unknown = {d for g in groupings for d in g} - set(dimensions)
+    if unknown:
+        print(f"Unknown --by dimension(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+        return None
+    return groupings
+
+
+def _cmd_scan(args: argparse.Namespace) -> int:
+    db = _single_db(args, "scan")
+    if db is None:
+        return 1
+    reducers = args.reduce or ["status", "node-status"]
+    with contextlib.ExitStack() as stack:
+        target = stack.enter_context(snapshot_copy(db)) if args.immutable_snapshot else db
+        conn = open_readonly(target, immutable=args.immutable_snapshot)
+        try:
+            if not has_executions_table(conn):
+                return 1
+        finally:
+            conn.close()
+        started = time.monotonic()
+        result = parallel_scan(
+            target,
+            reducers,
+            filters=filters_from_args(args),
+            workers=args.workers,
+            immutable=args.immutable_snapshot,
+        )
+        elapsed = time.monotonic() - started
+    emit_records(scan_records(result), args.format, sys.stdout, title=f"Database: {db}")
+    print(
+        f"Scanned {result.rows} state(s) in {elapsed:.2f}s "
+        f"({result.undecodable} undecodable, json backend: {json_backend()}).",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _cmd_latency(args: argparse.Namespace) -> int:
+    groupings = _parse_groupings(args.by or ["workflow", "status", "owner"], LATENCY_DIMENSIONS)
+    if groupings is None:
+        return 2
+    use_numpy = None if args.engine == "auto" else args.engine == "numpy"
+    shards = _resolve_shards(args)
+    if shards is None:
+        return 1
+    dimensions = sorted({d for g in groupings for d in g})
+    filters = filters_from_args(args)
+
+    def fetch(shard: Path) -> DurationColumns | None:
+        with _open_shard(shard, args) as conn:
+            if not has_executions_table(conn, shard if len(shards) > 1 else None):
+                return None
+            return fetch_duration_columns(conn, dimensions, filters)
+
+    started = time.monotonic()
+    try:
+        parts = map_shards(shards, fetch, args.shard_workers)
+    except ShardError as e:
+        print(f"Shard {e}", file=sys.stderr)
+        return 1
+    if any(part is None for part in parts):
+        return 1
+    # Percentiles need every duration, so shards contribute rows, not summaries.
+    columns = DurationColumns.concat(parts)
+    fetched = time.monotonic() - started
+    try:
+        for group_by in groupings:
+            summaries = summarize(columns, group_by, args.window, use_numpy=use_numpy)
+            title = f"Latency (seconds) by {','.join(group_by)}, window={args.window}"
+            emit_records(latency_records(summaries, group_by), args.format, sys.stdout, title)
+            if args.histogram:
+                emit_records(
+                    histogram_records(summaries, group_by),
+                    args.format,
+                    sys.stdout,
+                    f"Histogram by {','.join(group_by)}, window={args.window}",
+                )
+            if args.format == "table":
+                print()
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    print(
+        f"{len(columns)} completed execution(s)"
+        f"{f' from {len(shards)} shards' if len(shards) > 1 else ''}; fetch {fetched:.2f}s, "
+        f"total {time.monotonic() - started:.2f}s.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _cmd_nodes(args: argparse.Namespace) -> int:
+    db = _single_db(args, "nodes")
+    if db is None:
+        return 1
+    with open_inspection_db(
+        db, immutable_snapshot=args.immutable_snapshot, busy_timeout_ms=args.busy_timeout_ms
+    ) as conn:
+        if not has_executions_table(conn):
+            return 1
+        report = analyze_node_timings(conn, filters_from_args(args))
+    sections = node_report_sections(report, args.top)
+    if args.format == "json":
+        json.dump(sections, sys.stdout, indent=2, default=str)
+        print()
+    else:
+        titles = {
+            "node_types": "Node duration (seconds) by node type",
+            "agent_models": "Agent node duration (seconds) by model",
+            "critical_paths": "Most frequent critical path per workflow",
+            "critical_nodes": "Nodes on the critical path (share of critical time)",
+        }
+        for name, records in sections.items():
+            emit_records(records, args.format, sys.stdout, titles[name])
+            if args.format == "table":
+                print()
+    print(
+        f"{report.executions} execution(s), {report.untimed} without node timings.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _cmd_concurrency(args: argparse.Namespace) -> int:
+    capacities = (
+        {n: "--capacity" for n in args.capacity} if args.capacity else DEFAULT_CAPACITIES
+    )
+    try:
+        horizon = parse_timestamp(args.horizon) if args.horizon else None
+    except ValueError as e:
+        print(f"Invalid --horizon: {e}", file=sys.stderr)
+        return 2
+    db = _single_db(args, "concurrency")
+    if db is None:
+        return 1
+    started = time.monotonic()
+    with open_inspection_db(
+        db, immutable_snapshot=args.immutable_snapshot, busy_timeout_ms=args.busy_timeout_ms
+    ) as conn:
+        if not has_executions_table(conn):
+            return 1
+        sweep = sweep_concurrency(conn, filters_from_args(args), args.window, horizon)
+    sections = concurrency_sections(sweep, capacities)
+    if args.format == "json":
+        json.dump(sections, sys.stdout, indent=2)
+        print()
+    else:
+        titles = {
+            "concurrency": f"In-flight executions, window={args.window} (time-weighted)",
+            "arrivals": "Arrivals per minute",
+            "capacity": "Time above capacity",
+        }
+        for name, records in sections.items():
+            emit_records(records, args.format, sys.stdout, titles[name])
+            if args.format == "table":
+                print()
+    print(
+        f"{sweep.executions} execution(s) swept in {time.monotonic() - started:.2f}s; "
+        f"{sweep.open_ended} unfinished, {sweep.out_of_order} out of start order.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _cmd_stuck(args: argparse.Namespace) -> int:
+    try:
+        now = parse_timestamp(args.now) if args.now else time.time()
+    except ValueError as e:
+        print(f"Invalid --now: {e}", file=sys.stderr)
+        return 2
+    db = _single_db(args, "stuck")
+    if db is None:
+        return 1
+    with contextlib.closing(open_readonly(db, busy_timeout_ms=args.busy_timeout_ms)) as probe:
+        if not has_executions_table(probe):
+            return 1
+        indexed = has_status_started_index(probe)
+    if not indexed and args.create_index:
+        started = time.monotonic()
+        create_status_started_index(db, args.busy_timeout_ms)
+        indexed = True
+        print(
+            f"Created {STATUS_STARTED_INDEX} in {time.monotonic() - started:.2f}s.",
+            file=sys.stderr,
+        )
+    elif not indexed:
+        print(
+            "No index on executions(status, started_at): this check scans the whole table. "
+            "Re-run with --create-index to add one.",
+            file=sys.stderr,
+        )
+    started = time.monotonic()
+    with open_inspection_db(
+        db, immutable_snapshot=args.immutable_snapshot, busy_timeout_ms=args.busy_timeout_ms
+    ) as conn:
+        stuck = find_stuck_executions(
+            conn, now, args.older_than, filters_from_args(args), args.idle
+        )
+        storage = detect_timestamp_storage(conn)
+    elapsed = time.monotonic() - started
+    try:
+        if args.format == "sql":
+            for statement in remediation_sql(stuck, storage, now):
+                print(statement)
+        else:
+            emit_records(
+                stuck_records(stuck),
+                args.format,
+                sys.stdout,
+                f"Executions unsettled for over {args.older_than:g}s (as of {_iso(now)})",
+            )
+    except BrokenPipeError:
+        sys.stderr.close()
+        return 0
+    orphaned = sum(1 for s in stuck if s.orphaned)
+    print(
+        f"{len(stuck)} stuck: {orphaned} orphaned, {len(stuck) - orphaned} slow "
+        f"({elapsed:.3f}s, {'indexed' if indexed else 'full scan'}).",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _cmd_rollup(args: argparse.Namespace) -> int:
+    groupings = _parse_groupings(args.by or ["status"], ROLLUP_DIMENSIONS)
+    if groupings is None:
+        return 2
+    db = _single_db(args, "rollup")
+    if db is None:
+        return 1
+    path = args.rollup_db or rollup_sidecar_path(db)
+    if args.no_refresh and not path.is_file():
+        print(f"Rollup sidecar not found: {path} (run without --no-refresh)", file=sys.stderr)
+        return 1
+    with RollupStore(path, readonly=args.no_refresh) as store:
+        if not args.no_refresh:
+            started = time.monotonic()
+            with open_inspection_db(
+                db,
+                immutable_snapshot=args.immutable_snapshot,
+                busy_timeout_ms=args.busy_timeout_ms,
+            ) as conn:
+                if not has_executions_table(conn):
+                    return 1
+                refresh = refresh_rollup(conn, store, rebuild=args.rebuild)
+            print(
+                f"Refreshed {path}{' (rebuilt)' if refresh.rebuilt else ''}: "
+                f"{refresh.new_rows} new row(s), {refresh.rechecked} in-flight re-checked, "
+                f"{refresh.folded} folded in {time.monotonic() - started:.2f}s.",
+                file=sys.stderr,
+            )
+        if not args.refresh_only:
+            for group_by in groupings:
+                groups = store.groups(
+                    group_by,
+                    args.window,
+                    since=args.since,
+                    until=args.until,
+                    statuses=args.status,
+                    workflow_ids=args.workflow,
+                )
+                title = f"Rollup by {','.join(group_by)}, window={args.window} (seconds)"
+                emit_records(rollup_records(groups, group_by), args.format, sys.stdout, title)
+                if args.format == "table":
+                    print()
+        in_flight = store.in_flight_counts()
+        print(
+            f"{store.folded_count()} settled execution(s) folded; in flight: "
+            f"{', '.join(f'{s}={n}' for s, n in in_flight.items()) or 'none'}; "
+            f"last refresh {store.get_meta('refreshed_at') or 'never'}.",
+            file=sys.stderr,
+        )
+    return 0
+
+
+def _cmd_failures(args: argparse.Namespace) -> int:
+    try:
+        miner = TemplateMiner(similarity=args.similarity, max_templates=args.max_templates)
+    except ValueError as e:
+        print(f"Invalid --similarity: {e}", file=sys.stderr)
+        return 2
+    shards = _resolve_shards(args)
+    if shards is None:
+        return 1
+    filters = filters_from_args(args)
+    if not filters.statuses:
+        filters = replace(filters, statuses=("failed",))
+    started = time.monotonic()
+    stats = _fold_state_rows(shards, args, filters, lambda rows: mine_failure_rows(rows, miner))
+    if stats is None:
+        return 1
+    elapsed = time.monotonic() - started
+    sections = failure_sections(miner, args.top, args.sources)
+    try:
+        if args.format == "json":
+            json.dump(sections, sys.stdout, indent=2, default=str)
+            print()
+        else:
+            titles = {
+                "templates": f"Top failure templates ({', '.join(filters.statuses)} executions)",
+                "sources": "Where each template occurs (by rank)",
+            }
+            for name, records in sections.items():
+                emit_records(records, args.format, sys.stdout, titles[name])
+                if args.format == "table":
+                    print()
+    except BrokenPipeError:
+        sys.stderr.close()
+        return 0
+    evicted = (
+        f"; {miner.evicted} rare template(s) evicted ({miner.evicted_messages} messages)"
+        if miner.evicted
+        else ""
+    )
+    print(
+        f"{stats.messages} message(s) from {stats.executions} execution(s) -> {len(miner)} "
+        f"template(s) in {elapsed:.2f}s; {stats.undecodable} undecodable state(s){evicted}.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _cmd_sizes(args: argparse.Namespace) -> int:
+    try:
+        profiler = StateProfiler(depth=args.depth, max_paths=args.max_paths)
+    except ValueError as e:
+        print(f"Invalid --depth: {e}", file=sys.stderr)
+        return 2
+    shards = _resolve_shards(args)
+    if shards is None:
+        return 1
+    started = time.monotonic()
+    stats = _fold_state_rows(
+        shards, args, filters_from_args(args), lambda rows: profile_state_rows(rows, profiler)
+    )
+    if stats is None:
+        return 1
+    elapsed = time.monotonic() - started
+    sections = size_sections(profiler, args.top)
+    try:
+        if args.format == "json":
+            json.dump(sections, sys.stdout, indent=2, default=str)
+            print()
+        else:
+            titles = {
+                "paths": "Bytes by state path (inclusive: a path contains its children)",
+                "workflows": "Bytes by workflow",
+                "workflow_paths": f"Bytes by workflow and path (depth <= {WORKFLOW_DEPTH})",
+            }
+            for name, records in sections.items():
+                emit_records(records, args.format, sys.stdout, titles[name])
+                if args.format == "table":
+                    print()
+    except BrokenPipeError:
+        sys.stderr.close()
+        return 0
+    stored = sum(w.raw_bytes for w in profiler.workflows())
+    print(
+        f"{profiler.executions} state(s), {profiler.bytes / 2**20:.1f} MB as compact JSON "
+        f"({stored / 2**20:.1f} MB stored) in {elapsed:.2f}s; "
+        f"{stats.undecodable} undecodable state(s).",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _cmd_search(args: argparse.Namespace) -> int:
+    if args.status:
+        print("search does not filter by --status (log entries carry no status)", file=sys.stderr)
+        return 2
+    if not args.refresh_only and not (args.query or "").strip():
+        print("A query is required unless --refresh-only is given.", file=sys.stderr)
+        return 2
+    try:
+        since = parse_timestamp(args.since)
+        until = parse_timestamp(args.until)
+    except ValueError as e:
+        print(f"Invalid --since/--until: {e}", file=sys.stderr)
+        return 2
+    db = _single_db(args, "search")
+    if db is None:
+        return 1
+    path = args.index_db or log_sidecar_path(db)
+    if args.no_refresh and not path.is_file():
+        print(f"Log index not found: {path} (run without --no-refresh)", file=sys.stderr)
+        return 1
+    with LogIndex(path, readonly=args.no_refresh) as index:
+        if not args.no_refresh:
+            started = time.monotonic()
+            with open_inspection_db(
+                db,
+                immutable_snapshot=args.immutable_snapshot,
+                busy_timeout_ms=args.busy_timeout_ms,
+            ) as conn:
+                if not has_executions_table(conn):
+                    return 1
+                refresh = refresh_log_index(conn, index, rebuild=args.rebuild)
+            print(
+                f"Refreshed {path}{' (rebuilt)' if refresh.rebuilt else ''}: "
+                f"{refresh.new_rows} new row(s), {refresh.rechecked} in-flight re-checked, "
+                f"{refresh.entries} entries added in {time.monotonic() - started:.2f}s.",
+                file=sys.stderr,
+            )
+        if args.refresh_only:
+            return 0
+        options = dict(
+            since=since,
+            until=until,
+            workflow_ids=args.workflow,
+            levels=args.level,
+            node_ids=args.node,
+            limit=args.limit,
+        )
+        started = time.monotonic()
+        try:
+            if args.executions:
+                records = execution_hit_records(index.executions(args.query, **options))
+            else:
+                records = log_hit_records(
+                    index.search(args.query, by_time=args.by_time, **options)
+                )
+        except sqlite3.OperationalError as e:
+            print(f"Invalid search query {args.query!r}: {e}", file=sys.stderr)
+            return 2
+        elapsed = time.monotonic() - started
+        try:
+            emit_records(records, args.format, sys.stdout, f"Log entries matching {args.query!r}")
+        except BrokenPipeError:
+            sys.stderr.close()
+            return 0
+        print(
+            f"{len(records)} result(s) in {elapsed:.3f}s from {index.entry_count()} indexed "
+            f"entries; last refresh {index.get_meta('refreshed_at') or 'never'}.",
+            file=sys.stderr,
+        )
+    return 0
+
+
+Subcommand = tuple[Callable[[], argparse.ArgumentParser], Callable[[argparse.Namespace], int]]
+
+SUBCOMMANDS: dict[str, Subcommand] = {
+    "scan": (build_scan_parser, _cmd_scan),
+    "latency": (build_latency_parser, _cmd_latency),
+    "nodes": (build_nodes_parser, _cmd_nodes),
+    "rollup": (build_rollup_parser, _cmd_rollup),
+    "concurrency": (build_concurrency_parser, _cmd_concurrency),
+    "stuck": (build_stuck_parser, _cmd_stuck),
+    "search": (build_search_parser, _cmd_search),
+    "failures": (build_failures_parser, _cmd_failures),
+    "sizes": (build_sizes_parser, _cmd_sizes),
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    try:
+        return _main(argv)
+    except BackupError as e:
+        print(
+            f"--immutable-snapshot failed: {e}; retry when the backend is quieter.",
+            file=sys.stderr,
+        )
+        return 1
+
+
+def _main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] in SUBCOMMANDS:
+        build, run = SUBCOMMANDS[argv[0]]
+        return run(build().parse_args(argv[1:]))
+
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    by_id = bool(args.ids_file) or any(a.strip() for a in args.ids)
+    try:
+        selectors = [parse_path(p) for p in args.path]
+    except PathSyntaxError as e:
+        parser.error(str(e))
+    if args.follow and (
+        by_id or selectors or args.cursor or args.since or args.until or args.immutable_snapshot
+    ):
+        parser.error(
+            "--follow watches the live table and only combines with --status, --workflow, "
+            "--format and --interval"
+        )
+
+    shards = _resolve_shards(args)
+    if shards is None:
+        return 1
+    if len(shards) > 1:
+        if args.follow or selectors or args.cursor:
+            parser.error(
+                f"--follow, --path and --cursor read one database; --db matched {len(shards)}"
+            )
+        return _run_shards(shards, args, by_id)
+    db = shards[0]
+
+    with open_inspection_db(
+        db,
+        immutable_snapshot=args.immutable_snapshot,
+        busy_timeout_ms=args.busy_timeout_ms,
+    ) as conn:
+        if not has_executions_table(conn):
+            return 1
+
+        if by_id:
+            load_lookup_ids(conn, _iter_requested_ids(args))
+
+        archive_dir = archive_path(db)
+        try:
+            if args.follow:
+                return _run_follow(conn, args)
+            if selectors:
+                return _run_paths(conn, args, selectors, by_id, archive_dir)
+            if args.stream:
+                return _run_stream(conn, args, by_id, archive_dir)
+
+            archived = []
+            if by_id:
+                rows = fetch_lookup_rows(conn)
+                archived = fetch_archived_rows(conn, archive_dir)
+            else:
+                rows = fetch_execution_rows(conn, None, recent_limit=args.limit)
+        except ArchiveError as e:
+            print(f"Archive {archive_dir} is unreadable: {e}", file=sys.stderr)
+            return 1
+
+        if rows:
+            _print_table(rows, f"Database: {db}")
+        if archived:
+            _print_table(archived, f"Archive: {archive_dir}")
+        if not rows and not archived:
+            print("No matching rows." if by_id else "No executions in database.")
+
+        if by_id:
+            _report_missing(conn, {r["id"] for r in archived})
     return 0
 
 
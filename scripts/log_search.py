@@ -0,0 +1,236 @@
+"""
+Full-text index of execution log entries, kept in a sidecar SQLite file (``workflows.db.logs``).
+
+Each ``state.logs`` entry becomes one row of an FTS5 table. Only ``message`` is tokenized;
+``level``, ``node_id``, ``execution_id``, ``workflow_id``, ``timestamp`` and ``ts`` (epoch
+seconds) are stored as-is and filter the rows that the full-text match produced. Logs are
+append-only, so executions still in flight are remembered with the number of entries already
+indexed and only their new entries are added later. Like execution_rollup, a high-water rowid
+means each refresh reads only executions added since.
+"""
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from execution_rollup import HighWaterMark
+from node_timeline import parse_iso
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+    CREATE VIRTUAL TABLE IF NOT EXISTS logs USING fts5(
+        message,
+        level UNINDEXED,
+        node_id UNINDEXED,
+        execution_id UNINDEXED,
+        workflow_id UNINDEXED,
+        timestamp UNINDEXED,
+        ts UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+    CREATE TABLE IF NOT EXISTS in_flight (
+        id TEXT PRIMARY KEY,
+        logs_indexed INTEGER NOT NULL
+    ) WITHOUT ROWID;
+"""
+
+
+def sidecar_path(db: Path) -> Path:
+    return db.with_name(db.name + ".logs")
+
+
+@dataclass(frozen=True)
+class LogHit:
+    execution_id: str
+    workflow_id: str
+    timestamp: str | None
+    level: str | None
+    node_id: str | None
+    message: str
+    rank: float
+
+
+@dataclass(frozen=True)
+class ExecutionHits:
+    execution_id: str
+    workflow_id: str
+    hits: int
+    first: str | None
+    last: str | None
+
+
+class LogIndex:
+    """Read/write access to one log-search sidecar."""
+
+    def __init__(self, path: Path, readonly: bool = False) -> None:
+        self.path = path
+        if readonly:
+            self.conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+            return
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        if self.get_meta("schema_version") not in (None, str(SCHEMA_VERSION)):
+            self.conn.executescript("DROP TABLE meta; DROP TABLE logs; DROP TABLE in_flight;")
+        self.conn.executescript(_SCHEMA)
+        with self.conn:
+            self.set_meta("schema_version", SCHEMA_VERSION)
+
+    def __enter__(self) -> LogIndex:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get_meta(self, key: str) -> str | None:
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:  # not created yet
+            return None
+        return None if row is None else row[0]
+
+    def set_meta(self, key: str, value: object) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, None if value is None else str(value)),
+        )
+
+    def high_water(self) -> HighWaterMark:
+        rowid = self.get_meta("high_water_rowid")
+        return HighWaterMark(
+            rowid=int(rowid) if rowid else 0, execution_id=self.get_meta("high_water_id")
+        )
+
+    def set_high_water(self, mark: HighWaterMark) -> None:
+        self.set_meta("high_water_rowid", mark.rowid)
+        self.set_meta("high_water_id", mark.execution_id)
+
+    def reset(self) -> None:
+        self.conn.execute("DELETE FROM logs")
+        self.conn.execute("DELETE FROM in_flight")
+        self.conn.execute("DELETE FROM meta WHERE key != 'schema_version'")
+
+    def add_logs(
+        self, execution_id: str, workflow_id: str, entries: Sequence[object], offset: int = 0
+    ) -> int:
+        """Index ``entries[offset:]``; return how many rows were added."""
+        rows = []
+        for entry in entries[offset:]:
+            if not isinstance(entry, dict):
+                continue
+            timestamp = entry.get("timestamp")
+            rows.append(
+                (
+                    str(entry.get("message") or ""),
+                    entry.get("level"),
+                    entry.get("node_id"),
+                    execution_id,
+                    workflow_id,
+                    timestamp,
+                    parse_iso(timestamp),
+                )
+            )
+        self.conn.executemany(
+            "INSERT INTO logs (message, level, node_id, execution_id, workflow_id, timestamp, ts) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        return len(rows)
+
+    def in_flight(self) -> dict[str, int]:
+        """Unsettled execution id -> number of its log entries already indexed."""
+        return dict(self.conn.execute("SELECT id, logs_indexed FROM in_flight"))
+
+    def track(self, execution_id: str, logs_indexed: int) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO in_flight (id, logs_indexed) VALUES (?, ?)",
+            (execution_id, logs_indexed),
+        )
+
+    def forget(self, ids: Iterable[str]) -> None:
+        self.conn.executemany("DELETE FROM in_flight WHERE id = ?", [(i,) for i in ids])
+
+    def entry_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+
+    def _where(
+        self,
+        query: str,
+        since: float | None,
+        until: float | None,
+        workflow_ids: Sequence[str],
+        levels: Sequence[str],
+        node_ids: Sequence[str],
+    ) -> tuple[str, list[object]]:
+        clauses, params = ["logs MATCH ?"], [query]
+        for column, values in (("level", levels), ("node_id", node_ids)):
+            if values:
+                clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if workflow_ids:
+            clauses.append(f"workflow_id IN ({','.join('?' * len(workflow_ids))})")
+            params.extend(workflow_ids)
+        return " AND ".join(clauses), params
+
+    def search(
+        self,
+        query: str,
+        since: float | None = None,
+        until: float | None = None,
+        workflow_ids: Sequence[str] = (),
+        levels: Sequence[str] = (),
+        node_ids: Sequence[str] = (),
+        limit: int = 100,
+        by_time: bool = False,
+    ) -> list[LogHit]:
+        """
+        Entries whose message matches the FTS5 ``query`` ("quoted phrases", ``prefix*``,
+        AND/OR/NOT, NEAR), best match first or newest first with ``by_time``.
+        """
+        where, params = self._where(query, since, until, workflow_ids, levels, node_ids)
+        order = "ts DESC" if by_time else "rank"
+        rows = self.conn.execute(
+            f"""
+            SELECT execution_id, workflow_id, timestamp, level, node_id,
+                   highlight(logs, 0, '[', ']'), rank
+            FROM logs WHERE {where}
+            ORDER BY {order} LIMIT ?
+            """,
+            [*params, limit],
+        )
+        return [LogHit(*row) for row in rows]
+
+    def executions(
+        self,
+        query: str,
+        since: float | None = None,
+        until: float | None = None,
+        workflow_ids: Sequence[str] = (),
+        levels: Sequence[str] = (),
+        node_ids: Sequence[str] = (),
+        limit: int = 100,
+    ) -> list[ExecutionHits]:
+        """Executions with at least one matching entry, most hits first."""
+        where, params = self._where(query, since, until, workflow_ids, levels, node_ids)
+        rows = self.conn.execute(
+            f"""
+            SELECT execution_id, workflow_id, COUNT(*), MIN(timestamp), MAX(timestamp)
+            FROM logs WHERE {where}
+            GROUP BY execution_id
+            ORDER BY COUNT(*) DESC, execution_id LIMIT ?
+            """,
+            [*params, limit],
+        )
+        return [ExecutionHits(*row) for row in rows]
@@ -0,0 +1,131 @@
+"""
+Per-node timelines and critical paths reconstructed from stored execution state.
+
+``node_states`` records each node's start/finish (LocalDateTime.toString(), so ISO text with no
+zone); the workflow definition supplies node types, agent models and edges. The critical path
+is rebuilt backwards from the node that finished last: at each step the predecessor that
+completed last before the current node started is the one that held it back.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+# Tolerance for "finished before it started" comparisons: LocalDateTime.now() granularity.
+CLOCK_TOLERANCE_SECONDS = 0.002
+DEFAULT_AGENT_MODEL = "gpt-4o-mini"  # AgentConfig.model default in backend-java
+
+
+def parse_iso(value: object) -> float | None:
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+@dataclass
+class WorkflowGraph:
+    """Node metadata and predecessor sets from a workflows.definition document."""
+
+    node_types: dict[str, str] = field(default_factory=dict)
+    models: dict[str, str] = field(default_factory=dict)
+    predecessors: dict[str, set[str]] = field(default_factory=dict)
+
+    @property
+    def has_edges(self) -> bool:
+        return bool(self.predecessors)
+
+    @classmethod
+    def from_definition(cls, definition: object) -> WorkflowGraph:
+        graph = cls()
+        if not isinstance(definition, dict):
+            return graph
+        for node in definition.get("nodes") or ():
+            if not isinstance(node, dict) or not node.get("id"):
+                continue
+            node_id = str(node["id"])
+            data = node.get("data") if isinstance(node.get("data"), dict) else {}
+            node_type = str(node.get("type") or data.get("type") or "tool").lower()
+            graph.node_types[node_id] = node_type
+            config = node.get("agent_config") or data.get("agent_config")
+            if node_type == "agent":
+                model = config.get("model") if isinstance(config, dict) else None
+                graph.models[node_id] = str(model or DEFAULT_AGENT_MODEL)
+        for edge in definition.get("edges") or ():
+            if isinstance(edge, dict) and edge.get("source") and edge.get("target"):
+                graph.predecessors.setdefault(str(edge["target"]), set()).add(str(edge["source"]))
+        return graph
+
+
+@dataclass(frozen=True)
+class NodeTiming:
+    node_id: str
+    status: str
+    started: float
+    completed: float
+    node_type: str
+    model: str
+
+    @property
+    def duration(self) -> float:
+        return max(0.0, self.completed - self.started)
+
+
+def node_timings(node_states: object, graph: WorkflowGraph) -> list[NodeTiming]:
+    """Timed nodes of one execution, ordered by start time; untimed nodes are skipped."""
+    if not isinstance(node_states, dict):
+        return []
+    timings = []
+    for node_id, node in node_states.items():
+        if not isinstance(node, dict):
+            continue
+        started = parse_iso(node.get("started_at"))
+        completed = parse_iso(node.get("completed_at"))
+        if started is None or completed is None:
+            continue
+        timings.append(
+            NodeTiming(
+                node_id=str(node_id),
+                status=str(node.get("status") or "(none)"),
+                started=started,
+                completed=completed,
+                node_type=graph.node_types.get(str(node_id), "(unknown)"),
+                model=graph.models.get(str(node_id), "(n/a)"),
+            )
+        )
+    return sorted(timings, key=lambda t: (t.started, t.completed))
+
+
+def critical_path(timings: list[NodeTiming], graph: WorkflowGraph) -> list[NodeTiming]:
+    """
+    Chain of nodes that bounded total latency, first to last.
+
+    Uses graph edges when the definition has them; otherwise any node that finished before the
+    current one started counts as a possible predecessor (pure timeline reconstruction).
+    """
+    if not timings:
+        return []
+    current = max(timings, key=lambda t: t.completed)
+    path = [current]
+    seen = {current.node_id}
+    while True:
+        allowed = graph.predecessors.get(current.node_id) if graph.has_edges else None
+        candidates = [
+            t
+            for t in timings
+            if t.node_id not in seen
+            and (allowed is None or t.node_id in allowed)
+            and t.completed <= current.started + CLOCK_TOLERANCE_SECONDS
+        ]
+        if not candidates:
+            break
+        current = max(candidates, key=lambda t: t.completed)
+        path.append(current)
+        seen.add(current.node_id)
+    path.reverse()
+    return path
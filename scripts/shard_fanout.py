@@ -0,0 +1,186 @@
+"""
+Fan queries out over several workflows.db shards (one SQLite file per backend replica) and
+merge what comes back.
+
+Each shard is read by its own thread with its own connection. sqlite3 releases the GIL while
+it steps a query, so the reads overlap, and wall time tracks the slowest shard, not the sum.
+map_shards is for aggregates: it returns one result per shard and the caller combines them.
+merge_shards is for row streams: every producer pushes into a bounded queue, and
+``heapq.merge`` yields rows in global ``key`` order as they arrive. Each shard is already
+sorted by that key, so memory stays at ``queue_size`` rows per shard however large the output
+gets. A merge has to see the head of every shard before it can yield anything, so it always
+runs one thread per shard; ``workers`` caps only map_shards.
+"""
+from __future__ import annotations
+
+import glob
+import heapq
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_SHARD_WORKERS = 8
+SHARD_QUEUE_ROWS = 512
+_DONE = object()
+
+
+class ShardError(Exception):
+    """A shard's producer failed; ``shard`` names the file and ``__cause__`` the error."""
+
+    def __init__(self, shard: Path, error: BaseException) -> None:
+        super().__init__(f"{shard}: {error}")
+        self.shard = shard
+
+
+class _Failure:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def expand_shards(patterns: Iterable[str]) -> tuple[list[Path], list[str]]:
+    """
+    (existing files in pattern order without duplicates, patterns that matched nothing).
+    Patterns may be plain paths or globs (``~`` expanded, ``**`` recursive).
+    """
+    shards: dict[Path, None] = {}
+    unmatched = []
+    for pattern in patterns:
+        expanded = str(Path(pattern).expanduser())
+        if glob.has_magic(expanded):
+            matches = sorted(glob.glob(expanded, recursive=True))
+        else:
+            matches = [expanded]
+        files = [Path(m).resolve() for m in matches if Path(m).is_file()]
+        if not files:
+            unmatched.append(pattern)
+        shards.update(dict.fromkeys(files))
+    return list(shards), unmatched
+
+
+def shard_labels(shards: Sequence[Path]) -> dict[Path, str]:
+    """Shortest trailing path that tells the shards apart (file name, then parent/name, ...)."""
+    longest = max((len(s.parts) for s in shards), default=1)
+    for depth in range(1, longest + 1):
+        labels = {s: "/".join(s.parts[-depth:]) for s in shards}
+        if len(set(labels.values())) == len(labels):
+            break
+    return labels
+
+
+def map_shards(
+    shards: Sequence[Path],
+    fn: Callable[[Path], T],
+    workers: int = DEFAULT_SHARD_WORKERS,
+) -> list[T]:
+    """
+    ``fn(shard)`` for every shard concurrently; results in shard order. A failure is raised
+    as ShardError naming the shard; a lone shard runs inline and its errors pass through.
+    """
+    if len(shards) == 1:
+        return [fn(shards[0])]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(shards)))) as pool:
+        futures = [pool.submit(fn, shard) for shard in shards]
+        results = []
+        for shard, future in zip(shards, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                for pending in futures:
+                    pending.cancel()
+                raise ShardError(shard, e) from e
+        return results
+
+
+def _produce(
+    shard: Path,
+    produce: Callable[[Path], Iterable[T]],
+    out: queue.Queue,
+    stop: threading.Event,
+    tag: bool,
+) -> None:
+    def put(item: object) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    items: Iterable[T] = ()
+    try:
+        items = produce(shard)
+        for item in items:
+            if not put((shard, item) if tag else item):
+                return
+    except BaseException as e:  # noqa: BLE001 - handed to the consuming thread
+        put((shard, _Failure(e)) if tag else _Failure(e))
+    finally:
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()  # runs the producer's own cleanup (connection close) in this thread
+        put((shard, _DONE) if tag else _DONE)
+
+
+def _drain(shard: Path, source: queue.Queue) -> Iterator[tuple[Path, T]]:
+    while True:
+        item = source.get()
+        if item is _DONE:
+            return
+        if isinstance(item, _Failure):
+            raise ShardError(shard, item.error) from item.error
+        yield shard, item
+
+
+def merge_shards(
+    shards: Sequence[Path],
+    produce: Callable[[Path], Iterable[T]],
+    key: Callable[[T], object] | None = None,
+    reverse: bool = False,
+    queue_size: int = SHARD_QUEUE_ROWS,
+) -> Iterator[tuple[Path, T]]:
+    """
+    (shard, item) for every item ``produce(shard)`` yields, all shards read concurrently.
+
+    With ``key`` the output is a k-way merge in key order (each shard's items must already
+    be in that order; ``reverse`` for descending). Without it, items come out as they arrive.
+    Closing the generator early stops the producers.
+    """
+    stop = threading.Event()
+    threads = []
+    if key is None:
+        shared: queue.Queue = queue.Queue(maxsize=queue_size * len(shards))
+        queues = [shared] * len(shards)
+    else:
+        queues = [queue.Queue(maxsize=queue_size) for _ in shards]
+    for shard, out in zip(shards, queues):
+        thread = threading.Thread(
+            target=_produce,
+            args=(shard, produce, out, stop, key is None),
+            name=f"shard-{shard.name}",
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    try:
+        if key is None:
+            remaining = len(shards)
+            while remaining:
+                shard, item = shared.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, _Failure):
+                    raise ShardError(shard, item.error) from item.error
+                else:
+                    yield shard, item
+        else:
+            streams = [_drain(shard, source) for shard, source in zip(shards, queues)]
+            yield from heapq.merge(*streams, key=lambda pair: key(pair[1]), reverse=reverse)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
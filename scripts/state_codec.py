@@ -0,0 +1,459 @@
+"""
+Compact binary encoding of executions.state (the map built by ExecutionState.toStateMap()).
+
+Reference implementation for evaluating a backend change; bench_state_codec.py compares it with
+the stored JSON. Layout of one blob (all integers are LEB128 varints, signed ones zigzagged):
+
+  b"WFS" version
+  symbols      count, then (length, UTF-8) each. Every dict key, node ID, status and log level
+               is stored once here and referenced by index everywhere else.
+  state        presence bitmap over STATE_FIELDS, the present fields in that order, then any
+               other top-level keys as a generic dict
+  logs         entry count, then one column per field: timestamps (style byte and delta),
+               levels, node IDs, messages
+  node_states  count, then per node: key, presence bitmap over NODE_FIELDS, fields, extras
+
+Timestamps are LocalDateTime.toString() text: ``2026-04-16T12:00``, ``...:05``, ``...:05.123``,
+``...:05.123456``. They are stored as microseconds since 1970 plus a style byte that
+reproduces the exact text; log timestamps are deltas from the previous entry. Text that does
+not fit (time zones, sub-microsecond digits) is stored verbatim. variables, result and node
+input/output use a generic tagged encoding of JSON values. A field whose value does not fit
+its schema (a non-list ``logs``, a numeric ``status``) goes to the extras in the generic
+encoding. Any JSON document therefore round-trips to an equal value. Keys come back in schema
+order, which is toStateMap() order.
+"""
+from __future__ import annotations
+
+import re
+import struct
+from datetime import date
+from typing import Callable
+
+MAGIC = b"WFS"
+VERSION = 1
+
+STATE_FIELDS = (
+    ("execution_id", "str"),
+    ("workflow_id", "str"),
+    ("status", "sym"),
+    ("current_node", "sym"),
+    ("variables", "any"),
+    ("result", "any"),
+    ("error", "any"),
+    ("started_at", "ts"),
+    ("completed_at", "ts"),
+    ("logs", "logs"),
+    ("node_states", "nodes"),
+)
+NODE_FIELDS = (
+    ("node_id", "sym"),
+    ("status", "sym"),
+    ("input", "any"),
+    ("output", "any"),
+    ("error", "any"),
+    ("started_at", "ts"),
+    ("completed_at", "ts"),
+)
+LOG_KEYS = frozenset(("timestamp", "level", "node_id", "message"))
+
+# Generic value tags.
+_NULL, _FALSE, _TRUE, _INT, _FLOAT, _STR, _LIST, _DICT, _BIGINT = range(9)
+_DOUBLE = struct.Struct("<d")
+_INT64 = 1 << 63
+
+# Timestamp styles: how many parts of HH:MM[:SS[.fraction]] the text had; 3 + n for n (1..6)
+# fraction digits.
+_TS_NULL, _TS_RAW, _TS_MINUTES, _TS_SECONDS = range(4)
+_TS = re.compile(r"(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d)(?::(\d\d)(?:\.(\d{1,9}))?)?\Z")
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_DAY_US = 86_400_000_000
+
+
+class CodecError(ValueError):
+    """The blob is not a state encoding this module can read."""
+
+
+def _zigzag(n: int) -> int:
+    return n << 1 if n >= 0 else ((-n) << 1) - 1
+
+
+def _unzigzag(n: int) -> int:
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+def parse_timestamp(text: str) -> tuple[int, int] | None:
+    """(style, microseconds since 1970) when ``text`` re-renders exactly, else None."""
+    m = _TS.match(text)
+    if m is None:
+        return None
+    year, month, day, hour, minute, second, fraction = m.groups()
+    try:
+        days = date(int(year), int(month), int(day)).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return None
+    if int(hour) > 23 or int(minute) > 59 or (second and int(second) > 59):
+        return None
+    micros = (days * 24 + int(hour)) * 60 + int(minute)
+    micros = (micros * 60 + int(second or 0)) * 1_000_000
+    if fraction is None:
+        return (_TS_SECONDS if second else _TS_MINUTES), micros
+    if len(fraction) > 6:
+        return None
+    return _TS_SECONDS + len(fraction), micros + int(fraction.ljust(6, "0"))
+
+
+def format_timestamp(style: int, micros: int) -> str:
+    days, rest = divmod(micros, _DAY_US)
+    seconds, fraction = divmod(rest, 1_000_000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    text = f"{date.fromordinal(days + _EPOCH_ORDINAL).isoformat()}T{hour:02d}:{minute:02d}"
+    if style == _TS_MINUTES:
+        return text
+    text = f"{text}:{second:02d}"
+    if style == _TS_SECONDS:
+        return text
+    return f"{text}.{fraction:06d}"[: len(text) + 1 + style - _TS_SECONDS]
+
+
+# --- Encoding -------------------------------------------------------------------------------
+
+
+class _Writer:
+    def __init__(self) -> None:
+        self.out = bytearray()
+        self.symbols: dict[str, int] = {}
+
+    def varint(self, n: int) -> None:
+        out = self.out
+        while n > 0x7F:
+            out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        out.append(n)
+
+    def string(self, text: str) -> None:
+        data = text.encode("utf-8", "surrogatepass")
+        self.varint(len(data))
+        self.out += data
+
+    def _intern(self, text: str) -> int:
+        index = self.symbols.get(text)
+        if index is None:
+            index = self.symbols[text] = len(self.symbols)
+        return index
+
+    def symbol(self, text: str) -> None:
+        self.varint(self._intern(text))
+
+    def optional_symbol(self, text: str | None) -> None:
+        """Symbol index + 1, or 0 for null."""
+        self.varint(0 if text is None else self._intern(text) + 1)
+
+    def value(self, value: object) -> None:
+        out = self.out
+        if value is None:
+            out.append(_NULL)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif isinstance(value, str):
+            out.append(_STR)
+            self.string(value)
+        elif isinstance(value, int):
+            if -_INT64 <= value < _INT64:
+                out.append(_INT)
+                self.varint(_zigzag(value))
+            else:
+                out.append(_BIGINT)
+                self.string(str(value))
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out += _DOUBLE.pack(value)
+        elif isinstance(value, dict):
+            out.append(_DICT)
+            self.varint(len(value))
+            for key, item in value.items():
+                self.symbol(str(key))
+                self.value(item)
+        elif isinstance(value, (list, tuple)):
+            out.append(_LIST)
+            self.varint(len(value))
+            for item in value:
+                self.value(item)
+        else:
+            raise TypeError(f"not a JSON value: {type(value).__name__}")
+
+    def timestamp(self, text: str | None, previous: int = 0) -> int:
+        """Write one timestamp (style byte, then delta from ``previous``); return its micros."""
+        if text is None:
+            self.out.append(_TS_NULL)
+            return previous
+        parsed = parse_timestamp(text)
+        if parsed is None:
+            self.out.append(_TS_RAW)
+            self.string(text)
+            return previous
+        style, micros = parsed
+        self.out.append(style)
+        self.varint(_zigzag(micros - previous))
+        return micros
+
+
+def _fits(kind: str, value: object) -> bool:
+    if kind == "str":
+        return isinstance(value, str)
+    if kind in ("sym", "ts"):
+        return value is None or isinstance(value, str)
+    if kind == "logs":
+        return isinstance(value, list)
+    if kind == "nodes":
+        return isinstance(value, dict) and all(isinstance(v, dict) for v in value.values())
+    return True
+
+
+def _write_record(writer: _Writer, record: dict, fields: tuple[tuple[str, str], ...]) -> None:
+    """Presence bitmap, the fields that fit their kind, then the rest as a generic dict."""
+    present = 0
+    for bit, (name, kind) in enumerate(fields):
+        if name in record and _fits(kind, record[name]):
+            present |= 1 << bit
+    writer.varint(present)
+    for bit, (name, kind) in enumerate(fields):
+        if present >> bit & 1:
+            _FIELD_WRITERS[kind](writer, record[name])
+    known = {name for bit, (name, _) in enumerate(fields) if present >> bit & 1}
+    extras = {k: v for k, v in record.items() if k not in known}
+    writer.varint(len(extras))
+    for key, item in extras.items():
+        writer.symbol(str(key))
+        writer.value(item)
+
+
+def _write_logs(writer: _Writer, logs: list) -> None:
+    columnar = all(
+        isinstance(e, dict)
+        and e.keys() == LOG_KEYS
+        and all(v is None or isinstance(v, str) for v in e.values())
+        for e in logs
+    )
+    writer.out.append(0 if columnar else 1)
+    if not columnar:
+        writer.value(logs)
+        return
+    writer.varint(len(logs))
+    previous = 0
+    for entry in logs:
+        previous = writer.timestamp(entry["timestamp"], previous)
+    for entry in logs:
+        writer.optional_symbol(entry["level"])
+    for entry in logs:
+        writer.optional_symbol(entry["node_id"])
+    for entry in logs:
+        message = entry["message"]
+        if message is None:
+            writer.out.append(0)
+        else:
+            data = message.encode("utf-8", "surrogatepass")
+            writer.varint(len(data) + 1)  # 0 is null
+            writer.out += data
+
+
+def _write_nodes(writer: _Writer, nodes: dict) -> None:
+    writer.varint(len(nodes))
+    for key, node in nodes.items():
+        writer.symbol(str(key))
+        _write_record(writer, node, NODE_FIELDS)
+
+
+_FIELD_WRITERS: dict[str, Callable[[_Writer, object], object]] = {
+    "str": _Writer.string,
+    "sym": _Writer.optional_symbol,
+    "any": _Writer.value,
+    "ts": _Writer.timestamp,
+    "logs": _write_logs,
+    "nodes": _write_nodes,
+}
+
+
+def encode_state(state: object) -> bytes:
+    """Binary form of one decoded executions.state document."""
+    body = _Writer()
+    if isinstance(state, dict):
+        body.out.append(1)
+        _write_record(body, state, STATE_FIELDS)
+    else:
+        body.out.append(0)
+        body.value(state)
+    head = _Writer()
+    head.out += MAGIC
+    head.out.append(VERSION)
+    head.varint(len(body.symbols))
+    for symbol in body.symbols:
+        head.string(symbol)
+    return bytes(head.out + body.out)
+
+
+# --- Decoding -------------------------------------------------------------------------------
+
+
+class _Reader:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.pos = 0
+        self.symbols: list[str] = []
+
+    def byte(self) -> int:
+        b = self.data[self.pos]
+        self.pos += 1
+        return b
+
+    def varint(self) -> int:
+        data, pos = self.data, self.pos
+        b = data[pos]
+        pos += 1
+        if b < 0x80:
+            self.pos = pos
+            return b
+        n, shift = b & 0x7F, 7
+        while True:
+            b = data[pos]
+            pos += 1
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                self.pos = pos
+                return n
+            shift += 7
+
+    def string(self) -> str:
+        size = self.varint()
+        start = self.pos
+        self.pos = start + size
+        if self.pos > len(self.data):
+            raise IndexError("string runs past the end")
+        return self.data[start : self.pos].decode("utf-8", "surrogatepass")
+
+    def symbol(self) -> str:
+        return self.symbols[self.varint()]
+
+    def optional_symbol(self) -> str | None:
+        index = self.varint()
+        return None if index == 0 else self.symbols[index - 1]
+
+    def value(self) -> object:
+        tag = self.byte()
+        if tag == _STR:
+            return self.string()
+        if tag == _INT:
+            return _unzigzag(self.varint())
+        if tag == _DICT:
+            return {self.symbol(): self.value() for _ in range(self.varint())}
+        if tag == _LIST:
+            return [self.value() for _ in range(self.varint())]
+        if tag == _NULL:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _FLOAT:
+            (number,) = _DOUBLE.unpack_from(self.data, self.pos)
+            self.pos += 8
+            return number
+        if tag == _BIGINT:
+            return int(self.string())
+        raise CodecError(f"unknown value tag {tag}")
+
+    def timestamp(self, previous: int = 0) -> tuple[str | None, int]:
+        style = self.byte()
+        if style == _TS_NULL:
+            return None, previous
+        if style == _TS_RAW:
+            return self.string(), previous
+        micros = previous + _unzigzag(self.varint())
+        return format_timestamp(style, micros), micros
+
+
+def _read_record(reader: _Reader, fields: tuple[tuple[str, str], ...]) -> dict:
+    present = reader.varint()
+    record = {}
+    for bit, (name, kind) in enumerate(fields):
+        if present >> bit & 1:
+            record[name] = _FIELD_READERS[kind](reader)
+    for _ in range(reader.varint()):
+        key = reader.symbol()
+        record[key] = reader.value()
+    return record
+
+
+def _read_timestamp(reader: _Reader) -> str | None:
+    return reader.timestamp()[0]
+
+
+def _read_logs(reader: _Reader) -> list:
+    if reader.byte():
+        return reader.value()  # type: ignore[return-value]
+    count = reader.varint()
+    timestamps = []
+    previous = 0
+    for _ in range(count):
+        text, previous = reader.timestamp(previous)
+        timestamps.append(text)
+    levels = [reader.optional_symbol() for _ in range(count)]
+    node_ids = [reader.optional_symbol() for _ in range(count)]
+    logs = []
+    data = reader.data
+    for timestamp, level, node_id in zip(timestamps, levels, node_ids):
+        size = reader.varint()
+        if size == 0:
+            message = None
+        else:
+            start = reader.pos
+            reader.pos = start + size - 1
+            message = data[start : reader.pos].decode("utf-8", "surrogatepass")
+        # Same key order as JsonStateUtils.createLogEntry.
+        logs.append(
+            {"timestamp": timestamp, "level": level, "node_id": node_id, "message": message}
+        )
+    if reader.pos > len(data):
+        raise IndexError("log messages run past the end")
+    return logs
+
+
+def _read_nodes(reader: _Reader) -> dict:
+    nodes = {}
+    for _ in range(reader.varint()):
+        key = reader.symbol()
+        nodes[key] = _read_record(reader, NODE_FIELDS)
+    return nodes
+
+
+_FIELD_READERS: dict[str, Callable[[_Reader], object]] = {
+    "str": _Reader.string,
+    "sym": _Reader.optional_symbol,
+    "any": _Reader.value,
+    "ts": _read_timestamp,
+    "logs": _read_logs,
+    "nodes": _read_nodes,
+}
+
+
+def decode_state(data: bytes) -> object:
+    """Inverse of encode_state. Raises CodecError on anything that is not a valid blob."""
+    if data[:3] != MAGIC:
+        raise CodecError("not a binary state blob")
+    if len(data) < 4 or data[3] != VERSION:
+        raise CodecError(f"unsupported version {data[3] if len(data) > 3 else None}")
+    reader = _Reader(data)
+    reader.pos = 4
+    try:
+        reader.symbols = [reader.string() for _ in range(reader.varint())]
+        if reader.byte():
+            state = _read_record(reader, STATE_FIELDS)
+        else:
+            state = reader.value()
+    except (IndexError, UnicodeDecodeError, struct.error) as e:
+        raise CodecError(f"truncated or corrupt blob: {e}") from e
+    if reader.pos != len(data):
+        raise CodecError(f"{len(data) - reader.pos} trailing byte(s)")
+    return state
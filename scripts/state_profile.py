@@ -0,0 +1,210 @@
+"""
+Where the bytes in executions.state go: sizes attributed to JSON paths, in one streaming pass.
+
+Every decoded state is walked down to ``depth`` levels. Each value is charged its compact JSON
+size (characters, which equal bytes for the ASCII-heavy blobs Jackson writes) under its path.
+Array elements share one ``[*]`` path, so ``logs[*].message`` covers every log message. Sizes
+are inclusive: ``node_states.n1`` contains ``node_states.n1.output``, so shares only add up
+across paths of the same depth. Paths use state_stream selector syntax and can be passed to
+``inspect_executions_db.py --path`` as-is.
+
+Per path the profiler also estimates:
+- compressibility: zlib over the concatenation of the first ``sample_bytes`` of values. That
+  is the block-compression view execution_archive gets, not a per-value one;
+- duplication: occurrences equal to a value seen under the same path in an earlier execution.
+  Values are compared by hash. Once ``max_distinct`` hashes are stored, new values are no
+  longer remembered, so the duplicate counts become a lower bound (``saturated``).
+
+Memory is bounded by ``max_paths``. Values under paths past that limit are charged whole to
+``(other)``.
+"""
+from __future__ import annotations
+
+import json
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from json.encoder import encode_basestring as _encode_str  # the C one when available
+
+OTHER_PATH = "(other)"
+WORKFLOW_DEPTH = 2  # per-workflow attribution stops here to keep that table small
+_IDENT = re.compile(r"[A-Za-z0-9_\-]+\Z")
+
+
+def _dumps(value: object) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+@lru_cache(maxsize=16384)  # the same few hundred paths recur in every state
+def child_path(path: str, key: str) -> str:
+    step = key if _IDENT.match(key) else f"[{json.dumps(key)}]"
+    if not path:
+        return step
+    return f"{path}{step}" if step.startswith("[") else f"{path}.{step}"
+
+
+@dataclass
+class PathStats:
+    path: str
+    depth: int
+    bytes: int = 0
+    values: int = 0
+    executions: int = 0
+    max_bytes: int = 0
+    duplicate_values: int = 0
+    duplicate_bytes: int = 0
+    saturated: bool = False
+    sample_raw: int = 0
+    _sample: list[str] = field(default_factory=list, repr=False)
+    _first_seen: dict[int, int] = field(default_factory=dict, repr=False)  # hash -> execution
+    _last_execution: int = field(default=-1, repr=False)
+
+    @property
+    def compression_ratio(self) -> float | None:
+        """Uncompressed / zlib-compressed size of the sampled values."""
+        if not self._sample:
+            return None
+        raw = "\x1e".join(self._sample).encode()
+        return len(raw) / len(zlib.compress(raw, 6))
+
+    def _record(self, size: int, digest: int, execution: int, max_distinct: int) -> None:
+        self.bytes += size
+        self.values += 1
+        if size > self.max_bytes:
+            self.max_bytes = size
+        if execution != self._last_execution:
+            self.executions += 1
+            self._last_execution = execution
+        first = self._first_seen.get(digest)
+        if first is None:
+            if len(self._first_seen) < max_distinct:
+                self._first_seen[digest] = execution
+            else:
+                self.saturated = True
+        elif first != execution:
+            self.duplicate_values += 1
+            self.duplicate_bytes += size
+
+
+@dataclass
+class WorkflowStats:
+    workflow_id: str
+    executions: int = 0
+    raw_bytes: int = 0  # length(state) as stored, whitespace included
+    bytes: int = 0  # compact JSON
+
+
+class StateProfiler:
+    """Path and workflow size statistics over decoded states (see module docstring)."""
+
+    def __init__(
+        self,
+        depth: int = 4,
+        max_paths: int = 256,
+        max_distinct: int = 8192,
+        sample_bytes: int = 64 * 1024,
+        max_workflow_paths: int = 4096,
+    ) -> None:
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        self.depth = depth
+        self.max_paths = max_paths
+        self.max_distinct = max_distinct
+        self.sample_bytes = sample_bytes
+        self.max_workflow_paths = max_workflow_paths
+        self.executions = 0
+        self.bytes = 0
+        self._paths: dict[str, PathStats] = {}
+        self._workflows: dict[str, WorkflowStats] = {}
+        self._workflow_paths: Counter = Counter()  # (workflow_id, path) -> bytes
+
+    def _stats(self, path: str, depth: int) -> PathStats:
+        stats = self._paths.get(path)
+        if stats is None:
+            if len(self._paths) >= self.max_paths:
+                path, depth = OTHER_PATH, 0
+                stats = self._paths.get(path)
+            if stats is None:
+                stats = self._paths[path] = PathStats(path, depth)
+        return stats
+
+    def add(self, state: object, workflow_id: str, raw_bytes: int | None = None) -> int:
+        """Profile one decoded state; return its compact JSON size."""
+        execution = self.executions
+        self.executions += 1
+        workflow = self._workflows.get(workflow_id)
+        if workflow is None:
+            workflow = self._workflows[workflow_id] = WorkflowStats(workflow_id)
+        size, _ = self._measure(state, "", 0, execution, workflow_id)
+        workflow.executions += 1
+        workflow.bytes += size
+        workflow.raw_bytes += size if raw_bytes is None else raw_bytes
+        self.bytes += size
+        return size
+
+    def _measure(
+        self, value: object, path: str, depth: int, execution: int, workflow_id: str
+    ) -> tuple[int, int]:
+        """(compact JSON size, hash) of ``value``, charged to ``path`` and its children."""
+        stats = self._stats(path, depth) if depth else None
+        expand = depth < self.depth and (stats is None or stats.path != OTHER_PATH)
+        text = None
+        if expand and isinstance(value, dict):
+            size = 1 + max(len(value), 1)  # braces and commas
+            parts = []
+            for key, child in value.items():
+                key = str(key)
+                child_size, child_hash = self._measure(
+                    child, child_path(path, key), depth + 1, execution, workflow_id
+                )
+                size += len(_encode_str(key)) + 1 + child_size
+                parts.append((key, child_hash))
+            digest = hash(("{", tuple(parts)))
+        elif expand and isinstance(value, list):
+            size = 1 + max(len(value), 1)
+            element = f"{path}[*]"
+            hashes = []
+            for item in value:
+                item_size, item_hash = self._measure(
+                    item, element, depth + 1, execution, workflow_id
+                )
+                size += item_size
+                hashes.append(item_hash)
+            digest = hash(("[", tuple(hashes)))
+        else:
+            text = _encode_str(value) if value.__class__ is str else _dumps(value)
+            size = len(text)
+            digest = hash(text)
+        if stats is None:
+            return size, digest
+        stats._record(size, digest, execution, self.max_distinct)
+        if stats.sample_raw < self.sample_bytes:
+            if text is None:
+                text = _dumps(value)
+            text = text[: self.sample_bytes - stats.sample_raw]
+            stats._sample.append(text)
+            stats.sample_raw += len(text)
+        if depth <= WORKFLOW_DEPTH:
+            key = (workflow_id, stats.path)
+            if key not in self._workflow_paths and (
+                len(self._workflow_paths) >= self.max_workflow_paths
+            ):
+                key = (workflow_id, OTHER_PATH)
+            self._workflow_paths[key] += size
+        return size, digest
+
+    def paths(self) -> list[PathStats]:
+        """Tracked paths, most bytes first."""
+        return sorted(self._paths.values(), key=lambda p: (-p.bytes, p.path))
+
+    def workflows(self) -> list[WorkflowStats]:
+        return sorted(self._workflows.values(), key=lambda w: (-w.bytes, w.workflow_id))
+
+    def workflow_paths(self) -> list[tuple[str, str, int]]:
+        """(workflow_id, path, bytes) for paths down to WORKFLOW_DEPTH, most bytes first."""
+        return sorted(
+            ((w, p, n) for (w, p), n in self._workflow_paths.items()),
+            key=lambda r: (-r[2], r[0], r[1]),
+        )
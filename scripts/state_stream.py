@@ -0,0 +1,271 @@
+"""
+Event-style extraction of selected paths from an executions.state JSON document.
+
+The state blob is the serialized ExecutionState (``variables``, ``result``, ``logs``,
+``node_states``, ...) and can run to many megabytes. Instead of ``json.loads`` on the whole
+document, the selector walks the raw text: subtrees that cannot match are skipped by bracket
+scanning (strings are jumped over with one regex match each), and only the values that match
+are decoded, with the C ``raw_decode``. Memory per row is the row text plus the matched values.
+
+Selector syntax (see parse_path):
+  node_states.*.status          every node's status
+  node_states.n1                one node's full state
+  logs[*].message               every log message
+  logs[?level=ERROR]            log entries whose level is ERROR ([?level!=INFO] negates)
+  logs[0]                       by position (arrays are read forward once; no negative indexes)
+  variables["key.with.dots"]    quoted keys
+"""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+_DECODER = json.JSONDecoder()
+_WS = re.compile(r"[ \t\n\r]*")
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_STRUCTURE = re.compile(r'[\[\]{}"]')
+# A container with no nested containers (e.g. one log entry), matched in a single C call.
+_FLAT_CONTAINER = re.compile(
+    r'[\[{][^\[\]{}"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^\[\]{}"]*)*[\]}]'
+)
+_SCALAR = re.compile(r"-?[0-9][0-9.eE+\-]*|true|false|null|-?Infinity|NaN")
+_IDENT = re.compile(r"[A-Za-z0-9_\-]+\Z")
+
+_SELECTOR_TOKEN = re.compile(
+    r"""
+      \.?(?P<name>[A-Za-z0-9_\-]+|\*)
+    | \[(?P<index>\d+|\*)\]
+    | \[(?P<quoted>"(?:[^"\\]|\\.)*")\]
+    | \[\?(?P<field>[A-Za-z0-9_\-]+)(?P<op>!=|=)(?P<value>[^\]]*)\]
+    """,
+    re.VERBOSE,
+)
+
+
+class PathSyntaxError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class PathStep:
+    """One selector step: kind is 'key', 'any_key', 'index', 'any_index' or 'filter'."""
+
+    kind: str
+    key: str | None = None
+    index: int | None = None
+    field: str | None = None
+    value: str | None = None
+    negate: bool = False
+
+    def matches_element(self, element: object) -> bool:
+        if not isinstance(element, dict):
+            return False
+        actual = element.get(self.field)
+        equal = actual is not None and str(actual) == self.value
+        return equal != self.negate
+
+
+def parse_path(selector: str) -> tuple[PathStep, ...]:
+    """Parse a selector such as ``logs[?level=ERROR].message`` into steps."""
+    steps: list[PathStep] = []
+    pos = 0
+    text = selector.strip()
+    while pos < len(text):
+        m = _SELECTOR_TOKEN.match(text, pos)
+        if m is None or (m.group("name") is not None and pos > 0 and text[pos] != "."):
+            raise PathSyntaxError(f"Invalid path selector at offset {pos}: {selector!r}")
+        if m.group("name") is not None:
+            name = m.group("name")
+            steps.append(PathStep("any_key") if name == "*" else PathStep("key", key=name))
+        elif m.group("index") is not None:
+            index = m.group("index")
+            steps.append(
+                PathStep("any_index") if index == "*" else PathStep("index", index=int(index))
+            )
+        elif m.group("quoted") is not None:
+            steps.append(PathStep("key", key=json.loads(m.group("quoted"))))
+        else:
+            steps.append(
+                PathStep(
+                    "filter",
+                    field=m.group("field"),
+                    value=m.group("value").strip().strip("'\""),
+                    negate=m.group("op") == "!=",
+                )
+            )
+        pos = m.end()
+    if not steps:
+        raise PathSyntaxError("Empty path selector")
+    return tuple(steps)
+
+
+def format_key(prefix: str, key: str) -> str:
+    if _IDENT.match(key):
+        return f"{prefix}.{key}" if prefix else key
+    return f"{prefix}[{json.dumps(key)}]"
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    return _WS.match(text, pos).end()
+
+
+def _skip_string(text: str, pos: int) -> int:
+    """Return the index just past the string whose body starts at ``pos``."""
+    m = _STRING_BODY.match(text, pos)
+    if m is None:
+        raise ValueError(f"Unterminated string starting at offset {pos - 1}")
+    return m.end()
+
+
+def skip_value(text: str, pos: int) -> int:
+    """Return the index just past the JSON value starting at ``pos`` without decoding it."""
+    ch = text[pos]
+    if ch == '"':
+        return _skip_string(text, pos + 1)
+    if ch not in "[{":
+        m = _SCALAR.match(text, pos)
+        if m is None:
+            raise ValueError(f"Unexpected character {ch!r} at offset {pos}")
+        return m.end()
+    depth = 0
+    while True:
+        m = _STRUCTURE.search(text, pos)
+        if m is None:
+            raise ValueError("Unterminated JSON container")
+        ch = m.group()
+        if ch == '"':
+            pos = _skip_string(text, m.end())
+            continue
+        if ch in "[{":
+            flat = _FLAT_CONTAINER.match(text, m.start())
+            if flat is not None:
+                pos = flat.end()
+                if depth == 0:
+                    return pos
+                continue
+        pos = m.end()
+        depth += 1 if ch in "[{" else -1
+        if depth == 0:
+            return pos
+
+
+def _expect(text: str, pos: int, ch: str) -> None:
+    if text[pos] != ch:
+        raise ValueError(f"Expected {ch!r} at offset {pos}, found {text[pos]!r}")
+
+
+def _project(
+    value: object, steps: tuple[PathStep, ...], prefix: str
+) -> Iterator[tuple[str, object]]:
+    """Apply the remaining steps to an already-decoded value."""
+    if not steps:
+        yield prefix, value
+        return
+    step, rest = steps[0], steps[1:]
+    if step.kind in ("key", "any_key"):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                if step.kind == "any_key" or key == step.key:
+                    yield from _project(child, rest, format_key(prefix, key))
+    elif isinstance(value, list):
+        for i, child in enumerate(value):
+            if step.kind == "index" and i != step.index:
+                continue
+            if step.kind == "filter" and not step.matches_element(child):
+                continue
+            yield from _project(child, rest, f"{prefix}[{i}]")
+
+
+def _select(
+    text: str,
+    pos: int,
+    steps: tuple[PathStep, ...],
+    prefix: str,
+    out: list[tuple[str, object]],
+    need_end: bool,
+) -> int:
+    """
+    Collect matches of ``steps`` for the value at ``pos`` into ``out``; return its end offset.
+
+    With ``need_end`` False (nothing after this value will be read) a single-key or single-index
+    step stops as soon as its match is done and returns -1.
+    """
+    if not steps:
+        value, end = _DECODER.raw_decode(text, pos)
+        out.append((prefix, value))
+        return end
+    step, rest = steps[0], steps[1:]
+    ch = text[pos]
+    if ch == "{" and step.kind in ("key", "any_key"):
+        pos = _skip_ws(text, pos + 1)
+        if text[pos] == "}":
+            return pos + 1
+        while True:
+            _expect(text, pos, '"')
+            key, pos = json.decoder.scanstring(text, pos + 1)
+            pos = _skip_ws(text, pos)
+            _expect(text, pos, ":")
+            pos = _skip_ws(text, pos + 1)
+            if step.kind == "any_key":
+                pos = _select(text, pos, rest, format_key(prefix, key), out, True)
+            elif key == step.key:
+                pos = _select(text, pos, rest, format_key(prefix, key), out, need_end)
+                if not need_end:
+                    return -1
+            else:
+                pos = skip_value(text, pos)
+            pos = _skip_ws(text, pos)
+            if text[pos] == "}":
+                return pos + 1
+            _expect(text, pos, ",")
+            pos = _skip_ws(text, pos + 1)
+    if ch == "[" and step.kind in ("index", "any_index", "filter"):
+        pos = _skip_ws(text, pos + 1)
+        if text[pos] == "]":
+            return pos + 1
+        index = 0
+        while True:
+            item_prefix = f"{prefix}[{index}]"
+            if step.kind == "filter":
+                # Predicates need the element's fields, so decode just this element.
+                element, pos = _DECODER.raw_decode(text, pos)
+                if step.matches_element(element):
+                    out.extend(_project(element, rest, item_prefix))
+            elif step.kind == "any_index":
+                pos = _select(text, pos, rest, item_prefix, out, True)
+            elif index == step.index:
+                pos = _select(text, pos, rest, item_prefix, out, need_end)
+                if not need_end:
+                    return -1
+            else:
+                pos = skip_value(text, pos)
+            pos = _skip_ws(text, pos)
+            if text[pos] == "]":
+                return pos + 1
+            _expect(text, pos, ",")
+            pos = _skip_ws(text, pos + 1)
+            index += 1
+    return skip_value(text, pos)
+
+
+def iter_path_values(text: str, steps: tuple[PathStep, ...]) -> Iterator[tuple[str, object]]:
+    """
+    Yield (concrete path, value) for every match of ``steps`` in the JSON ``text``.
+
+    Matches are collected before yielding, so memory is bounded by the selected values, never
+    by the whole document.
+    """
+    if not text:
+        return
+    out: list[tuple[str, object]] = []
+    _select(text, _skip_ws(text, 0), steps, "", out, False)
+    yield from out
+
+
+def select_paths(
+    text: str, selectors: Iterable[tuple[PathStep, ...]]
+) -> Iterator[tuple[str, object]]:
+    for steps in selectors:
+        yield from iter_path_values(text, steps)
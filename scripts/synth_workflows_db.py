@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+"""
+Build a synthetic workflows.db: users, workflows and executions shaped like the ones the backend
+writes, at any size from 10^4 to 10^7 executions. The same config and seed always give the same
+rows, so two runs of bench_inspector.py measure the same data.
+
+The shape follows backend-java:
+- users and workflows carry the Hibernate columns. Workflow definitions are node/edge graphs
+  (start, agent, tool, condition, loop, storage, end) with agent_config.model set, so
+  ``nodes`` can attribute time to node types and models;
+- executions.state is the ExecutionState document Jackson writes. It has snake_case keys,
+  LocalDateTime.toString() timestamps and node_states per executed node. Its logs use the
+  WorkflowExecutor messages ("Executing node: ...", "Node completed with output: ...",
+  "Node failed: ..."). Failed runs carry one of a few error templates with varying numbers
+  and hosts, which is what ``failures`` clusters;
+- activity is skewed. Users and workflows are picked with Zipf weights (``skew``), so a few
+  owners account for most executions. Loop nodes repeat a geometric number of times, which
+  gives log counts and state sizes a long tail;
+- started_at increases with rowid (Poisson arrivals over ``days``), as it does for rows the
+  API inserts. A small share of the newest rows stays pending/running.
+
+Rows are generated in blocks of CHUNK_ROWS, each from its own seed, by a pool of worker
+processes. The main process inserts the blocks in order, so the output does not depend on
+``--workers``. Expect a few thousand rows/s per worker; 10^7 rows take tens of GB.
+
+Usage:
+  python3 scripts/synth_workflows_db.py /tmp/synthetic.db --executions 1e6
+  python3 scripts/synth_workflows_db.py /tmp/big.db --executions 1e7 --users 20000 --seed 7 --force
+  python3 scripts/synth_workflows_db.py /tmp/ms.db --executions 1e5 --timestamps epoch-ms
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterator
+
+TIMESTAMP_STORAGE = ("text", "epoch-ms")
+CHUNK_ROWS = 5000  # rows per independently seeded block; changing it changes the output
+
+SCHEMA = """
+CREATE TABLE users (
+    id VARCHAR(255) NOT NULL PRIMARY KEY,
+    username VARCHAR(255) NOT NULL UNIQUE,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    hashed_password VARCHAR(255) NOT NULL,
+    full_name VARCHAR(255),
+    is_active BOOLEAN NOT NULL,
+    is_admin BOOLEAN NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    last_login TIMESTAMP
+);
+CREATE TABLE workflows (
+    id VARCHAR(255) NOT NULL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    description TEXT,
+    version VARCHAR(255) NOT NULL,
+    definition TEXT NOT NULL,
+    owner_id VARCHAR(255),
+    is_public BOOLEAN NOT NULL,
+    is_template BOOLEAN NOT NULL,
+    category VARCHAR(255),
+    tags TEXT,
+    likes_count INTEGER NOT NULL,
+    views_count INTEGER NOT NULL,
+    uses_count INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NOT NULL
+);
+CREATE TABLE executions (
+    id VARCHAR(255) NOT NULL PRIMARY KEY,
+    workflow_id VARCHAR(255) NOT NULL,
+    user_id VARCHAR(255),
+    status VARCHAR(255) NOT NULL,
+    state TEXT NOT NULL,
+    started_at TIMESTAMP NOT NULL,
+    completed_at TIMESTAMP,
+    FOREIGN KEY(user_id) REFERENCES users (id)
+);
+"""
+
+MODELS = ("gpt-4o-mini", "gpt-4o-mini", "gpt-4o", "gpt-4", "claude-3-5-sonnet", "gemini-1.5-pro")
+MIDDLE_NODES = ("agent", "agent", "agent", "tool", "tool", "condition", "loop", "storage")
+CATEGORIES = ("automation", "research", "support", "data", "marketing", None)
+HOSTS = ("api.openai.com", "search.internal", "crm.example.com", "storage.svc", "hooks.slack.com")
+WORDS = (
+    "the report summary customer order invoice data result analysis request response model "
+    "value field record update status pipeline account region quarter revenue growth risk "
+    "ticket priority issue resolved pending review draft final score item batch source"
+).split()
+_CORPUS = random.Random(0).choices(WORDS, k=1 << 16)  # text is sliced from here
+ERROR_TEMPLATES: tuple[Callable[[random.Random], str], ...] = (
+    lambda r: f"HTTP {r.choice((429, 500, 502, 503))} from {r.choice(HOSTS)} after "
+    f"{r.randint(1, 5)} retries",
+    lambda r: f"Timeout after {r.choice((5000, 10000, 30000))}ms calling {r.choice(HOSTS)}",
+    lambda r: f"Rate limit exceeded for model {r.choice(MODELS)}: retry after {r.randint(1, 60)}s",
+    lambda r: f"Invalid JSON in agent output at position {r.randint(1, 4000)}",
+    lambda r: f"Connection refused: {r.choice(HOSTS)}:{r.choice((443, 5432, 6379))}",
+)
+NODE_MILLIS = {  # lognormal (mu, sigma) of node durations in milliseconds
+    "agent": (7.8, 0.8),
+    "tool": (5.7, 1.0),
+    "storage": (3.0, 0.7),
+    "loop": (2.0, 0.5),
+    "condition": (0.5, 0.5),
+    "start": (0.0, 0.3),
+    "end": (0.0, 0.3),
+}
+
+
+@dataclass(frozen=True)
+class SynthConfig:
+    executions: int = 10_000
+    users: int = 200
+    workflows: int = 100
+    seed: int = 1
+    start: datetime = datetime(2024, 5, 1)
+    days: float = 30.0
+    skew: float = 1.1  # Zipf exponent of per-user and per-workflow activity
+    failure_rate: float = 0.08
+    unsettled_rate: float = 0.02  # pending/running, drawn from the newest rows
+    loop_continue: float = 0.7  # geometric loop iteration count: mean 1 / (1 - p)
+    timestamps: str = "text"  # executions.started_at/completed_at as TEXT or epoch ms
+
+    @property
+    def label(self) -> str:
+        return (
+            f"synthetic executions={self.executions} users={self.users} "
+            f"workflows={self.workflows} seed={self.seed}"
+        )
+
+
+@dataclass(frozen=True)
+class SynthSummary:
+    users: int
+    workflows: int
+    executions: int
+    state_bytes: int
+    seconds: float
+
+
+@dataclass(frozen=True)
+class _Node:
+    id: str
+    type: str
+    name: str
+    model: str | None = None
+
+
+@dataclass(frozen=True)
+class _Workflow:
+    id: str
+    nodes: tuple[_Node, ...]
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+@lru_cache(maxsize=4096)  # log timestamps of one execution share a handful of seconds
+def _second_text(second: int) -> str:
+    return (_EPOCH + timedelta(seconds=second)).isoformat()
+
+
+def _epoch_ms(dt: datetime) -> int:
+    return round((dt - _EPOCH).total_seconds() * 1000)
+
+
+def java_local_datetime(ms: int) -> str:
+    """LocalDateTime.toString() of epoch milliseconds: seconds and millis only when non-zero."""
+    second, millis = divmod(ms, 1000)
+    text = _second_text(second)
+    if millis:
+        return f"{text}.{millis:03d}"
+    return text[:-3] if text.endswith(":00") else text
+
+
+def _column_time(ms: int | None, storage: str) -> object:
+    """started_at/completed_at as sqlite-jdbc stores it: epoch ms or 'yyyy-MM-dd HH:mm:ss.SSS'."""
+    if ms is None or storage == "epoch-ms":
+        return ms
+    second, millis = divmod(ms, 1000)
+    return f"{_second_text(second).replace('T', ' ')}.{millis:03d}"
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _zipf_weights(n: int, skew: float) -> list[float]:
+    """Cumulative weights for random.choices: rank r gets 1 / r**skew."""
+    return list(itertools.accumulate(1.0 / (rank**skew) for rank in range(1, n + 1)))
+
+
+def _words(rng: random.Random, n: int) -> str:
+    n = min(max(1, n), len(_CORPUS) // 2)
+    offset = rng.randrange(len(_CORPUS) - n)
+    return " ".join(_CORPUS[offset : offset + n])
+
+
+def _java_string(value: object, limit: int = 101) -> str:
+    """
+    String.valueOf on the Map/List an executor returns ({k=v, ...}). Rendering stops soon
+    after ``limit`` characters, which is all the completion log keeps.
+    """
+    if isinstance(value, (dict, list)):
+        is_dict = isinstance(value, dict)
+        items = value.items() if is_dict else ((None, v) for v in value)
+        parts, size = [], 1
+        for key, item in items:
+            text = _java_string(item, limit - size)
+            part = f"{key}={text}" if is_dict else text
+            parts.append(part)
+            size += len(part) + 2
+            if size > limit:
+                break
+        return ("{" if is_dict else "[") + ", ".join(parts) + ("}" if is_dict else "]")
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "null" if value is None else str(value)
+
+
+def create_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(SCHEMA)
+
+
+def _users(rng: random.Random, config: SynthConfig) -> list[tuple]:
+    start = _epoch_ms(config.start)
+    rows = []
+    for i in range(config.users):
+        joined = start - rng.randrange(1, 365 * 86400) * 1000
+        rows.append(
+            (
+                _uuid(rng),
+                f"user{i:06d}",
+                f"user{i:06d}@example.com",
+                "$2a$10$" + "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789./", k=53)),
+                f"User {i}",
+                1,
+                int(i == 0),
+                _column_time(joined, config.timestamps),
+                _column_time(start, config.timestamps),
+            )
+        )
+    return rows
+
+
+def _workflow(rng: random.Random, index: int, owner: str, config: SynthConfig) -> tuple:
+    middle = rng.choices(MIDDLE_NODES, k=rng.randint(1, 10))
+    nodes = [_Node("start-1", "start", "Start")]
+    for position, kind in enumerate(middle, start=2):
+        model = rng.choice(MODELS) if kind == "agent" else None
+        nodes.append(_Node(f"{kind}-{position}", kind, f"{kind.title()} {position}", model))
+    nodes.append(_Node(f"end-{len(middle) + 2}", "end", "End"))
+    definition = {
+        "nodes": [
+            {
+                "id": n.id,
+                "type": n.type,
+                "name": n.name,
+                "position": {"x": 100 + 200 * i, "y": 100},
+                **(
+                    {"agent_config": {"model": n.model, "prompt": _words(rng, 30)}}
+                    if n.model
+                    else {}
+                ),
+            }
+            for i, n in enumerate(nodes)
+        ],
+        "edges": [
+            {"id": f"e{i}", "source": a.id, "target": b.id}
+            for i, (a, b) in enumerate(zip(nodes, nodes[1:]), start=1)
+        ],
+        "variables": {},
+    }
+    created = _column_time(
+        _epoch_ms(config.start) - rng.randrange(86400, 180 * 86400) * 1000, config.timestamps
+    )
+    workflow_id = _uuid(rng)
+    row = (
+        workflow_id,
+        f"Workflow {index}",
+        _words(rng, 12),
+        "1.0.0",
+        json.dumps(definition),
+        owner,
+        int(rng.random() < 0.2),
+        0,
+        rng.choice(CATEGORIES),
+        json.dumps(rng.sample(WORDS, 2)),
+        rng.randrange(50),
+        rng.randrange(500),
+        0,
+        created,
+        created,
+    )
+    return row, _Workflow(workflow_id, tuple(nodes))
+
+
+def _node_output(rng: random.Random, node: _Node, iterations: int) -> object:
+    if node.type == "agent":
+        completion = max(5, int(rng.lognormvariate(3.8, 0.9)))
+        return {
+            "text": _words(rng, completion),
+            "model": node.model,
+            "usage": {"prompt_tokens": rng.randint(50, 2000), "completion_tokens": completion},
+        }
+    if node.type == "tool":
+        return {
+            "status": 200,
+            "items": [
+                {"id": rng.randrange(10**6), "score": round(rng.random(), 3)}
+                for _ in range(rng.randint(0, 6))
+            ],
+        }
+    if node.type == "condition":
+        return {"result": rng.random() < 0.7}
+    if node.type == "loop":
+        results = [rng.randrange(100) for _ in range(iterations)]
+        return {"iterations": iterations, "results": results}
+    if node.type == "storage":
+        return {"key": f"{rng.choice(WORDS)}-{rng.randrange(10**4)}", "stored": True}
+    return None
+
+
+def _ms(rng: random.Random, node_type: str) -> int:
+    return max(1, round(rng.lognormvariate(*NODE_MILLIS[node_type])))
+
+
+def _execution_state(
+    rng: random.Random,
+    config: SynthConfig,
+    execution_id: str,
+    workflow: _Workflow,
+    started: int,
+    status: str,
+) -> tuple[dict[str, object], int | None]:
+    """The state Jackson would store, and completed_at in epoch ms (None while unsettled)."""
+    variables = {"input_data": _words(rng, rng.randint(3, 40)), "priority": rng.randint(1, 5)}
+    logs: list[dict[str, object]] = []
+    node_states: dict[str, dict[str, object]] = {}
+    now = started
+
+    def log(level: str, node_id: str | None, message: str) -> None:
+        logs.append(
+            {
+                "timestamp": java_local_datetime(now),
+                "level": level,
+                "node_id": node_id,
+                "message": message,
+            }
+        )
+
+    nodes = workflow.nodes
+    stop_at = len(nodes)  # index of the node that fails or is still running
+    if status == "pending":
+        stop_at = -1
+    else:
+        log("INFO", None, "Workflow execution started")
+        if status != "completed":
+            stop_at = rng.randrange(1, len(nodes))
+    error = result = current = None
+    for index, node in enumerate(nodes[: stop_at + 1]):
+        current = node.id
+        log("INFO", node.id, f"Executing node: {node.name} (type: {node.type})")
+        node_started = now
+        iterations = 0
+        if node.type == "loop":
+            iterations = 1
+            while rng.random() < config.loop_continue:
+                iterations += 1
+            for i in range(1, iterations + 1):
+                now += _ms(rng, "tool")
+                log("INFO", node.id, f"Loop iteration {i} of {iterations}")
+        now += _ms(rng, node.type)
+        node_state: dict[str, object] = {
+            "node_id": node.id,
+            "status": "completed",
+            "input": {"input_data": variables["input_data"]} if index else variables,
+            "output": None,
+            "error": None,
+            "started_at": java_local_datetime(node_started),
+            "completed_at": None,
+        }
+        node_states[node.id] = node_state
+        if index == stop_at and status == "running":
+            node_state["status"] = "running"
+            break
+        if index == stop_at and status == "failed":
+            error = rng.choice(ERROR_TEMPLATES)(rng)
+            node_state.update(status="failed", error=error, completed_at=java_local_datetime(now))
+            log("ERROR", node.id, f"Node failed: {error}")
+            break
+        output = variables if node.type == "start" else _node_output(rng, node, iterations)
+        node_state.update(output=output, completed_at=java_local_datetime(now))
+        text = _java_string(output)
+        log(
+            "INFO",
+            node.id,
+            f"Node completed with output: {text[:100] + '...' if len(text) > 100 else text}",
+        )
+        if output is not None and node.type != "end":
+            result = output
+    completed = None
+    if status in ("completed", "failed"):
+        completed = now
+        log("INFO", None, f"Workflow execution {status}")
+    return {
+        "execution_id": execution_id,
+        "workflow_id": workflow.id,
+        "status": status,
+        "current_node": current,
+        "node_states": node_states,
+        "variables": variables,
+        "result": result if status == "completed" else None,
+        "error": error,
+        "started_at": java_local_datetime(started),
+        "completed_at": None if completed is None else java_local_datetime(completed),
+        "logs": logs,
+    }, completed
+
+
+@dataclass(frozen=True)
+class _Population:
+    """What every block draws from: users and workflows with their Zipf weights."""
+
+    config: SynthConfig
+    user_ids: tuple[str, ...]
+    user_weights: tuple[float, ...]
+    workflows: tuple[_Workflow, ...]
+    workflow_weights: tuple[float, ...]
+    owned: dict[str, tuple[_Workflow, ...]]
+
+
+def _population(rng: random.Random, config: SynthConfig) -> tuple[_Population, list, list]:
+    """The population plus the users and workflows rows to insert."""
+    users = _users(rng, config)
+    user_ids = tuple(u[0] for u in users)
+    user_weights = tuple(_zipf_weights(len(user_ids), config.skew))
+    workflow_rows, workflows = [], []
+    owned: dict[str, list[_Workflow]] = {}
+    for i in range(config.workflows):
+        owner = rng.choices(user_ids, cum_weights=user_weights)[0]
+        row, workflow = _workflow(rng, i, owner, config)
+        workflow_rows.append(row)
+        workflows.append(workflow)
+        owned.setdefault(owner, []).append(workflow)
+    population = _Population(
+        config,
+        user_ids,
+        user_weights,
+        tuple(workflows),
+        tuple(_zipf_weights(len(workflows), config.skew)),
+        {owner: tuple(ws) for owner, ws in owned.items()},
+    )
+    return population, users, workflow_rows
+
+
+def execution_block(population: _Population, block: int) -> list[tuple]:
+    """
+    executions rows ``block * CHUNK_ROWS`` onwards, in started_at order. Each block has its own
+    seed and slice of the time span, so blocks can be generated in any order or process.
+    """
+    config = population.config
+    rng = random.Random(f"{config.seed}:executions:{block}")
+    first = block * CHUNK_ROWS
+    count = min(CHUNK_ROWS, config.executions - first)
+    span_ms = config.days * 86400 * 1000 / max(1, config.executions)
+    begin = _epoch_ms(config.start) + first * span_ms
+    # Sorted uniform arrivals in the block's window: a Poisson process given its count.
+    arrivals = sorted(begin + rng.random() * count * span_ms for _ in range(count))
+    unsettled_from = int(config.executions * (1 - config.unsettled_rate))
+    rows = []
+    for offset, arrival in enumerate(arrivals):
+        started = round(arrival)
+        user = rng.choices(population.user_ids, cum_weights=population.user_weights)[0]
+        mine = population.owned.get(user)
+        if mine and rng.random() < 0.8:
+            workflow = rng.choice(mine)
+        else:
+            workflow = rng.choices(population.workflows, cum_weights=population.workflow_weights)[0]
+        if first + offset >= unsettled_from:
+            status = rng.choice(("pending", "running", "running"))
+        else:
+            status = "failed" if rng.random() < config.failure_rate else "completed"
+        execution_id = _uuid(rng)
+        state, completed = _execution_state(rng, config, execution_id, workflow, started, status)
+        rows.append(
+            (
+                execution_id,
+                workflow.id,
+                user,
+                status,
+                json.dumps(state),
+                _column_time(started, config.timestamps),
+                _column_time(completed, config.timestamps),
+            )
+        )
+    return rows
+
+
+_WORKER_POPULATION: _Population | None = None
+
+
+def _init_worker(population: _Population) -> None:
+    global _WORKER_POPULATION
+    _WORKER_POPULATION = population
+
+
+def _worker_block(block: int) -> list[tuple]:
+    assert _WORKER_POPULATION is not None
+    return execution_block(_WORKER_POPULATION, block)
+
+
+def iter_execution_blocks(population: _Population, workers: int = 1) -> Iterator[list[tuple]]:
+    """Blocks in order. With workers > 1 at most 2 * workers blocks are in flight at once."""
+    blocks = range(-(-population.config.executions // CHUNK_ROWS))
+    if workers <= 1 or len(blocks) <= 1:
+        for block in blocks:
+            yield execution_block(population, block)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(population,)
+    ) as pool:
+        pending: deque[Future] = deque()
+        for block in blocks:
+            pending.append(pool.submit(_worker_block, block))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def generate(
+    path: Path,
+    config: SynthConfig = SynthConfig(),
+    workers: int = 1,
+    progress: Callable[[int], None] | None = None,
+) -> SynthSummary:
+    """Write a new database at ``path`` (which must not exist)."""
+    if config.timestamps not in TIMESTAMP_STORAGE:
+        raise ValueError(f"timestamps must be one of {', '.join(TIMESTAMP_STORAGE)}")
+    if config.users < 1 or config.workflows < 1:
+        raise ValueError("users and workflows must be at least 1")
+    if path.exists():
+        raise FileExistsError(path)
+    started = time.monotonic()
+    population, users, workflow_rows = _population(random.Random(config.seed), config)
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        # A throwaway file: no journal, no fsync. The result is an ordinary rollback-journal DB.
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        create_schema(conn)
+        conn.execute("BEGIN")
+        conn.executemany(f"INSERT INTO users VALUES ({', '.join('?' * 9)})", users)
+        conn.executemany(f"INSERT INTO workflows VALUES ({', '.join('?' * 15)})", workflow_rows)
+        conn.execute("COMMIT")
+        written = state_bytes = 0
+        for rows in iter_execution_blocks(population, workers):
+            conn.execute("BEGIN")
+            conn.executemany("INSERT INTO executions VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+            written += len(rows)
+            state_bytes += sum(len(r[4]) for r in rows)
+            if progress is not None:
+                progress(written)
+        conn.execute("PRAGMA journal_mode = DELETE")
+    except BaseException:
+        conn.close()
+        path.unlink(missing_ok=True)
+        raise
+    conn.close()
+    return SynthSummary(
+        len(users), len(population.workflows), written, state_bytes, time.monotonic() - started
+    )
+
+
+def parse_row_count(text: str) -> int:
+    """Accept 10000, 10_000 and 1e4."""
+    value = float(text.replace("_", ""))
+    if value < 0 or value != int(value):
+        raise argparse.ArgumentTypeError(f"not a row count: {text}")
+    return int(value)
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    defaults = SynthConfig()
+    parser = argparse.ArgumentParser(description="Generate a synthetic workflows.db.")
+    parser.add_argument("output", type=Path, help="Database file to create")
+    parser.add_argument("--executions", type=parse_row_count, default=defaults.executions)
+    parser.add_argument("--users", type=parse_row_count, default=defaults.users)
+    parser.add_argument("--workflows", type=parse_row_count, default=defaults.workflows)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--start",
+        type=datetime.fromisoformat,
+        default=defaults.start,
+        help=f"First started_at (default {defaults.start:%Y-%m-%d})",
+    )
+    parser.add_argument("--days", type=float, default=defaults.days, help="Span of started_at")
+    parser.add_argument(
+        "--skew", type=float, default=defaults.skew, help="Zipf exponent of user activity"
+    )
+    parser.add_argument("--failure-rate", type=float, default=defaults.failure_rate)
+    parser.add_argument("--timestamps", choices=TIMESTAMP_STORAGE, default=defaults.timestamps)
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Generator processes"
+    )
+    parser.add_argument("--force", action="store_true", help="Replace an existing output file")
+    return parser
+
+
+def config_from_args(args: argparse.Namespace) -> SynthConfig:
+    return SynthConfig(
+        executions=args.executions,
+        users=args.users,
+        workflows=args.workflows,
+        seed=args.seed,
+        start=args.start,
+        days=args.days,
+        skew=args.skew,
+        failure_rate=args.failure_rate,
+        timestamps=args.timestamps,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.users < 1 or args.workflows < 1:
+        parser.error("--users and --workflows must be at least 1")
+    if args.output.exists():
+        if not args.force:
+            print(f"{args.output} exists; pass --force to replace it.", file=sys.stderr)
+            return 1
+        args.output.unlink()
+    config = config_from_args(args)
+    started = time.monotonic()
+
+    def progress(written: int) -> None:
+        if written % 100_000 < CHUNK_ROWS or written == config.executions:
+            rate = written / max(time.monotonic() - started, 1e-9)
+            print(f"  {written}/{config.executions} rows ({rate:,.0f}/s)", file=sys.stderr)
+
+    summary = generate(args.output, config, max(1, args.workers), progress)
+    print(
+        f"Wrote {summary.executions} execution(s), {summary.users} user(s), "
+        f"{summary.workflows} workflow(s) to {args.output} "
+        f"({summary.state_bytes / 2**20:.1f} MB of state) in {summary.seconds:.1f}s.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
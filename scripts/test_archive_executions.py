@@ -0,0 +1,132 @@
+"""Unit tests for archive_executions (batched move into the archive, transparent lookup)."""
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import archive_executions
+import execution_archive
+import inspect_executions_db
+
+NOW = 1_700_000_000.0  # 2023-11-14T22:13:20Z
+DAY_MS = 86_400_000
+
+
+class TestArchiveExecutions(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "workflows.db"
+        conn = sqlite3.connect(self.db)
+        conn.executescript(
+            """
+            CREATE TABLE users (id VARCHAR PRIMARY KEY, username VARCHAR NOT NULL);
+            CREATE TABLE executions (
+                id VARCHAR NOT NULL PRIMARY KEY, workflow_id VARCHAR NOT NULL, user_id VARCHAR,
+                status VARCHAR NOT NULL, state TEXT NOT NULL, started_at DATETIME,
+                completed_at DATETIME
+            );
+            INSERT INTO users VALUES ('user-1', 'alice');
+            """
+        )
+        now_ms = int(NOW * 1000)
+        rows = [
+            (f"exec-old-{i}", "completed", now_ms - 40 * DAY_MS, now_ms - 40 * DAY_MS + 5)
+            for i in range(7)
+        ]
+        rows += [
+            ("exec-new", "completed", now_ms - DAY_MS, now_ms - DAY_MS + 5),
+            ("exec-old-failed", "failed", now_ms - 40 * DAY_MS, now_ms - 40 * DAY_MS + 5),
+            ("exec-running", "running", now_ms - 40 * DAY_MS, None),
+        ]
+        conn.executemany(
+            "INSERT INTO executions VALUES (?, 'wf-1', 'user-1', ?, '{\"logs\": []}', ?, ?)",
+            rows,
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _live_ids(self) -> list[str]:
+        with contextlib.closing(sqlite3.connect(self.db)) as conn:
+            return sorted(r[0] for r in conn.execute("SELECT id FROM executions"))
+
+    def _archive(self, **kwargs: object) -> archive_executions.ArchiveRun:
+        conn = sqlite3.connect(self.db, isolation_level=None)
+        try:
+            storage = inspect_executions_db.detect_timestamp_storage(conn)
+            cutoff = archive_executions.cutoff_bound(storage, NOW, 30)
+            path = execution_archive.archive_path(self.db)
+            with execution_archive.ExecutionArchive(path) as archive:
+                return archive_executions.archive_executions(
+                    conn, archive, cutoff, pause=0, **kwargs
+                )
+        finally:
+            conn.close()
+
+    def test_moves_only_old_rows_of_selected_statuses_in_batches(self) -> None:
+        run = self._archive(batch_size=3)
+        self.assertEqual((run.executions, run.batches), (7, 3))
+        self.assertEqual(self._live_ids(), ["exec-new", "exec-old-failed", "exec-running"])
+        path = execution_archive.archive_path(self.db)
+        with execution_archive.ExecutionArchive(path, readonly=True) as archive:
+            self.assertEqual(archive.get("exec-old-3")["status"], "completed")
+
+    def test_max_batches_stops_early_and_resumes(self) -> None:
+        self.assertEqual(self._archive(batch_size=2, max_batches=1).executions, 2)
+        self.assertEqual(self._archive(statuses=("completed", "failed")).executions, 6)
+        self.assertEqual(self._live_ids(), ["exec-new", "exec-running"])
+
+    def test_segment_is_written_without_the_write_lock(self) -> None:
+        append = execution_archive.ExecutionArchive.append
+        writes = []
+
+        def append_while_backend_writes(archive, rows):
+            # Another writer must get in while the segment is compressed and fsynced.
+            with contextlib.closing(sqlite3.connect(self.db, timeout=0)) as other:
+                other.execute("UPDATE executions SET state = '{}' WHERE id = ?", (rows[0]["id"],))
+                other.commit()
+            writes.append(rows[0]["id"])
+            return append(archive, rows)
+
+        with mock.patch.object(
+            execution_archive.ExecutionArchive, "append", append_while_backend_writes
+        ):
+            run = self._archive(batch_size=4)
+        self.assertEqual(writes, ["exec-old-0", "exec-old-4"])
+        self.assertEqual((run.executions, run.changed), (5, 2))
+        self.assertEqual(
+            self._live_ids(),
+            ["exec-new", "exec-old-0", "exec-old-4", "exec-old-failed", "exec-running"],
+        )
+        self.assertEqual(self._archive().executions, 2)
+        path = execution_archive.archive_path(self.db)
+        with execution_archive.ExecutionArchive(path, readonly=True) as archive:
+            self.assertEqual(archive.get("exec-old-0")["state"], "{}")
+
+    def test_inspector_finds_archived_ids(self) -> None:
+        self._archive()
+        out, err = io.StringIO(), io.StringIO()
+        env = {"WORKFLOW_SQLITE_DB": str(self.db)}
+        with mock.patch.dict(os.environ, env):
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                code = inspect_executions_db.main(
+                    ["exec-old-1", "exec-new", "exec-gone", "--stream", "--format", "jsonl"]
+                )
+        self.assertEqual(code, 0)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"owner_username": "alice"', lines[1])
+        self.assertIn("1 from the archive", err.getvalue())
+        self.assertIn("IDs not found in DB (1): exec-gone", err.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Unit tests for bench_inspector (inspector query-path benchmark and baseline comparison)."""
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import bench_inspector
+from synth_workflows_db import SynthConfig, generate
+
+
+class TestCompare(unittest.TestCase):
+    def test_verdicts(self) -> None:
+        records = bench_inspector.compare(
+            {"slow": 2.0, "noise": 0.03, "same": 1.1, "quick": 0.5, "added": 1.0},
+            {"slow": 1.0, "noise": 0.01, "same": 1.0, "quick": 1.0},
+            tolerance=0.25,
+            min_delta=0.05,
+        )
+        verdicts = {r["case"]: r["verdict"] for r in records}
+        self.assertEqual(
+            verdicts,
+            {"slow": "REGRESSED", "noise": "ok", "same": "ok", "quick": "faster", "added": "new"},
+        )
+        self.assertEqual(records[0]["ratio"], 2.0)
+
+    def test_baseline_keeps_other_datasets_and_cases(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "baseline.json"
+            data = bench_inspector.load_baseline(path)
+            bench_inspector.save_baseline(path, data, "small", {"a": 0.123456, "b": 1.0})
+            bench_inspector.save_baseline(path, data, "large", {"a": 9.0})
+            data = bench_inspector.load_baseline(path)
+            bench_inspector.save_baseline(path, data, "small", {"a": 0.2})
+            stored = json.loads(path.read_text())["datasets"]
+        self.assertEqual(stored["small"]["seconds"], {"a": 0.2, "b": 1.0})
+        self.assertEqual(stored["large"]["seconds"], {"a": 9.0})
+        self.assertIn("sqlite", stored["small"])
+
+
+class TestRunSuite(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.db = Path(cls.tmp.name) / "synthetic.db"
+        generate(cls.db, SynthConfig(executions=300, users=20, workflows=8))
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def test_every_query_path_runs(self) -> None:
+        seen = []
+        results = bench_inspector.run_suite(
+            self.db, bench_inspector.CASES, repeat=1, progress=lambda n, _: seen.append(n)
+        )
+        names = [c.name for c in bench_inspector.CASES]
+        self.assertEqual(list(results), names)
+        self.assertEqual(seen, names)
+        self.assertTrue(all(s > 0 for s in results.values()))
+        self.assertFalse(list(Path(self.tmp.name).glob("synthetic.db.*")))  # no sidecars left
+
+    def test_failing_invocation_raises(self) -> None:
+        case = bench_inspector.BenchCase("latency", ("latency",))
+        with self.assertRaises(bench_inspector.BenchError):
+            bench_inspector.run_case(case, Path(self.tmp.name) / "missing.db", {}, repeat=1)
+
+    def test_case_selection_by_prefix(self) -> None:
+        names = [c.name for c in bench_inspector.select_cases(["rollup", "list"])]
+        self.assertEqual(names, ["list-recent", "rollup-build", "rollup"])
+
+
+if __name__ == "__main__":
+    unittest.main()
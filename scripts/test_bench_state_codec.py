@@ -0,0 +1,62 @@
+"""Unit tests for bench_state_codec (sampling, round-trip check, report rows)."""
+from __future__ import annotations
+
+import itertools
+import json
+import sqlite3
+import unittest
+
+import bench_state_codec
+import inspect_executions_db
+
+
+class TestBenchStateCodec(unittest.TestCase):
+    def setUp(self) -> None:
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.executescript(
+            """
+            CREATE TABLE users (id VARCHAR PRIMARY KEY, username VARCHAR NOT NULL);
+            CREATE TABLE executions (
+                id VARCHAR NOT NULL PRIMARY KEY, workflow_id VARCHAR NOT NULL, user_id VARCHAR,
+                status VARCHAR NOT NULL, state TEXT NOT NULL, started_at DATETIME,
+                completed_at DATETIME
+            );
+            """
+        )
+        states = [
+            json.dumps({"status": "completed", "logs": [], "node_states": {}, "n": i})
+            for i in range(5)
+        ]
+        self.conn.executemany(
+            "INSERT INTO executions VALUES (?, 'wf-1', NULL, 'completed', ?, NULL, NULL)",
+            [(f"exec-{i}", s) for i, s in enumerate(states)] + [("exec-bad", "{")],
+        )
+
+    def tearDown(self) -> None:
+        self.conn.close()
+
+    def test_sample_skips_undecodable_rows_and_honours_limit(self) -> None:
+        sample, stored, undecodable = bench_state_codec.load_sample(self.conn, limit=10)
+        self.assertEqual((len(sample), undecodable), (5, 1))
+        self.assertEqual(sample[0][1]["n"], 0)
+        self.assertGreater(stored, 0)
+        sample, _, _ = bench_state_codec.load_sample(
+            self.conn, inspect_executions_db.ExecutionFilters(), limit=2
+        )
+        self.assertEqual([i for i, _ in sample], ["exec-0", "exec-1"])
+        self.assertEqual(bench_state_codec.verify_round_trip(sample), [])
+
+    def test_benchmark_reports_best_pass_per_codec(self) -> None:
+        ticks = itertools.count()
+        results = bench_state_codec.benchmark(
+            [{"a": 1}, {"b": [2]}], repeat=2, timer=lambda: float(next(ticks))
+        )
+        self.assertEqual([r.name for r in results], [c.name for c in bench_state_codec.CODECS])
+        self.assertTrue(all(r.encode_seconds == 1.0 and r.rows == 2 for r in results))
+        records = bench_state_codec.bench_records(results, stored=2**20)
+        self.assertEqual(records[0]["vs_json"], 1.0)
+        self.assertEqual(records[0]["encode_mb_s"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
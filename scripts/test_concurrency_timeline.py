@@ -0,0 +1,82 @@
+"""Unit tests for concurrency_timeline (sweep line, windows, arrival statistics)."""
+from __future__ import annotations
+
+import random
+import unittest
+from collections import Counter
+
+import concurrency_timeline
+
+
+def _brute_force(intervals: list[tuple[float, float]], horizon: float) -> Counter:
+    """Seconds at each level, by sampling every elementary interval between events."""
+    points = sorted({t for pair in intervals for t in pair} | {horizon})
+    levels: Counter = Counter()
+    for lo, hi in zip(points, points[1:]):
+        mid = (lo + hi) / 2
+        levels[sum(1 for s, e in intervals if s <= mid < e)] += hi - lo
+    return levels
+
+
+class TestConcurrencySweep(unittest.TestCase):
+    def test_matches_brute_force_levels(self) -> None:
+        rng = random.Random(3)
+        intervals = []
+        for _ in range(300):
+            start = rng.uniform(0, 1000)
+            intervals.append((start, start + rng.expovariate(1 / 30)))
+        intervals.sort()
+        sweep = concurrency_timeline.ConcurrencySweep()
+        for start, end in intervals:
+            sweep.add(start, end)
+        sweep.finish()
+        expected = _brute_force(intervals, max(e for _, e in intervals))
+        stats = sweep.overall()
+        expected.pop(0, None)
+        for level, seconds in expected.items():
+            self.assertAlmostEqual(stats.level_seconds[level], seconds, places=6)
+        self.assertEqual(stats.peak, max(expected))
+
+    def test_end_before_start_on_ties_and_peak_time(self) -> None:
+        sweep = concurrency_timeline.ConcurrencySweep()
+        sweep.add(0, 10)
+        sweep.add(10, 20)  # starts exactly when the first ends
+        sweep.add(12, 13)
+        sweep.finish()
+        stats = sweep.overall()
+        self.assertEqual((stats.peak, stats.peak_at), (2, 12))
+        self.assertEqual(stats.level_seconds, Counter({1: 19, 2: 1}))
+        self.assertEqual(stats.quantile(0.5), 1)
+        self.assertAlmostEqual(stats.mean, 21 / 20)
+
+    def test_windows_split_held_time_at_boundaries(self) -> None:
+        sweep = concurrency_timeline.ConcurrencySweep("hour")
+        sweep.add(3000, 4200)
+        sweep.finish()
+        self.assertEqual(
+            {k: w.level_seconds[1] for k, w in sweep.windows.items()}, {0.0: 600, 3600.0: 600}
+        )
+        self.assertEqual(sweep.windows[0.0].arrivals, 1)
+        self.assertEqual(sweep.windows[3600.0].arrivals, 0)
+
+    def test_open_ended_and_out_of_order_rows(self) -> None:
+        sweep = concurrency_timeline.ConcurrencySweep()
+        sweep.add(0, None)
+        sweep.add(5, 8)
+        sweep.add(4, 6)  # clamped to 5
+        sweep.finish(horizon=10)
+        self.assertEqual((sweep.open_ended, sweep.out_of_order), (1, 1))
+        self.assertEqual(sweep.overall().level_seconds, Counter({1: 7, 2: 2, 3: 1}))
+
+    def test_arrivals_per_minute_include_idle_minutes(self) -> None:
+        sweep = concurrency_timeline.ConcurrencySweep()
+        for t in (0, 10, 20, 185):
+            sweep.add(t, t + 1)
+        sweep.finish()
+        self.assertEqual(sweep.minute_arrivals, Counter({3: 1, 0: 2, 1: 1}))
+        self.assertEqual(sweep.overall().busiest_minute, 3)
+        self.assertEqual(sweep.arrival_rate_quantiles((0.5,)), {0.5: 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
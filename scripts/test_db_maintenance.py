@@ -0,0 +1,219 @@
+"""Unit tests for db_maintenance (space stats, throttled backup, chunked incremental vacuum)."""
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import db_maintenance
+
+
+def _make_db(path: Path, rows: int = 400, auto_vacuum: str = "NONE") -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA auto_vacuum = {auto_vacuum}")
+    conn.executescript(
+        """
+        CREATE TABLE executions (
+            id VARCHAR NOT NULL PRIMARY KEY, workflow_id VARCHAR NOT NULL,
+            status VARCHAR NOT NULL, state TEXT NOT NULL
+        );
+        """
+    )
+    conn.executemany(
+        "INSERT INTO executions VALUES (?, 'wf-1', 'completed', ?)",
+        [(f"exec-{i}", "x" * 2000) for i in range(rows)],
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestSpaceStats(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "workflows.db"
+        _make_db(self.db)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_counts_free_pages_after_delete(self) -> None:
+        with contextlib.closing(sqlite3.connect(self.db)) as conn:
+            before = db_maintenance.space_stats(conn)
+            conn.execute("DELETE FROM executions WHERE rowid <= 200")
+            conn.commit()
+            after = db_maintenance.space_stats(conn)
+        self.assertEqual(before.freelist_count, 0)
+        self.assertGreater(after.freelist_count, 0)
+        self.assertEqual(after.auto_vacuum, "none")
+        record = after.record()
+        self.assertEqual(record["free_pages"], after.freelist_count)
+        self.assertAlmostEqual(record["free_share"], round(after.free_share, 4))
+
+    def test_fragmentation_per_table(self) -> None:
+        with contextlib.closing(sqlite3.connect(self.db)) as conn:
+            records = db_maintenance.table_fragmentation(conn)
+        if records is None:
+            self.skipTest("SQLite built without dbstat")
+        names = {r["name"] for r in records}
+        self.assertIn("executions", names)
+        executions = next(r for r in records if r["name"] == "executions")
+        self.assertGreater(executions["leaves"], 1)
+        self.assertGreaterEqual(executions["out_of_order"], 0.0)
+
+
+class TestBackup(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.db = self.dir / "workflows.db"
+        _make_db(self.db)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_copies_in_steps_and_throttles(self) -> None:
+        pauses: list[float] = []
+        dest = self.dir / "copy.db"
+        result = db_maintenance.throttled_backup(
+            self.db, dest, pages_per_step=16, max_mb_per_s=0.5, sleep=pauses.append
+        )
+        with contextlib.closing(sqlite3.connect(dest)) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM executions").fetchone()[0], 400)
+        self.assertGreater(result.steps, 1)
+        self.assertEqual(result.restarts, 0)
+        # 16 pages of 4 KiB at 0.5 MB/s is 0.125s per step; the last step does not sleep.
+        self.assertEqual(len(pauses), result.steps - 1)
+        self.assertTrue(all(0 < p <= 0.125 for p in pauses))
+
+    def test_unthrottled_never_sleeps(self) -> None:
+        pauses: list[float] = []
+        db_maintenance.throttled_backup(
+            self.db, self.dir / "copy.db", pages_per_step=16, max_mb_per_s=None,
+            sleep=pauses.append,
+        )
+        self.assertEqual(pauses, [])
+
+    def test_busy_source_gives_up_after_max_restarts(self) -> None:
+        writer = sqlite3.connect(self.db)
+        self.addCleanup(writer.close)
+        writes = iter(range(10**6))
+
+        def write_between_steps(pause: float) -> None:
+            writer.execute("UPDATE executions SET state = ? WHERE rowid = 1", (str(next(writes)),))
+            writer.commit()
+
+        with self.assertRaises(db_maintenance.BackupError) as ctx:
+            db_maintenance.throttled_backup(
+                self.db, self.dir / "copy.db", pages_per_step=16, max_mb_per_s=0.001,
+                sleep=write_between_steps, max_restarts=3,
+            )
+        self.assertIn("Gave up after 3 restart(s)", str(ctx.exception))
+
+    def test_deadline_fails_unfinished_backup(self) -> None:
+        with self.assertRaises(db_maintenance.BackupError) as ctx:
+            db_maintenance.throttled_backup(
+                self.db, self.dir / "copy.db", pages_per_step=16, max_mb_per_s=None,
+                max_seconds=0,
+            )
+        self.assertIn("page(s) left", str(ctx.exception))
+
+    def test_cli_reports_failure_and_removes_partial(self) -> None:
+        dest = self.dir / "copy.db"
+        env = {"WORKFLOW_SQLITE_DB": str(self.db)}
+        err = io.StringIO()
+        with mock.patch.dict(os.environ, env), contextlib.redirect_stderr(err):
+            code = db_maintenance.main(
+                ["backup", str(dest), "--pages-per-step", "16", "--max-seconds", "0"]
+            )
+        self.assertEqual(code, 1)
+        self.assertIn("Backup failed: Gave up after", err.getvalue())
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()), ["workflows.db"])
+
+    def test_destination_and_rotation(self) -> None:
+        backups = self.dir / "backups"
+        backups.mkdir()
+        for day in range(1, 5):
+            path = db_maintenance.backup_destination(backups, self.db, datetime(2024, 1, day))
+            path.touch()
+        self.assertEqual(path.name, "workflows-20240104T000000Z.db")
+        (backups / "unrelated.db").touch()
+        removed = db_maintenance.rotate_backups(backups, self.db, keep=2)
+        self.assertEqual(
+            [p.name for p in removed],
+            ["workflows-20240101T000000Z.db", "workflows-20240102T000000Z.db"],
+        )
+        self.assertEqual(
+            sorted(p.name for p in backups.iterdir()),
+            ["unrelated.db", "workflows-20240103T000000Z.db", "workflows-20240104T000000Z.db"],
+        )
+        self.assertEqual(
+            db_maintenance.backup_destination(self.dir / "x.db", self.db, datetime(2024, 1, 1)),
+            self.dir / "x.db",
+        )
+
+
+class TestIncrementalVacuum(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "workflows.db"
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _delete_oldest_half(self, auto_vacuum: str) -> sqlite3.Connection:
+        _make_db(self.db, auto_vacuum=auto_vacuum)
+        conn = sqlite3.connect(self.db, isolation_level=None)
+        conn.execute("DELETE FROM executions WHERE rowid <= 200")
+        return conn
+
+    def test_reclaims_in_chunks(self) -> None:
+        pauses: list[float] = []
+        with contextlib.closing(self._delete_oldest_half("INCREMENTAL")) as conn:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            steps = db_maintenance.incremental_vacuum(
+                conn, pages_per_step=64, pause=0.01, sleep=pauses.append
+            )
+            self.assertEqual(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+        self.assertEqual(sum(s.pages for s in steps), free)
+        self.assertEqual(len(steps), -(-free // 64))
+        self.assertTrue(all(s.pages == 64 for s in steps[:-1]))
+        self.assertEqual(len(pauses), len(steps) - 1)
+
+    def test_not_incremental_stops_after_one_step(self) -> None:
+        with contextlib.closing(self._delete_oldest_half("NONE")) as conn:
+            steps = db_maintenance.incremental_vacuum(conn, pages_per_step=64, sleep=lambda _: None)
+            self.assertGreater(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+        self.assertEqual([s.pages for s in steps], [0])
+
+    def test_closed_window_does_nothing(self) -> None:
+        window = db_maintenance.VacuumWindow.parse("02:00-04:00")
+        with contextlib.closing(self._delete_oldest_half("INCREMENTAL")) as conn:
+            steps = db_maintenance.incremental_vacuum(
+                conn, window=window, clock=lambda: datetime(2024, 1, 1, 12, 0)
+            )
+        self.assertEqual(steps, [])
+
+    def test_window_wraps_past_midnight(self) -> None:
+        window = db_maintenance.VacuumWindow.parse("23:30-01:00")
+        self.assertTrue(window.contains(datetime(2024, 1, 1, 23, 45)))
+        self.assertTrue(window.contains(datetime(2024, 1, 2, 0, 30)))
+        self.assertFalse(window.contains(datetime(2024, 1, 2, 1, 0)))
+        self.assertFalse(window.contains(datetime(2024, 1, 1, 12, 0)))
+        with self.assertRaises(ValueError):
+            db_maintenance.VacuumWindow.parse("tonight")
+
+    def test_enable_incremental(self) -> None:
+        with contextlib.closing(self._delete_oldest_half("NONE")) as conn:
+            db_maintenance.enable_incremental_vacuum(conn)
+            self.assertEqual(db_maintenance.space_stats(conn).auto_vacuum, "incremental")
+            self.assertEqual(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Unit tests for execution_archive (frames, segments, index lookups)."""
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import execution_archive
+
+
+def _row(i: int, state: str = "{}") -> dict[str, object]:
+    return {
+        "id": f"exec-{i}",
+        "workflow_id": "wf-1",
+        "user_id": "user-1",
+        "status": "completed",
+        "state": state,
+        "started_at": 1_700_000_000_000 + i,
+        "completed_at": 1_700_000_001_000 + i,
+    }
+
+
+class TestExecutionArchive(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "workflows.db.archive"
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_archive_path_sits_next_to_database(self) -> None:
+        self.assertEqual(
+            execution_archive.archive_path(Path("/data/workflows.db")),
+            Path("/data/workflows.db.archive"),
+        )
+
+    def test_round_trip_with_both_codecs(self) -> None:
+        for codec in execution_archive.CODECS:
+            with self.subTest(codec=codec):
+                path = self.path / codec
+                with execution_archive.ExecutionArchive(path, codec=codec) as archive:
+                    archive.append([_row(i, '{"logs": ["x"]}') for i in range(3)])
+                with execution_archive.ExecutionArchive(path, readonly=True) as archive:
+                    self.assertEqual(archive.get("exec-1"), _row(1, '{"logs": ["x"]}'))
+                    self.assertIsNone(archive.get("exec-9"))
+                    self.assertIn("exec-2", archive)
+
+    def test_large_batches_split_into_blocks_and_segments(self) -> None:
+        big = '{"output": "' + "abc" * 40_000 + '"}'
+        with execution_archive.ExecutionArchive(self.path, segment_bytes=1) as archive:
+            archive.append([_row(i, big) for i in range(6)])
+            archive.append([_row(6)])
+            stats = archive.stats()
+            found = archive.get_many(["exec-0", "exec-5", "exec-6", "missing"])
+        self.assertEqual(stats.executions, 7)
+        self.assertGreater(stats.blocks, 2)
+        self.assertEqual(stats.segments, stats.blocks)  # segment_bytes=1 rolls every block
+        self.assertGreater(stats.ratio, 50)
+        self.assertEqual(sorted(found), ["exec-0", "exec-5", "exec-6"])
+        self.assertEqual(found["exec-5"]["state"], big)
+
+    def test_newest_copy_wins(self) -> None:
+        with execution_archive.ExecutionArchive(self.path) as archive:
+            archive.append([_row(1, '{"v": 1}')])
+            archive.append([_row(1, '{"v": 2}')])
+            self.assertEqual(archive.get("exec-1")["state"], '{"v": 2}')
+            self.assertEqual(archive.stats().executions, 1)
+
+    def test_corrupt_frame_raises(self) -> None:
+        with execution_archive.ExecutionArchive(self.path) as archive:
+            archive.append([_row(1)])
+        (segment,) = self.path.glob("segment-*.seg")
+        data = bytearray(segment.read_bytes())
+        data[-1] ^= 0xFF
+        segment.write_bytes(bytes(data))
+        with execution_archive.ExecutionArchive(self.path, readonly=True) as archive:
+            with self.assertRaises(execution_archive.ArchiveError):
+                archive.get("exec-1")
+
+
+if __name__ == "__main__":
+    unittest.main()
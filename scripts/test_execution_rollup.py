@@ -0,0 +1,88 @@
+"""Unit tests for execution_rollup (sidecar store, folding, merged reports)."""
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import execution_rollup
+
+DAY = 86400.0
+JAN_1 = 1704067200.0  # 2024-01-01T00:00:00Z
+
+
+def _fact(
+    rowid: int, status: str, started: float | None, duration: float | None, wf: str = "wf-1"
+) -> execution_rollup.ExecutionFact:
+    return execution_rollup.ExecutionFact(
+        rowid, f"exec-{rowid}", wf, "user-1", status, started, duration
+    )
+
+
+class TestRollupStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "workflows.db.rollup"
+        self.store = execution_rollup.RollupStore(self.path)
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_sidecar_path_sits_next_to_database(self) -> None:
+        self.assertEqual(
+            execution_rollup.sidecar_path(Path("/data/workflows.db")),
+            Path("/data/workflows.db.rollup"),
+        )
+
+    def test_folds_merge_into_existing_rows(self) -> None:
+        with self.store.conn:
+            self.store.fold([_fact(1, "completed", JAN_1, 2.0), _fact(2, "completed", JAN_1, 4.0)])
+            self.store.fold([_fact(3, "completed", JAN_1 + 60, 8.0)])
+        (group,) = self.store.groups(["status"])
+        self.assertEqual((group.key, group.executions, group.sketch.count), (("completed",), 3, 3))
+        self.assertEqual(group.sketch.max, 8.0)
+        self.assertAlmostEqual(group.sketch.mean, 14 / 3)
+
+    def test_untimed_executions_count_without_durations(self) -> None:
+        with self.store.conn:
+            self.store.fold([_fact(1, "cancelled", None, None)])
+        (group,) = self.store.groups(["status"], window="day")
+        self.assertEqual((group.window, group.executions, group.sketch.count), ("(none)", 1, 0))
+
+    def test_windows_and_day_filters(self) -> None:
+        facts = [_fact(i, "failed", JAN_1 + i * DAY, 1.0) for i in range(40)]
+        with self.store.conn:
+            self.store.fold(facts)
+        months = {g.window: g.executions for g in self.store.groups([], window="month")}
+        self.assertEqual(months, {"2024-01": 31, "2024-02": 9})
+        weeks = self.store.groups([], window="week")
+        self.assertEqual(weeks[0].window, "2024-01-01")
+        self.assertEqual(sum(g.executions for g in weeks), 40)
+        filtered = self.store.groups([], since="2024-01-10T12:00:00", until="2024-01-20")
+        self.assertEqual(filtered[0].executions, 10)
+
+    def test_owner_dimension_uses_usernames(self) -> None:
+        with self.store.conn:
+            self.store.fold([_fact(1, "completed", JAN_1, 1.0)])
+            self.store.replace_owners([("user-1", "alice")])
+        (group,) = self.store.groups(["owner", "workflow"])
+        self.assertEqual(group.key, ("alice", "wf-1"))
+
+    def test_reopen_keeps_state_and_readonly_rejects_writes(self) -> None:
+        mark = execution_rollup.HighWaterMark(7, "exec-7", JAN_1)
+        with self.store.conn:
+            self.store.fold([_fact(1, "completed", JAN_1, 1.0)])
+            self.store.track_in_flight([_fact(7, "running", JAN_1, None)])
+            self.store.set_high_water(mark)
+        self.store.close()
+        self.store = execution_rollup.RollupStore(self.path, readonly=True)
+        self.assertEqual(self.store.high_water(), mark)
+        self.assertEqual(self.store.in_flight_counts(), {"running": 1})
+        self.assertEqual(self.store.folded_count(), 1)
+        with self.assertRaises(Exception):
+            self.store.reset()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Unit tests for execution_stats (grouped percentiles, sketch, windows)."""
+from __future__ import annotations
+
+import random
+import unittest
+
+import execution_stats
+
+
+def _columns(rows: list[tuple]) -> execution_stats.DurationColumns:
+    columns = execution_stats.DurationColumns({"workflow": [], "status": []})
+    columns.extend(rows)
+    return columns
+
+
+class TestDurationSketch(unittest.TestCase):
+    def test_quantiles_within_relative_accuracy(self) -> None:
+        rng = random.Random(7)
+        values = sorted(rng.lognormvariate(2, 1.5) for _ in range(20_000))
+        sketch = execution_stats.DurationSketch()
+        for v in values:
+            sketch.add(v)
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q) / exact, 1.0, delta=0.02)
+        self.assertEqual(sketch.max, values[-1])
+
+    def test_merge_and_round_trip(self) -> None:
+        a, b = execution_stats.DurationSketch(), execution_stats.DurationSketch()
+        for v in (0.0, 1.0, 2.0):
+            a.add(v)
+        for v in (3.0, 100.0):
+            b.add(v)
+        merged = execution_stats.DurationSketch.from_dict(a.merge(b).to_dict())
+        self.assertEqual(merged.count, 5)
+        self.assertEqual(merged.max, 100.0)
+        self.assertEqual(merged.quantile(0.0), 0.0)
+        self.assertAlmostEqual(merged.mean, 21.2)
+
+
+class TestSummarize(unittest.TestCase):
+    ROWS = [
+        ("wf-a", "completed", 1_704_067_200.0 + i * 3600, float(i)) for i in range(1, 49)
+    ] + [(None, "failed", None, 5.0)]
+
+    def test_sketch_engine_groups_by_window_and_key(self) -> None:
+        summaries = execution_stats.summarize(
+            _columns(self.ROWS), ["workflow"], window="day", use_numpy=False
+        )
+        self.assertEqual(
+            [(s.window, s.key, s.count) for s in summaries],
+            [("(none)", ("(none)",), 1), ("2024-01-01", ("wf-a",), 23),
+             ("2024-01-02", ("wf-a",), 24), ("2024-01-03", ("wf-a",), 1)],
+        )
+        self.assertEqual(summaries[1].max, 23.0)
+        self.assertEqual(sum(summaries[1].histogram), 23)
+
+    def test_window_labels(self) -> None:
+        ts = 1_704_326_400.0  # Thursday 2024-01-04 00:00 UTC
+        self.assertEqual(execution_stats.window_label(ts, "week"), "2024-01-01")
+        self.assertEqual(execution_stats.window_label(ts, "month"), "2024-01")
+        self.assertEqual(execution_stats.window_label(ts, "hour"), "2024-01-04T00:00")
+
+    @unittest.skipIf(execution_stats.np is None, "NumPy not installed")
+    def test_numpy_engine_matches_sketch_engine(self) -> None:
+        rng = random.Random(3)
+        rows = [
+            (
+                rng.choice(["wf-a", "wf-b"]),
+                rng.choice(["completed", "failed"]),
+                1_704_067_200.0 + rng.random() * 40 * 86400,
+                rng.expovariate(0.05),
+            )
+            for _ in range(5000)
+        ]
+        columns = _columns(rows)
+        group_by = ["workflow", "status"]
+        for window in execution_stats.WINDOWS:
+            exact = execution_stats.summarize(columns, group_by, window, use_numpy=True)
+            approx = execution_stats.summarize(columns, group_by, window, use_numpy=False)
+            self.assertEqual(
+                [(s.window, s.key, s.count, s.histogram) for s in exact],
+                [(s.window, s.key, s.count, s.histogram) for s in approx],
+            )
+            for e, a in zip(exact, approx):
+                self.assertEqual(e.max, a.max)
+                if e.count >= 200:  # interpolation vs rank only agree on larger groups
+                    p50 = e.quantiles[0.5]
+                    self.assertAlmostEqual(a.quantiles[0.5], p50, delta=p50 * 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
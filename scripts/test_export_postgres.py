@@ -0,0 +1,224 @@
+"""Unit tests for export_postgres (COPY text files, manifest, resume and offline verification)."""
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import export_postgres
+
+_UNESCAPES = {"\\\\": "\\", "\\n": "\n", "\\r": "\r", "\\t": "\t"}
+
+
+def _parse_copy_line(line: str) -> list[str | None]:
+    """Decode one COPY text line the way PostgreSQL does (for the escapes the exporter emits)."""
+    fields = []
+    for field in line.rstrip("\n").split("\t"):
+        if field == "\\N":
+            fields.append(None)
+        else:
+            fields.append(re.sub(r"\\[\\nrt]", lambda m: _UNESCAPES[m.group(0)], field))
+    return fields
+
+
+def _make_db(path: Path) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE users (
+            id VARCHAR(255) NOT NULL PRIMARY KEY, username VARCHAR(255) NOT NULL,
+            is_admin BOOLEAN NOT NULL, created_at TIMESTAMP NOT NULL
+        );
+        CREATE TABLE executions (
+            id VARCHAR(255) NOT NULL PRIMARY KEY, user_id VARCHAR(255),
+            state TEXT NOT NULL, started_at TIMESTAMP NOT NULL, blob BLOB,
+            FOREIGN KEY(user_id) REFERENCES users (id)
+        );
+        CREATE TABLE settings (user_id TEXT PRIMARY KEY, data TEXT) WITHOUT ROWID;
+        """
+    )
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?)",
+        [("u1", "alice", 1, 1714521600123), ("u2", "bob\tby", 0, "2024-05-01 10:00:00")],
+    )
+    states = [
+        json.dumps({"logs": [{"message": f"line one\nline two\\ {i}"}]}, indent=2)
+        for i in range(25)
+    ]
+    conn.executemany(
+        "INSERT INTO executions VALUES (?, 'u1', ?, 1714521600000, ?)",
+        [(f"exec-{i}", s, b"\x00\xff" if i == 0 else None) for i, s in enumerate(states)],
+    )
+    conn.execute("INSERT INTO settings VALUES ('anonymous', '{\"model\": \"gpt-4o\"}')")
+    conn.commit()
+    conn.close()
+
+
+class TestCopyEncoding(unittest.TestCase):
+    def test_escapes_and_types(self) -> None:
+        kinds = ["value", "bool", "timestamp", "timestamp", "value", "value", "value"]
+        line = export_postgres.copy_line(
+            ["a\\b\tc\nd\re", 1, 1714521600123, "2024-05-01T10:00", None, b"\x01\xab", 2.5],
+            kinds,
+        )
+        self.assertEqual(
+            line,
+            "a\\\\b\\tc\\nd\\re\tt\t2024-05-01 00:00:00.123\t2024-05-01T10:00\t\\N"
+            "\t\\\\x01ab\t2.5\n",
+        )
+        self.assertEqual(_parse_copy_line(line)[0], "a\\b\tc\nd\re")
+        with self.assertRaises(export_postgres.ExportError):
+            export_postgres.copy_line(["nul\x00"], ["value"])
+
+    def test_column_kinds(self) -> None:
+        self.assertEqual(export_postgres.column_kind("boolean"), "bool")
+        self.assertEqual(export_postgres.column_kind("TIMESTAMP"), "timestamp")
+        self.assertEqual(export_postgres.column_kind("datetime"), "timestamp")
+        self.assertEqual(export_postgres.column_kind("VARCHAR(255)"), "value")
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.db = self.dir / "workflows.db"
+        self.out = self.dir / "export"
+        self.out.mkdir()
+        _make_db(self.db)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _export(self, chunk_rows: int = 10, workers: int = 1, restart: bool = False) -> int:
+        manifest = export_postgres.prepare_manifest(self.db, self.out, chunk_rows, [], restart)
+        written = export_postgres.run_export(manifest, self.db, self.out, workers)
+        export_postgres.write_sums(manifest, self.out)
+        return written
+
+    def test_files_decode_to_the_source_rows(self) -> None:
+        self.assertEqual(self._export(workers=2), 5)
+        manifest = export_postgres.Manifest.load(self.out)
+        self.assertEqual([t.name for t in manifest.tables], ["users", "executions", "settings"])
+        executions = manifest.tables[1]
+        self.assertEqual([c.rows for c in executions.chunks], [10, 10, 5])
+        decoded = []
+        for chunk in executions.chunks:
+            decoded += [_parse_copy_line(line) for line in (self.out / chunk.file).open()]
+        with sqlite3.connect(self.db) as conn:
+            states = [r[0] for r in conn.execute("SELECT state FROM executions ORDER BY rowid")]
+        self.assertEqual([row[2] for row in decoded], states)
+        self.assertEqual(decoded[0][3], "2024-05-01 00:00:00.000")
+        self.assertEqual(decoded[0][4], "\\x00ff")
+        users = [_parse_copy_line(line) for line in (self.out / "users.000001.copy").open()]
+        self.assertEqual(
+            users,
+            [
+                ["u1", "alice", "t", "2024-05-01 00:00:00.123"],
+                ["u2", "bob\tby", "f", "2024-05-01 10:00:00"],
+            ],
+        )
+        self.assertEqual(export_postgres.verify_export(self.out), [])
+
+    def test_resume_redoes_only_unfinished_chunks(self) -> None:
+        self._export()
+        data = json.loads((self.out / "manifest.json").read_text())
+        chunk = data["tables"][1]["chunks"][1]
+        chunk.update(rows=None, bytes=None, sha256=None)
+        (self.out / "manifest.json").write_text(json.dumps(data))
+        (self.out / chunk["file"]).rename(self.out / (chunk["file"] + ".partial"))
+        self.assertEqual(self._export(), 1)
+        self.assertFalse(list(self.out.glob("*.copy.partial")))
+        self.assertEqual(export_postgres.verify_export(self.out), [])
+
+    def test_changed_source_refuses_to_resume(self) -> None:
+        self._export()
+        with sqlite3.connect(self.db) as conn:
+            conn.execute("INSERT INTO users VALUES ('u3', 'carol', 0, 0)")
+        with self.assertRaises(export_postgres.ExportError):
+            self._export()
+        self._export(restart=True)
+        manifest = export_postgres.Manifest.load(self.out)
+        self.assertEqual(sum(c.rows for c in manifest.tables[0].chunks), 3)
+
+    def test_wal_writes_refuse_to_resume(self) -> None:
+        writer = sqlite3.connect(self.db)
+        self.addCleanup(writer.close)
+        writer.execute("PRAGMA journal_mode=WAL")
+        writer.execute("INSERT INTO users VALUES ('u3', 'carol', 0, 0)")
+        writer.commit()
+        self._export()
+        size, mtime = self.db.stat().st_size, self.db.stat().st_mtime_ns
+        writer.execute("INSERT INTO users VALUES ('u4', 'dave', 0, 0)")
+        writer.commit()
+        self.assertEqual((self.db.stat().st_size, self.db.stat().st_mtime_ns), (size, mtime))
+        with self.assertRaises(export_postgres.ExportError):
+            self._export()
+
+    def _main(self, *args: str) -> int:
+        env = {"WORKFLOW_SQLITE_DB": str(self.db)}
+        with mock.patch.dict(os.environ, env), contextlib.redirect_stdout(io.StringIO()):
+            with contextlib.redirect_stderr(io.StringIO()):
+                return export_postgres.main([str(self.out), "--workers", "1", *args])
+
+    def test_immutable_snapshot_is_planned_from_and_kept_for_resume(self) -> None:
+        with mock.patch.object(export_postgres, "run_export", side_effect=KeyboardInterrupt):
+            self.assertEqual(self._main("--immutable-snapshot"), 130)
+        snapshot = self.out / export_postgres.SNAPSHOT_NAME
+        manifest = export_postgres.Manifest.load(self.out)
+        self.assertEqual(manifest.source["path"], str(snapshot.resolve()))
+        with sqlite3.connect(self.db) as conn:
+            conn.execute("INSERT INTO users VALUES ('u3', 'carol', 0, 0)")
+            conn.execute("DELETE FROM executions WHERE rowid > 20")
+        self.assertEqual(self._main("--immutable-snapshot"), 0)
+        self.assertFalse(snapshot.exists())
+        manifest = export_postgres.Manifest.load(self.out)
+        self.assertEqual([sum(c.rows for c in t.chunks) for t in manifest.tables], [2, 25, 1])
+        self.assertEqual(export_postgres.verify_export(self.out), [])
+
+    def test_busy_timeout_reaches_every_connection(self) -> None:
+        with mock.patch.object(
+            export_postgres, "open_readonly", wraps=export_postgres.open_readonly
+        ) as opened:
+            manifest = export_postgres.prepare_manifest(self.db, self.out, 10, [], False, 1234)
+            export_postgres.run_export(manifest, self.db, self.out, 1, busy_timeout_ms=1234)
+        self.assertEqual(opened.call_count, 6)
+        for call in opened.call_args_list:
+            self.assertEqual(call.kwargs["busy_timeout_ms"], 1234)
+
+    def test_verify_reports_damage(self) -> None:
+        self._export()
+        path = self.out / "executions.000002.copy"
+        path.write_bytes(path.read_bytes()[:-1])
+        (self.out / "users.000001.copy").unlink()
+        problems = {(p["file"], p["problem"]) for p in export_postgres.verify_export(self.out)}
+        self.assertIn(("users.000001.copy", "missing"), problems)
+        self.assertIn(("executions.000002.copy", "sha256 mismatch"), problems)
+        self.assertIn(("executions.000002.copy", "1 line(s) without 5 fields"), problems)
+
+    def test_load_script_checks_counts_in_one_transaction(self) -> None:
+        self._export()
+        script = export_postgres.load_script(export_postgres.Manifest.load(self.out))
+        self.assertLess(script.index("BEGIN;"), script.index('\\copy "users"'))
+        self.assertLess(script.index('\\copy "users"'), script.index('\\copy "executions"'))
+        self.assertIn(
+            "\\copy \"executions\" (\"id\", \"user_id\", \"state\", \"started_at\", \"blob\") "
+            "FROM 'executions.000003.copy'",
+            script,
+        )
+        self.assertIn(
+            'IF (SELECT count(*) FROM "executions") <> 25 THEN RAISE EXCEPTION', script
+        )
+        self.assertTrue(script.rstrip().endswith("COMMIT;"))
+        sums = (self.out / "SHA256SUMS").read_text().splitlines()
+        self.assertEqual(len(sums), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
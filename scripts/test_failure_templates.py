@@ -0,0 +1,65 @@
+"""Unit tests for failure_templates (masking, Drain clustering, bounded memory)."""
+from __future__ import annotations
+
+import unittest
+
+import failure_templates
+
+
+class TestMask(unittest.TestCase):
+    def test_masks_variables_and_keeps_first_line(self) -> None:
+        tokens = failure_templates.mask(
+            "Timeout after 30s calling http://api.local/v1 for exec-9f2 from 10.0.0.7:8080\n"
+            "Traceback (most recent call last):"
+        )
+        self.assertEqual(
+            tokens,
+            ("Timeout", "after", "<NUM>", "calling", "<URL>", "for", "<ID>", "from", "<IP>"),
+        )
+
+    def test_uuid_and_hex(self) -> None:
+        tokens = failure_templates.mask("row 123e4567-e89b-12d3-a456-426614174000 at 0xdeadbeef")
+        self.assertEqual(tokens, ("row", "<UUID>", "at", "<HEX>"))
+
+
+class TestTemplateMiner(unittest.TestCase):
+    def test_similar_messages_share_a_template(self) -> None:
+        miner = failure_templates.TemplateMiner()
+        miner.add("Agent node summarize failed: model gpt-4o refused", "exec-1", "wf-1", "n1", 10)
+        miner.add("Agent node classify failed: model gpt-4o refused", "exec-1", "wf-1", "n2", 5)
+        miner.add("Agent node classify failed: model claude refused", "exec-2", "wf-2", "n2", 20)
+        miner.add("Workflow wf-1 has no start node", "exec-3", "wf-1", None, 30)
+        top, other = miner.templates()
+        self.assertEqual(top.template, "Agent node <*> failed: model <*> refused")
+        self.assertEqual((top.count, top.executions, top.example), (3, 2, "exec-1"))
+        self.assertEqual((top.first_seen, top.last_seen), (5, 20))
+        self.assertEqual(top.sources[("wf-1", "n2")], 1)
+        self.assertEqual(other.template, "Workflow <ID> has no start node")
+        self.assertEqual(other.sources[("wf-1", "(none)")], 1)
+
+    def test_different_lengths_never_merge(self) -> None:
+        miner = failure_templates.TemplateMiner()
+        miner.add("connection reset", "exec-1", "wf-1")
+        miner.add("connection reset by peer", "exec-1", "wf-1")
+        self.assertEqual(len(miner), 2)
+
+    def test_eviction_bounds_templates(self) -> None:
+        miner = failure_templates.TemplateMiner(max_templates=3)
+        for word in ("alpha", "beta", "gamma", "delta"):
+            miner.add(f"{word} exploded loudly today", "exec-1", "wf-1")
+        miner.add("delta exploded loudly today", "exec-2", "wf-1")
+        self.assertEqual(len(miner), 3)
+        self.assertEqual((miner.evicted, miner.evicted_messages), (1, 1))
+        self.assertEqual(miner.templates()[0].template, "delta exploded loudly today")
+
+    def test_sources_overflow_into_other(self) -> None:
+        miner = failure_templates.TemplateMiner(max_sources=2)
+        for i in range(4):
+            miner.add("boom", f"exec-{i}", f"wf-{i}", "n1")
+        (template,) = miner.templates()
+        self.assertEqual(template.sources[failure_templates.OTHER_SOURCE], 2)
+        self.assertEqual(template.executions, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
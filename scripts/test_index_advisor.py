@@ -0,0 +1,84 @@
+"""Unit tests for index_advisor (plan flags, proposals, benchmarking on a copy)."""
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+import index_advisor
+
+RECENT_BY_WORKFLOW = next(
+    q for q in index_advisor.CATALOG if q.name == "api.executions.by_workflow_recent"
+)
+
+
+class TestIndexAdvisor(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "workflows.db"
+        conn = sqlite3.connect(self.db)
+        conn.executescript(
+            """
+            CREATE TABLE users (id VARCHAR PRIMARY KEY, username VARCHAR UNIQUE);
+            CREATE TABLE executions (
+                id VARCHAR PRIMARY KEY, workflow_id VARCHAR, user_id VARCHAR, status VARCHAR,
+                state TEXT, started_at DATETIME, completed_at DATETIME
+            );
+            """
+        )
+        conn.executemany(
+            "INSERT INTO executions VALUES (?, ?, 'user-1', ?, '{}', ?, NULL)",
+            [
+                (f"exec-{i}", f"wf-{i % 50}", "failed" if i % 7 else "running", 1_700_000_000 + i)
+                for i in range(5000)
+            ],
+        )
+        conn.commit()
+        conn.close()
+        self.conn = sqlite3.connect(self.db)
+        self.params = index_advisor.sample_parameters(self.conn)
+
+    def tearDown(self) -> None:
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_proposal_follows_equality_then_ordering(self) -> None:
+        self.assertEqual(RECENT_BY_WORKFLOW.index_columns, ("workflow_id", "started_at"))
+        self.assertEqual(RECENT_BY_WORKFLOW.index_name, "idx_executions_workflow_id_started_at")
+
+    def test_explain_flags_scans_and_temp_sorts(self) -> None:
+        plan = index_advisor.explain(self.conn, RECENT_BY_WORKFLOW.sql, self.params)
+        self.assertEqual(plan.full_scans, ("executions",))
+        self.assertEqual(plan.temp_btrees, ("ORDER BY",))
+
+    def test_evaluate_benchmarks_and_drops_the_proposal(self) -> None:
+        finding = index_advisor.evaluate(self.conn, RECENT_BY_WORKFLOW, self.params, repeat=1)
+        self.assertFalse(finding.after.flagged)
+        self.assertIn(RECENT_BY_WORKFLOW.index_name, finding.after.text)
+        self.assertGreater(finding.index_bytes, 0)
+        self.assertEqual(
+            index_advisor.existing_index_prefixes(self.conn, "executions"), [("id",)]
+        )
+        self.assertEqual(finding.record()["proposal"], RECENT_BY_WORKFLOW.index_name)
+
+    def test_already_indexed_query_is_ok(self) -> None:
+        self.conn.execute(RECENT_BY_WORKFLOW.ddl)
+        finding = index_advisor.evaluate(self.conn, RECENT_BY_WORKFLOW, self.params, repeat=1)
+        self.assertEqual((finding.note, finding.after), ("ok", None))
+
+    def test_advise_leaves_the_original_untouched(self) -> None:
+        findings = index_advisor.advise(self.db, index_advisor.CATALOG, repeat=1)
+        names = {f.query.name for f in findings}
+        self.assertIn("tool.inspect.stuck", names)
+        self.assertNotIn("api.workflows.by_owner", names)  # no workflows table here
+        indexes = self.conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+        ).fetchone()[0]
+        self.assertEqual(indexes, 0)
+        ddl = index_advisor.accepted_ddl(findings, min_speedup=0)
+        self.assertTrue(all("CREATE INDEX IF NOT EXISTS" in d for d in ddl))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,17 @@
 """Unit tests for inspect_executions_db (import by path to avoid stdlib `inspect` name clash)."""
 from __future__ import annotations
 
+import contextlib
 import importlib.util
+import io
+import json
 import sqlite3
+import sys
+import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 from pathlib import Path
 
 
@@ -12,30 +20,37 @@ def _load_inspect_module():
     spec = importlib.util.spec_from_file_location("workflow_exec_db_inspect", path)
     assert spec and spec.loader
     mod = importlib.util.module_from_spec(spec)
+    # Registered before exec so dataclasses (and pickling) can resolve the module by name.
+    sys.modules[spec.name] = mod
     spec.loader.exec_module(mod)
     return mod
 
 
+SCHEMA = """
+    CREATE TABLE users (
+        id VARCHAR NOT NULL PRIMARY KEY,
+        username VARCHAR NOT NULL
+    );
+    CREATE TABLE executions (
+        id VARCHAR NOT NULL PRIMARY KEY,
+        workflow_id VARCHAR NOT NULL,
+        user_id VARCHAR,
+        status VARCHAR NOT NULL,
+        state TEXT NOT NULL,
+        started_at DATETIME,
+        completed_at DATETIME,
+        FOREIGN KEY(user_id) REFERENCES users (id)
+    );
+"""
+
+
 class TestFetchExecutionRows(unittest.TestCase):
     def setUp(self) -> None:
         self.mod = _load_inspect_module()
         self.conn = sqlite3.connect(":memory:")
+        self.conn.executescript(SCHEMA)
         self.conn.executescript(
             """
-            CREATE TABLE users (
-                id VARCHAR NOT NULL PRIMARY KEY,
-                username VARCHAR NOT NULL
-            );
-            CREATE TABLE executions (
-                id VARCHAR NOT NULL PRIMARY KEY,
-                workflow_id VARCHAR NOT NULL,
-                user_id VARCHAR,
-                status VARCHAR NOT NULL,
-                state TEXT NOT NULL,
-                started_at DATETIME,
-                completed_at DATETIME,
-                FOREIGN KEY(user_id) REFERENCES users (id)
-            );
             INSERT INTO users (id, username) VALUES ('user-1', 'alice');
             INSERT INTO executions (id, workflow_id, user_id, status, state, started_at)
             VALUES ('exec-one', 'wf-1', 'user-1', 'running', '{}', '2020-01-01');
@@ -56,6 +71,745 @@ class TestFetchExecutionRows(unittest.TestCase):
         rows = self.mod.fetch_execution_rows(self.conn, None, recent_limit=10)
         self.assertEqual(len(rows), 1)
 
+    def test_fetch_beyond_host_parameter_limit(self) -> None:
+        ids = [f"exec-missing-{i}" for i in range(40_000)] + ["exec-one"]
+        rows = self.mod.fetch_execution_rows(self.conn, iter(ids))
+        self.assertEqual([r["id"] for r in rows], ["exec-one"])
+        missing = self.mod.missing_lookup_ids(self.conn)
+        self.assertEqual(len(missing), 40_000)
+        self.assertNotIn("exec-one", missing)
+
+    def test_read_ids_skips_comments_and_separators(self) -> None:
+        lines = ["exec-a, exec-b\n", "# header\n", "  exec-c  # trailing\n", "\n"]
+        self.assertEqual(list(self.mod.read_ids(lines)), ["exec-a", "exec-b", "exec-c"])
+
+
+class TestStreamExecutions(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mod = _load_inspect_module()
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("INSERT INTO users (id, username) VALUES ('user-1', 'alice')")
+        self.conn.executemany(
+            "INSERT INTO executions (id, workflow_id, user_id, status, state, started_at) "
+            "VALUES (?, ?, 'user-1', ?, '{}', ?)",
+            [
+                (f"exec-{i:02d}", f"wf-{i % 2}", "failed" if i % 3 == 0 else "completed",
+                 f"2024-01-01 00:{i // 2:02d}:00")
+                for i in range(10)
+            ],
+        )
+
+    def tearDown(self) -> None:
+        self.conn.close()
+
+    def test_pages_in_keyset_order_across_ties(self) -> None:
+        ids = [r["id"] for r in self.mod.iter_execution_rows(self.conn, page_size=3)]
+        self.assertEqual(ids, [f"exec-{i:02d}" for i in range(10)])
+
+    def test_filters_apply(self) -> None:
+        filters = self.mod.ExecutionFilters(
+            since="2024-01-01T00:01:00", until="2024-01-01 00:04", statuses=("completed",)
+        )
+        ids = [r["id"] for r in self.mod.iter_execution_rows(self.conn, filters, page_size=2)]
+        self.assertEqual(ids, ["exec-02", "exec-04", "exec-05", "exec-07"])
+
+    def test_cursor_resumes_after_last_row(self) -> None:
+        out = io.StringIO()
+        filters = self.mod.ExecutionFilters(workflow_ids=("wf-0",))
+        count, token = self.mod.stream_executions(self.conn, out, filters=filters)
+        self.assertEqual(count, 5)
+        self.assertEqual(json.loads(out.getvalue().splitlines()[0])["owner_username"], "alice")
+        self.conn.execute(
+            "INSERT INTO executions (id, workflow_id, status, state, started_at) "
+            "VALUES ('exec-new', 'wf-0', 'running', '{}', '2024-02-01')"
+        )
+        cursor = self.mod.decode_cursor(token)
+        rest = list(self.mod.iter_execution_rows(self.conn, filters, cursor=cursor))
+        self.assertEqual([r["id"] for r in rest], ["exec-new"])
+
+    def test_csv_writes_header_once(self) -> None:
+        out = io.StringIO()
+        self.mod.stream_executions(self.conn, out, fmt="csv", page_size=4)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0].split(",")[0], "id")
+        self.assertEqual(len(lines), 11)
+
+    def test_state_path_matches_include_row_context(self) -> None:
+        self.conn.execute(
+            "UPDATE executions SET state = ? WHERE id = 'exec-03'",
+            (json.dumps({"node_states": {"n1": {"status": "failed"}}}),),
+        )
+        self.conn.execute("UPDATE executions SET state = '{broken' WHERE id = 'exec-06'")
+        filters = self.mod.ExecutionFilters(statuses=("failed",))
+        rows = self.mod.iter_execution_rows(self.conn, filters, include_state=True)
+        selectors = [self.mod.parse_path("node_states.*.status")]
+        records = list(self.mod.iter_state_matches(rows, selectors))
+        self.assertEqual(
+            [(r["id"], r["path"], r["value"]) for r in records if r["path"]],
+            [("exec-03", "node_states.n1.status", "failed")],
+        )
+        self.assertEqual([r["id"] for r in records if r["path"] is None], ["exec-06"])
+
+    def test_duration_columns_for_text_and_integer_timestamps(self) -> None:
+        self.conn.execute(
+            "UPDATE executions SET completed_at = '2024-01-01 00:10:00' WHERE id = 'exec-00'"
+        )
+        columns = self.mod.fetch_duration_columns(self.conn, ["workflow", "owner"])
+        self.assertEqual(len(columns), 1)
+        self.assertAlmostEqual(columns.durations[0], 600.0, places=3)
+        self.assertEqual(columns.dimensions["owner"], ["alice"])
+        self.conn.execute(
+            "UPDATE executions SET started_at = 1704067200000, completed_at = 1704067201500"
+        )
+        columns = self.mod.fetch_duration_columns(
+            self.conn, ["status"], self.mod.ExecutionFilters(since="2024-01-01")
+        )
+        self.assertEqual(set(columns.durations), {1.5})
+        self.assertEqual(list(columns.started)[:1], [1_704_067_200.0])
+
+    def test_concurrency_sweep_reads_in_start_order(self) -> None:
+        sweep = self.mod.sweep_concurrency(self.conn, window="day")
+        sections = self.mod.concurrency_sections(sweep, {1: "test"})
+        self.assertEqual(sum(r["arrivals"] for r in sections["concurrency"]), sweep.executions)
+        self.assertEqual(sweep.out_of_order, 0)
+        self.assertEqual(sections["capacity"][0]["capacity"], 1)
+
+    def test_integer_timestamp_bounds(self) -> None:
+        storage = self.mod.TimestampStorage(kind="integer")
+        self.assertEqual(storage.bound("1970-01-01T00:00:01"), 1000)
+        self.assertEqual(self.mod.parse_timestamp(1000), 1000.0)
+        self.assertEqual(self.mod.parse_timestamp(1_700_000_000_000), 1_700_000_000.0)
+
+
+class TestReadonlyConnection(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mod = _load_inspect_module()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "workflows.db"
+        conn = sqlite3.connect(str(self.db))
+        conn.executescript(SCHEMA)
+        conn.execute(
+            "INSERT INTO executions (id, workflow_id, status, state, started_at) "
+            "VALUES ('exec-one', 'wf-1', 'running', '{}', '2020-01-01')"
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_readonly_connection_rejects_writes(self) -> None:
+        conn = self.mod.open_readonly(self.db)
+        try:
+            self.assertEqual(self.mod.journal_mode(conn), "delete")
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM executions")
+        finally:
+            conn.close()
+
+    def test_immutable_snapshot_sees_committed_rows(self) -> None:
+        with self.mod.open_inspection_db(self.db, immutable_snapshot=True) as conn:
+            rows = self.mod.fetch_execution_rows(conn, ["exec-one"])
+        self.assertEqual([r["id"] for r in rows], ["exec-one"])
+
+    def test_backup_limit_counts_steps_without_progress_as_restarts(self) -> None:
+        limit = self.mod.BackupLimit(self.db, max_restarts=2)
+        for remaining in (90, 80, 90, 90, 70):
+            limit(0, remaining, 100)
+        self.assertEqual(limit.restarts, 2)
+        with self.assertRaises(self.mod.BackupError) as ctx:
+            limit(0, 95, 100)
+        self.assertIn("Gave up after 2 restart(s)", str(ctx.exception))
+        with self.assertRaises(self.mod.BackupError):
+            self.mod.BackupLimit(self.db, max_seconds=0)(0, 10, 100)
+        self.mod.BackupLimit(self.db, max_seconds=0)(0, 0, 100)  # finished copies pass
+
+    def test_snapshot_of_constantly_written_db_gives_up(self) -> None:
+        conn = sqlite3.connect(str(self.db))
+        conn.executemany(
+            "INSERT INTO executions (id, workflow_id, status, state) VALUES (?, 'wf', 'done', ?)",
+            [(f"exec-{i}", "x" * 4000) for i in range(1000)],
+        )
+        conn.commit()
+        stop = threading.Event()
+
+        def write() -> None:
+            with contextlib.closing(sqlite3.connect(str(self.db), timeout=5)) as writer:
+                n = 0
+                while not stop.is_set():
+                    n += 1
+                    writer.execute("UPDATE executions SET state = ? WHERE id = 'exec-one'", (n,))
+                    writer.commit()
+                    time.sleep(0.001)
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        try:
+            with self.assertRaises(self.mod.BackupError):
+                self.mod.snapshot_database(
+                    self.db, Path(self.tmp.name) / "copy.db", pages_per_step=1, max_restarts=2
+                )
+        finally:
+            stop.set()
+            thread.join()
+            conn.close()
+
+    def test_lookup_table_loads_on_readonly_connection(self) -> None:
+        conn = self.mod.open_readonly(self.db)
+        try:
+            self.assertEqual(self.mod.load_lookup_ids(conn, ["exec-one", "nope", "nope"]), 2)
+            self.assertEqual(self.mod.missing_lookup_ids(conn), ["nope"])
+            self.assertEqual(conn.execute("PRAGMA query_only").fetchone()[0], 1)
+            filters = self.mod.ExecutionFilters(lookup_ids=True)
+            rows = list(self.mod.iter_execution_rows(conn, filters))
+            self.assertEqual([r["id"] for r in rows], ["exec-one"])
+        finally:
+            conn.close()
+
+    def test_busy_errors_are_retried(self) -> None:
+        calls = []
+
+        def flaky() -> str:
+            calls.append(1)
+            if len(calls) < 3:
+                raise sqlite3.OperationalError("database is locked")
+            return "ok"
+
+        self.assertEqual(self.mod.with_busy_retry(flaky, base_delay=0.0), "ok")
+        self.assertEqual(len(calls), 3)
+
+        def broken() -> None:
+            calls.append(1)
+            raise sqlite3.OperationalError("no such table: executions")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            self.mod.with_busy_retry(broken, base_delay=0.0)
+        self.assertEqual(len(calls), 4)
+
+
+class TestParallelScan(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mod = _load_inspect_module()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "workflows.db"
+        conn = sqlite3.connect(str(self.db))
+        conn.executescript(SCHEMA)
+        rows = []
+        for i in range(40):
+            state = {
+                "status": "failed" if i % 4 == 0 else "completed",
+                "logs": [{"level": "INFO"}, {"level": "ERROR" if i % 4 == 0 else "INFO"}],
+                "node_states": {
+                    "agent-1": {"status": "completed"},
+                    "agent-2": {"status": "failed" if i % 4 == 0 else "completed"},
+                },
+            }
+            started_at = f"2024-01-{i % 28 + 1:02d}"
+            rows.append((f"exec-{i:02d}", f"wf-{i % 2}", "x", json.dumps(state), started_at))
+        rows.append(("exec-bad", "wf-0", "x", "{not json", "2024-02-01"))
+        conn.executemany(
+            "INSERT INTO executions (id, workflow_id, status, state, started_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_partitions_cover_rowid_range_without_overlap(self) -> None:
+        conn = self.mod.open_readonly(self.db)
+        try:
+            ranges = self.mod.partition_rowids(conn, 7)
+        finally:
+            conn.close()
+        self.assertEqual(ranges[0][0], 1)
+        self.assertEqual(ranges[-1][1], 41)
+        for (_, hi), (lo, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(lo, hi + 1)
+
+    def test_parallel_scan_matches_serial_scan(self) -> None:
+        reducers = ["status", "node-status", "log-levels", "failed-nodes"]
+        serial = self.mod.parallel_scan(self.db, reducers, workers=1)
+        parallel = self.mod.parallel_scan(self.db, reducers, workers=3)
+        self.assertEqual(serial.counts, parallel.counts)
+        self.assertEqual((parallel.rows, parallel.undecodable), (41, 1))
+        self.assertEqual(parallel.counts[("status", "failed")], 10)
+        self.assertEqual(parallel.counts[("log-levels", "INFO")], 70)
+        self.assertEqual(parallel.counts[("failed-nodes", "agent-2")], 10)
+
+    def test_filters_apply_inside_workers(self) -> None:
+        filters = self.mod.ExecutionFilters(workflow_ids=("wf-1",), until="2024-01-10")
+        result = self.mod.parallel_scan(self.db, ["status"], filters=filters, workers=2)
+        self.assertEqual(result.rows, 8)
+        self.assertNotIn(("status", "failed"), result.counts)
+
+
+class TestNodeTimingReport(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mod = _load_inspect_module()
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("CREATE TABLE workflows (id VARCHAR PRIMARY KEY, definition TEXT)")
+        definition = {
+            "nodes": [
+                {"id": "a", "type": "agent", "agent_config": {"model": "gpt-4o"}},
+                {"id": "b", "type": "tool"},
+                {"id": "c", "type": "agent"},
+            ],
+            "edges": [{"source": "a", "target": "c"}, {"source": "b", "target": "c"}],
+        }
+        self.conn.execute("INSERT INTO workflows VALUES ('wf-1', ?)", (json.dumps(definition),))
+        for i, slow in enumerate(["a", "a", "b"]):
+            ends = {"a": 5 if slow == "a" else 1, "b": 5 if slow == "b" else 1}
+            nodes = {
+                n: {"started_at": "2024-01-01T00:00:00", "completed_at": f"2024-01-01T00:00:0{e}"}
+                for n, e in ends.items()
+            }
+            nodes["c"] = {
+                "started_at": "2024-01-01T00:00:05",
+                "completed_at": "2024-01-01T00:00:06",
+            }
+            self.conn.execute(
+                "INSERT INTO executions (id, workflow_id, status, state, started_at) "
+                "VALUES (?, 'wf-1', 'completed', ?, ?)",
+                (f"exec-{i}", json.dumps({"logs": [], "node_states": nodes}), f"2024-01-0{i + 1}"),
+            )
+        self.conn.execute(
+            "INSERT INTO executions (id, workflow_id, status, state, started_at) "
+            "VALUES ('exec-untimed', 'wf-2', 'running', '{}', '2024-01-09')"
+        )
+
+    def tearDown(self) -> None:
+        self.conn.close()
+
+    def test_sections_cover_types_models_and_critical_paths(self) -> None:
+        report = self.mod.analyze_node_timings(self.conn)
+        self.assertEqual((report.executions, report.untimed), (4, 1))
+        sections = self.mod.node_report_sections(report)
+        self.assertEqual(
+            {r["group"]: r["count"] for r in sections["node_types"]}, {"agent": 6, "tool": 3}
+        )
+        self.assertEqual(
+            {r["group"] for r in sections["agent_models"]}, {"gpt-4o", "gpt-4o-mini"}
+        )
+        (path,) = sections["critical_paths"]
+        self.assertEqual(path["critical_path"], "a > c")
+        self.assertAlmostEqual(path["path_share"], 0.667)
+        self.assertEqual(path["bottleneck"], "a")
+        nodes = {r["node"]: r for r in sections["critical_nodes"]}
+        self.assertEqual(nodes["c"]["on_path"], 1.0)
+
+
+class TestRollupRefresh(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mod = _load_inspect_module()
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("INSERT INTO users VALUES ('user-1', 'alice')")
+        self._insert("exec-1", "completed", "2024-01-01 00:00:00", "2024-01-01 00:00:04")
+        self._insert("exec-2", "running", "2024-01-01 00:00:00", None)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = self.mod.RollupStore(Path(self.tmp.name) / "workflows.db.rollup")
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def _insert(self, exec_id: str, status: str, started: str, completed: str | None) -> None:
+        self.conn.execute(
+            "INSERT INTO executions VALUES (?, 'wf-1', 'user-1', ?, '{}', ?, ?)",
+            (exec_id, status, started, completed),
+        )
+
+    def _counts(self) -> dict[str, int]:
+        return {g.key[0]: g.executions for g in self.store.groups(["status"])}
+
+    def test_refresh_folds_only_new_and_newly_settled(self) -> None:
+        first = self.mod.refresh_rollup(self.conn, self.store)
+        self.assertEqual((first.new_rows, first.folded, first.in_flight), (2, 1, 1))
+        self.assertEqual(self._counts(), {"completed": 1})
+
+        self.conn.execute(
+            "UPDATE executions SET status = 'failed', completed_at = '2024-01-01 00:00:10' "
+            "WHERE id = 'exec-2'"
+        )
+        self._insert("exec-3", "completed", "2024-01-02 00:00:00", "2024-01-02 00:00:01")
+        second = self.mod.refresh_rollup(self.conn, self.store)
+        self.assertEqual((second.new_rows, second.rechecked, second.folded), (1, 1, 2))
+        self.assertEqual(second.in_flight, 0)
+        self.assertEqual(self._counts(), {"completed": 2, "failed": 1})
+        (failed,) = self.store.groups(["status"], statuses=["failed"])
+        self.assertAlmostEqual(failed.sketch.max, 10.0, places=3)
+
+        third = self.mod.refresh_rollup(self.conn, self.store)
+        self.assertEqual((third.new_rows, third.folded, third.rebuilt), (0, 0, False))
+        self.assertEqual(self._counts(), {"completed": 2, "failed": 1})
+
+    def test_reused_high_water_rowid_triggers_rebuild(self) -> None:
+        self.mod.refresh_rollup(self.conn, self.store)
+        self.conn.execute("DELETE FROM executions WHERE id = 'exec-2'")
+        self._insert("exec-9", "completed", "2024-01-03 00:00:00", "2024-01-03 00:00:02")
+        refresh = self.mod.refresh_rollup(self.conn, self.store)
+        self.assertTrue(refresh.rebuilt)
+        self.assertEqual(self._counts(), {"completed": 2})
+        self.assertEqual(self.store.in_flight_counts(), {})
+
+
+class TestLogIndexRefresh(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mod = _load_inspect_module()
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.executescript(SCHEMA)
+        self._insert("exec-1", "completed", ["disk full on worker", "retrying upload"])
+        self._insert("exec-2", "running", ["connecting to upstream"])
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = self.mod.LogIndex(Path(self.tmp.name) / "workflows.db.logs")
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.conn.close()
+        self.tmp.cleanup()
+
+    @staticmethod
+    def _state(messages: list[str]) -> str:
+        logs = [
+            {"timestamp": f"2024-01-01T00:00:{i:02d}", "level": "INFO", "message": m}
+            for i, m in enumerate(messages)
+        ]
+        return json.dumps({"node_states": {}, "logs": logs})
+
+    def _insert(self, exec_id: str, status: str, messages: list[str]) -> None:
+        self.conn.execute(
+            "INSERT INTO executions VALUES (?, 'wf-1', NULL, ?, ?, '2024-01-01', NULL)",
+            (exec_id, status, self._state(messages)),
+        )
+
+    def _hits(self, query: str) -> list[str]:
+        return sorted(h.execution_id for h in self.index.search(query))
+
+    def test_refresh_adds_only_new_entries_of_in_flight_executions(self) -> None:
+        first = self.mod.refresh_log_index(self.conn, self.index)
+        self.assertEqual((first.new_rows, first.entries, first.in_flight), (2, 3, 1))
+        self.assertEqual(self._hits("disk"), ["exec-1"])
+
+        self.conn.execute(
+            "UPDATE executions SET status = 'failed', state = ? WHERE id = 'exec-2'",
+            (self._state(["connecting to upstream", "upstream refused connection"]),),
+        )
+        self._insert("exec-3", "completed", ["upload finished"])
+        second = self.mod.refresh_log_index(self.conn, self.index)
+        self.assertEqual((second.new_rows, second.rechecked, second.entries), (1, 1, 2))
+        self.assertEqual(second.in_flight, 0)
+        self.assertEqual(self._hits("upstream"), ["exec-2", "exec-2"])
+        self.assertEqual(self._hits("upload*"), ["exec-1", "exec-3"])
+
+        third = self.mod.refresh_log_index(self.conn, self.index)
+        self.assertEqual((third.new_rows, third.entries, third.rebuilt), (0, 0, False))
+        self.assertEqual(self.index.entry_count(), 5)
+
+    def test_reused_high_water_rowid_triggers_rebuild(self) -> None:
+        self.mod.refresh_log_index(self.conn, self.index)
+        self.conn.execute("DELETE FROM executions WHERE id = 'exec-2'")
+        self._insert("exec-9", "completed", ["replacement row"])
+        refresh = self.mod.refresh_log_index(self.conn, self.index)
+        self.assertTrue(refresh.rebuilt)
+        self.assertEqual(self._hits("connecting"), [])
+        self.assertEqual(self.index.entry_count(), 3)
+
+
+class TestFailureMining(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mod = _load_inspect_module()
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.executescript(SCHEMA)
+        rows = []
+        for i in range(6):
+            state = {
+                "current_node": "fetch",
+                "error": f"HTTP {500 + i} from upstream after {i + 1} retries",
+                "logs": [
+                    {"level": "INFO", "node_id": "fetch", "message": "starting"},
+                    {
+                        "timestamp": f"2024-01-01T00:00:{i:02d}",
+                        "level": "ERROR",
+                        "node_id": "parse",
+                        "message": f"Unexpected token at position {i * 7}",
+                    },
+                ],
+            }
+            rows.append((f"exec-{i}", f"wf-{i % 2}", "failed", json.dumps(state)))
+        rows.append(("exec-ok", "wf-0", "completed", json.dumps({"error": "ignored"})))
+        rows.append(("exec-bad", "wf-0", "failed", '{"error": '))
+        self.conn.executemany(
+            "INSERT INTO executions VALUES (?, ?, NULL, ?, ?, '2024-01-01', '2024-01-01 00:01')",
+            rows,
+        )
+
+    def tearDown(self) -> None:
+        self.conn.close()
+
+    def test_error_and_error_logs_cluster_per_template(self) -> None:
+        miner = self.mod.TemplateMiner()
+        filters = self.mod.ExecutionFilters(statuses=("failed",))
+        stats = self.mod.mine_failures(self.conn, miner, filters, page_size=4)
+        self.assertEqual((stats.executions, stats.messages, stats.undecodable), (7, 12, 1))
+        sections = self.mod.failure_sections(miner, top=5, sources=5)
+        templates = {t["template"]: t for t in sections["templates"]}
+        self.assertEqual(
+            set(templates),
+            {
+                "HTTP <NUM> from upstream after <NUM> retries",
+                "Unexpected token at position <NUM>",
+            },
+        )
+        parse = templates["Unexpected token at position <NUM>"]
+        self.assertEqual((parse["executions"], parse["share"]), (6, 0.5))
+        self.assertEqual(parse["first_seen"], "2024-01-01T00:00:00+00:00")
+        self.assertEqual(parse["last_seen"], "2024-01-01T00:00:05+00:00")
+        error_sources = [r for r in sections["sources"] if r["node"] == "fetch"]
+        self.assertEqual(sorted(r["workflow"] for r in error_sources), ["wf-0", "wf-1"])
+
+
+class TestStateSizes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mod = _load_inspect_module()
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.executescript(SCHEMA)
+        rows = []
+        for i in range(4):
+            state = {
+                "variables": {"prompt": "Summarize the attached report. " * 10},
+                "logs": [{"level": "INFO", "message": f"step {i}"}],
+            }
+            rows.append((f"exec-{i}", f"wf-{i % 2}", json.dumps(state, indent=2)))
+        rows.append(("exec-bad", "wf-0", "{"))
+        self.conn.executemany(
+            "INSERT INTO executions VALUES (?, ?, NULL, 'completed', ?, '2024-01-01', NULL)", rows
+        )
+
+    def tearDown(self) -> None:
+        self.conn.close()
+
+    def test_paths_and_workflows_ranked_by_bytes(self) -> None:
+        profiler = self.mod.StateProfiler(depth=3)
+        stats = self.mod.profile_state_sizes(self.conn, profiler, page_size=2)
+        self.assertEqual((stats.executions, stats.undecodable), (5, 1))
+        sections = self.mod.size_sections(profiler, top=3)
+        self.assertEqual(
+            [r["path"] for r in sections["paths"]], ["variables", "variables.prompt", "logs"]
+        )
+        prompt = sections["paths"][1]
+        self.assertEqual((prompt["executions"], prompt["dup_share"]), (4, 0.75))
+        self.assertGreater(prompt["zlib_ratio"], 1)
+        workflows = sections["workflows"]
+        self.assertEqual(sorted(r["workflow"] for r in workflows), ["wf-0", "wf-1"])
+        # Stored blobs are indented, so they are larger than their compact JSON.
+        self.assertTrue(all(r["stored_kb"] > r["kb"] for r in workflows))
+        self.assertEqual(sections["workflow_paths"][0]["path"], "variables")
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mod = _load_inspect_module()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        for replica, minutes in (("replica-0", (0, 2, 4)), ("replica-1", (1, 3))):
+            conn = sqlite3.connect(self.dir / f"{replica}.db")
+            conn.executescript(SCHEMA)
+            conn.executemany(
+                "INSERT INTO executions VALUES (?, 'wf-1', NULL, 'completed', '{}', ?, ?)",
+                [
+                    (f"{replica}-{m}", f"2024-01-01 00:0{m}:00", f"2024-01-01 00:0{m}:0{m + 1}")
+                    for m in minutes
+                ],
+            )
+            conn.commit()
+            conn.close()
+        self.pattern = str(self.dir / "replica-*.db")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _main(self, argv: list[str]) -> tuple[int, str, str]:
+        out, err = io.StringIO(), io.StringIO()
+        with mock.patch.object(sys, "stdout", out), mock.patch.object(sys, "stderr", err):
+            code = self.mod.main(argv)
+        return code, out.getvalue(), err.getvalue()
+
+    def test_stream_merges_shards_by_started_at(self) -> None:
+        code, out, err = self._main(["--db", self.pattern, "--stream", "--format", "jsonl"])
+        self.assertEqual(code, 0)
+        rows = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual([r["id"].rsplit("-", 1)[1] for r in rows], ["0", "1", "2", "3", "4"])
+        self.assertEqual(rows[1]["shard"], "replica-1.db")
+        self.assertIn("5 row(s) from 2 shard(s)", err)
+
+    def test_lookup_reports_ids_missing_everywhere(self) -> None:
+        code, out, err = self._main(
+            ["--db", self.pattern, "replica-0-2", "replica-1-3", "nowhere"]
+        )
+        self.assertEqual(code, 0)
+        self.assertIn("replica-0-2", out)
+        self.assertIn("replica-1-3", out)
+        self.assertIn("nowhere", err)
+
+    def test_latency_combines_durations(self) -> None:
+        code, out, _ = self._main(["latency", "--db", self.pattern, "--format", "jsonl"])
+        self.assertEqual(code, 0)
+        overall = json.loads(out.splitlines()[0])
+        self.assertEqual(overall["count"], 5)
+        self.assertEqual(overall["max"], 5.0)
+
+    def test_single_database_commands_refuse_several(self) -> None:
+        code, _, err = self._main(["stuck", "--db", self.pattern])
+        self.assertEqual(code, 1)
+        self.assertIn("--db matched 2", err)
+        with self.assertRaises(SystemExit):
+            self._main(["--db", self.pattern, "--follow"])
+
+
+class TestFollowExecutions(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mod = _load_inspect_module()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "workflows.db"
+        self.writer = sqlite3.connect(self.db, isolation_level=None)
+        self.writer.execute("PRAGMA journal_mode = WAL")
+        self.writer.executescript(SCHEMA)
+        self._insert("exec-old", "running")
+        self._insert("exec-done", "completed")
+        self.reader = self.mod.open_readonly(self.db)
+
+    def tearDown(self) -> None:
+        self.reader.close()
+        self.writer.close()
+        self.tmp.cleanup()
+
+    def _insert(self, exec_id: str, status: str, workflow_id: str = "wf-1") -> None:
+        self.writer.execute(
+            "INSERT INTO executions (id, workflow_id, status, state, started_at) "
+            "VALUES (?, ?, ?, '{}', '2024-01-01')",
+            (exec_id, workflow_id, status),
+        )
+
+    def _set_status(self, exec_id: str, status: str) -> None:
+        self.writer.execute("UPDATE executions SET status = ? WHERE id = ?", (status, exec_id))
+
+    def test_emits_new_rows_and_transitions_once(self) -> None:
+        follower = self.mod.ExecutionFollower(self.reader)
+        follower.start()
+        self.assertEqual(follower.tracked, {"exec-old": "running"})
+        self.assertEqual(follower.poll(), [])
+
+        self._insert("exec-new", "pending")
+        self._set_status("exec-old", "failed")
+        events = [(e["event"], e["id"], e["previous_status"], e["status"]) for e in follower.poll()]
+        self.assertEqual(
+            events,
+            [("status", "exec-old", "running", "failed"), ("new", "exec-new", None, "pending")],
+        )
+        self.assertEqual(follower.tracked, {"exec-new": "pending"})
+        self.assertEqual(follower.poll(), [])
+
+        self.writer.execute("DELETE FROM executions WHERE id = 'exec-new'")
+        (event,) = follower.poll()
+        self.assertEqual(
+            (event["event"], event["id"], event["status"]), ("deleted", "exec-new", None)
+        )
+
+    def test_filters_limit_events_but_not_tracking(self) -> None:
+        filters = self.mod.ExecutionFilters(statuses=("failed",), workflow_ids=("wf-1",))
+        follower = self.mod.ExecutionFollower(self.reader, filters, page_size=1)
+        follower.start()
+        self._insert("exec-a", "running")
+        self._insert("exec-b", "failed", workflow_id="wf-2")
+        self._insert("exec-c", "failed")
+        self.assertEqual([e["id"] for e in follower.poll()], ["exec-c"])
+        self._set_status("exec-a", "failed")
+        self.assertEqual([e["id"] for e in follower.poll()], ["exec-a"])
+        self.assertEqual(follower.high_water, 5)
+
+
+class TestStuckExecutions(unittest.TestCase):
+    NOW = "2024-01-01T01:00:00"
+
+    def setUp(self) -> None:
+        self.mod = _load_inspect_module()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "workflows.db"
+        conn = sqlite3.connect(self.db)
+        conn.executescript(SCHEMA)
+        rows = [
+            ("dead", "running", "2024-01-01 00:00:00",
+             {"logs": [{"timestamp": "2024-01-01T00:01"}]}),
+            ("slow", "running", "2024-01-01 00:00:00",
+             {"node_states": {"n1": {"started_at": "2024-01-01T00:55:00"}}}),
+            ("queued", "pending", "2024-01-01 00:30:00", {}),
+            ("young", "running", "2024-01-01 00:58:00", {}),
+            ("done", "completed", "2024-01-01 00:00:00", {}),
+        ]
+        conn.executemany(
+            "INSERT INTO executions (id, workflow_id, status, state, started_at) "
+            "VALUES (?, 'wf-1', ?, ?, ?)",
+            [(i, status, json.dumps(state), started) for i, status, started, state in rows],
+        )
+        conn.commit()
+        conn.close()
+        self.conn = self.mod.open_readonly(self.db)
+        self.now = self.mod.parse_timestamp(self.NOW)
+
+    def tearDown(self) -> None:
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_last_activity_separates_slow_from_orphaned(self) -> None:
+        stuck = {s.id: s for s in self.mod.find_stuck_executions(self.conn, self.now)}
+        self.assertEqual(set(stuck), {"dead", "slow", "queued"})
+        self.assertTrue(stuck["dead"].orphaned)
+        self.assertEqual(stuck["dead"].idle_for, 3540)
+        self.assertFalse(stuck["slow"].orphaned)
+        self.assertTrue(stuck["queued"].orphaned)  # no activity at all: idle since start
+        only_running = self.mod.ExecutionFilters(statuses=("running",))
+        self.assertEqual(
+            len(self.mod.find_stuck_executions(self.conn, self.now, filters=only_running)), 2
+        )
+
+    def test_index_is_created_only_on_request(self) -> None:
+        self.assertFalse(self.mod.has_status_started_index(self.conn))
+        self.mod.create_status_started_index(self.db)
+        self.assertTrue(self.mod.has_status_started_index(self.conn))
+        plan = " ".join(
+            r[-1]
+            for r in self.conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM executions "
+                "WHERE status IN ('pending', 'running') AND started_at < '2024-01-01 00:55'"
+            )
+        )
+        self.assertIn(self.mod.STATUS_STARTED_INDEX, plan)
+
+    def test_remediation_sql_fails_only_orphans_still_unsettled(self) -> None:
+        stuck = self.mod.find_stuck_executions(self.conn, self.now)
+        storage = self.mod.detect_timestamp_storage(self.conn)
+        script = "\n".join(self.mod.remediation_sql(stuck, storage, self.now))
+        writer = sqlite3.connect(self.db)
+        writer.execute("UPDATE executions SET status = 'completed' WHERE id = 'queued'")
+        writer.commit()
+        writer.executescript(script)
+        rows = {
+            r[0]: r[1:]
+            for r in writer.execute(
+                "SELECT id, status, completed_at, json_extract(state, '$.status') FROM executions"
+            )
+        }
+        writer.close()
+        self.assertEqual(rows["dead"], ("failed", "2024-01-01 01:00:00", "failed"))
+        self.assertEqual(rows["queued"], ("completed", None, None))
+        self.assertEqual(rows["slow"][0], "running")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,90 @@
+"""Unit tests for log_search (FTS5 sidecar: indexing, queries, grouping)."""
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import log_search
+
+JAN_1 = 1704067200.0  # 2024-01-01T00:00:00Z
+
+
+def _entry(second: int, message: str, level: str = "INFO", node: str = "n1") -> dict:
+    return {
+        "timestamp": f"2024-01-01T00:00:{second:02d}Z",
+        "level": level,
+        "node_id": node,
+        "message": message,
+    }
+
+
+class TestLogIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "workflows.db.logs"
+        self.index = log_search.LogIndex(self.path)
+        with self.index.conn:
+            self.index.add_logs(
+                "exec-1",
+                "wf-1",
+                [
+                    _entry(1, "Connection refused by upstream", "ERROR", "fetch"),
+                    _entry(2, "retrying connection", "WARNING", "fetch"),
+                    _entry(3, "Résumé parsed", "INFO", "parse"),
+                ],
+            )
+            self.index.add_logs(
+                "exec-2", "wf-2", [_entry(30, "connection refused again", "ERROR"), "not a dict"]
+            )
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_sidecar_path_sits_next_to_database(self) -> None:
+        self.assertEqual(
+            log_search.sidecar_path(Path("/data/workflows.db")), Path("/data/workflows.db.logs")
+        )
+
+    def test_phrase_prefix_and_diacritics(self) -> None:
+        self.assertEqual(self.index.entry_count(), 4)
+        phrase = self.index.search('"connection refused"')
+        self.assertEqual({h.execution_id for h in phrase}, {"exec-1", "exec-2"})
+        self.assertIn("[Connection refused] by upstream", [h.message for h in phrase])
+        self.assertEqual(len(self.index.search("connect*")), 3)
+        self.assertEqual([h.node_id for h in self.index.search("resume")], ["parse"])
+
+    def test_attribute_and_time_filters(self) -> None:
+        errors = self.index.search("connection", levels=["ERROR"], by_time=True)
+        self.assertEqual([h.execution_id for h in errors], ["exec-2", "exec-1"])
+        self.assertEqual(len(self.index.search("connection", node_ids=["fetch"])), 2)
+        self.assertEqual(len(self.index.search("connection", workflow_ids=["wf-2"])), 1)
+        window = self.index.search("connection", since=JAN_1 + 2, until=JAN_1 + 30)
+        self.assertEqual([h.message for h in window], ["retrying [connection]"])
+
+    def test_executions_groups_hits(self) -> None:
+        grouped = self.index.executions("connection")
+        hits = [(g.execution_id, g.hits) for g in grouped]
+        self.assertEqual(hits, [("exec-1", 2), ("exec-2", 1)])
+        self.assertEqual(grouped[0].first, "2024-01-01T00:00:01Z")
+        self.assertEqual(grouped[0].last, "2024-01-01T00:00:02Z")
+
+    def test_offset_skips_already_indexed_entries(self) -> None:
+        with self.index.conn:
+            added = self.index.add_logs("exec-2", "wf-2", [_entry(30, "x"), _entry(31, "tail")], 1)
+            self.index.track("exec-2", 2)
+        self.assertEqual(added, 1)
+        self.assertEqual(self.index.in_flight(), {"exec-2": 2})
+        self.assertEqual(len(self.index.search("x")), 0)
+
+    def test_reopen_readonly_keeps_entries(self) -> None:
+        self.index.close()
+        self.index = log_search.LogIndex(self.path, readonly=True)
+        self.assertEqual(self.index.entry_count(), 4)
+        with self.assertRaises(Exception):
+            self.index.reset()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Unit tests for node_timeline (timings, critical path reconstruction)."""
+from __future__ import annotations
+
+import unittest
+
+import node_timeline
+
+DEFINITION = {
+    "nodes": [
+        {"id": "start", "type": "start"},
+        {"id": "fetch", "type": "tool"},
+        {"id": "summarize", "type": "agent", "agent_config": {"model": "gpt-4o"}},
+        {"id": "classify", "data": {"type": "agent", "agent_config": {}}},
+        {"id": "end", "type": "end"},
+    ],
+    "edges": [
+        {"source": "start", "target": "fetch"},
+        {"source": "start", "target": "classify"},
+        {"source": "fetch", "target": "summarize"},
+        {"source": "summarize", "target": "end"},
+        {"source": "classify", "target": "end"},
+    ],
+}
+
+
+def _node(start: str, end: str, status: str = "completed") -> dict:
+    return {
+        "status": status,
+        "started_at": f"2024-01-01T00:00:{start}",
+        "completed_at": f"2024-01-01T00:00:{end}",
+    }
+
+
+NODE_STATES = {
+    "start": _node("00.000", "00.100"),
+    "fetch": _node("00.100", "02.000"),
+    "classify": _node("00.100", "05.000"),  # long, but only feeds end
+    "summarize": _node("02.000", "09.000"),
+    "end": _node("09.000", "09.050"),
+    "never_ran": {"status": "pending"},
+}
+
+
+class TestWorkflowGraph(unittest.TestCase):
+    def test_types_models_and_predecessors(self) -> None:
+        graph = node_timeline.WorkflowGraph.from_definition(DEFINITION)
+        self.assertEqual(graph.node_types["classify"], "agent")
+        self.assertEqual(graph.models["summarize"], "gpt-4o")
+        self.assertEqual(graph.models["classify"], node_timeline.DEFAULT_AGENT_MODEL)
+        self.assertNotIn("fetch", graph.models)
+        self.assertEqual(graph.predecessors["end"], {"summarize", "classify"})
+
+
+class TestCriticalPath(unittest.TestCase):
+    def test_follows_last_arriving_predecessor_along_edges(self) -> None:
+        graph = node_timeline.WorkflowGraph.from_definition(DEFINITION)
+        timings = node_timeline.node_timings(NODE_STATES, graph)
+        self.assertEqual(len(timings), 5)
+        path = node_timeline.critical_path(timings, graph)
+        self.assertEqual([t.node_id for t in path], ["start", "fetch", "summarize", "end"])
+        self.assertAlmostEqual(path[2].duration, 7.0)
+
+    def test_timeline_fallback_without_definition(self) -> None:
+        graph = node_timeline.WorkflowGraph.from_definition(None)
+        timings = node_timeline.node_timings(NODE_STATES, graph)
+        path = node_timeline.critical_path(timings, graph)
+        self.assertEqual([t.node_id for t in path], ["start", "fetch", "summarize", "end"])
+        self.assertEqual(path[0].node_type, "(unknown)")
+
+    def test_empty_and_malformed_states(self) -> None:
+        graph = node_timeline.WorkflowGraph()
+        self.assertEqual(node_timeline.node_timings(None, graph), [])
+        self.assertEqual(node_timeline.node_timings({"n": {"started_at": "bogus"}}, graph), [])
+        self.assertEqual(node_timeline.critical_path([], graph), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
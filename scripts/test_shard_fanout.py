@@ -0,0 +1,111 @@
+"""Unit tests for shard_fanout (shard expansion, concurrent map, k-way merge)."""
+from __future__ import annotations
+
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from shard_fanout import ShardError, expand_shards, map_shards, merge_shards, shard_labels
+
+
+class TestExpandShards(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        for name in ("a/workflows.db", "b/workflows.db", "b/other.db"):
+            path = self.dir / name
+            path.parent.mkdir(exist_ok=True)
+            path.touch()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_globs_dedupe_and_report_unmatched(self) -> None:
+        shards, unmatched = expand_shards(
+            [str(self.dir / "*/workflows.db"), str(self.dir / "a/workflows.db"), "nope-*.db"]
+        )
+        self.assertEqual(
+            shards,
+            [(self.dir / "a/workflows.db").resolve(), (self.dir / "b/workflows.db").resolve()],
+        )
+        self.assertEqual(unmatched, ["nope-*.db"])
+
+    def test_labels_are_shortest_distinct_suffix(self) -> None:
+        shards, _ = expand_shards([str(self.dir / "**/*.db")])
+        labels = shard_labels(shards)
+        self.assertEqual(
+            sorted(labels.values()), ["a/workflows.db", "b/other.db", "b/workflows.db"]
+        )
+        self.assertEqual(shard_labels(shards[:1]), {shards[0]: "workflows.db"})
+
+
+class TestMapShards(unittest.TestCase):
+    def test_results_in_shard_order(self) -> None:
+        shards = [Path(f"s{i}.db") for i in range(5)]
+        self.assertEqual(map_shards(shards, lambda s: s.stem, workers=2), [s.stem for s in shards])
+
+    def test_failure_names_the_shard(self) -> None:
+        def fn(shard: Path) -> int:
+            if shard.name == "bad.db":
+                raise ValueError("boom")
+            return 1
+
+        with self.assertRaises(ShardError) as ctx:
+            map_shards([Path("ok.db"), Path("bad.db")], fn)
+        self.assertEqual(ctx.exception.shard, Path("bad.db"))
+        self.assertIsInstance(ctx.exception.__cause__, ValueError)
+
+
+class TestMergeShards(unittest.TestCase):
+    def test_keyed_merge_is_globally_ordered(self) -> None:
+        data = {Path("a.db"): [1, 4, 7, 10], Path("b.db"): [2, 3, 11], Path("c.db"): []}
+        merged = list(merge_shards(list(data), lambda s: iter(data[s]), key=lambda x: x))
+        self.assertEqual([x for _, x in merged], [1, 2, 3, 4, 7, 10, 11])
+        self.assertEqual(merged[1], (Path("b.db"), 2))
+
+    def test_queue_bound_holds_with_many_rows(self) -> None:
+        data = {Path("a.db"): range(0, 5000, 2), Path("b.db"): range(1, 5000, 2)}
+        merged = merge_shards(list(data), lambda s: iter(data[s]), key=int, queue_size=4)
+        self.assertEqual([x for _, x in merged], list(range(5000)))
+
+    def test_unkeyed_yields_everything(self) -> None:
+        data = {Path("a.db"): ["x", "y"], Path("b.db"): ["z"]}
+        merged = merge_shards(list(data), lambda s: iter(data[s]))
+        self.assertEqual(
+            sorted(merged), [(Path("a.db"), "x"), (Path("a.db"), "y"), (Path("b.db"), "z")]
+        )
+
+    def test_early_close_stops_producers_and_runs_cleanup(self) -> None:
+        closed = []
+        lock = threading.Lock()
+
+        def produce(shard: Path):
+            try:
+                yield from range(10**6)
+            finally:
+                with lock:
+                    closed.append(shard)
+
+        shards = [Path("a.db"), Path("b.db")]
+        merged = merge_shards(shards, produce, key=int, queue_size=8)
+        self.assertEqual([next(merged)[1] for _ in range(3)], [0, 0, 1])
+        merged.close()
+        self.assertEqual(sorted(closed), shards)
+
+    def test_producer_error_is_raised_in_consumer(self) -> None:
+        def produce(shard: Path):
+            yield 1
+            if shard.name == "bad.db":
+                raise OSError("disk I/O error")
+            yield 2
+
+        for key in (int, None):
+            with self.assertRaises(ShardError) as ctx:
+                list(merge_shards([Path("ok.db"), Path("bad.db")], produce, key=key))
+            self.assertEqual(ctx.exception.shard, Path("bad.db"))
+            self.assertIn("disk I/O error", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
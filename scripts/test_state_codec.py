@@ -0,0 +1,122 @@
+"""Unit tests for state_codec (schema-aware binary encoding of executions.state)."""
+from __future__ import annotations
+
+import contextlib
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+import state_codec
+
+
+def _state_map(i: int) -> dict:
+    """Shaped like ExecutionState.toStateMap() as Jackson writes it."""
+    return {
+        "execution_id": f"exec-{i}",
+        "workflow_id": "wf-1",
+        "status": "completed",
+        "current_node": "summarize",
+        "variables": {"topic": "Q3 revenue", "max_tokens": 512, "temperature": 0.2},
+        "result": {"summary": "Revenue grew 12%", "citations": [1, 2, 3], "ok": True},
+        "started_at": "2026-04-16T12:00",
+        "completed_at": f"2026-04-16T12:05:0{i % 10}.123456",
+        "logs": [
+            {
+                "timestamp": f"2026-04-16T12:00:0{n}.{n}21",
+                "level": "ERROR" if n == 3 else "INFO",
+                "node_id": None if n == 0 else f"node-{n % 2}",
+                "message": f"step {n} ✓",
+            }
+            for n in range(4)
+        ],
+        "node_states": {
+            f"node-{n}": {
+                "node_id": f"node-{n}",
+                "status": "completed",
+                "input": {"prompt": "Summarize"},
+                "output": None,
+                "started_at": "2026-04-16T12:00:01",
+            }
+            for n in range(2)
+        },
+    }
+
+
+class TestTimestamps(unittest.TestCase):
+    def test_local_date_time_styles_round_trip(self) -> None:
+        for text in (
+            "2026-04-16T12:00",
+            "2026-04-16T12:00:05",
+            "2026-04-16T12:00:05.1",
+            "2026-04-16T12:00:05.123",
+            "2026-04-16T12:00:05.123456",
+            "1969-12-31T23:59:59.999",
+        ):
+            parsed = state_codec.parse_timestamp(text)
+            self.assertIsNotNone(parsed, text)
+            self.assertEqual(state_codec.format_timestamp(*parsed), text)
+
+    def test_unrepresentable_text_is_not_parsed(self) -> None:
+        for text in (
+            "2026-04-16T12:00:05.123456789",
+            "2026-04-16T12:00:05Z",
+            "2026-02-30T00:00",
+            "2026-04-16T24:00",
+            "yesterday",
+        ):
+            self.assertIsNone(state_codec.parse_timestamp(text), text)
+
+
+class TestRoundTrip(unittest.TestCase):
+    def _assert_round_trip(self, state: object) -> bytes:
+        blob = state_codec.encode_state(state)
+        self.assertEqual(state_codec.decode_state(blob), state)
+        return blob
+
+    def test_state_map_round_trips_smaller_than_json(self) -> None:
+        state = _state_map(1)
+        blob = self._assert_round_trip(state)
+        self.assertLess(len(blob), len(json.dumps(state, separators=(",", ":")).encode()))
+        # Keys come back in toStateMap() order.
+        self.assertEqual(list(state_codec.decode_state(blob)), list(state))
+
+    def test_irregular_shapes_fall_back_to_generic_encoding(self) -> None:
+        state = _state_map(2)
+        state["status"] = 3
+        state["logs"].append({"level": "DEBUG", "message": "no timestamp or node"})
+        state["node_states"]["node-0"]["started_at"] = "2026-04-16T12:00:01+02:00"
+        state["node_states"]["node-0"]["retries"] = 2
+        state["extra"] = [None, -1, 2**70, 1.5, "", {}]
+        self._assert_round_trip(state)
+        state["node_states"] = {"node-0": "not a dict"}
+        self._assert_round_trip(state)
+
+    def test_any_json_document_round_trips(self) -> None:
+        for value in (None, [], {}, "text", -7, [{"a": [1, {"b": None}]}], {"logs": "x"}):
+            self._assert_round_trip(value)
+
+    def test_rows_from_a_workflows_db(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / "workflows.db"
+            with contextlib.closing(sqlite3.connect(db)) as conn:
+                conn.execute("CREATE TABLE executions (id VARCHAR PRIMARY KEY, state TEXT)")
+                conn.executemany(
+                    "INSERT INTO executions VALUES (?, ?)",
+                    [(f"exec-{i}", json.dumps(_state_map(i))) for i in range(20)],
+                )
+                conn.commit()
+                for execution_id, text in conn.execute("SELECT id, state FROM executions"):
+                    with self.subTest(execution_id):
+                        self._assert_round_trip(json.loads(text))
+
+    def test_corrupt_blobs_raise_codec_error(self) -> None:
+        blob = state_codec.encode_state(_state_map(3))
+        for bad in (b"", b"{}", blob[:3] + b"\x09" + blob[4:], blob[:-5], blob + b"\x00"):
+            with self.assertRaises(state_codec.CodecError):
+                state_codec.decode_state(bad)
+
+
+if __name__ == "__main__":
+    unittest.main()
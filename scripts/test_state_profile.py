@@ -0,0 +1,82 @@
+"""Unit tests for state_profile (path attribution, duplication, bounded paths)."""
+from __future__ import annotations
+
+import json
+import unittest
+
+import state_profile
+
+
+def _compact(value: object) -> int:
+    return len(json.dumps(value, separators=(",", ":"), ensure_ascii=False))
+
+
+class TestStateProfiler(unittest.TestCase):
+    def test_sizes_match_compact_json(self) -> None:
+        state = {
+            "variables": {"a": 1, "b": "café \"quoted\"", "c.d": [1, 2.5, None, True]},
+            "logs": [{"level": "INFO", "message": "hi"}] * 3,
+            "empty": [],
+            "none": {},
+        }
+        profiler = state_profile.StateProfiler(depth=3)
+        self.assertEqual(profiler.add(state, "wf-1"), _compact(state))
+        paths = {p.path: p for p in profiler.paths()}
+        self.assertEqual(paths["variables"].bytes, _compact(state["variables"]))
+        self.assertEqual(paths['variables["c.d"]'].bytes, _compact([1, 2.5, None, True]))
+        self.assertEqual(paths["logs[*]"].values, 3)
+        self.assertEqual(paths["logs[*].message"].bytes, 3 * len('"hi"'))
+        self.assertNotIn("logs[*].message[*]", paths)
+        self.assertEqual(profiler.paths()[0].path, "logs")
+
+    def test_duplicates_count_only_across_executions(self) -> None:
+        profiler = state_profile.StateProfiler()
+        profiler.add({"prompt": "same", "logs": ["x", "x"]}, "wf-1")
+        profiler.add({"prompt": "same", "logs": ["x"]}, "wf-1")
+        profiler.add({"prompt": "other", "logs": []}, "wf-2")
+        paths = {p.path: p for p in profiler.paths()}
+        self.assertEqual(paths["prompt"].duplicate_values, 1)
+        self.assertEqual(paths["prompt"].duplicate_bytes, len('"same"'))
+        self.assertEqual(paths["prompt"].executions, 3)
+        # The repeat inside the first execution is not a cross-execution duplicate.
+        self.assertEqual(paths["logs[*]"].duplicate_values, 1)
+
+    def test_compression_ratio_reflects_repetition(self) -> None:
+        profiler = state_profile.StateProfiler()
+        for i in range(50):
+            profiler.add({"repeated": "lorem ipsum " * 20, "random": f"{i * 7919:x}"}, "wf-1")
+        paths = {p.path: p for p in profiler.paths()}
+        self.assertGreater(paths["repeated"].compression_ratio, 10)
+        self.assertLess(paths["random"].compression_ratio, paths["repeated"].compression_ratio)
+
+    def test_paths_and_distinct_values_are_bounded(self) -> None:
+        profiler = state_profile.StateProfiler(max_paths=2, max_distinct=2)
+        state = {"a": 1, "b": {"x": 1}, "c": "z"}
+        for i in range(3):
+            profiler.add({**state, "a": i}, "wf-1")
+        paths = {p.path: p for p in profiler.paths()}
+        self.assertEqual(set(paths), {"a", "b", state_profile.OTHER_PATH})
+        # b.x and c arrive after the limit; each is charged whole to (other).
+        self.assertEqual(paths[state_profile.OTHER_PATH].bytes, 3 * (len("1") + len('"z"')))
+        self.assertEqual(paths["b"].bytes, 3 * len('{"x":1}'))
+        self.assertTrue(paths["a"].saturated)
+        self.assertFalse(paths["b"].saturated)
+
+    def test_workflow_attribution(self) -> None:
+        profiler = state_profile.StateProfiler()
+        profiler.add({"logs": ["a" * 100]}, "wf-1", raw_bytes=500)
+        profiler.add({"variables": {"k": 1}}, "wf-2")
+        wf1, wf2 = profiler.workflows()
+        self.assertEqual((wf1.workflow_id, wf1.executions, wf1.raw_bytes), ("wf-1", 1, 500))
+        self.assertEqual(wf2.raw_bytes, wf2.bytes)
+        rows = profiler.workflow_paths()
+        self.assertEqual(rows[0][:2], ("wf-1", "logs"))
+        self.assertIn(("wf-2", "variables.k", 1), rows)
+
+    def test_rejects_depth_below_one(self) -> None:
+        with self.assertRaises(ValueError):
+            state_profile.StateProfiler(depth=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Unit tests for state_stream path selection over executions.state JSON text."""
+from __future__ import annotations
+
+import json
+import unittest
+
+import state_stream
+
+STATE = {
+    "execution_id": "exec-1",
+    "status": "failed",
+    "variables": {"payload": {"items": [1, "]}", {"deep": [[]]}]}, "a.b": 2},
+    "result": None,
+    "logs": [
+        {"timestamp": "2024-01-01T00:00:01", "level": "INFO", "node_id": "n1", "message": "start {"},
+        {"timestamp": "2024-01-01T00:00:02", "level": "ERROR", "node_id": "n2", "message": 'bad "x"'},
+        {"timestamp": "2024-01-01T00:00:03", "level": "INFO", "node_id": "n2", "message": "done"},
+    ],
+    "node_states": {
+        "n1": {"node_id": "n1", "status": "completed", "output": {"text": "]"}},
+        "n2": {"node_id": "n2", "status": "failed", "error": "boom"},
+    },
+}
+
+
+def select(selector: str, indent: int | None = None) -> list[tuple[str, object]]:
+    text = json.dumps(STATE, indent=indent)
+    return list(state_stream.iter_path_values(text, state_stream.parse_path(selector)))
+
+
+class TestParsePath(unittest.TestCase):
+    def test_parses_keys_indexes_and_filters(self) -> None:
+        steps = state_stream.parse_path('logs[?level!=INFO].message')
+        self.assertEqual([s.kind for s in steps], ["key", "filter", "key"])
+        self.assertTrue(steps[1].negate)
+        self.assertEqual(steps[1].value, "INFO")
+        steps = state_stream.parse_path('variables["a.b"]')
+        self.assertEqual(steps[1].key, "a.b")
+
+    def test_rejects_malformed_selectors(self) -> None:
+        for bad in ("", "logs[", "logs[*]message", "a..b"):
+            with self.assertRaises(state_stream.PathSyntaxError, msg=bad):
+                state_stream.parse_path(bad)
+
+
+class TestIterPathValues(unittest.TestCase):
+    def test_wildcard_node_status(self) -> None:
+        for indent in (None, 2):
+            self.assertEqual(
+                select("node_states.*.status", indent),
+                [("node_states.n1.status", "completed"), ("node_states.n2.status", "failed")],
+            )
+
+    def test_log_level_filter(self) -> None:
+        self.assertEqual(select("logs[?level=ERROR].message"), [("logs[1].message", 'bad "x"')])
+        self.assertEqual(len(select("logs[?level!=ERROR]")), 2)
+
+    def test_index_quoted_key_and_subtree(self) -> None:
+        self.assertEqual(select("logs[2].node_id"), [("logs[2].node_id", "n2")])
+        self.assertEqual(select('variables["a.b"]'), [('variables["a.b"]', 2)])
+        self.assertEqual(
+            select("variables.payload"), [("variables.payload", STATE["variables"]["payload"])]
+        )
+
+    def test_missing_and_type_mismatched_paths_yield_nothing(self) -> None:
+        self.assertEqual(select("node_states.n9.status"), [])
+        self.assertEqual(select("status[*]"), [])
+        self.assertEqual(select("logs.level"), [])
+
+    def test_skip_value_handles_brackets_inside_strings(self) -> None:
+        text = json.dumps({"a": ["]", {"b": "}{"}, [[1], {"c": '"'}]], "z": 1})
+        self.assertEqual(state_stream.skip_value(text, 0), len(text))
+        self.assertEqual(state_stream.skip_value(text, text.index("[")), text.index(', "z"'))
+
+    def test_truncated_state_raises_value_error(self) -> None:
+        for text in ('{"variables": "abc', '{"logs": [{"message": "go', '{"a": 1, "b'):
+            for selector in ("variables", "logs[*].level", "z", "*"):
+                with self.assertRaises(ValueError, msg=(text, selector)):
+                    list(state_stream.iter_path_values(text, state_stream.parse_path(selector)))
+        with self.assertRaises(ValueError):
+            state_stream.skip_value('"abc', 0)
+        with self.assertRaises(ValueError):
+            state_stream.skip_value('[1, "abc', 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
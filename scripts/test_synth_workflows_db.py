@@ -0,0 +1,117 @@
+"""Unit tests for synth_workflows_db (deterministic synthetic workflows.db generator)."""
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import json
+import random
+import sqlite3
+import statistics
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest import mock
+
+import synth_workflows_db as synth
+from inspect_executions_db import parse_timestamp
+
+
+def _rows(db: Path, table: str = "executions") -> list[tuple]:
+    with contextlib.closing(sqlite3.connect(db)) as conn:
+        return conn.execute(f"SELECT * FROM {table} ORDER BY rowid").fetchall()
+
+
+class TestGenerate(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.config = synth.SynthConfig(executions=400, users=30, workflows=12, seed=3)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_same_seed_same_rows_regardless_of_workers(self) -> None:
+        with mock.patch.object(synth, "CHUNK_ROWS", 150):
+            one = synth.generate(self.dir / "one.db", self.config)
+            two = synth.generate(self.dir / "two.db", self.config, workers=2)
+        self.assertEqual(one.executions, 400)
+        self.assertEqual(dataclasses.replace(two, seconds=one.seconds), one)
+        self.assertEqual(_rows(self.dir / "one.db"), _rows(self.dir / "two.db"))
+        self.assertEqual(_rows(self.dir / "one.db", "users"), _rows(self.dir / "two.db", "users"))
+        other = synth.SynthConfig(executions=400, users=30, workflows=12, seed=4)
+        synth.generate(self.dir / "other.db", other)
+        self.assertNotEqual(_rows(self.dir / "one.db"), _rows(self.dir / "other.db"))
+
+    def test_blocks_are_independent_of_generation_order(self) -> None:
+        population, _, _ = synth._population(random.Random(3), self.config)
+        with mock.patch.object(synth, "CHUNK_ROWS", 100):
+            forward = [synth.execution_block(population, b) for b in range(4)]
+            backward = [synth.execution_block(population, b) for b in reversed(range(4))]
+        self.assertEqual(forward, backward[::-1])
+
+    def test_states_look_like_the_backend_wrote_them(self) -> None:
+        db = self.dir / "synthetic.db"
+        synth.generate(db, self.config)
+        with contextlib.closing(sqlite3.connect(db)) as conn:
+            definitions = {
+                wid: {n["id"] for n in json.loads(d)["nodes"]}
+                for wid, d in conn.execute("SELECT id, definition FROM workflows")
+            }
+            users = {r[0] for r in conn.execute("SELECT id FROM users")}
+            rows = conn.execute(
+                "SELECT id, workflow_id, user_id, status, state, started_at, completed_at "
+                "FROM executions ORDER BY rowid"
+            ).fetchall()
+        statuses = Counter(r[3] for r in rows)
+        self.assertTrue({"completed", "failed"} <= set(statuses))
+        self.assertTrue(set(statuses) <= {"completed", "failed", "running", "pending"})
+        starts = [parse_timestamp(r[5]) for r in rows]
+        self.assertEqual(starts, sorted(starts))
+        for execution_id, workflow_id, user_id, status, text, started, completed in rows:
+            state = json.loads(text)
+            self.assertEqual((state["execution_id"], state["status"]), (execution_id, status))
+            self.assertIn(user_id, users)
+            self.assertLessEqual(set(state["node_states"]), definitions[workflow_id])
+            for entry in state["logs"]:
+                self.assertEqual(set(entry), {"timestamp", "level", "node_id", "message"})
+                parse_timestamp(entry["timestamp"])
+            if status in ("completed", "failed"):
+                self.assertGreaterEqual(parse_timestamp(completed), parse_timestamp(started))
+                self.assertEqual(state["logs"][-1]["message"], f"Workflow execution {status}")
+            else:
+                self.assertIsNone(completed)
+            if status == "failed":
+                self.assertTrue(state["error"])
+                messages = [e["message"] for e in state["logs"]]
+                self.assertIn(f"Node failed: {state['error']}", messages)
+            if status == "pending":
+                self.assertEqual((state["logs"], state["node_states"]), ([], {}))
+
+    def test_activity_is_skewed_across_users(self) -> None:
+        db = self.dir / "synthetic.db"
+        synth.generate(db, synth.SynthConfig(executions=2000, users=100, workflows=20))
+        per_user = Counter(r[2] for r in _rows(db))
+        counts = sorted(per_user.values(), reverse=True)
+        self.assertGreater(counts[0], 5 * statistics.median(counts))
+
+    def test_epoch_ms_timestamps_and_existing_file(self) -> None:
+        db = self.dir / "ms.db"
+        config = synth.SynthConfig(executions=50, users=5, workflows=3, timestamps="epoch-ms")
+        synth.generate(db, config)
+        started = _rows(db)[0][5]
+        self.assertIsInstance(started, int)
+        self.assertGreaterEqual(started, synth._epoch_ms(config.start))
+        with self.assertRaises(FileExistsError):
+            synth.generate(db, config)
+
+    def test_java_local_datetime(self) -> None:
+        base = synth._epoch_ms(synth.datetime(2024, 5, 1, 12, 30))
+        self.assertEqual(synth.java_local_datetime(base), "2024-05-01T12:30")
+        self.assertEqual(synth.java_local_datetime(base + 5000), "2024-05-01T12:30:05")
+        self.assertEqual(synth.java_local_datetime(base + 5120), "2024-05-01T12:30:05.120")
+        self.assertEqual(synth._column_time(base + 7, "text"), "2024-05-01 12:30:00.007")
+
+
+if __name__ == "__main__":
+    unittest.main()